@@ -1,3 +1,8 @@
 from .multi_frame_data import MultiFrameData
 from .writer import DLISWriter
+from .file_plan import FilePlan, FilePlanner
+from .frame_plan import FramePlan, ChannelPlan
+from .stream import DLISStream
+from .logical_file_writer import ParallelLogicalFileWriter
+from .frame_data_cache import FrameDataCache, CacheStatistics, CachedFrameData
 from .file import DLISFile
@@ -0,0 +1,161 @@
+import logging
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Generator, Iterable, Optional, Union
+
+import numpy as np
+
+from dliswriter.logical_record.iflr_types import FrameDataEncoder
+from dliswriter.utils.internal.validator_enum import ValidatorEnum
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorType(ValidatorEnum):
+    """Types of executors which can be used for encoding the frame data in parallel."""
+
+    THREAD = "thread"  #: pool of threads; numpy releases the GIL for the conversions and copies done in encoding
+    PROCESS = "process"  #: pool of processes; the chunks and the encoded bytes are transferred between processes
+
+
+def _encode_chunk(encoder: FrameDataEncoder, chunk: Union[np.ndarray, dict[str, np.ndarray]],
+                  first_frame_number: int) -> tuple[np.ndarray, np.ndarray]:
+    """Encode a chunk of frame data. Defined at module level, so that it can be used in a process pool."""
+
+    return encoder.encode_chunk(chunk, first_frame_number=first_frame_number)
+
+
+def _encode_chunk_in_process(encoder: FrameDataEncoder, chunk: Union[np.ndarray, dict[str, np.ndarray]],
+                             first_frame_number: int) -> tuple[tuple[np.ndarray, np.ndarray], dict[str, int]]:
+    """Encode a chunk of frame data in a worker process.
+
+    The encoder is a copy of the one in the main process; the numbers of absent values substituted in the chunk
+    are therefore returned along with the encoded chunk, to be added to the counts of the original encoder.
+    """
+
+    encoder.reset_substitution_counts()
+    return encoder.encode_chunk(chunk, first_frame_number=first_frame_number), encoder.substitution_counts
+
+
+class EncodingPool:
+    """Encode chunks of frame data in parallel, in a pool of threads or processes.
+
+    The chunks are submitted to the pool as they are loaded and the encoded chunks are yielded in the original order,
+    so that the produced bytes are identical to those obtained by encoding the chunks one by one.
+    The number of chunks submitted to the pool, but not yet yielded (and therefore the memory taken by the loaded
+    and encoded chunks) is limited by 'max_chunks_in_flight'.
+    """
+
+    def __init__(self, n_workers: int, max_chunks_in_flight: Optional[int] = None,
+                 executor_type: str = ExecutorType.THREAD):
+        """Initialise EncodingPool.
+
+        Args:
+            n_workers               :   Number of threads or processes encoding the chunks.
+            max_chunks_in_flight    :   Max number of chunks submitted to the pool and not yet yielded.
+                                        If not provided, twice the number of workers is used.
+            executor_type           :   'thread' or 'process'; type of the pool (see ExecutorType).
+        """
+
+        self._check_positive_int(n_workers, "Number of encoding workers")
+        if max_chunks_in_flight is None:
+            max_chunks_in_flight = 2 * n_workers
+        self._check_positive_int(max_chunks_in_flight, "Max number of chunks in flight")
+
+        self._n_workers = n_workers
+        self._max_chunks_in_flight = max_chunks_in_flight
+        self._executor_type = ExecutorType.make_converter("executor types")(executor_type)
+
+        self._executor: Optional[Executor] = None  #: created when the first chunk is submitted
+
+    @staticmethod
+    def _check_positive_int(value: Any, label: str) -> None:
+        """Check that the value is a positive integer; raise TypeError or ValueError otherwise."""
+
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise TypeError(f"{label} must be an integer; got {type(value)}: {value}")
+
+        if value < 1:
+            raise ValueError(f"{label} must be positive; got {value}")
+
+    @property
+    def n_workers(self) -> int:
+        """Number of threads or processes encoding the chunks."""
+
+        return self._n_workers
+
+    @property
+    def max_chunks_in_flight(self) -> int:
+        """Max number of chunks submitted to the pool and not yet yielded."""
+
+        return self._max_chunks_in_flight
+
+    def _get_executor(self) -> Executor:
+        """Return the executor, creating it if needed."""
+
+        if self._executor is None:
+            logger.debug(f"Starting a {self._executor_type} pool with {self._n_workers} workers for encoding "
+                         f"frame data; max {self._max_chunks_in_flight} chunks in flight")
+            if self._executor_type == ExecutorType.PROCESS:
+                self._executor = ProcessPoolExecutor(max_workers=self._n_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self._n_workers, thread_name_prefix="DLISEncoder")
+
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Shut down the workers of the pool (if they have been started)."""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "EncodingPool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+
+    def encode_chunks(self, encoder: FrameDataEncoder,
+                      chunks: Iterable[tuple[Union[np.ndarray, dict[str, np.ndarray]], int]]
+                      ) -> Generator[tuple[np.ndarray, np.ndarray], None, None]:
+        """Encode the chunks in the pool; yield the encoded chunks in the original order.
+
+        Args:
+            encoder :   Encoder of the frame data.
+            chunks  :   Iterable of (chunk, first frame number) tuples; the chunks are structured arrays
+                        or dictionaries of columns (see FrameDataEncoder.encode_chunk).
+
+        Yields:
+            Consecutive (buffer, offsets) tuples, as returned by FrameDataEncoder.encode.
+        """
+
+        executor = self._get_executor()
+        futures: deque[Future] = deque()
+        in_process = self._executor_type == ExecutorType.PROCESS
+        encode = _encode_chunk_in_process if in_process else _encode_chunk
+
+        def collect(future: Future) -> tuple[np.ndarray, np.ndarray]:
+            """Take the encoded chunk from the future; add the substitution counts made in a worker process."""
+
+            encoded: tuple[np.ndarray, np.ndarray]
+            if not in_process:
+                encoded = future.result()
+            else:
+                encoded, counts = future.result()
+                encoder.add_substitution_counts(counts)
+            return encoded
+
+        try:
+            for chunk, first_frame_number in chunks:
+                futures.append(executor.submit(encode, encoder, chunk, first_frame_number))
+                if len(futures) >= self._max_chunks_in_flight:
+                    # wait for the oldest chunk before loading the next one
+                    yield collect(futures.popleft())
+
+            while futures:
+                yield collect(futures.popleft())
+        finally:
+            for future in futures:
+                future.cancel()  # e.g. if an error occurred or the generator was closed
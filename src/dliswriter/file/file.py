@@ -10,12 +10,14 @@ from datetime import timedelta, datetime
 import logging
 
 from dliswriter.utils.source_data_wrappers import DictDataWrapper, SourceDataWrapper
+from dliswriter.utils.cast_checker import CastPolicy
 from dliswriter.utils.internal.types import (
     numpy_dtype_type,
     number_type,
     dtime_or_number_type,
     list_of_values_type,
     file_name_type,
+    sink_type,
     data_form_type,
     ListOrTuple,
     NestedList,
@@ -28,7 +30,12 @@ from dliswriter.logical_record.misc import StorageUnitLabel
 from dliswriter.logical_record import eflr_types
 from dliswriter.logical_record.iflr_types.no_format_frame_data import NoFormatFrameData
 from dliswriter.file.multi_frame_data import MultiFrameData
-from dliswriter.file.writer import DLISWriter
+from dliswriter.file.writer import DLISWriter, BufferedOutput, OutputMode
+from dliswriter.file.stream import DLISStream
+from dliswriter.file.logical_file_writer import ParallelLogicalFileWriter
+from dliswriter.file.frame_data_cache import FrameDataCache
+from dliswriter.file.sinks import ChunkCollector
+from dliswriter.file.file_plan import FilePlan, FilePlanner
 from dliswriter.file.eflr_sets_dict import EFLRSetsDict
 from dliswriter.configuration import global_config
 
@@ -114,18 +121,11 @@ class DLISFile:
         """Define a generator yielding logical records to be put in the file."""
 
         for idx_lf, logical_file in enumerate(self.logical_files):
-            yield logical_file.file_header_item.parent
-
-            yield from logical_file._eflr_sets[eflr_types.OriginSet].values()
-
-            for set_type, set_dict in logical_file._eflr_sets.items():
-                if set_type not in (eflr_types.FileHeaderSet, eflr_types.OriginSet):
-                    yield from set_dict.values()
-
-            yield from logical_file._no_format_frame_data
-
-            for multi_frame_data in multi_frame_data_objects[idx_lf]:
-                yield from multi_frame_data
+            for lr in logical_file.generator(multi_frame_data_objects[idx_lf]):
+                if isinstance(lr, MultiFrameData):
+                    yield from lr
+                else:
+                    yield lr
 
     def generate_logical_records(
         self,
@@ -135,11 +135,66 @@ class DLISFile:
     ) -> SizedGenerator:
         """Iterate over all logical records defined in the file.
 
-        Yields: EFLR and IFLR objects defined for the file.
+        Yields: EFLR and IFLR objects defined for the file. The size of the generator is the number of yielded objects.
 
         Note: Storage Unit Label should be added to the file separately before adding other records.
         """
 
+        multi_frame_data_objects = self._make_multi_frame_data_objects(chunk_size, data=data, **kwargs)
+
+        n = sum(logical_file._count_logical_records(multi_frame_data_objects[idx_lf])
+                for idx_lf, logical_file in enumerate(self.logical_files))
+
+        return SizedGenerator(self.generator(multi_frame_data_objects), size=n)
+
+    def _generate_frame_wise_logical_records(self, multi_frame_data_objects: list[list[MultiFrameData]]
+                                             ) -> SizedGenerator:
+        """Iterate over all logical records defined in the file, yielding the data of each frame at once.
+
+        Args:
+            multi_frame_data_objects    :   MultiFrameData objects of all frames (see _make_multi_frame_data_objects).
+
+        Yields: EFLR and NoFormatFrameData objects defined for the file, as well as MultiFrameData objects
+        (one per frame), whose FrameData are encoded chunk-wise by DLISWriter. As in generate_logical_records,
+        the size of the generator is the total number of logical records, including the FrameData of each frame.
+        """
+
+        generators = self._generate_logical_records_per_logical_file(multi_frame_data_objects)
+
+        return SizedGenerator((lr for g in generators for lr in g), size=sum(len(g) for g in generators))
+
+    def _generate_logical_records_per_logical_file(self, multi_frame_data_objects: list[list[MultiFrameData]]
+                                                   ) -> list[SizedGenerator]:
+        """Iterate over the logical records of each logical file separately.
+
+        Args:
+            multi_frame_data_objects    :   MultiFrameData objects of all frames (see _make_multi_frame_data_objects).
+
+        Returns:
+            List of SizedGenerator objects (one per logical file), yielding the same logical records
+            as LogicalFile.generator. The size of each generator is the number of logical records of the logical file,
+            including the FrameData of each frame.
+        """
+
+        return [SizedGenerator(logical_file.generator(multi_frame_data_objects[idx_lf]),
+                               size=logical_file._count_logical_records(multi_frame_data_objects[idx_lf]))
+                for idx_lf, logical_file in enumerate(self.logical_files)]
+
+    def _make_multi_frame_data_objects(
+        self,
+        chunk_size: Optional[int],
+        data: Optional[data_form_type] = None,
+        **kwargs: Any,
+    ) -> list[list[MultiFrameData]]:
+        """Create MultiFrameData objects for all frames of all logical files, setting up the frames from the data.
+
+        If the creation fails, the channel ranges reserved for the frames created so far are removed
+        (see _clear_channel_ranges).
+
+        Returns:
+            List (one per logical file) of lists of MultiFrameData objects (one per frame of the logical file).
+        """
+
         for idx_lf, f in enumerate(self.logical_files):
             if f.defining_origin is None:
                 raise RuntimeError(
@@ -147,54 +202,198 @@ class DLISFile:
                 )
 
         multi_frame_data_objects: list[list[MultiFrameData]] = []
-        frame_items: list[Generator[eflr_types.FrameItem, None, None]] = []
 
-        for idx_lf, logical_file in enumerate(self.logical_files):
+        try:
+            for logical_file in self.logical_files:
+                lf_multi_frame_data: list[MultiFrameData] = []
+                multi_frame_data_objects.append(lf_multi_frame_data)
 
-            lf_frame_items: Generator[eflr_types.FrameItem, None, None] = \
-                logical_file._eflr_sets.get_all_items_for_set_type(eflr_types.FrameSet)
+                frame_items: Generator[eflr_types.FrameItem, None, None] = \
+                    logical_file._eflr_sets.get_all_items_for_set_type(eflr_types.FrameSet)
+                for fr in frame_items:
+                    lf_multi_frame_data.append(
+                        logical_file._make_multi_frame_data(fr, chunk_size=chunk_size, data=data, **kwargs)
+                    )
+        except BaseException:
+            self._clear_channel_ranges(multi_frame_data_objects)
+            raise
 
-            frame_items.append(lf_frame_items)
+        return multi_frame_data_objects
 
-            multi_frame_data_objects.append(
-                [
-                    logical_file._make_multi_frame_data(
-                        fr, chunk_size=chunk_size, data=data, **kwargs
-                    )
-                    for fr in frame_items[idx_lf]
-                ]
-            )
+    @staticmethod
+    def _clear_channel_ranges(multi_frame_data_objects: list[list[MultiFrameData]]) -> None:
+        """Remove the channel ranges reserved or filled in for the frames (see MultiFrameData.clear_channel_ranges)."""
 
-        n = 0
-        for eflr_set_type in self._eflr_sets:
-            n += len(list(self._eflr_sets.get_all_items_for_set_type(eflr_set_type)))
+        for lf_multi_frame_data in multi_frame_data_objects:
+            for mfd in lf_multi_frame_data:
+                mfd.clear_channel_ranges()
 
-        for idx_lf, logical_file in enumerate(self.logical_files):
-            for mfd in multi_frame_data_objects[idx_lf]:
-                n += len(mfd)
-            n += len(logical_file._no_format_frame_data)
+    def plan(
+        self,
+        input_chunk_size: Optional[int] = None,
+        output_chunk_size: Optional[number_type] = None,
+        data: Optional[data_form_type] = None,
+        from_idx: int = 0,
+        to_idx: Optional[int] = None,
+        pack_visible_records: bool = False,
+        write_behind: bool = False,
+        output_mode: str = "buffered",
+        n_encoding_workers: Optional[int] = None,
+        max_chunks_in_flight: Optional[int] = None,
+        pipeline: bool = False,
+        pipeline_queue_bytes: Optional[int] = None,
+        compute_channel_ranges: bool = False,
+        cast_policy: str = CastPolicy.RAISE,
+    ) -> FilePlan:
+        """Compute the layout of the DLIS file (as it would be created by 'write'), without writing it.
+
+        The exact file size, the numbers of visible records and logical record segments (in total, per logical file,
+        and per frame), and an estimate of the peak memory usage are computed. Frame Data are not encoded;
+        their sizes are computed from the channels' data types and the number of rows in the data.
+        The arguments have the same meaning as in 'write'.
 
-        return SizedGenerator(self.generator(multi_frame_data_objects), size=n)
+        Note:
+            Like 'write', this method sets up the frames and channels (e.g. index range, representation codes)
+            based on the data. With compute_channel_ranges, the Channel set is planned with the placeholder
+            minimum and maximum values (of the same size as the computed ones); these are removed afterwards.
+
+        Returns:
+            A FilePlan object describing the file.
+        """
+
+        for lf in self.logical_files:
+            lf.check_objects()
+
+        multi_frame_data_objects = self._make_multi_frame_data_objects(
+            input_chunk_size, data=data, from_idx=from_idx, to_idx=to_idx,
+            compute_channel_ranges=compute_channel_ranges, cast_policy=cast_policy
+        )
+
+        mode = OutputMode.make_converter("output modes")(output_mode)
+        buffered = mode == OutputMode.BUFFERED
+        queue_bytes = (pipeline_queue_bytes or DLISWriter.default_pipeline_queue_bytes) if pipeline else None
+        write_behind = (write_behind or pipeline) and mode != OutputMode.MMAP
+        # in 'mmap' mode, no output buffer is used
+        output_chunk_size = 0 if mode == OutputMode.MMAP else int(
+            output_chunk_size or DLISWriter.default_output_chunk_size)
+        planner = FilePlanner(
+            self.storage_unit_label.max_record_length,
+            pack_visible_records=pack_visible_records,
+            output_chunk_size=output_chunk_size,
+            output_block_size=min(BufferedOutput.default_block_size, output_chunk_size) if buffered else 0,
+            write_behind_queue_size=2 if write_behind else 0,
+            n_chunks_in_flight=(max_chunks_in_flight or 2 * n_encoding_workers) if n_encoding_workers else 1,
+            prefetch_bytes=queue_bytes or 0,
+            write_behind_queue_bytes=queue_bytes,
+        )
+
+        try:
+            return planner.plan_file(
+                (lf.generator(multi_frame_data_objects[idx_lf]) for idx_lf, lf in enumerate(self.logical_files)),
+                sul_size=self.storage_unit_label.represent_as_bytes().size,
+            )
+        finally:
+            self._clear_channel_ranges(multi_frame_data_objects)
 
     def write(
         self,
-        dlis_file_name: file_name_type,
+        dlis_file_name: sink_type,
         input_chunk_size: Optional[int] = None,
-        output_chunk_size: Optional[number_type] = 2**32,
+        output_chunk_size: Optional[number_type] = None,
         data: Optional[data_form_type] = None,
         from_idx: int = 0,
         to_idx: Optional[int] = None,
+        pack_visible_records: bool = False,
+        write_behind: bool = False,
+        fsync_policy: Union[str, int] = "never",
+        output_mode: str = "buffered",
+        n_encoding_workers: Optional[int] = None,
+        max_chunks_in_flight: Optional[int] = None,
+        executor_type: str = "thread",
+        pipeline: bool = False,
+        pipeline_queue_bytes: Optional[int] = None,
+        n_logical_file_workers: Optional[int] = None,
+        temp_dir: Optional[file_name_type] = None,
+        frame_data_cache: Optional[FrameDataCache] = None,
+        compute_channel_ranges: bool = False,
+        absent_value: Optional[float] = None,
+        cast_policy: str = CastPolicy.RAISE,
     ) -> None:
         """Create a DLIS file form the current specifications.
 
         Args:
-            dlis_file_name          :   Name of the file to be created.
+            dlis_file_name          :   Name of the file to be created. Alternatively, a binary file object
+                                        (e.g. an open file, io.BytesIO, a member of an archive) or a file
+                                        descriptor (e.g. of a pipe) the bytes should be written to;
+                                        these are not closed after writing. 'mmap' output mode requires a file name.
             input_chunk_size        :   Size of the chunks (in rows) in which input data will be loaded to be processed.
             output_chunk_size       :   Size of the buffers accumulating file bytes before file write action is called.
+                                        If not provided, DLISWriter.default_output_chunk_size (64 MiB) is used.
+                                        Memory for the buffer is allocated gradually, as the bytes are collected.
             data                    :   Data for channels - if not specified when channels were added.
             from_idx                :   Index from which the data should be loaded (or number of initial rows
                                         to ignore).
             to_idx                  :   Index up to which data should be loaded.
+            pack_visible_records    :   If True, put as many logical record segments in each visible record
+                                        as the max record length allows, instead of wrapping each segment
+                                        in its own visible record. Reduces the file size, especially for
+                                        frames with short rows.
+            write_behind            :   If True, write the bytes to the file in a background thread, so that
+                                        creating the next bytes overlaps with writing the previous ones.
+            fsync_policy            :   When the written bytes should be forced to the storage device (using fsync):
+                                        'never' (leave it to the operating system), 'end' (after writing all bytes),
+                                        or a positive integer N - every N bytes (and at the end).
+            output_mode             :   'buffered' (default) - copy the created bytes to an output buffer and write
+                                        it when full; 'vectored' - pass references to the created bytes to the file
+                                        in scatter/gather (os.writev) calls, without copying them; 'mmap' -
+                                        preallocate the file (with the size computed as in 'plan') and create
+                                        the bytes directly in a memory-mapped region of it. 'mmap' mode cannot be
+                                        combined with write_behind; output_chunk_size is ignored in this mode.
+            n_encoding_workers      :   Number of threads or processes encoding the chunks of frame data
+                                        in parallel. If not provided, the chunks are encoded one by one.
+                                        The produced bytes are the same in both cases.
+            max_chunks_in_flight    :   Max number of chunks being encoded in parallel or waiting to be written;
+                                        limits the memory used. Defaults to twice the number of encoding workers.
+            executor_type           :   'thread' (default) or 'process'; type of the pool encoding the chunks.
+            pipeline                :   If True, overlap reading, encoding, and writing: the input data chunks are
+                                        loaded in advance by a reader thread and the output bytes are written
+                                        by a write-behind thread (except in 'mmap' output mode), while the
+                                        main thread (or the encoding pool) encodes the chunks.
+            pipeline_queue_bytes    :   Max number of bytes in each of the queues between the pipeline stages.
+                                        Defaults to DLISWriter.default_pipeline_queue_bytes (128 MiB).
+                                        Ignored if pipeline is False.
+            n_logical_file_workers  :   If provided, the logical files are written in parallel by this number
+                                        of threads, each into a temporary segment file; the segment files are then
+                                        appended to the DLIS file (see ParallelLogicalFileWriter). The produced bytes
+                                        are the same. Requires additional disk space, up to the size of the file.
+                                        write_behind and pipeline then apply to writing the segment files.
+            temp_dir                :   Directory for the temporary segment files. Defaults to the directory
+                                        of the created file. Ignored if n_logical_file_workers is not provided.
+            frame_data_cache        :   A FrameDataCache; if provided, the visible records of the Frame Data of each
+                                        frame are copied from the cache if the same frame and data have been written
+                                        before (with the same visible record settings and input_chunk_size), instead
+                                        of being loaded and encoded. Otherwise, they are stored in the cache.
+            compute_channel_ranges  :   If True, set the minimum and maximum values of each channel (per element,
+                                        ignoring NaNs), unless they have been set explicitly, to the ones found
+                                        in the data. The values are computed while the data are encoded (without
+                                        reading the data again) and filled in the Channel set, written beforehand
+                                        with placeholders, at the end. Requires a file name or a seekable file object
+                                        and cannot be combined with write_behind or pipeline (unless in 'mmap' mode).
+                                        The computed values are available in the channels' 'computed_minimum_value'
+                                        and 'computed_maximum_value' after writing; 'minimum_value' and
+                                        'maximum_value' are left unset.
+            absent_value            :   Value written in place of missing samples (NaN values or values masked
+                                        in numpy masked arrays) of the channels which do not define their own
+                                        'absent_value', e.g. -999.25. Applied to integer channels only if it is
+                                        an integer. The values are replaced in the encoded rows, without copying
+                                        the source data; the number of replaced samples of each channel is available
+                                        in its 'absent_value_count' after writing.
+            cast_policy             :   How to handle integer values which do not fit in the data type the data
+                                        are written in, e.g. int64 data (which have no representation code) written
+                                        as int32: 'raise' (default) - raise a ValueError; 'clip' - write the smallest
+                                        or largest value of the data type instead; 'promote' - write the channel
+                                        as float64 (the values are then read once before writing to find out).
+                                        See CastPolicy.
         """
 
         def timed_func() -> None:
@@ -206,27 +405,197 @@ class DLISFile:
             for lf in self.logical_files:
                 lf.check_objects()
 
-            logical_records = self.generate_logical_records(
-                chunk_size=input_chunk_size,
-                data=data,
-                from_idx=from_idx,
-                to_idx=to_idx,
-            )
-
-            writer = DLISWriter(
-                dlis_file_name,
+            queue_bytes = (pipeline_queue_bytes or DLISWriter.default_pipeline_queue_bytes) if pipeline else None
+            writer_kwargs: dict[str, Any] = dict(
                 visible_record_length=self.storage_unit_label.max_record_length,
+                pack_visible_records=pack_visible_records,
+                write_behind=write_behind or (pipeline and output_mode != OutputMode.MMAP),
+                output_mode=output_mode,
+                n_encoding_workers=n_encoding_workers,
+                max_chunks_in_flight=max_chunks_in_flight,
+                executor_type=executor_type,
+                prefetch_bytes=queue_bytes,
+                write_behind_queue_bytes=queue_bytes,
+                frame_data_cache=frame_data_cache,
             )
-            writer.write_storage_unit_label(self.storage_unit_label)
-            writer.write_logical_records(
-                logical_records, output_chunk_size=output_chunk_size
+            if compute_channel_ranges and writer_kwargs['write_behind']:
+                raise ValueError("Channel ranges cannot be computed in write-behind mode; the Channel set "
+                                 "cannot be filled in after its bytes have been passed to the write-behind thread")
+
+            writer: Union[DLISWriter, ParallelLogicalFileWriter]
+            if n_logical_file_workers is not None:
+                # the logical files are written to temporary files, whose Channel sets can always be filled in
+                writer = ParallelLogicalFileWriter(
+                    dlis_file_name,
+                    n_workers=n_logical_file_workers,
+                    fsync_policy=fsync_policy,
+                    temp_dir=temp_dir,
+                    **writer_kwargs,
+                )
+            else:
+                writer = DLISWriter(dlis_file_name, fsync_policy=fsync_policy, **writer_kwargs)
+                if compute_channel_ranges:
+                    # checked before the placeholders of the channel ranges are set
+                    writer.check_channel_ranges_supported()
+
+            multi_frame_data_objects = self._make_multi_frame_data_objects(
+                input_chunk_size, data=data, from_idx=from_idx, to_idx=to_idx,
+                compute_channel_ranges=compute_channel_ranges, absent_value=absent_value, cast_policy=cast_policy,
             )
 
+            try:
+                if isinstance(writer, ParallelLogicalFileWriter):
+                    writer.write(
+                        self.storage_unit_label,
+                        self._generate_logical_records_per_logical_file(multi_frame_data_objects),
+                        output_chunk_size=output_chunk_size,
+                    )
+                else:
+                    writer.write_storage_unit_label(self.storage_unit_label)
+                    writer.write_logical_records(
+                        self._generate_frame_wise_logical_records(multi_frame_data_objects),
+                        output_chunk_size=output_chunk_size
+                    )
+            finally:
+                # the computed ranges are available in the channels' computed_minimum_value/computed_maximum_value
+                self._clear_channel_ranges(multi_frame_data_objects)
+
         exec_time = timeit(timed_func, number=1)
         logger.info(
             f"DLIS file created in {timedelta(seconds=exec_time)} ({exec_time} seconds)"
         )
 
+    def iter_bytes(
+        self,
+        chunk_size: int = 2 ** 20,
+        input_chunk_size: Optional[int] = None,
+        data: Optional[data_form_type] = None,
+        from_idx: int = 0,
+        to_idx: Optional[int] = None,
+        pack_visible_records: bool = False,
+        n_encoding_workers: Optional[int] = None,
+        max_chunks_in_flight: Optional[int] = None,
+        executor_type: str = "thread",
+        absent_value: Optional[float] = None,
+        cast_policy: str = CastPolicy.RAISE,
+    ) -> Generator[memoryview, None, None]:
+        """Create the bytes of the DLIS file lazily, in chunks of a given size, without writing them to a file.
+
+        The bytes are identical to those written by 'write'. They are created as the chunks are requested, so that
+        the file can be e.g. sent over the network or put into an archive using a constant amount of memory.
+
+        Args:
+            chunk_size              :   Number of bytes in each yielded chunk (except possibly the last one).
+            input_chunk_size        :   Size of the chunks (in rows) in which input data will be loaded to be processed.
+            data                    :   Data for channels - if not specified when channels were added.
+            from_idx                :   Index from which the data should be loaded (or number of initial rows
+                                        to ignore).
+            to_idx                  :   Index up to which data should be loaded.
+            pack_visible_records    :   If True, put as many logical record segments in each visible record
+                                        as the max record length allows.
+            n_encoding_workers      :   Number of threads or processes encoding the chunks of frame data
+                                        in parallel. If not provided, the chunks are encoded one by one.
+            max_chunks_in_flight    :   Max number of chunks being encoded in parallel or waiting to be written.
+            executor_type           :   'thread' (default) or 'process'; type of the pool encoding the chunks.
+            absent_value            :   Default value written in place of missing samples of the channels
+                                        (see 'write').
+            cast_policy             :   How to handle integer values which do not fit in the data type the data
+                                        are written in (see 'write').
+
+        Yields:
+            Consecutive chunks of the file bytes, as read-only memoryviews (use bytes(chunk) if bytes are needed).
+        """
+
+        collector = ChunkCollector(chunk_size)
+
+        for lf in self.logical_files:
+            lf.check_objects()
+
+        logical_records = self._generate_frame_wise_logical_records(self._make_multi_frame_data_objects(
+            input_chunk_size,
+            data=data,
+            from_idx=from_idx,
+            to_idx=to_idx,
+            absent_value=absent_value,
+            cast_policy=cast_policy,
+        ))
+
+        visible_record_length = self.storage_unit_label.max_record_length
+        writer = DLISWriter(
+            collector,
+            visible_record_length=visible_record_length,
+            pack_visible_records=pack_visible_records,
+            output_mode=OutputMode.VECTORED,  # the bytes are only copied once - into the chunks of the collector
+            n_encoding_workers=n_encoding_workers,
+            max_chunks_in_flight=max_chunks_in_flight,
+            executor_type=executor_type,
+        )
+        writer.write_storage_unit_label(self.storage_unit_label)
+
+        # references to the created bytes are passed to the collector as soon as they amount to a chunk
+        for _ in writer.iter_write_logical_records(logical_records, output_chunk_size=max(chunk_size,
+                                                                                          visible_record_length)):
+            yield from collector.pop_chunks()
+
+        yield from collector.pop_chunks(include_incomplete=True)
+
+    def open_stream(
+        self,
+        dlis_file_name: sink_type,
+        pack_visible_records: bool = False,
+        fsync_policy: Union[str, int] = "never",
+        update_channel_ranges: bool = True,
+    ) -> DLISStream:
+        """Start writing a DLIS file incrementally, appending the frame data as they become available.
+
+        The Storage Unit Label and all EFLRs are written immediately; rows of frame data can then be added using
+        'append_rows' of the returned stream. Values depending on the entire data (frame index_min, index_max, and
+        spacing; channel minimum_value and maximum_value), unless set explicitly, are filled in when the stream
+        is closed. Can be used as a context manager:
+
+            with dlis_file.open_stream("file.DLIS") as stream:
+                stream.append_rows(frame, {"depth": depth_chunk, "rpm": rpm_chunk})
+
+        Note:
+            The data types of all channels must be defined up front (through 'cast_dtype'), as well as the dimensions
+            of channels with multiple values per row. Only a single logical file can be streamed.
+            If the spacing of the index channel turns out not to be uniform, the spacing is left unset and the direction
+            of the index is recorded instead (if it fits in the space reserved for the spacing).
+
+        Args:
+            dlis_file_name          :   Name of the file to be created, or a binary file object or file descriptor
+                                        supporting random access (seek), e.g. io.BytesIO.
+            pack_visible_records    :   If True, put as many logical record segments in each visible record
+                                        as the max record length allows.
+            fsync_policy            :   When the written bytes should be forced to the storage device (using fsync):
+                                        'never', 'end' (when the stream is closed), or a positive integer N -
+                                        every N bytes (and at the end).
+            update_channel_ranges   :   If True, fill in the minimum and maximum values of each channel (per element,
+                                        ignoring NaNs) when the stream is closed, unless they have been set explicitly.
+
+        Returns:
+            An open DLISStream object.
+        """
+
+        if len(self.logical_files) != 1:
+            raise ValueError(f"Streaming is supported for files with a single logical file; "
+                             f"got {len(self.logical_files)}")
+
+        logical_file = self.logical_files[0]
+        logical_file.check_objects()
+
+        stream = DLISStream(
+            dlis_file_name,
+            storage_unit_label=self.storage_unit_label,
+            logical_records=logical_file.generator([]),
+            frames=logical_file.frames,
+            pack_visible_records=pack_visible_records,
+            fsync_policy=fsync_policy,
+            update_channel_ranges=update_channel_ranges,
+        )
+        stream.open()
+        return stream
+
 
 class LogicalFile:
     """Define the structure and contents of a DLIS Logical File. The Logical File constitutes the DLIS logical
@@ -687,6 +1056,7 @@ class LogicalFile:
         data: Optional[np.ndarray] = None,
         dataset_name: Optional[str] = None,
         cast_dtype: Optional[numpy_dtype_type] = None,
+        absent_value: Optional[float] = None,
         long_name: OptAttrSetupType[Union[eflr_types.LongNameItem, str]] = None,
         dimension: OptAttrSetupType[Union[int, list[int]]] = None,
         element_limit: OptAttrSetupType[Union[int, list[int]]] = None,
@@ -710,6 +1080,9 @@ class LogicalFile:
             dataset_name        :   Name of the data array associated with the Channel in the data source provided
                                     at init of DLISFile.
             cast_dtype          :   Numpy data type the Channel data should be cast to - e.g. np.float64, np.int32.
+            absent_value        :   Value written in place of missing samples of the Channel - NaN values or values
+                                    masked in a numpy masked array (e.g. -999.25). If not provided, the default
+                                    passed to DLISFile.write (if any) is used.
             long_name           :   Description of the Channel.
             properties          :   '[A] List of Property Indicators (...). The Property Indicators summarize the
                                     characteristics of the Channel and the processing that has occurred to produce it.'
@@ -757,6 +1130,7 @@ class LogicalFile:
             long_name=long_name,
             dataset_name=dataset_name,
             cast_dtype=cast_dtype,
+            absent_value=absent_value,
             properties=properties,
             dimension=dimension,
             element_limit=element_limit,
@@ -2121,6 +2495,39 @@ class LogicalFile:
 
         return z
 
+    def generator(self, multi_frame_data_objects: list[MultiFrameData]) -> Generator:
+        """Define a generator yielding logical records of this logical file.
+
+        Args:
+            multi_frame_data_objects    :   MultiFrameData objects of the frames of this logical file.
+        """
+
+        yield self.file_header_item.parent
+
+        yield from self._eflr_sets[eflr_types.OriginSet].values()
+
+        for set_type, set_dict in self._eflr_sets.items():
+            if set_type not in (eflr_types.FileHeaderSet, eflr_types.OriginSet):
+                yield from set_dict.values()
+
+        yield from self._no_format_frame_data
+
+        # frame data are yielded per frame; their FrameData records are encoded chunk-wise by the writer
+        yield from multi_frame_data_objects
+
+    def _count_logical_records(self, multi_frame_data_objects: list[MultiFrameData]) -> int:
+        """Number of logical records of this logical file, including the FrameData of each frame.
+
+        Args:
+            multi_frame_data_objects    :   MultiFrameData objects of the frames of this logical file.
+        """
+
+        n = 1  # file header
+        n += sum(len(d) for t, d in self._eflr_sets.items() if t is not eflr_types.FileHeaderSet)
+        n += len(self._no_format_frame_data)
+        n += sum(len(mfd) for mfd in multi_frame_data_objects)
+        return n
+
     def check_objects(self) -> None:
         """Check objects defined for the DLISFile. Called before writing the file."""
 
@@ -2199,6 +2606,7 @@ class LogicalFile:
         data: Optional[data_form_type] = None,
         from_idx: int = 0,
         to_idx: Optional[int] = None,
+        cast_policy: str = CastPolicy.RAISE,
         **kwargs: Any,
     ) -> MultiFrameData:
         """Create a MultiFrameData object, containing the frame and associated data, generating FrameData instances."""
@@ -2216,6 +2624,7 @@ class LogicalFile:
                 known_dtypes=fr.known_channel_dtypes_mapping,
                 from_idx=from_idx,
                 to_idx=to_idx,
+                cast_policy=cast_policy,
             )
         else:
             if self._data_dict:
@@ -2230,10 +2639,11 @@ class LogicalFile:
                 known_dtypes=fr.known_channel_dtypes_mapping,
                 from_idx=from_idx,
                 to_idx=to_idx,
+                cast_policy=cast_policy,
             )
 
         self._check_data(data_object)
-        fr.setup_from_data(data_object)
+        fr.setup_from_data(data_object, chunk_rows=kwargs.get('chunk_size'))
         return MultiFrameData(fr, data_object, **kwargs)
 
     @staticmethod
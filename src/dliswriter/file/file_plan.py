@@ -0,0 +1,200 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from dliswriter.logical_record.core.logical_record import LogicalRecordBytes
+from dliswriter.file.multi_frame_data import MultiFrameData
+from dliswriter.file.frame_data_assembler import FrameDataAssembler
+from dliswriter.file.frame_plan import FramePlan
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FrameDataPlan:
+    """Summary of the output produced for the Frame Data of a single frame."""
+
+    frame_name: str             #: name of the frame
+    n_rows: int                 #: number of FrameData records (rows)
+    row_size: int               #: number of bytes of channel data in each row
+    n_chunks: int               #: number of chunks the input data are loaded and encoded in
+    n_segments: int = 0         #: number of logical record segments
+    n_visible_records: int = 0  #: number of visible records
+    size: int = 0               #: number of bytes (including all headers and padding)
+    peak_chunk_memory: int = 0  #: estimated memory (in bytes) needed to load, encode, and assemble the largest chunk
+    frame_plan: Optional[FramePlan] = field(default=None, repr=False)  #: compiled encoding plan of the frame
+
+
+@dataclass
+class LogicalFilePlan:
+    """Summary of the output produced for a single logical file."""
+
+    n_logical_records: int = 0  #: number of logical records (EFLRs and IFLRs)
+    n_segments: int = 0         #: number of logical record segments
+    n_visible_records: int = 0  #: number of visible records (started in this logical file)
+    size: int = 0               #: number of bytes of the visible records
+    frames: list[FrameDataPlan] = field(default_factory=list)  #: summaries of the Frame Data of consecutive frames
+
+
+@dataclass
+class FilePlan:
+    """Summary of the layout of a DLIS file, computed before writing it (see DLISFile.plan)."""
+
+    size: int                   #: exact size of the file, in bytes (including the Storage Unit Label)
+    n_visible_records: int      #: total number of visible records
+    n_segments: int             #: total number of logical record segments
+    peak_memory: int            #: estimated peak memory (in bytes) used for creating the file
+    logical_files: list[LogicalFilePlan] = field(default_factory=list)  #: summaries of consecutive logical files
+
+
+class FilePlanner:
+    """Compute the layout of a DLIS file without encoding the frame data.
+
+    The same segmentation rules (LogicalRecordBytes.compute_segment_sizes) and visible record layouts
+    (FrameDataAssembler) are used as when the file is written, so the computed sizes are exact.
+    The EFLRs and No-Format Frame Data are converted to bytes (which is cheap) to determine their sizes.
+    Frame Data sizes are computed from the frame's data types and number of rows only.
+    """
+
+    def __init__(self, visible_record_length: int, pack_visible_records: bool = False,
+                 output_chunk_size: Optional[int] = None, output_block_size: int = 0, write_behind_queue_size: int = 0,
+                 n_chunks_in_flight: int = 1, prefetch_bytes: int = 0, write_behind_queue_bytes: Optional[int] = None):
+        """Initialise FilePlanner.
+
+        Args:
+            visible_record_length   :   Maximum allowed length of visible records.
+            pack_visible_records    :   Whether multiple logical record segments are put in each visible record.
+            output_chunk_size       :   Size of the output buffer (None: the whole file, 0: no output buffer);
+                                        used for estimating peak memory.
+            output_block_size       :   Size of a memory block of the output buffer; used for estimating peak memory.
+            write_behind_queue_size :   Number of output chunks which can wait to be written in a background thread;
+                                        used for estimating peak memory.
+            n_chunks_in_flight      :   Max number of chunks of frame data loaded and encoded at the same time
+                                        (see EncodingPool); used for estimating peak memory.
+            prefetch_bytes          :   Max number of bytes of input data chunks loaded in advance by a reader thread;
+                                        used for estimating peak memory.
+            write_behind_queue_bytes:   Max number of bytes waiting for the write-behind thread (if limited);
+                                        used for estimating peak memory.
+        """
+
+        self._visible_record_length = visible_record_length
+        self._pack = pack_visible_records
+        self._output_chunk_size = output_chunk_size
+        self._output_block_size = output_block_size
+        self._write_behind_queue_size = write_behind_queue_size
+        self._n_chunks_in_flight = n_chunks_in_flight
+        self._prefetch_bytes = prefetch_bytes
+        self._write_behind_queue_bytes = write_behind_queue_bytes
+
+        # fmt version bytes do not influence the sizes
+        self._assembler = FrameDataAssembler(visible_record_length, b'\xff\x01', pack=pack_visible_records)
+
+    def plan_frame_data(self, mfd: MultiFrameData) -> FrameDataPlan:
+        """Compute the layout of the Frame Data of a single frame."""
+
+        frame_plan = FramePlan(mfd, self._assembler)
+        encoder = frame_plan.encoder
+        chunk_bounds = frame_plan.chunk_bounds
+
+        plan = FrameDataPlan(frame_name=mfd.frame.name, n_rows=len(mfd), row_size=encoder.row_data_size,
+                             n_chunks=len(chunk_bounds), frame_plan=frame_plan)
+
+        for first_frame_number, n_rows in chunk_bounds:
+            runs = encoder.compute_body_size_runs(first_frame_number, n_rows)
+            n_bytes, n_visible_records, n_segments = self._assembler.compute_sizes(runs)
+            plan.size += n_bytes
+            plan.n_visible_records += n_visible_records
+            plan.n_segments += n_segments
+
+            # chunk loaded in the big-endian target dtype + encoded bodies + assembled visible records
+            chunk_memory = (n_rows * encoder.row_data_size
+                            + sum(body_size * n for body_size, n in runs) + n_bytes)
+            plan.peak_chunk_memory = max(plan.peak_chunk_memory, chunk_memory)
+
+        return plan
+
+    def plan_file(self, logical_files_records: Iterable[Iterable], sul_size: int = 80) -> FilePlan:
+        """Compute the layout of the file.
+
+        Args:
+            logical_files_records   :   For each logical file, an iterable of its logical records
+                                        (see LogicalFile.generator).
+            sul_size                :   Size of the Storage Unit Label.
+
+        Returns:
+            A FilePlan describing the file.
+        """
+
+        lf_plans: list[LogicalFilePlan] = []
+        pending: list[tuple[LogicalFilePlan, int]] = []  # (logical file plan, segment size) of segments to be wrapped
+
+        for records in logical_files_records:
+            lf_plan = LogicalFilePlan()
+            lf_plans.append(lf_plan)
+
+            for lr in records:
+                if isinstance(lr, MultiFrameData):
+                    self._wrap_segments(pending)  # visible records are not shared between FrameData and other records
+                    frame_plan = self.plan_frame_data(lr)
+                    lf_plan.frames.append(frame_plan)
+                    lf_plan.n_logical_records += frame_plan.n_rows
+                    lf_plan.n_segments += frame_plan.n_segments
+                    lf_plan.n_visible_records += frame_plan.n_visible_records
+                    lf_plan.size += frame_plan.size
+                else:
+                    lr_size = lr.represent_as_bytes().size
+                    segment_sizes = LogicalRecordBytes.compute_segment_sizes(lr_size, self._visible_record_length - 8)
+                    pending.extend((lf_plan, size + 4 + size % 2) for size in segment_sizes)
+                    lf_plan.n_logical_records += 1
+                    lf_plan.n_segments += len(segment_sizes)
+                    if not self._pack:
+                        self._wrap_segments(pending)
+
+        self._wrap_segments(pending)
+
+        size = sul_size + sum(p.size for p in lf_plans)
+        plan = FilePlan(
+            size=size,
+            n_visible_records=sum(p.n_visible_records for p in lf_plans),
+            n_segments=sum(p.n_segments for p in lf_plans),
+            peak_memory=self._estimate_peak_memory(lf_plans, size),
+            logical_files=lf_plans
+        )
+
+        logger.debug(f"Planned file: {plan.size} bytes, {plan.n_visible_records} visible records, "
+                     f"{plan.n_segments} logical record segments")
+        return plan
+
+    def _wrap_segments(self, pending: list[tuple[LogicalFilePlan, int]]) -> None:
+        """Account for the visible records the pending segments are wrapped in; clear the pending segments.
+
+        If segments are packed, a visible record is attributed to the logical file of its first segment.
+        """
+
+        max_body_size = self._visible_record_length - 4
+        body_size = 0
+
+        for lf_plan, segment_size in pending:
+            lf_plan.size += segment_size
+            if not self._pack or not body_size or body_size + segment_size > max_body_size:
+                lf_plan.n_visible_records += 1
+                lf_plan.size += 4  # header of the new visible record
+                body_size = 0
+            body_size += segment_size
+
+        pending.clear()
+
+    def _estimate_peak_memory(self, lf_plans: list[LogicalFilePlan], file_size: int) -> int:
+        """Estimate the peak memory used for creating the file: the largest chunks in flight plus the output buffers."""
+
+        peak_chunk_memory = max((fp.peak_chunk_memory for lf in lf_plans for fp in lf.frames), default=0)
+        peak_chunk_memory *= self._n_chunks_in_flight
+
+        output_size = file_size if self._output_chunk_size is None else min(self._output_chunk_size, file_size)
+        output_memory = output_size + self._output_block_size
+        queue_memory = self._write_behind_queue_size * output_size
+        if self._write_behind_queue_bytes is not None:
+            queue_memory = min(queue_memory, self._write_behind_queue_bytes + output_size)  # one write always fits
+
+        return peak_chunk_memory + output_memory + queue_memory + self._prefetch_bytes
@@ -0,0 +1,293 @@
+import logging
+import numpy as np
+from typing import Optional
+
+from dliswriter.logical_record.core.logical_record import LogicalRecordBytes
+from dliswriter.logical_record.core.logical_record.segment_attributes import SegmentAttributes
+from dliswriter.logical_record.iflr_types import FrameData
+from dliswriter.utils.internal.internal_enums import RepresentationCode as RepC
+
+
+logger = logging.getLogger(__name__)
+
+
+class FixedRowLayout:
+    """Precomputed layout of visible records and logical record segments for FrameData rows of a constant size.
+
+    Once the size of a FrameData body is known, the way it is split into logical record segments and wrapped
+    in visible records is fully predictable. All segment and visible record headers are therefore the same for each
+    row (or group of rows, if multiple rows are packed into a visible record) and can be prepared once.
+    The layout is expressed as a structured numpy dtype, so that the headers and row bytes of an entire chunk
+    can be put in place with a few vectorised assignments.
+    """
+
+    def __init__(self, body_size: int, visible_record_length: int, fmt_version: bytes, pack: bool = False):
+        """Initialise FixedRowLayout.
+
+        Args:
+            body_size               :   Number of bytes in the body of each FrameData row.
+            visible_record_length   :   Maximum allowed length of visible records.
+            fmt_version             :   Format version bytes, included in each visible record header.
+            pack                    :   If True, put as many single-segment rows in each visible record as fit.
+        """
+
+        self._body_size = body_size
+        self._visible_record_length = visible_record_length
+        self._fmt_version = fmt_version
+
+        # max allowed size of an LR segment body; 4 bytes reserved for VR header and another 4 for LR segment header
+        self._segment_sizes = LogicalRecordBytes.compute_segment_sizes(body_size, visible_record_length - 8)
+        if min(self._segment_sizes) < 12:
+            raise ValueError(f"Logical Record segment body cannot be shorter than 12 bytes (got {body_size})")
+
+        if pack and len(self._segment_sizes) == 1:
+            self._rows_per_vr = (visible_record_length - 4) // (body_size + 4 + body_size % 2)
+        else:
+            # rows split into multiple segments cannot share visible records: all but the last segment fill entire VRs
+            self._rows_per_vr = 1
+
+        self._row_dtype = self._make_row_dtype()
+        self._row_headers = self._make_row_headers()
+
+    @property
+    def body_size(self) -> int:
+        """Number of bytes in the body of each FrameData row."""
+
+        return self._body_size
+
+    @property
+    def segment_sizes(self) -> list[int]:
+        """Sizes of the bodies of logical record segments each row is split into."""
+
+        return self._segment_sizes
+
+    @property
+    def rows_per_visible_record(self) -> int:
+        """Number of rows put in a single visible record (1 unless single-segment rows are packed)."""
+
+        return self._rows_per_vr
+
+    @property
+    def row_dtype(self) -> np.dtype:
+        """Structured dtype describing the bytes of a single row: headers, body parts, and padding."""
+
+        return self._row_dtype
+
+    def _make_row_dtype(self) -> np.dtype:
+        """Create a structured dtype describing all bytes created for a single row.
+
+        If rows are not packed, each segment of a row is preceded by a visible record header (4 bytes)
+        and a logical record segment header (4 bytes). Otherwise, the (single) segment of the row is preceded
+        by the segment header only; visible record headers are added per group of rows (see 'vr_dtype').
+        """
+
+        vr_header_size = 4 if self._rows_per_vr == 1 else 0
+
+        fields: list[tuple] = []
+        for i, size in enumerate(self._segment_sizes):
+            fields.append((f'header{i}', np.uint8, (vr_header_size + 4,)))
+            fields.append((f'body{i}', np.uint8, (size,)))
+            if size % 2:
+                fields.append((f'padding{i}', np.uint8, (1,)))
+
+        return np.dtype(fields)
+
+    def _make_row_headers(self) -> list[np.ndarray]:
+        """Create header bytes for each segment of a row."""
+
+        headers = []
+        n_segments = len(self._segment_sizes)
+
+        for i, size in enumerate(self._segment_sizes):
+            segment_attributes = SegmentAttributes(is_eflr=False, is_first=(i == 0), is_last=(i == n_segments - 1))
+            segment_attributes.has_padding = bool(size % 2)
+            segment_size = size + 4 + size % 2
+
+            header = RepC.UNORM.convert(segment_size) + segment_attributes.to_struct() + FrameData.lr_type_struct
+            if self._rows_per_vr == 1:
+                header = self._make_vr_header(segment_size) + header
+            headers.append(np.frombuffer(header, dtype=np.uint8))
+
+        return headers
+
+    def _make_vr_header(self, body_size: int) -> bytes:
+        """Create the header of a visible record with the given body size."""
+
+        return RepC.UNORM.convert(body_size + 4) + self._fmt_version
+
+    def vr_dtype(self, n_rows: int) -> np.dtype:
+        """Structured dtype of a visible record containing the given number of packed rows."""
+
+        return np.dtype([('header', np.uint8, (4,)), ('rows', self._row_dtype, (n_rows,))])
+
+    def compute_size(self, n_rows: int) -> int:
+        """Compute the number of bytes produced for the given number of rows."""
+
+        if self._rows_per_vr == 1:
+            return n_rows * self._row_dtype.itemsize
+
+        n_full, remainder = divmod(n_rows, self._rows_per_vr)
+        size = n_full * self.vr_dtype(self._rows_per_vr).itemsize
+        if remainder:
+            size += self.vr_dtype(remainder).itemsize
+        return size
+
+    def compute_n_visible_records(self, n_rows: int) -> int:
+        """Compute the number of visible records produced for the given number of rows."""
+
+        if self._rows_per_vr == 1:
+            return n_rows * len(self._segment_sizes)
+
+        return -(-n_rows // self._rows_per_vr)
+
+    def fill(self, out: np.ndarray, bodies: np.ndarray) -> None:
+        """Put the bytes of the given rows, together with all headers, in the output array.
+
+        Args:
+            out     :   1D uint8 array of size equal to 'compute_size(n_rows)', to be filled.
+            bodies  :   2D uint8 array of shape (n_rows, body_size) with the FrameData bodies of consecutive rows.
+        """
+
+        n_rows = bodies.shape[0]
+
+        if self._rows_per_vr == 1:
+            self._fill_rows(out.view(self._row_dtype), bodies)
+            return
+
+        n_full, remainder = divmod(n_rows, self._rows_per_vr)
+        full_size = n_full * self.vr_dtype(self._rows_per_vr).itemsize
+
+        for vr_out, vr_bodies, rows_in_vr in (
+                (out[:full_size], bodies[:n_full * self._rows_per_vr], self._rows_per_vr),
+                (out[full_size:], bodies[n_full * self._rows_per_vr:], remainder)):
+            if not rows_in_vr or not vr_out.size:
+                continue
+            vrs = vr_out.view(self.vr_dtype(rows_in_vr))
+            vrs['header'] = np.frombuffer(self._make_vr_header(rows_in_vr * self._row_dtype.itemsize), dtype=np.uint8)
+            self._fill_rows(vrs['rows'], vr_bodies.reshape(vrs.shape[0], rows_in_vr, self._body_size))
+
+    def _fill_rows(self, rows: np.ndarray, bodies: np.ndarray) -> None:
+        """Fill the row-structured output array with the header bytes, the segments of bodies, and the padding."""
+
+        start = 0
+        for i, size in enumerate(self._segment_sizes):
+            rows[f'header{i}'] = self._row_headers[i]
+            rows[f'body{i}'] = bodies[..., start:start + size]
+            if size % 2:
+                rows[f'padding{i}'] = LogicalRecordBytes.padding[0]
+            start += size
+
+
+class FrameDataAssembler:
+    """Assemble visible records of whole chunks of encoded FrameData rows, using precomputed fixed layouts.
+
+    Rows of a frame all have the same size, except for the frame number (UVARI), whose size changes at frame
+    numbers 128 and 16384. A chunk of encoded rows is therefore made up of (at most 3) runs of rows of a constant
+    size; each run is assembled using a FixedRowLayout for its row size.
+
+    Note:
+        If rows are packed, visible records are not shared between chunks, nor between the runs of a chunk.
+    """
+
+    def __init__(self, visible_record_length: int, fmt_version: bytes, pack: bool = False):
+        """Initialise FrameDataAssembler.
+
+        Args:
+            visible_record_length   :   Maximum allowed length of visible records.
+            fmt_version             :   Format version bytes, included in each visible record header.
+            pack                    :   If True, put as many single-segment rows in each visible record as fit.
+        """
+
+        self._visible_record_length = visible_record_length
+        self._fmt_version = fmt_version
+        self._pack = pack
+
+        self._layouts: dict[int, FixedRowLayout] = {}
+
+    def get_layout(self, body_size: int) -> FixedRowLayout:
+        """Return a (cached) layout for rows with the given body size."""
+
+        layout = self._layouts.get(body_size)
+        if layout is None:
+            layout = FixedRowLayout(body_size, self._visible_record_length, self._fmt_version, pack=self._pack)
+            logger.debug(f"Row layout for body size {body_size}: segments of {layout.segment_sizes} bytes, "
+                         f"{layout.rows_per_visible_record} row(s) per visible record")
+            self._layouts[body_size] = layout
+        return layout
+
+    @staticmethod
+    def split_runs(offsets: np.ndarray) -> list[tuple[int, int]]:
+        """Split the rows described by the offsets into runs of rows of the same size.
+
+        Returns:
+            List of (start, stop) row indices of consecutive runs.
+        """
+
+        row_sizes = np.diff(offsets)
+        boundaries = [0, *(np.flatnonzero(np.diff(row_sizes)) + 1).tolist(), row_sizes.size]
+        return [(start, stop) for start, stop in zip(boundaries[:-1], boundaries[1:]) if stop > start]
+
+    def compute_sizes(self, runs: list[tuple[int, int]]) -> tuple[int, int, int]:
+        """Compute the sizes of the output of a chunk of rows, without assembling it.
+
+        Args:
+            runs    :   (body size, number of rows) of consecutive runs of rows of the chunk;
+                        see FrameDataEncoder.compute_body_size_runs.
+
+        Returns:
+            Number of bytes, number of visible records, and number of logical record segments produced for the chunk.
+        """
+
+        n_bytes = n_visible_records = n_segments = 0
+        for body_size, n_rows in runs:
+            layout = self.get_layout(body_size)
+            n_bytes += layout.compute_size(n_rows)
+            n_visible_records += layout.compute_n_visible_records(n_rows)
+            n_segments += n_rows * len(layout.segment_sizes)
+        return n_bytes, n_visible_records, n_segments
+
+    def _make_runs(self, offsets: np.ndarray) -> list[tuple[int, int, FixedRowLayout]]:
+        """Split the rows described by the offsets into runs of the same size; return the runs with their layouts."""
+
+        return [(start, stop, self.get_layout(int(offsets[start + 1] - offsets[start])))
+                for start, stop in self.split_runs(offsets)]
+
+    def compute_chunk_size(self, offsets: np.ndarray) -> int:
+        """Compute the number of bytes of the visible records created for a chunk of encoded rows.
+
+        Args:
+            offsets :   Offsets of the rows' bodies in the buffer (see FrameDataEncoder.encode).
+        """
+
+        return sum(layout.compute_size(stop - start) for start, stop, layout in self._make_runs(offsets))
+
+    def assemble(self, buffer: np.ndarray, offsets: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Create visible records with the logical record segments of the encoded rows.
+
+        Args:
+            buffer  :   1D uint8 array with the body bytes of consecutive rows (see FrameDataEncoder.encode).
+            offsets :   Offsets of the rows' bodies in the buffer.
+            out     :   1D uint8 array of size equal to 'compute_chunk_size(offsets)', in which the visible records
+                        should be created (e.g. a memory-mapped region of the file). If not provided, a new array
+                        is allocated.
+
+        Returns:
+            1D uint8 array with the bytes of the created visible records.
+        """
+
+        runs = self._make_runs(offsets)
+        sizes = [layout.compute_size(stop - start) for start, stop, layout in runs]
+
+        if out is None:
+            out = np.empty(sum(sizes), dtype=np.uint8)
+        elif out.size != sum(sizes):
+            raise ValueError(f"Output array size ({out.size}) does not match the size of the assembled visible "
+                             f"records ({sum(sizes)})")
+
+        out_start = 0
+        for (start, stop, layout), size in zip(runs, sizes):
+            bodies = buffer[offsets[start]:offsets[stop]].reshape(stop - start, layout.body_size)
+            layout.fill(out[out_start:out_start + size], bodies)
+            out_start += size
+
+        return out
@@ -0,0 +1,367 @@
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Optional, Union, Any
+
+from dliswriter.utils.internal.types import file_name_type, bytes_type, number_type
+from dliswriter.file.multi_frame_data import MultiFrameData
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStatistics:
+    """Counts of the uses of a FrameDataCache."""
+
+    hits: int = 0           #: number of times the Frame Data of a frame were taken from the cache
+    misses: int = 0         #: number of times the Frame Data of a frame had to be encoded
+    bytes_reused: int = 0   #: number of bytes taken from the cache
+    bytes_stored: int = 0   #: number of bytes of new entries put in the cache
+    evictions: int = 0      #: number of entries removed because of their age or the cache size limit
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of look-ups which found the bytes in the cache (0 if there have been no look-ups)."""
+
+        n = self.hits + self.misses
+        return self.hits / n if n else 0.0
+
+
+@dataclass
+class CachedFrameData:
+    """Entry of a FrameDataCache found by FrameDataCache.get: the open file of the entry and the data stored with it.
+
+    The file is opened (and the counts are loaded) while the cache is locked, so that the bytes can be read even if
+    the entry is removed from the cache in the meantime, e.g. by another thread storing a new entry.
+    The file should be closed when the bytes have been read (or the object used as a context manager).
+    """
+
+    file: io.BufferedReader             #: file of the entry, open for reading
+    size: int                           #: number of bytes in the file
+    substitution_counts: dict[str, int]  #: numbers of missing samples replaced with absent values (per channel)
+
+    def close(self) -> None:
+        """Close the file of the entry."""
+
+        self.file.close()
+
+    def __enter__(self) -> "CachedFrameData":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class CacheEntryWriter:
+    """Collect the bytes of a new cache entry in a temporary file; put the file in place once it is complete."""
+
+    def __init__(self, cache: "FrameDataCache", key: str):
+        """Initialise CacheEntryWriter.
+
+        Args:
+            cache   :   The cache the entry belongs to.
+            key     :   Key of the entry (see FrameDataCache.make_key).
+        """
+
+        self._cache = cache
+        self._key = key
+        fd, path = tempfile.mkstemp(suffix='.tmp', dir=cache.cache_dir)
+        self._temp_path = Path(path)
+        self._file = open(fd, 'wb')
+        self._size = 0
+
+        #: numbers of missing samples of the channels replaced with absent values, stored with the entry
+        self.substitution_counts: dict[str, int] = {}
+
+    def write(self, bts: bytes_type) -> None:
+        """Append bytes to the entry."""
+
+        self._file.write(bts)
+        self._size += memoryview(bts).nbytes
+
+    def commit(self) -> None:
+        """Close the temporary file and put it in the cache as the entry of the given key."""
+
+        self._file.close()
+        self._cache.store(self._key, self._temp_path, self._size, substitution_counts=self.substitution_counts)
+
+    def discard(self) -> None:
+        """Close and remove the temporary file, e.g. if an error has occurred before all bytes were written."""
+
+        self._file.close()
+        self._temp_path.unlink(missing_ok=True)
+
+
+class FrameDataCache:
+    """On-disk cache of the visible records of Frame Data of frames, keyed by everything the bytes depend on.
+
+    When a DLIS file with the same frames and data is written repeatedly (e.g. with only some EFLRs changed),
+    the visible records of the Frame Data can be copied from the cache instead of loading and encoding the data again
+    (see DLISWriter). The key of an entry (see 'make_key') is a hash of: the frame reference (OBNAME),
+    the data types and dimensions of the channels (as encoded), the identity of the source data and the range of rows
+    (see SourceDataWrapper.compute_identity), the chunks the data are loaded in, the absent values and the cast policy,
+    and the visible record settings.
+
+    Each entry is a separate file in the cache directory. The numbers of missing samples replaced with absent values
+    while encoding the Frame Data are stored next to it (see 'load_substitution_counts'). Entries not used for longer
+    than 'max_age' seconds are removed, as are the least recently used entries if the total size of the entries
+    exceeds 'max_size' (see 'evict'). The cache can be shared between threads; statistics of its use are kept
+    in 'statistics'.
+    """
+
+    entry_suffix = '.frames'  #: extension of the files of the cache entries
+    counts_suffix = '.counts'  #: extension of the files with the absent value substitution counts of the entries
+    key_version = 2  #: included in the keys; to be increased if the way the Frame Data are encoded changes
+
+    def __init__(self, cache_dir: file_name_type, max_size: Optional[int] = None,
+                 max_age: Optional[number_type] = None):
+        """Initialise FrameDataCache.
+
+        Args:
+            cache_dir   :   Directory in which the cache entries are stored. Created if it does not exist.
+            max_size    :   Max total size (in bytes) of the cache entries. If not provided, the size is not limited.
+            max_age     :   Max time (in seconds) since an entry has been created or last used.
+                            If not provided, the entries do not expire.
+        """
+
+        if max_size is not None and (not isinstance(max_size, int) or isinstance(max_size, bool)):
+            raise TypeError(f"Max cache size must be an integer; got {type(max_size)}: {max_size}")
+        if max_size is not None and max_size < 0:
+            raise ValueError(f"Max cache size cannot be negative; got {max_size}")
+        if max_age is not None and (not isinstance(max_age, (int, float)) or isinstance(max_age, bool)):
+            raise TypeError(f"Max age of cache entries must be a number; got {type(max_age)}: {max_age}")
+        if max_age is not None and max_age < 0:
+            raise ValueError(f"Max age of cache entries cannot be negative; got {max_age}")
+
+        self._cache_dir = Path(cache_dir)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._max_size = max_size
+        self._max_age = max_age
+
+        self._statistics = CacheStatistics()
+        self._lock = Lock()
+
+    @property
+    def cache_dir(self) -> Path:
+        """Directory in which the cache entries are stored."""
+
+        return self._cache_dir
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        """Statistics of the use of the cache (a copy)."""
+
+        with self._lock:
+            return CacheStatistics(**vars(self._statistics))
+
+    @property
+    def size(self) -> int:
+        """Total size (in bytes) of the cache entries."""
+
+        return sum(stat.st_size for _, stat in self._list_entries())
+
+    def make_key(self, multi_frame_data: MultiFrameData, visible_record_length: int,
+                 pack_visible_records: bool) -> str:
+        """Compute the key of the entry for the visible records of the Frame Data of a frame.
+
+        Args:
+            multi_frame_data        :   Frame and source data the Frame Data are created from.
+            visible_record_length   :   Max length of the visible records.
+            pack_visible_records    :   Whether multiple logical record segments are put in each visible record.
+
+        Returns:
+            Hexadecimal digest identifying the bytes of the visible records.
+        """
+
+        encoder = multi_frame_data.make_encoder()
+
+        digest = hashlib.sha256(f"v{self.key_version}:{visible_record_length}:{pack_visible_records}:".encode())
+        digest.update(multi_frame_data.frame.obname)
+        digest.update(str(encoder.target_dtype.descr).encode())
+        if encoder.absent_values:
+            digest.update(str(sorted(encoder.absent_values.items())).encode())
+        digest.update(f"{multi_frame_data.data.cast_policy}:".encode())
+        digest.update(str(multi_frame_data.compute_chunk_bounds()).encode())
+        digest.update(multi_frame_data.data.identity)
+        return digest.hexdigest()
+
+    def _get_entry_path(self, key: str) -> Path:
+        """Path of the file of the entry with the given key."""
+
+        return self._cache_dir / f"{key}{self.entry_suffix}"
+
+    def _get_counts_path(self, entry_path: Path) -> Path:
+        """Path of the file with the absent value substitution counts of the entry of the given path."""
+
+        return entry_path.with_suffix(self.counts_suffix)
+
+    def _is_expired(self, mtime: float, now: float) -> bool:
+        """Check whether an entry last used at the given time should be removed because of its age."""
+
+        return self._max_age is not None and now - mtime > self._max_age
+
+    def get(self, key: str) -> Optional[CachedFrameData]:
+        """Look up the entry of the given key; if found (and not expired), mark it as used and open it.
+
+        The file of the entry is opened and its substitution counts are loaded under the lock of the cache,
+        so that the entry cannot be removed (see 'evict') in between. Updates the hit/miss statistics.
+
+        Returns:
+            CachedFrameData with the open file of the entry (to be closed by the caller), or None if not found.
+        """
+
+        path = self._get_entry_path(key)
+        with self._lock:
+            try:
+                file: Optional[io.BufferedReader] = open(path, 'rb')
+            except FileNotFoundError:
+                file = None
+
+            now = time.time()
+            if file is not None and self._is_expired(os.fstat(file.fileno()).st_mtime, now):
+                file.close()
+                self._remove_entry(path)
+                file = None
+
+            if file is None:
+                self._statistics.misses += 1
+                return None
+
+            try:
+                os.utime(path, (now, now))  # the modification time is the time of the last use
+                entry = CachedFrameData(file, os.fstat(file.fileno()).st_size, self.load_substitution_counts(path))
+            except BaseException:
+                file.close()
+                raise
+            self._statistics.hits += 1
+            self._statistics.bytes_reused += entry.size
+
+        logger.debug(f"Frame data found in the cache: {path}")
+        return entry
+
+    def open_entry(self, key: str) -> CacheEntryWriter:
+        """Start creating the entry of the given key; the bytes are put in the cache when the entry is committed."""
+
+        return CacheEntryWriter(self, key)
+
+    def store(self, key: str, temp_path: Path, size: int, substitution_counts: Optional[dict[str, int]] = None
+              ) -> None:
+        """Put a complete file in the cache as the entry of the given key; remove entries as required by the limits.
+
+        Args:
+            key                 :   Key of the entry.
+            temp_path           :   Path of the file with the bytes of the entry (in the cache directory);
+                                    the file is moved.
+            size                :   Number of bytes in the file.
+            substitution_counts :   Numbers of missing samples of the channels replaced with absent values
+                                    in the bytes of the entry (see 'load_substitution_counts').
+        """
+
+        path = self._get_entry_path(key)
+        if substitution_counts:
+            # put in place before the entry, so that an entry is never found without its counts
+            fd, counts_temp_path = tempfile.mkstemp(suffix='.tmp', dir=self._cache_dir)
+            with open(fd, 'w') as f:
+                json.dump(substitution_counts, f)
+            os.replace(counts_temp_path, self._get_counts_path(path))
+        else:
+            self._get_counts_path(path).unlink(missing_ok=True)
+        os.replace(temp_path, path)
+        logger.debug(f"Frame data ({size} bytes) stored in the cache: {path}")
+
+        with self._lock:
+            self._statistics.bytes_stored += size
+
+        self.evict(keep=path)
+
+    def load_substitution_counts(self, path: Path) -> dict[str, int]:
+        """Load the numbers of missing samples replaced with absent values in the Frame Data of a cache entry.
+
+        Args:
+            path    :   Path of the entry.
+
+        Returns:
+            Numbers of the replaced samples, keyed by channel names; channels without replaced samples are omitted.
+        """
+
+        try:
+            with open(self._get_counts_path(path)) as f:
+                counts: dict[str, int] = json.load(f)
+        except FileNotFoundError:
+            return {}
+        return counts
+
+    def _list_entries(self) -> list[tuple[Path, os.stat_result]]:
+        """Return (path, stat) tuples of all entries in the cache directory."""
+
+        entries = []
+        for path in self._cache_dir.glob(f"*{self.entry_suffix}"):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                pass  # removed in the meantime
+        return entries
+
+    def _remove_entry(self, path: Path) -> None:
+        """Remove the file of an entry and count the eviction."""
+
+        try:
+            path.unlink(missing_ok=True)
+        except PermissionError:  # on Windows, the file of an entry being read (see 'get') cannot be removed
+            logger.debug(f"Cache entry {path} is in use; not removed")
+            return
+        self._get_counts_path(path).unlink(missing_ok=True)
+        self._statistics.evictions += 1
+        logger.debug(f"Removed cache entry {path}")
+
+    def evict(self, keep: Optional[Union[Path, str]] = None) -> int:
+        """Remove the expired entries and then the least recently used ones until the size limit is respected.
+
+        Args:
+            keep    :   Path of an entry which should not be removed because of the size limit
+                        (e.g. a newly added entry which itself exceeds the limit).
+
+        Returns:
+            Number of removed entries.
+        """
+
+        now = time.time()
+        n_removed = 0
+
+        with self._lock:
+            entries = []
+            for path, stat in self._list_entries():
+                if self._is_expired(stat.st_mtime, now):
+                    self._remove_entry(path)
+                    n_removed += 1
+                else:
+                    entries.append((path, stat))
+
+            if self._max_size is not None:
+                total_size = sum(stat.st_size for _, stat in entries)
+                for path, stat in sorted(entries, key=lambda entry: entry[1].st_mtime):
+                    if total_size <= self._max_size:
+                        break
+                    if keep is not None and path == Path(keep):
+                        continue
+                    self._remove_entry(path)
+                    total_size -= stat.st_size
+                    n_removed += 1
+
+        return n_removed
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+
+        with self._lock:
+            for path, _ in self._list_entries():
+                path.unlink(missing_ok=True)
+                self._get_counts_path(path).unlink(missing_ok=True)
@@ -0,0 +1,163 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+from dliswriter.utils.internal.converters import ReprCodeConverter
+from dliswriter.logical_record.eflr_types.frame import FrameItem
+from dliswriter.logical_record.iflr_types import FrameDataEncoder
+from dliswriter.file.multi_frame_data import MultiFrameData
+from dliswriter.file.frame_data_assembler import FrameDataAssembler, FixedRowLayout
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChannelPlan:
+    """Description of how the values of a single channel are put in each row of the Frame Data."""
+
+    name: str                   #: name of the channel
+    source_dtype: np.dtype      #: data type of the values in the source data
+    target_dtype: np.dtype      #: big-endian data type the values are written as
+    representation_code: str    #: name of the DLIS representation code of the values
+    dimension: tuple[int, ...]  #: shape of the channel's values in a single row (an empty tuple for a single value)
+    n_bytes: int                #: number of bytes taken by the channel's values in a single row
+    absent_value: Optional[float] = None  #: value written in place of missing samples (if any)
+    is_range_checked: bool = False  #: True if the values are checked to fit in a narrower integer data type
+
+    @property
+    def is_promoted(self) -> bool:
+        """True if an element takes more bytes in the file than in the source data (e.g. float32 cast to float64)."""
+
+        return self.target_dtype.itemsize > self.source_dtype.itemsize
+
+
+class FramePlan:
+    """Description of how the Frame Data of a frame are encoded and wrapped in visible records, compiled once.
+
+    The plan is compiled before the data of the frame are written: the encoder (with the packed, big-endian target
+    dtype and the OBNAME prefix of the rows) is created and the visible record layouts of all row sizes occurring
+    in the data are computed (and cached in the assembler). The chunks are then encoded and assembled
+    by just executing the plan (see MultiFrameData.iterate_encoded_chunks).
+
+    The plan can be inspected (see 'describe'), e.g. to check the row sizes or find channels whose values
+    are cast to a larger data type before writing a large file (see DLISFile.plan).
+    """
+
+    def __init__(self, multi_frame_data: MultiFrameData, assembler: FrameDataAssembler):
+        """Compile FramePlan.
+
+        Args:
+            multi_frame_data    :   Frame and source data the Frame Data are created from.
+            assembler           :   Object creating the visible records of the Frame Data.
+        """
+
+        self._frame = multi_frame_data.frame
+        self._n_rows = len(multi_frame_data)
+        self._encoder = multi_frame_data.make_encoder()
+        self._chunk_bounds = multi_frame_data.compute_chunk_bounds()
+
+        source_dtypes = multi_frame_data.data.source_dtypes
+        cast_checkers = multi_frame_data.data.cast_checkers
+        self._channels = [self._make_channel_plan(name, source_dtypes[name], is_range_checked=name in cast_checkers)
+                          for name in self.target_dtype.names or ()]
+
+        # rows of the frame have (at most 3) sizes, depending on the number of bytes of the frame number
+        self._layouts = [assembler.get_layout(body_size)
+                         for body_size, _ in self._encoder.compute_body_size_runs(1, self._n_rows)]
+
+    def _make_channel_plan(self, name: str, source_dtype: np.dtype, is_range_checked: bool = False) -> ChannelPlan:
+        """Describe how the values of a channel are written."""
+
+        target_dtype = self.target_dtype[name]
+        return ChannelPlan(
+            name=name,
+            source_dtype=source_dtype,
+            target_dtype=target_dtype.base,
+            representation_code=ReprCodeConverter.determine_repr_code_from_numpy_dtype(target_dtype.base).name,
+            dimension=target_dtype.shape,
+            n_bytes=target_dtype.itemsize,
+            absent_value=self._encoder.absent_values.get(name),
+            is_range_checked=is_range_checked
+        )
+
+    @property
+    def frame(self) -> FrameItem:
+        """The frame the plan refers to."""
+
+        return self._frame
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows (FrameData records) of the frame."""
+
+        return self._n_rows
+
+    @property
+    def encoder(self) -> FrameDataEncoder:
+        """Encoder of the chunks of the frame's data."""
+
+        return self._encoder
+
+    @property
+    def obname(self) -> bytes:
+        """Reference to the frame (OBNAME) put at the beginning of each row."""
+
+        return self._frame.obname
+
+    @property
+    def target_dtype(self) -> np.dtype:
+        """Packed, big-endian structured dtype the data chunks are converted to."""
+
+        return self._encoder.target_dtype
+
+    @property
+    def row_data_size(self) -> int:
+        """Number of bytes of channel values in each row."""
+
+        return self._encoder.row_data_size
+
+    @property
+    def channels(self) -> list[ChannelPlan]:
+        """Descriptions of the channels of the frame, in the order of the values in the rows."""
+
+        return self._channels
+
+    @property
+    def promoted_channels(self) -> list[ChannelPlan]:
+        """Channels whose values are cast to a data type taking more bytes than in the source data."""
+
+        return [channel for channel in self._channels if channel.is_promoted]
+
+    @property
+    def layouts(self) -> list[FixedRowLayout]:
+        """Visible record layouts of the rows of the frame (one per row size, in the order of the frame numbers)."""
+
+        return self._layouts
+
+    @property
+    def chunk_bounds(self) -> list[tuple[int, int]]:
+        """(first frame number, number of rows) of the chunks the data are loaded and encoded in."""
+
+        return self._chunk_bounds
+
+    def describe(self) -> str:
+        """Summarise the plan in a human-readable form, e.g. for logging."""
+
+        lines = [f"{self._frame}: {self._n_rows} rows in {len(self._chunk_bounds)} chunk(s), "
+                 f"{self.row_data_size} bytes of channel data per row"]
+
+        for channel in self._channels:
+            promoted = f" (promoted from {channel.source_dtype})" if channel.is_promoted else ""
+            if channel.is_range_checked:
+                promoted = f" (cast from {channel.source_dtype}, range checked)"
+            absent = f", absent value {channel.absent_value}" if channel.absent_value is not None else ""
+            lines.append(f"  {channel.name}: {channel.target_dtype}{promoted}, {channel.representation_code}, "
+                         f"dimension {list(channel.dimension) or [1]}, {channel.n_bytes} bytes{absent}")
+
+        for layout in self._layouts:
+            lines.append(f"  rows of {layout.body_size} bytes: {len(layout.segment_sizes)} segment(s) per row, "
+                         f"{layout.rows_per_visible_record} row(s) per visible record")
+
+        return "\n".join(lines)
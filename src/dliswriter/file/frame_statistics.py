@@ -0,0 +1,90 @@
+import numpy as np
+from typing import Any, Iterable, Optional, Union
+
+from dliswriter.utils.index_analyzer import IndexAnalyzer
+
+
+class FrameStatistics:
+    """Running statistics of the data of a frame, updated chunk by chunk in constant memory.
+
+    The statistics include the range, direction, and spacing of the index channel (if the frame has one; computed
+    by an IndexAnalyzer, as when the frame is set up from the data), as well as the minimum and maximum of each element
+    of the chosen channels (ignoring NaN values).
+    """
+
+    def __init__(self, index_name: Optional[str] = None, channel_names: Iterable[str] = ()):
+        """Initialise FrameStatistics.
+
+        Args:
+            index_name      :   Name of the index channel in the data chunks. If not provided, no index statistics
+                                are computed.
+            channel_names   :   Names of the channels for which minimum and maximum values should be computed.
+        """
+
+        self._index_name = index_name
+        self._channel_names = tuple(channel_names)
+
+        self.n_rows = 0  #: number of rows processed so far
+
+        self._index_analyzer = IndexAnalyzer()  #: statistics of the index channel (if any)
+
+        self.channel_min: dict[str, np.ndarray] = {}  #: element-wise minima of the channels' values
+        self.channel_max: dict[str, np.ndarray] = {}  #: element-wise maxima of the channels' values
+
+    def update(self, chunk: Union[np.ndarray, dict[str, np.ndarray]]) -> None:
+        """Include a chunk of data rows (structured numpy array or dictionary of columns) in the statistics."""
+
+        n_rows = next(iter(chunk.values())).shape[0] if isinstance(chunk, dict) else chunk.shape[0]
+        if not n_rows:
+            return
+
+        if self._index_name is not None:
+            self._index_analyzer.update(np.ma.getdata(chunk[self._index_name]))
+
+        for name in self._channel_names:
+            values = self._fill_masked(chunk[name])
+            # fmin/fmax ignore NaN values, unless all compared values are NaN
+            chunk_min = np.atleast_1d(np.fmin.reduce(values, axis=0))
+            chunk_max = np.atleast_1d(np.fmax.reduce(values, axis=0))
+            if name in self.channel_min:
+                chunk_min = np.fmin(self.channel_min[name], chunk_min)
+                chunk_max = np.fmax(self.channel_max[name], chunk_max)
+            self.channel_min[name] = chunk_min
+            self.channel_max[name] = chunk_max
+
+        self.n_rows += n_rows
+
+    @staticmethod
+    def _fill_masked(values: np.ndarray) -> np.ndarray:
+        """Replace masked values of a masked array with NaN (as floats), so that they are ignored like NaN values."""
+
+        if not np.ma.is_masked(values):
+            return np.ma.getdata(values)
+        return np.ma.filled(values.astype(np.float64), np.nan)
+
+    @property
+    def index_min(self) -> Optional[Any]:
+        """Minimum value of the index; None if there is no index channel or no rows."""
+
+        return self._index_analyzer.index_min
+
+    @property
+    def index_max(self) -> Optional[Any]:
+        """Maximum value of the index; None if there is no index channel or no rows."""
+
+        return self._index_analyzer.index_max
+
+    @property
+    def direction(self) -> Optional[bool]:
+        """True if the index is increasing, False if decreasing, None if neither or unknown (see IndexAnalyzer)."""
+
+        return self._index_analyzer.direction
+
+    @property
+    def spacing(self) -> Union[np.generic, float, None]:
+        """Spacing of the index values; None if there are too few values or the spacing is not uniform.
+
+        The spacing is determined as when the frame is set up from the data (see IndexAnalyzer.spacing).
+        """
+
+        return self._index_analyzer.spacing
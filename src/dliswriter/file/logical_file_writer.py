@@ -0,0 +1,129 @@
+import os
+import logging
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Sequence, Union
+
+from dliswriter.utils.internal.types import file_name_type, number_type, sink_type
+from dliswriter.logical_record.misc import StorageUnitLabel
+from dliswriter.file.writer import ByteWriter, DLISWriter, FsyncPolicy
+from dliswriter.file.sinks import is_path
+
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentWriter(DLISWriter):
+    """Write the visible records of a single logical file to a separate file, without a Storage Unit Label.
+
+    Since visible records are self-contained and no visible record is shared between logical files, the files
+    created for consecutive logical files can be concatenated (after the Storage Unit Label) to obtain the same
+    bytes as those written by a single DLISWriter for all logical files.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+
+        self._sul_written = True  # the Storage Unit Label is only written to the target file
+
+
+class ParallelLogicalFileWriter:
+    """Write the logical files of a DLIS file in parallel, in a pool of threads.
+
+    Each logical file is converted to visible records by a separate SegmentWriter, writing them to a temporary
+    file (a 'segment file'). The Storage Unit Label is written to the target file and the segment files are then
+    appended to it in the original order - each one as soon as it is complete - using ByteWriter.copy_file, which
+    lets the kernel copy the bytes where possible. The produced bytes are identical to those written by DLISWriter.
+
+    Note:
+        The segment files take up additional disk space, up to the size of the entire DLIS file. By default,
+        they are created in the directory of the target file (so that copying them does not cross file systems).
+    """
+
+    def __init__(self, filename: sink_type, n_workers: int, fsync_policy: Union[str, int] = FsyncPolicy.NEVER,
+                 temp_dir: Optional[file_name_type] = None, **writer_kwargs: Any):
+        """Initialise ParallelLogicalFileWriter.
+
+        Args:
+            filename        :   Name of the file to be created, or a binary file object or a file descriptor
+                                the bytes should be written to (see ByteWriter).
+            n_workers       :   Number of threads writing the logical files.
+            fsync_policy    :   When the bytes written to the target file should be forced to the storage device
+                                (see ByteWriter). The segment files are not synchronised.
+            temp_dir        :   Directory in which the segment files are created. If not provided, the directory
+                                of the target file is used (or the system's default temporary directory if the
+                                bytes are not written to a file of a given name).
+            writer_kwargs   :   Keyword arguments passed to each SegmentWriter (e.g. visible_record_length,
+                                output_mode, n_encoding_workers).
+        """
+
+        if not isinstance(n_workers, int) or isinstance(n_workers, bool):
+            raise TypeError(f"Number of logical file workers must be an integer; got {type(n_workers)}: {n_workers}")
+        if n_workers < 1:
+            raise ValueError(f"Number of logical file workers must be positive; got {n_workers}")
+
+        if temp_dir is None and is_path(filename):
+            temp_dir = Path(filename).resolve().parent  # type: ignore  # filename is a path here
+
+        self._byte_writer = ByteWriter(filename, fsync_policy=fsync_policy)
+        self._n_workers = n_workers
+        self._temp_dir = temp_dir
+        self._writer_kwargs = writer_kwargs
+
+    @property
+    def n_workers(self) -> int:
+        """Number of threads writing the logical files."""
+
+        return self._n_workers
+
+    def _make_segment_path(self) -> Path:
+        """Create an empty temporary file for the visible records of a logical file; return its path."""
+
+        fd, path = tempfile.mkstemp(suffix='.dlis-segment', dir=self._temp_dir)
+        os.close(fd)
+        return Path(path)
+
+    def _write_segment(self, path: Path, logical_records: Sequence, output_chunk_size: Optional[number_type]
+                       ) -> None:
+        """Write the visible records of the logical records of a single logical file to a segment file."""
+
+        SegmentWriter(path, **self._writer_kwargs).write_logical_records(logical_records, output_chunk_size)
+
+    def write(self, sul: StorageUnitLabel, logical_files: Sequence[Sequence],
+              output_chunk_size: Optional[number_type] = None) -> None:
+        """Write the Storage Unit Label and the logical records of all logical files.
+
+        Args:
+            sul                 :   Storage Unit Label of the file.
+            logical_files       :   Logical records of each of the logical files (see LogicalFile.generator).
+            output_chunk_size   :   Size of the output buffer of each SegmentWriter.
+        """
+
+        paths = [self._make_segment_path() for _ in logical_files]
+        futures: list[Future] = []
+        executor = ThreadPoolExecutor(max_workers=self._n_workers, thread_name_prefix="DLISLogicalFile")
+
+        try:
+            for path, logical_records in zip(paths, logical_files):
+                futures.append(executor.submit(self._write_segment, path, logical_records, output_chunk_size))
+
+            with self._byte_writer:
+                logger.info("Writing Storage Unit Label bytes to the file")
+                self._byte_writer.write_bytes(sul.represent_as_bytes().bts)
+
+                for idx_lf, (path, future) in enumerate(zip(paths, futures)):
+                    future.result()  # wait for the logical file to be written; re-raise an error if there was one
+                    n_copied = self._byte_writer.copy_file(path)
+                    logger.debug(f"Copied {n_copied} bytes of the {idx_lf}-th logical file")
+                    path.unlink()
+
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+        logger.info(f'{len(logical_files)} logical files written to {self._byte_writer.sink_description}')
+        logger.info(f"Total file size is {self._byte_writer.total_size} bytes")
@@ -1,9 +1,25 @@
-from typing import Any, Union, Generator, Optional
+import logging
+import numpy as np
+from collections import deque
+from typing import Any, Union, Generator, Optional, Iterable, TYPE_CHECKING
 from typing_extensions import Self
 
+from dliswriter.logical_record.eflr_types.channel import ChannelItem
 from dliswriter.logical_record.eflr_types.frame import FrameItem
-from dliswriter.logical_record.iflr_types import FrameData
-from dliswriter.utils.source_data_wrappers import SourceDataWrapper
+from dliswriter.logical_record.iflr_types import EncodedFrameData, FrameDataEncoder
+from dliswriter.utils.source_data_wrappers import SourceDataWrapper, ChunkBufferRing
+from dliswriter.file.pipeline import prefetch
+from dliswriter.file.frame_statistics import FrameStatistics
+
+if TYPE_CHECKING:
+    from dliswriter.file.encoding_pool import EncodingPool
+    from dliswriter.file.frame_plan import FramePlan
+
+
+logger = logging.getLogger(__name__)
+
+
+chunk_type = Union[np.ndarray, dict[str, np.ndarray]]  #: structured array or dictionary of columns
 
 
 class MultiFrameData:
@@ -11,15 +27,25 @@ class MultiFrameData:
 
     Iterate over an instance of MultiFrameData to yield consecutive instances of FrameData according to the provided
     SourceDataObject (specifying numerical data, channel names, data types etc.)
+
+    The source data are loaded and encoded chunk-wise (see FrameDataEncoder); the yielded EncodedFrameData objects
+    only refer to the relevant parts of the encoded chunk bytes.
     """
 
-    def __init__(self, frame: FrameItem, data: SourceDataWrapper, chunk_size: Optional[int] = None):
+    def __init__(self, frame: FrameItem, data: SourceDataWrapper, chunk_size: Optional[int] = None,
+                 compute_channel_ranges: bool = False, absent_value: Optional[float] = None):
         """Initialise MultiFrameData object.
 
         Args:
-            frame       :   FrameObject instance the data refer to.
-            data        :   Data (with basic metadata) to be included.
-            chunk_size  :   Size (in number of rows) of chunks in which source data should be loaded when iterated over.
+            frame                   :   FrameObject instance the data refer to.
+            data                    :   Data (with basic metadata) to be included.
+            chunk_size              :   Size (in number of rows) of chunks in which source data should be loaded
+                                        when iterated over.
+            compute_channel_ranges  :   If True, the minimum and maximum values of the frame's channels (unless set
+                                        explicitly) are computed from the data while they are encoded;
+                                        see 'reserve_channel_ranges'.
+            absent_value            :   Default value written in place of missing samples of the channels which
+                                        do not define their own absent value (see FrameItem.get_absent_values_mapping).
         """
 
         super().__init__()
@@ -27,6 +53,7 @@ class MultiFrameData:
         self._check_type(frame, FrameItem)
         self._check_type(data, SourceDataWrapper)
         self._check_type(chunk_size, int, type(None))
+        self._check_type(absent_value, int, float, type(None))
 
         frame_channel_names = tuple(c.name for c in frame.channels.value)
         data_channel_names = data.dtype.names
@@ -37,11 +64,13 @@ class MultiFrameData:
         self._data_source = data
         self._frame = frame
 
-        self._origin_reference: Union[int, None] = self._frame.origin_reference
-
         self._chunk_rows = chunk_size
+        self._absent_value = absent_value
         self._i = 0  # keep track of current frame number during iteration
-        self._data_item_generator: Union[Generator, None] = None
+        self._data_item_generator: Union[Generator[EncodedFrameData, None, None], None] = None
+
+        #: channels whose minimum and maximum values are computed from the data
+        self._range_channels: list[ChannelItem] = self.reserve_channel_ranges() if compute_channel_ranges else []
 
     @staticmethod
     def _check_type(value: Any, *expected_types: type) -> None:
@@ -57,6 +86,113 @@ class MultiFrameData:
 
         return self._frame
 
+    @property
+    def data(self) -> SourceDataWrapper:
+        """Source data of the frame."""
+
+        return self._data_source
+
+    def make_encoder(self) -> FrameDataEncoder:
+        """Create the encoder of the Frame Data, with the absent values of the frame's channels."""
+
+        return FrameDataEncoder(self._frame, self._data_source.dtype,
+                                absent_values=self._frame.get_absent_values_mapping(self._absent_value))
+
+    def record_absent_value_counts(self, encoder: FrameDataEncoder) -> None:
+        """Set the numbers of missing samples replaced with absent values by the encoder in the channels."""
+
+        counts = encoder.substitution_counts
+        for channel in self._frame.channels.value:
+            if channel.name not in encoder.absent_values:
+                continue
+            channel.absent_value_count = counts.get(channel.name, 0)
+            if channel.absent_value_count:
+                logger.info(f"{channel.absent_value_count} missing sample(s) of {channel} replaced with "
+                            f"the absent value {encoder.absent_values[channel.name]}")
+
+    @property
+    def range_channels(self) -> list[ChannelItem]:
+        """Channels whose minimum and maximum values are computed from the data (see 'reserve_channel_ranges')."""
+
+        return self._range_channels
+
+    def reserve_channel_ranges(self) -> list[ChannelItem]:
+        """Set placeholder minimum and maximum values of the channels of the frame, to be computed from the data.
+
+        The placeholders (zeros, one per element of the channel) have the same size as the final values, so that
+        the Channel set can be written before the data are encoded and overwritten in place afterwards
+        (see 'fill_in_channel_ranges'). Channels with the minimum or maximum value set explicitly are skipped.
+
+        Returns:
+            The channels for which the placeholders have been set.
+        """
+
+        channels = []
+        for channel in self._frame.channels.value:
+            if channel.minimum_value.value is not None or channel.maximum_value.value is not None:
+                continue  # range (partially) defined by the user
+            n_elements = int(np.prod(channel.dimension.value))
+            channel.minimum_value.value = [0.0] * n_elements
+            channel.maximum_value.value = [0.0] * n_elements
+            channel.computed_minimum_value = None
+            channel.computed_maximum_value = None
+            channels.append(channel)
+        return channels
+
+    def clear_channel_ranges(self) -> None:
+        """Remove the minimum and maximum values set by 'reserve_channel_ranges' and 'fill_in_channel_ranges'.
+
+        Called once the file has been planned or written (also if an error has occurred), so that the channels
+        are left as defined by the user. The computed values remain available in the channels'
+        'computed_minimum_value' and 'computed_maximum_value'.
+        """
+
+        for channel in self._range_channels:
+            channel.minimum_value.value = None
+            channel.maximum_value.value = None
+
+    def make_statistics(self) -> FrameStatistics:
+        """Create an object computing the minimum and maximum values of the range channels from the data chunks."""
+
+        return FrameStatistics(channel_names=(channel.name for channel in self._range_channels))
+
+    def scan_statistics(self, statistics: FrameStatistics) -> None:
+        """Load the data chunk by chunk (without encoding them) and include them in the statistics.
+
+        Used if the encoded Frame Data are not created from the data (e.g. taken from a cache).
+        """
+
+        if self._data_source.columnar:
+            for columns in self._data_source.iterate_column_chunks(self._chunk_rows):
+                statistics.update(columns)
+        else:
+            for chunk in self._data_source.iterate_chunks(self._chunk_rows):
+                statistics.update(chunk)
+
+    def fill_in_channel_ranges(self, statistics: FrameStatistics) -> None:
+        """Set the minimum and maximum values of the range channels to the ones computed from the data.
+
+        The values are cast to the channels' data types first, so that they are the same as the written values.
+        They are also stored in the channels' 'computed_minimum_value' and 'computed_maximum_value'.
+        """
+
+        for channel in self._range_channels:
+            if channel.name not in statistics.channel_min:
+                logger.warning(f"Minimum and maximum values of {channel} could not be determined from the data; "
+                               f"the placeholder values are kept")
+                continue
+            dtype = channel.cast_dtype or np.float64
+            channel.computed_minimum_value = self._cast_range_values(statistics.channel_min[channel.name], dtype)
+            channel.computed_maximum_value = self._cast_range_values(statistics.channel_max[channel.name], dtype)
+            channel.minimum_value.value = channel.computed_minimum_value
+            channel.maximum_value.value = channel.computed_maximum_value
+
+    @staticmethod
+    def _cast_range_values(values: np.ndarray, dtype: Any) -> list[float]:
+        """Cast minimum or maximum values to the data type of a channel; NaN values (no samples) are kept."""
+
+        return [float(v) if np.isnan(v) else float(np.dtype(dtype).type(v)) for v in values]
+
     def __len__(self) -> int:
         """Number of data rows (= number of FrameData objects that can be created from the provided data)."""
 
@@ -66,10 +202,10 @@ class MultiFrameData:
         """Set up iteration over FrameData objects (to be) defined based on the data."""
 
         self._i = 0
-        self._data_item_generator = self._data_source.make_chunked_generator(chunk_rows=self._chunk_rows)
+        self._data_item_generator = self._make_frame_data_generator()
         return self
 
-    def __next__(self) -> FrameData:
+    def __next__(self) -> EncodedFrameData:
         """Return a next FrameData object in the iteration."""
 
         if not self._data_item_generator:
@@ -80,9 +216,165 @@ class MultiFrameData:
 
         self._i += 1
 
-        return FrameData(
-            frame=self._frame,
-            frame_number=self._i,
-            slots=next(self._data_item_generator),
-            origin_reference=self._origin_reference
-        )
+        return next(self._data_item_generator)
+
+    def _iterate_chunks(self, buffer_ring: Optional[ChunkBufferRing] = None
+                        ) -> Generator[tuple[np.ndarray, int], None, None]:
+        """Load the source data chunk by chunk; yield (chunk, frame number of the first row of the chunk) tuples.
+
+        If a buffer ring is provided, the chunks are loaded into its buffers (see SourceDataWrapper.iterate_chunks).
+        """
+
+        frame_number = 1
+        for chunk in self._data_source.iterate_chunks(chunk_rows=self._chunk_rows, buffer_ring=buffer_ring):
+            yield chunk, frame_number
+            frame_number += chunk.shape[0]
+
+    def _iterate_column_chunks(self) -> Generator[tuple[dict[str, np.ndarray], int], None, None]:
+        """Load the source data chunk by chunk as separate columns; yield (columns, first frame number) tuples."""
+
+        frame_number = 1
+        for columns in self._data_source.iterate_column_chunks(chunk_rows=self._chunk_rows):
+            yield columns, frame_number
+            frame_number += next(iter(columns.values())).shape[0]
+
+    @staticmethod
+    def _get_chunk_size(chunk: chunk_type) -> int:
+        """Number of bytes of a chunk (structured array or dictionary of columns)."""
+
+        if isinstance(chunk, dict):
+            return sum(column.nbytes for column in chunk.values())
+        return chunk.nbytes
+
+    def iterate_encoded_chunks(self, pool: Optional["EncodingPool"] = None, prefetch_bytes: Optional[int] = None,
+                               plan: Optional["FramePlan"] = None, statistics: Optional[FrameStatistics] = None
+                               ) -> Generator[tuple[np.ndarray, np.ndarray], None, None]:
+        """Define a generator loading the source data chunk by chunk and encoding them as FrameData bodies.
+
+        Args:
+            pool            :   If provided, the chunks are encoded in parallel in this pool (see EncodingPool).
+                                The chunks are yielded in the same order in both cases.
+            prefetch_bytes  :   If provided, the chunks are loaded in a background (reader) thread, which keeps
+                                up to this number of bytes of the next chunks ready while the previous ones
+                                are being encoded.
+            plan            :   Plan compiled for the frame and data (see FramePlan); its encoder is used.
+                                If not provided, a new encoder is created.
+            statistics      :   If provided, each loaded chunk is included in these statistics before being encoded
+                                (in the calling thread), so that e.g. the channel ranges are computed without reading
+                                the data again.
+
+        If the source data are separate in-memory columns (see SourceDataWrapper.columnar), each chunk is encoded
+        column by column, straight from the source arrays (see FrameDataEncoder.encode_columns).
+        Otherwise, the chunks are loaded directly in the big-endian target data type of the encoder, into a small ring
+        of preallocated buffers (see ChunkBufferRing); each buffer is given back to the ring once its chunk
+        has been encoded. The ring has as many buffers as chunks can be loaded and not yet encoded at a time
+        (one, unless a pool or prefetching is used).
+
+        Yields:
+            Consecutive (buffer, offsets) tuples, as returned by FrameDataEncoder.encode.
+        """
+
+        encoder = plan.encoder if plan is not None else self.make_encoder()
+
+        chunks, buffer_ring = self._load_chunks(encoder, pool, prefetch_bytes)
+        if statistics is not None:
+            chunks = self._observe_chunks(chunks, statistics)
+
+        def release(chunk: chunk_type) -> None:
+            if buffer_ring is not None and isinstance(chunk, np.ndarray):
+                buffer_ring.release(chunk)
+
+        try:
+            if pool is not None:
+                loaded: deque[chunk_type] = deque()  # chunks submitted to the pool, in order
+
+                def track(items: Iterable[tuple[chunk_type, int]]) -> Generator[tuple[chunk_type, int], None, None]:
+                    for item in items:
+                        loaded.append(item[0])
+                        yield item
+
+                for encoded in pool.encode_chunks(encoder, track(chunks)):
+                    release(loaded.popleft())  # the encoded chunks are yielded in the original order
+                    yield encoded
+                return
+
+            for chunk, first_frame_number in chunks:
+                encoded = encoder.encode_chunk(chunk, first_frame_number=first_frame_number)
+                release(chunk)
+                yield encoded
+
+        finally:
+            if buffer_ring is not None:
+                buffer_ring.close()  # unblock the reader thread (if used) if it is waiting for a buffer
+            if isinstance(chunks, Generator):
+                chunks.close()
+
+    @staticmethod
+    def _observe_chunks(chunks: Iterable[tuple[chunk_type, int]], statistics: FrameStatistics
+                        ) -> Generator[tuple[chunk_type, int], None, None]:
+        """Include each chunk in the statistics as it is passed on."""
+
+        try:
+            for chunk, first_frame_number in chunks:
+                statistics.update(chunk)
+                yield chunk, first_frame_number
+        finally:
+            if isinstance(chunks, Generator):
+                chunks.close()
+
+    def _load_chunks(self, encoder: FrameDataEncoder, pool: Optional["EncodingPool"], prefetch_bytes: Optional[int]
+                     ) -> tuple[Iterable[tuple[chunk_type, int]], Optional[ChunkBufferRing]]:
+        """Set up loading the chunks (see 'iterate_encoded_chunks'); return the chunks and the buffer ring (if used).
+        """
+
+        buffer_ring: Optional[ChunkBufferRing] = None
+        chunks: Iterable[tuple[chunk_type, int]]
+        if self._data_source.columnar:
+            chunks = self._iterate_column_chunks()
+        else:
+            buffer_ring = self._make_buffer_ring(encoder, pool, prefetch_bytes)
+            chunks = self._iterate_chunks(buffer_ring=buffer_ring)
+
+        if prefetch_bytes is not None:
+            chunks = prefetch(chunks, prefetch_bytes,
+                              get_size=lambda chunk_and_number: self._get_chunk_size(chunk_and_number[0]))
+
+        return chunks, buffer_ring
+
+    def _make_buffer_ring(self, encoder: FrameDataEncoder, pool: Optional["EncodingPool"],
+                          prefetch_bytes: Optional[int]) -> ChunkBufferRing:
+        """Create a ring of buffers for the chunks, in the target dtype of the encoder.
+
+        Enough buffers are allowed for all chunks which can be loaded and not yet encoded at the same time,
+        so that loading never waits for a buffer held by a chunk which cannot be encoded before it.
+        The buffers are allocated on first use.
+        """
+
+        n_buffers = pool.max_chunks_in_flight if pool is not None else 1
+
+        if prefetch_bytes is not None:
+            chunk_bytes = max(self._data_source.compute_chunk_sizes(self._chunk_rows)) * encoder.row_data_size
+            n_buffers += 1 + prefetch_bytes // max(chunk_bytes, 1)  # chunk being loaded + chunks waiting in the queue
+
+        return self._data_source.make_buffer_ring(self._chunk_rows, n_buffers=n_buffers, dtype=encoder.target_dtype)
+
+    def compute_chunk_bounds(self) -> list[tuple[int, int]]:
+        """Determine (first frame number, number of rows) of the chunks the data are encoded in, without loading them.
+        """
+
+        bounds = []
+        frame_number = 1
+        for n_rows in self._data_source.compute_chunk_sizes(self._chunk_rows):
+            bounds.append((frame_number, n_rows))
+            frame_number += n_rows
+        return bounds
+
+    def _make_frame_data_generator(self) -> Generator[EncodedFrameData, None, None]:
+        """Define a generator yielding FrameData of consecutive rows of the encoded data chunks."""
+
+        for buffer, offsets in self.iterate_encoded_chunks():
+            body = buffer.data
+            offsets_list = offsets.tolist()
+
+            for i in range(len(offsets_list) - 1):
+                yield EncodedFrameData(body[offsets_list[i]:offsets_list[i + 1]])
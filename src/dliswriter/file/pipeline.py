@@ -0,0 +1,143 @@
+import logging
+from collections import deque
+from threading import Condition, Thread, Event
+from typing import Any, Callable, Generator, Iterable, Optional, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+
+class ByteBoundedQueue:
+    """FIFO queue connecting stages of the writing pipeline, bounded by the total size (in bytes) of its items.
+
+    'put' blocks as long as adding the item would exceed the byte limit (or the limit of the number of items).
+    An item is always accepted by an empty queue, even if it is larger than the byte limit, so that large items
+    do not block the pipeline.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, max_items: Optional[int] = None):
+        """Initialise ByteBoundedQueue.
+
+        Args:
+            max_bytes   :   Max total size of the items in the queue. If not provided, the size is not limited.
+            max_items   :   Max number of items in the queue. If not provided, the number is not limited.
+        """
+
+        for value, label in ((max_bytes, "Max number of bytes"), (max_items, "Max number of items")):
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(f"{label} in the queue must be a positive integer; got {value}")
+
+        self._max_bytes = max_bytes
+        self._max_items = max_items
+
+        self._items: deque[tuple[Any, int]] = deque()  #: (item, size) tuples
+        self._n_bytes = 0  #: total size of the items currently in the queue
+        self._condition = Condition()
+
+    @property
+    def n_bytes(self) -> int:
+        """Total size of the items currently in the queue."""
+
+        return self._n_bytes
+
+    def __len__(self) -> int:
+        """Number of items currently in the queue."""
+
+        return len(self._items)
+
+    def _is_full_for(self, size: int) -> bool:
+        """Check whether an item of the given size has to wait to be put in the queue."""
+
+        if not self._items:
+            return False
+
+        if self._max_items is not None and len(self._items) >= self._max_items:
+            return True
+
+        return self._max_bytes is not None and self._n_bytes + size > self._max_bytes
+
+    def put(self, item: Any, size: int) -> None:
+        """Put an item in the queue, waiting until there is enough space for it.
+
+        Args:
+            item    :   The item to be put in the queue.
+            size    :   Size of the item, in bytes.
+        """
+
+        with self._condition:
+            self._condition.wait_for(lambda: not self._is_full_for(size))
+            self._items.append((item, size))
+            self._n_bytes += size
+            self._condition.notify_all()
+
+    def get(self) -> Any:
+        """Take the first item from the queue, waiting until one is available."""
+
+        with self._condition:
+            self._condition.wait_for(lambda: bool(self._items))
+            item, size = self._items.popleft()
+            self._n_bytes -= size
+            self._condition.notify_all()
+
+        return item
+
+
+_END = object()  #: sentinel marking the end of the prefetched items
+
+
+def prefetch(items: Iterable[T], max_bytes: int, get_size: Callable[[T], int], name: str = "DLISReader"
+             ) -> Generator[T, None, None]:
+    """Iterate over the items in a background ('reader') thread, keeping the next items ready in a bounded queue.
+
+    This allows e.g. loading the next chunks of input data while the previous ones are being encoded and written.
+    An error raised while iterating over the items is re-raised in the consuming thread. If the consumer stops
+    the iteration early, the reader thread is stopped as well.
+
+    Args:
+        items       :   Items to be iterated over, e.g. a generator loading chunks of data.
+        max_bytes   :   Max total size of the items kept ready in the queue.
+        get_size    :   Callable returning the size (in bytes) of an item.
+        name        :   Name of the reader thread.
+
+    Yields:
+        The items, in the original order.
+    """
+
+    queue = ByteBoundedQueue(max_bytes=max_bytes)
+    stop = Event()
+    errors: list[BaseException] = []
+
+    def read() -> None:
+        try:
+            for item in items:
+                if stop.is_set():
+                    break
+                queue.put(item, get_size(item))
+        except BaseException as exc:
+            errors.append(exc)
+        finally:
+            queue.put(_END, 0)
+
+    thread = Thread(target=read, name=name, daemon=True)
+    thread.start()
+
+    finished = False
+    try:
+        while True:
+            item = queue.get()
+            if item is _END:
+                finished = True
+                break
+            yield item
+    finally:
+        if not finished:
+            stop.set()
+            while queue.get() is not _END:  # unblock the reader thread if it is waiting for space in the queue
+                pass
+        thread.join()
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,117 @@
+import io
+import os
+import logging
+from collections import deque
+from typing import Any, Optional
+
+from dliswriter.utils.internal.types import sink_type, bytes_type
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_path(sink: sink_type) -> bool:
+    """Check whether the sink is a path (name) of a file, as opposed to an open file object or a file descriptor."""
+
+    return isinstance(sink, (str, os.PathLike))
+
+
+def describe_sink(sink: sink_type) -> str:
+    """Describe the sink for the purpose of logging."""
+
+    if is_path(sink):
+        return f"DLIS file at {os.path.abspath(sink)}"  # type: ignore  # sink is a path here
+    if isinstance(sink, int):
+        return f"file descriptor {sink}"
+    return f"{type(sink).__name__} object"
+
+
+def get_fileno(file: Any) -> Optional[int]:
+    """Return the file descriptor underlying a file object, or None if there is none (e.g. for io.BytesIO)."""
+
+    try:
+        return int(file.fileno())
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+class ChunkCollector(io.RawIOBase):
+    """Binary, write-only file-like object collecting the written bytes in chunks of a fixed size.
+
+    Used as a sink of ByteWriter to obtain the bytes of a DLIS file piece by piece, without writing them
+    to the disk (see DLISFile.iter_bytes). The written bytes are copied straight into a buffer allocated for each chunk,
+    and the complete chunks are handed over as read-only memoryviews of these buffers, so each byte is copied only once.
+    The complete chunks are kept until they are taken by the consumer (see 'pop_chunks').
+    """
+
+    def __init__(self, chunk_size: int):
+        """Initialise ChunkCollector.
+
+        Args:
+            chunk_size  :   Number of bytes in each chunk (except possibly the last one).
+        """
+
+        if not isinstance(chunk_size, int) or isinstance(chunk_size, bool):
+            raise TypeError(f"Chunk size must be an integer; got {type(chunk_size)}: {chunk_size}")
+        if chunk_size < 1:
+            raise ValueError(f"Chunk size must be positive; got {chunk_size}")
+
+        super().__init__()
+
+        self._chunk_size = chunk_size
+        self._buffer: Optional[bytearray] = None  #: buffer of the incomplete chunk (allocated when needed)
+        self._n_buffered = 0  #: number of bytes in the buffer
+        self._chunks: deque[memoryview] = deque()  #: complete chunks, waiting to be taken
+
+    @property
+    def chunk_size(self) -> int:
+        """Number of bytes in each chunk (except possibly the last one)."""
+
+        return self._chunk_size
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, bts: bytes_type) -> int:  # type: ignore[override]  # accepts any bytes-like object
+        """Copy the bytes to the buffer(s) of the current chunk(s); pass on the chunks which are complete.
+
+        Returns:
+            Number of bytes written (as in io.RawIOBase.write).
+        """
+
+        with memoryview(bts) as view, view.cast('B') as flat:
+            n_bytes = flat.nbytes
+            pos = 0
+            while pos < n_bytes:
+                if self._buffer is None:
+                    self._buffer = bytearray(self._chunk_size)
+                n = min(n_bytes - pos, self._chunk_size - self._n_buffered)
+                self._buffer[self._n_buffered:self._n_buffered + n] = flat[pos:pos + n]
+                self._n_buffered += n
+                pos += n
+
+                if self._n_buffered == self._chunk_size:
+                    # the buffer is not reused, so the chunk can be passed on without copying
+                    self._chunks.append(memoryview(self._buffer).toreadonly())
+                    self._buffer = None
+                    self._n_buffered = 0
+
+        return n_bytes
+
+    def pop_chunks(self, include_incomplete: bool = False) -> list[memoryview]:
+        """Take the complete chunks collected so far (as read-only memoryviews).
+
+        Args:
+            include_incomplete  :   If True, also take the bytes of the last, incomplete chunk (if there are any).
+                                    Used when no more bytes are going to be written.
+        """
+
+        chunks = list(self._chunks)
+        self._chunks.clear()
+
+        if include_incomplete and self._buffer is not None:
+            chunks.append(memoryview(self._buffer).toreadonly()[:self._n_buffered])
+            self._buffer = None
+            self._n_buffered = 0
+
+        return chunks
@@ -0,0 +1,464 @@
+import logging
+import numpy as np
+from typing import Any, Iterable, Optional, Union
+
+from dliswriter.file.writer import DLISWriter, FsyncPolicy
+from dliswriter.file.frame_data_assembler import FrameDataAssembler
+from dliswriter.file.frame_statistics import FrameStatistics
+from dliswriter.logical_record import eflr_types
+from dliswriter.logical_record.core.attribute import Attribute
+from dliswriter.logical_record.core.logical_record import LogicalRecordBytes
+from dliswriter.logical_record.iflr_types import FrameDataEncoder
+from dliswriter.logical_record.misc import StorageUnitLabel
+from dliswriter.utils.internal.types import sink_type, bytes_type
+
+
+logger = logging.getLogger(__name__)
+
+
+class StreamedFrame:
+    """Frame whose data are appended to a DLIS file chunk by chunk, with the associated encoder and statistics."""
+
+    def __init__(self, frame: eflr_types.FrameItem, update_channel_ranges: bool = True):
+        """Initialise StreamedFrame; set up the frame and its channels for streaming.
+
+        The data types of the frame's channels must be defined (through 'cast_dtype'). Attributes of the frame
+        (index_min, index_max, spacing) and of its channels (minimum_value, maximum_value) which depend on the data
+        and have not been set explicitly are filled with placeholder values of the same size as the final ones.
+
+        Args:
+            frame                   :   The frame whose data are streamed.
+            update_channel_ranges   :   If True, reserve space for the channels' minimum and maximum values
+                                        (if not set explicitly), so that they can be filled in when the file is closed.
+        """
+
+        self._frame = frame
+        self._placeholder_attributes: list[Attribute] = []  #: attributes to be filled in at the end
+        self._direction_filled_in = False  #: True if the direction was set in place of a non-uniform spacing
+
+        if not frame.channels.value:
+            raise RuntimeError(f"No channels defined for {frame}")
+
+        self._dtype = self._make_dtype(frame.channels.value)
+        self._encoder = FrameDataEncoder(frame, self._dtype, absent_values=frame.get_absent_values_mapping())
+        self._next_frame_number = 1
+
+        index_name = self._set_up_index_attributes()
+
+        self._range_channels: list[eflr_types.ChannelItem] = []
+        if update_channel_ranges:
+            for channel in frame.channels.value:
+                if channel.minimum_value.value is not None or channel.maximum_value.value is not None:
+                    continue  # range (partially) defined by the user
+                n_elements = int(np.prod(channel.dimension.value))
+                self._reserve(channel.minimum_value, [0.0] * n_elements)
+                self._reserve(channel.maximum_value, [0.0] * n_elements)
+                self._range_channels.append(channel)
+
+        self._statistics = FrameStatistics(index_name, channel_names=(c.name for c in self._range_channels))
+
+    @property
+    def frame(self) -> eflr_types.FrameItem:
+        """The frame whose data are streamed."""
+
+        return self._frame
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Structured numpy dtype of the data rows of the frame."""
+
+        return self._dtype
+
+    @property
+    def encoder(self) -> FrameDataEncoder:
+        """Encoder of the frame data."""
+
+        return self._encoder
+
+    @property
+    def n_rows(self) -> int:
+        """Number of data rows appended so far."""
+
+        return self._next_frame_number - 1
+
+    @staticmethod
+    def _make_dtype(channels: list[eflr_types.ChannelItem]) -> np.dtype:
+        """Create the structured numpy dtype of the data rows from the channels' data types and dimensions."""
+
+        dtypes = []
+        for channel in channels:
+            if channel.cast_dtype is None:
+                raise RuntimeError(f"Data type of {channel} is not defined; set 'cast_dtype' of the channel "
+                                   f"before opening a stream")
+
+            dim = channel.dimension.value or channel.element_limit.value or [1]
+            if len(dim) > 1:
+                raise RuntimeError("Data sets with more than 2 dimensions are not supported")
+            if not channel.dimension.value:
+                logger.debug(f"Setting dimension of {channel} to {dim}")
+                channel.dimension.value = dim
+
+            dtypes.append((channel.name, channel.cast_dtype) if dim == [1] else (channel.name, channel.cast_dtype,
+                                                                                 dim[0]))
+
+        return np.dtype(dtypes)
+
+    def _reserve(self, attr: Attribute, placeholder: Any) -> bool:
+        """If the attribute value is not set, set a placeholder value, to be replaced when the file is closed.
+
+        Returns:
+            True if the placeholder was set, False if the attribute already had a value.
+        """
+
+        if attr.value is not None:
+            return False
+
+        attr.value = placeholder
+        self._placeholder_attributes.append(attr)
+        return True
+
+    def _set_up_index_attributes(self) -> Optional[str]:
+        """Set up the index characteristics of the frame (see FrameItem._setup_frame_params_from_data).
+
+        Returns:
+            Name of the index channel or None if the frame is indexed by row numbers.
+        """
+
+        frame = self._frame
+
+        if frame.index_type.value is None:
+            logger.info(f"No index channel defined for {frame}; it will be indexed by the row number")
+            if frame.spacing.value is None:
+                frame.spacing.value = 1
+            if frame.index_min.value is None:
+                frame.index_min.value = 1
+            self._reserve(frame.index_max, 0)
+            return None
+
+        index_channel: eflr_types.ChannelItem = frame.channels.value[0]
+        if index_channel.dimension.value != [1]:
+            raise RuntimeError(f"Index channel's data must be 1-dimensional; got dimension "
+                               f"{index_channel.dimension.value} for {index_channel} of {frame}")
+
+        for attr in (frame.index_min, frame.index_max, frame.spacing):
+            self._reserve(attr, 0.0)
+            if attr.units is None and index_channel.units.value is not None:
+                attr.units = index_channel.units.value
+
+        return index_channel.name
+
+    def make_chunk(self, data: Any) -> np.ndarray:
+        """Create a chunk of data rows (structured array of the frame dtype) from the provided data.
+
+        Args:
+            data    :   Dictionary of numpy arrays or a structured numpy array, in which the data of each channel
+                        are stored under the channel's dataset name.
+        """
+
+        n_rows = None
+        columns = []
+        for channel in self._frame.channels.value:
+            try:
+                column = np.asarray(data[channel.dataset_name])
+            except (KeyError, ValueError):
+                raise ValueError(f"No data for {channel} (dataset name '{channel.dataset_name}') found "
+                                 f"in the appended rows")
+            if n_rows is None:
+                n_rows = column.shape[0] if column.ndim else 0
+            if not column.ndim or column.shape[0] != n_rows:
+                raise ValueError(f"All channels must have the same number of rows; got {n_rows} rows for the first "
+                                 f"channel and {column.shape[0] if column.ndim else 0} for {channel}")
+            columns.append(column)
+
+        chunk = np.empty(n_rows or 0, dtype=self._dtype)
+        for channel, column in zip(self._frame.channels.value, columns):
+            expected_shape = chunk[channel.name].shape
+            if column.shape != expected_shape:
+                if column.size != chunk[channel.name].size:
+                    raise ValueError(f"Shape of the data of {channel} ({column.shape}) does not match the channel's "
+                                     f"dimension: {channel.dimension.value}")
+                column = column.reshape(expected_shape)
+            chunk[channel.name] = column
+
+        return chunk
+
+    def add_chunk(self, chunk: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Encode a chunk of data rows and include it in the statistics.
+
+        Returns:
+            (buffer, offsets) tuple, as returned by FrameDataEncoder.encode.
+        """
+
+        encoded = self._encoder.encode(chunk, first_frame_number=self._next_frame_number)
+        self._statistics.update(chunk)
+        self._next_frame_number += chunk.shape[0]
+        return encoded
+
+    def fill_in_placeholders(self) -> None:
+        """Replace the placeholder values of the frame's and channels' attributes with the values from the data."""
+
+        frame = self._frame
+        stats = self._statistics
+
+        values: dict[Attribute, Any]
+        if frame.index_type.value is None:
+            values = {frame.index_max: stats.n_rows}
+        else:
+            values = {frame.index_min: stats.index_min, frame.index_max: stats.index_max, frame.spacing: stats.spacing}
+            if stats.spacing is None and frame.spacing in self._placeholder_attributes:
+                self._unset_spacing()
+
+        for channel in self._range_channels:
+            if channel.name in stats.channel_min:
+                values[channel.minimum_value] = stats.channel_min[channel.name].tolist()
+                values[channel.maximum_value] = stats.channel_max[channel.name].tolist()
+
+        for attr in self._placeholder_attributes:
+            value = values.get(attr)
+            if value is None:
+                logger.warning(f"Value of {attr.label} of {attr.parent_eflr} could not be determined from the data "
+                               f"({stats.n_rows} rows); the placeholder value is kept")
+                continue
+            attr.value = [float(v) for v in value] if isinstance(value, list) else value
+
+    def _unset_spacing(self) -> None:
+        """Remove the spacing placeholder of a frame with a non-uniform index; record the index direction instead.
+
+        See FrameItem.setup_from_data.
+        """
+
+        frame = self._frame
+        logger.warning(f"Spacing of the index channel of {frame} is not uniform; the spacing will not be recorded")
+
+        frame.spacing.value = None
+        self._placeholder_attributes.remove(frame.spacing)
+
+        direction = self._statistics.direction
+        if direction is not None and frame.direction.value is None:
+            frame.direction.value = 'INCREASING' if direction else 'DECREASING'
+            self._direction_filled_in = True
+
+    def unset_direction(self) -> None:
+        """Unset the direction recorded in place of a non-uniform spacing (if any), e.g. if there is no space for it."""
+
+        if not self._direction_filled_in:
+            return
+
+        logger.warning(f"Direction of the index of {self._frame} does not fit in the space reserved for the spacing "
+                       f"and will not be recorded")
+        self._frame.direction.value = None
+        self._direction_filled_in = False
+
+
+class DLISStream(DLISWriter):
+    """Write a DLIS file incrementally, appending frame data rows as they become available (e.g. during acquisition).
+
+    The Storage Unit Label and the EFLRs are written when the stream is opened; the appended rows are encoded
+    and written to the file immediately, so the memory used does not depend on the length of the acquisition.
+    Values which are only known once all the data have been written (frame index range and spacing, channel minimum
+    and maximum values) are initially written as placeholders of a fixed size and filled in when the stream is closed,
+    by overwriting the Frame and Channel sets in place. If the index turns out not to be uniformly spaced,
+    the spacing is left unset and (if it fits) the direction of the index is recorded instead; the rewritten
+    logical record segments are padded to their initial sizes.
+    """
+
+    patched_set_types = (eflr_types.FrameSet, eflr_types.ChannelSet)  #: sets with values filled in on closing
+
+    def __init__(self, filename: sink_type, storage_unit_label: StorageUnitLabel, logical_records: Iterable,
+                 frames: Iterable[eflr_types.FrameItem], pack_visible_records: bool = False,
+                 fsync_policy: Union[str, int] = FsyncPolicy.NEVER, update_channel_ranges: bool = True):
+        """Initialise DLISStream.
+
+        Args:
+            filename                :   Name of the file to be created, or a seekable binary file object
+                                        or file descriptor.
+            storage_unit_label      :   Storage Unit Label of the file.
+            logical_records         :   Logical records (other than frame data) to be written at the beginning
+                                        of the file, e.g. as yielded by LogicalFile.generator.
+            frames                  :   Frames whose data can be appended to the file.
+            pack_visible_records    :   If True, put as many logical record segments in each visible record
+                                        as allowed by the visible record length.
+            fsync_policy            :   When the written bytes should be forced to the storage device: 'never',
+                                        'end' (when the stream is closed), or a positive integer N - every N bytes.
+            update_channel_ranges   :   If True, fill in the minimum and maximum values of the channels
+                                        (unless set explicitly) when the stream is closed.
+        """
+
+        super().__init__(filename, visible_record_length=storage_unit_label.max_record_length,
+                         pack_visible_records=pack_visible_records, fsync_policy=fsync_policy)
+
+        self._sul = storage_unit_label
+        self._logical_records = logical_records
+        self._frames = {frame: StreamedFrame(frame, update_channel_ranges=update_channel_ranges) for frame in frames}
+        self._assembler = FrameDataAssembler(self._visible_record_length, self._fmt_version,
+                                             pack=self._pack_visible_records)
+
+        #: (logical record, position, size, sizes of the logical record segments) of the patched sets
+        self._patched_regions: list[tuple[Any, int, int, list[int]]] = []
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """True if the stream has been closed."""
+
+        return self._closed
+
+    def __enter__(self) -> "DLISStream":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """Write the Storage Unit Label and the logical records describing the file structure."""
+
+        try:
+            self._write_header_records()
+        except BaseException:
+            self._closed = True
+            self._byte_writer.close()
+            raise
+
+    def _write_header_records(self) -> None:
+        """Write the Storage Unit Label and the logical records; record the positions of the patched sets."""
+
+        self._byte_writer.open()
+        if not self._byte_writer.seekable:
+            raise ValueError(f"Cannot stream to {self._byte_writer.sink_description}; streaming requires an output "
+                             f"supporting random access (e.g. a file or io.BytesIO), so that the values determined "
+                             f"from the data can be filled in at the end")
+
+        self.write_storage_unit_label(self._sul)
+
+        # max allowed size of an LR segment body; 4 bytes reserved for VR header and another 4 for LR segment header
+        max_lr_segment_size = self._visible_record_length - 8
+        segments: list[tuple[list[bytes_type], int]] = []
+
+        for lr in self._logical_records:
+            if isinstance(lr, self.patched_set_types):
+                # patched sets are put in separate visible records, so that they can be rewritten on their own
+                self._write_segments(segments)
+                position = self._byte_writer.total_size
+                lr_segments = list(lr.represent_as_bytes().make_segments_parts(max_lr_segment_size))
+                size = self._write_segments(lr_segments)
+                self._patched_regions.append((lr, position, size, [segment_size for _, segment_size in lr_segments]))
+                segments = []
+            else:
+                segments.extend(lr.represent_as_bytes().make_segments_parts(max_lr_segment_size))
+
+        self._write_segments(segments)
+
+    def _make_visible_records(self, segments: list[tuple[list[bytes_type], int]]) -> tuple[list[bytes_type], int]:
+        """Wrap the logical record segments in visible records; return the parts and the total size of the bytes."""
+
+        if self._pack_visible_records:
+            visible_records = list(self._make_packed_visible_records(segments))
+        else:
+            visible_records = [([self._make_visible_record_header(size), *parts], size + 4) for parts, size in segments]
+
+        return [part for parts, _ in visible_records for part in parts], sum(size for _, size in visible_records)
+
+    def _write_segments(self, segments: list[tuple[list[bytes_type], int]]) -> int:
+        """Wrap the logical record segments in visible records and write them to the file; return the number of bytes.
+        """
+
+        parts, size = self._make_visible_records(segments)
+        if parts:
+            self._byte_writer.write_parts(parts, size)
+        return size
+
+    def _get_streamed_frame(self, frame: Union[eflr_types.FrameItem, str]) -> StreamedFrame:
+        """Find the StreamedFrame corresponding to a frame (FrameItem or name of the frame)."""
+
+        if isinstance(frame, eflr_types.FrameItem):
+            if frame not in self._frames:
+                raise ValueError(f"{frame} is not a part of the streamed file")
+            return self._frames[frame]
+
+        matching = [sf for fr, sf in self._frames.items() if fr.name == frame]
+        if not matching:
+            raise ValueError(f"No frame named '{frame}' found in the streamed file")
+        if len(matching) > 1:
+            raise ValueError(f"There are {len(matching)} frames named '{frame}'; pass the FrameItem instead")
+        return matching[0]
+
+    def append_rows(self, frame: Union[eflr_types.FrameItem, str], data: Any) -> None:
+        """Encode rows of data of a frame and write them to the file as FrameData.
+
+        Args:
+            frame   :   The frame (FrameItem or name of the frame) the data belong to.
+            data    :   Dictionary of numpy arrays or a structured numpy array, in which the data of each channel
+                        of the frame are stored under the channel's dataset name. All channels must have the same
+                        number of rows; the data are cast to the channels' data types.
+        """
+
+        if self._closed:
+            raise RuntimeError("Cannot append rows; the stream has been closed")
+
+        streamed_frame = self._get_streamed_frame(frame)
+        chunk = streamed_frame.make_chunk(data)
+        if not chunk.shape[0]:
+            return
+
+        buffer, offsets = streamed_frame.add_chunk(chunk)
+        self._byte_writer.write_bytes(self._assembler.assemble(buffer, offsets).data)
+
+    def close(self) -> None:
+        """Fill in the values determined from the appended data and close the file."""
+
+        if self._closed:
+            return
+        self._closed = True
+
+        try:
+            for streamed_frame in self._frames.values():
+                streamed_frame.fill_in_placeholders()
+            self._rewrite_patched_sets()
+        finally:
+            self._byte_writer.close()
+
+        logger.info(f"{', '.join(f'{sf.n_rows} rows of {fr}' for fr, sf in self._frames.items())} written "
+                    f"to {self._byte_writer.sink_description}")
+        logger.info(f"Total file size is {self._byte_writer.total_size} bytes")
+
+    def _make_patched_segments(self, lr: Any, segment_sizes: list[int]) -> Optional[list[tuple[list[bytes_type], int]]]:
+        """Split the bytes of a patched set into segments padded to the sizes of the ones written initially.
+
+        Returns:
+            List of (parts, size) tuples of the segments or None if the bytes do not fit in the initial segments.
+        """
+
+        lr_bytes: LogicalRecordBytes = lr.represent_as_bytes()
+        body_sizes = LogicalRecordBytes.compute_segment_sizes(lr_bytes.size, self._visible_record_length - 8)
+        if len(body_sizes) != len(segment_sizes):
+            return None
+        if any(not 0 <= size - (n_bytes + 4) <= 255 for n_bytes, size in zip(body_sizes, segment_sizes)):
+            return None
+
+        segments = []
+        start_pos = 0
+        for n_bytes, size in zip(body_sizes, segment_sizes):
+            segments.append(lr_bytes.make_segment_parts(start_pos, n_bytes, padded_size=size))
+            start_pos += n_bytes
+        return segments
+
+    def _rewrite_patched_sets(self) -> None:
+        """Create the bytes of the patched sets again and put them in place of the ones written initially."""
+
+        for lr, position, size, segment_sizes in self._patched_regions:
+            segments = self._make_patched_segments(lr, segment_sizes)
+            if segments is None and isinstance(lr, eflr_types.FrameSet):
+                # the direction recorded in place of a non-uniform spacing can take more space than the spacing
+                for frame, streamed_frame in self._frames.items():
+                    if frame.parent is lr:
+                        streamed_frame.unset_direction()
+                segments = self._make_patched_segments(lr, segment_sizes)
+            if segments is None:
+                raise RuntimeError(f"{lr} does not fit in the {size} bytes written initially; the values filled in "
+                                   f"on closing the stream must have the same representation as the placeholders")
+
+            parts, new_size = self._make_visible_records(segments)
+            if new_size != size:
+                raise RuntimeError(f"Size of {lr} changed from {size} to {new_size} bytes; the values filled in "
+                                   f"on closing the stream must have the same representation as the placeholders")
+            self._byte_writer.overwrite_bytes(position, b''.join(parts))
@@ -1,43 +1,370 @@
+import io
+import os
+import errno
 import logging
-from progressbar import progressbar
-from typing import Optional, Sequence
+import numpy as np
+from threading import Thread
+from progressbar import ProgressBar
+from typing import Optional, Sequence, Generator, Iterable, Union, Any, BinaryIO
 from pathlib import Path
 
 from dliswriter.utils.internal.internal_enums import RepresentationCode
-from dliswriter.utils.internal.types import file_name_type, number_type, bytes_type
+from dliswriter.utils.internal.types import file_name_type, number_type, bytes_type, sink_type
+from dliswriter.utils.internal.validator_enum import ValidatorEnum
 from dliswriter.logical_record.misc import StorageUnitLabel
+from dliswriter.logical_record.eflr_types.channel import ChannelSet
+from dliswriter.file.multi_frame_data import MultiFrameData
+from dliswriter.file.frame_data_assembler import FrameDataAssembler
+from dliswriter.file.frame_plan import FramePlan
+from dliswriter.file.file_plan import FilePlanner
+from dliswriter.file.encoding_pool import EncodingPool, ExecutorType
+from dliswriter.file.pipeline import ByteBoundedQueue
+from dliswriter.file.sinks import is_path, describe_sink, get_fileno
+from dliswriter.file.frame_data_cache import FrameDataCache, CacheEntryWriter, CachedFrameData
+from dliswriter.file.frame_statistics import FrameStatistics
 
 logger = logging.getLogger(__name__)
 
 
+# errors meaning that os.copy_file_range / os.sendfile cannot be used for the given files (rather than a failed write)
+_KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF, errno.EOPNOTSUPP, errno.ENOTSOCK}
+
+
+def _get_iov_max() -> int:
+    """Return the max number of buffers which can be passed to a single os.writev call."""
+
+    try:
+        return os.sysconf('SC_IOV_MAX')
+    except (AttributeError, ValueError, OSError):
+        return 1024
+
+
+class FsyncPolicy(ValidatorEnum):
+    """Moments at which the bytes written to the file are forced to the storage device (using os.fsync).
+
+    Apart from these values, a positive integer can be used as a policy, meaning 'every N bytes (and at the end)'.
+    """
+
+    NEVER = "never"  #: leave flushing the bytes to the storage device to the operating system
+    END = "end"  #: synchronise once, when the file is closed
+
+
+class OutputMode(ValidatorEnum):
+    """Ways in which the bytes of the visible records are collected and passed to the file."""
+
+    BUFFERED = "buffered"  #: copy the bytes to block-aligned memory blocks, write them when the buffer is full
+    VECTORED = "vectored"  #: keep references to the bytes, write them with scatter/gather (os.writev) calls
+    MMAP = "mmap"  #: preallocate the file and put the bytes directly in a memory-mapped region of it
+
+
 class ByteWriter:
-    """Write bytes to DLIS file."""
+    """Write bytes to DLIS file.
+
+    The bytes can be written to a file of a given name, to a binary file object (e.g. an open file, io.BytesIO,
+    or a member of an archive), or to a file descriptor (e.g. of a pipe or a socket); this is referred to as the sink.
+    A file of a given name is opened (in 'wb' mode) when bytes are written to it for the first time and the handle
+    is kept open until 'close' is called. If the file is reopened afterwards, the bytes are appended to it.
+    File objects and file descriptors provided by the caller are not closed by the writer; they are only flushed.
+
+    Optionally, the bytes can be written by a background ('write-behind') thread. In that case, 'write_bytes' only
+    puts the bytes in a bounded queue and returns, so that the next bytes can be prepared while the previous ones
+    are being written to the file. An error raised in the background thread is re-raised in the next call
+    to 'write_bytes' or 'close'.
+    """
 
-    def __init__(self, filename: file_name_type):
+    copy_chunk_size = 2 ** 20  #: size of chunks in which bytes are copied if the kernel cannot do it (see copy_file)
+
+    def __init__(self, filename: sink_type, fsync_policy: Union[str, int] = FsyncPolicy.NEVER,
+                 write_behind: bool = False, max_queue_size: int = 2, max_queue_bytes: Optional[int] = None):
         """Initialise DLISFileWriter.
 
         Args:
-            filename    :   Name of the file the bytes should be written to.
+            filename        :   Name of the file the bytes should be written to, or a binary file object,
+                                or a file descriptor (the sink).
+            fsync_policy    :   When the written bytes should be forced to the storage device: 'never',
+                                'end' (when the file is closed), or a positive integer N - every N bytes
+                                (and when the file is closed).
+            write_behind    :   If True, write the bytes to the file in a background thread.
+            max_queue_size  :   Max number of write calls waiting for the background thread; if the queue is full,
+                                'write_bytes' blocks until the thread catches up. Ignored if write_behind is False.
+            max_queue_bytes :   Max total number of bytes waiting for the background thread (in addition to
+                                max_queue_size). If not provided, only the number of write calls is limited.
+                                Ignored if write_behind is False.
         """
 
-        self._filename = filename
-        self._append = False  # changes to True in first call of write_bytes
+        self._sink = filename
+        self._filename: Optional[file_name_type] = filename if is_path(filename) else None  # type: ignore
+        self._append = False  # changes to True when the file is opened for the first time
         self._total_size = 0
+        self._fs_block_size: Optional[int] = None
+
+        self._fsync_every, self._fsync_at_end = self._parse_fsync_policy(fsync_policy)
+        self._unsynced_size = 0  #: number of bytes written to the file since the last fsync
+
+        self._file: Optional[Any] = None  #: handle of the open file (binary file object)
+        self._owns_file = False  #: whether the file object has been opened here (and should be closed here)
+        self._fileno: Optional[int] = None  #: file descriptor of the open file, if there is one
+        self._seekable = False  #: whether the open file supports random access
+        self._start_position = 0  #: position in the open file at which the first byte has been written
+
+        if not isinstance(max_queue_size, int) or max_queue_size < 1:
+            raise ValueError(f"Max queue size must be a positive integer; got {max_queue_size}")
+        self._write_behind = write_behind
+        self._max_queue_size = max_queue_size
+        self._max_queue_bytes = max_queue_bytes
+        self._queue: Optional[ByteBoundedQueue] = None  #: queue of bytes to be written by the background thread
+        self._thread: Optional[Thread] = None  #: background (write-behind) thread
+        self._background_error: Optional[BaseException] = None  #: error raised in the background thread
+
+    @staticmethod
+    def _parse_fsync_policy(fsync_policy: Union[str, int]) -> tuple[Optional[int], bool]:
+        """Check the fsync policy; return the number of bytes between fsync calls (if any) and whether to fsync at end.
+        """
+
+        if isinstance(fsync_policy, int) and not isinstance(fsync_policy, bool):
+            if fsync_policy < 1:
+                raise ValueError(f"Number of bytes between fsync calls must be positive; got {fsync_policy}")
+            return fsync_policy, True
+
+        policy = FsyncPolicy.make_converter("fsync policies")(fsync_policy)
+        return None, policy == FsyncPolicy.END
 
     @property
-    def filename(self) -> file_name_type:
-        """Name of the file being written."""
+    def filename(self) -> Optional[file_name_type]:
+        """Name of the file being written; None if the sink is a file object or a file descriptor."""
 
         return self._filename
 
+    @property
+    def sink_description(self) -> str:
+        """Description of the sink the bytes are written to, for the purpose of logging."""
+
+        return describe_sink(self._sink)
+
+    @property
+    def seekable(self) -> bool:
+        """True if the bytes which have been written can be overwritten (see 'overwrite_bytes').
+
+        Only determined once the file has been opened.
+        """
+
+        return self._seekable
+
+    @property
+    def write_behind(self) -> bool:
+        """True if the bytes are written to the file in a background thread."""
+
+        return self._write_behind
+
     @property
     def total_size(self) -> int:
-        """Number of bytes which have been written into the file."""
+        """Number of bytes which have been written into the file (or queued to be written, in write-behind mode)."""
 
         return self._total_size
 
+    @property
+    def is_open(self) -> bool:
+        """True if the file is currently open for writing."""
+
+        return self._file is not None
+
+    @property
+    def fs_block_size(self) -> int:
+        """Block size of the file system the file is written to (4096 if it cannot be determined)."""
+
+        if self._fs_block_size is None:
+            try:
+                if self._filename is not None:
+                    self._fs_block_size = os.statvfs(Path(self._filename).resolve().parent).f_bsize
+                elif isinstance(self._sink, int):
+                    self._fs_block_size = os.fstat(self._sink).st_blksize
+                else:
+                    self._fs_block_size = 4096
+            except (AttributeError, OSError):  # os.statvfs is not available on Windows
+                self._fs_block_size = 4096
+        return self._fs_block_size
+
+    @staticmethod
+    def _is_seekable(file: Any) -> bool:
+        """Check if the bytes written to an open file object can be overwritten (not the case in append mode)."""
+
+        file_mode = getattr(file, 'mode', '')
+        return file.seekable() and not (isinstance(file_mode, str) and 'a' in file_mode)
+
+    def check_seekable(self) -> bool:
+        """Check if the bytes to be written can be overwritten (see 'overwrite_bytes'), without opening the file.
+
+        Unlike 'seekable', the result is available before the file has been opened.
+        """
+
+        if self._file is not None:
+            return self._seekable
+        if self._filename is not None:
+            return not self._append  # reopened files are opened in append mode
+        if isinstance(self._sink, int):
+            try:
+                os.lseek(self._sink, 0, os.SEEK_CUR)
+            except OSError:  # e.g. a pipe
+                return False
+            return True
+        return self._is_seekable(self._sink)
+
+    def open(self) -> None:
+        """Open the file (in 'wb' or 'ab' mode, as needed) and start the background thread if required."""
+
+        if self._file is not None:
+            return
+
+        file: Any
+        if self._filename is not None:
+            mode = 'ab' if self._append else 'wb'
+            logger.debug(f"Opening file {self._filename} in '{mode}' mode")
+            file = open(self._filename, mode)
+            self._append = True  # if the file is reopened, append bytes to it
+        elif isinstance(self._sink, int):
+            logger.debug(f"Writing to file descriptor {self._sink}")
+            file = open(self._sink, 'wb', closefd=False)
+        else:
+            logger.debug(f"Writing to {self.sink_description}")
+            file = self._sink
+
+        self._file = file
+        self._owns_file = file is not self._sink
+        self._fileno = get_fileno(file)
+        self._seekable = self._is_seekable(file)
+        self._start_position = file.tell() if self._seekable else 0
+
+        if self._write_behind:
+            self._queue = ByteBoundedQueue(max_bytes=self._max_queue_bytes, max_items=self._max_queue_size)
+            self._thread = Thread(target=self._write_behind_worker, name="DLISWriteBehind", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Wait for the queued bytes to be written (in write-behind mode), synchronise if required, close the file."""
+
+        if self._file is None:
+            return
+
+        try:
+            if self._thread is not None and self._queue is not None:
+                self._queue.put(None, 0)  # sentinel - no more bytes to be written
+                self._thread.join()
+            if self._fsync_at_end:
+                self._fsync()
+        finally:
+            self._thread = None
+            self._queue = None
+            if self._owns_file:
+                self._file.close()
+            else:
+                self._file.flush()  # file object provided by the caller - not closed here
+            self._file = None
+
+        self._raise_background_error()
+
+    def __enter__(self) -> "ByteWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _raise_background_error(self) -> None:
+        """Re-raise an error which has occurred in the background thread (if any)."""
+
+        if self._background_error is not None:
+            error, self._background_error = self._background_error, None
+            raise error
+
+    def _write_behind_worker(self) -> None:
+        """Write the queued bytes to the file until the sentinel is received. Run in the background thread."""
+
+        assert self._queue is not None
+        while True:
+            parts = self._queue.get()
+            if parts is None:
+                break
+            if self._background_error is not None:
+                continue  # keep emptying the queue so that the main thread does not block
+            try:
+                self._write_to_file(parts)
+            except BaseException as exc:
+                self._background_error = exc
+
+    def _write_to_file(self, parts: Sequence[bytes_type]) -> None:
+        """Write the consecutive parts of bytes to the open file; synchronise if required by the fsync policy."""
+
+        assert self._file is not None
+
+        if len(parts) == 1:
+            self._write_fully(parts[0])
+        elif self._fileno is not None and hasattr(os, 'writev'):
+            self._file.flush()  # make sure no bytes are left in the file object's own buffer
+            self._writev(self._fileno, parts)
+        else:  # os.writev is not available on Windows; in-memory file objects have no file descriptor
+            for part in parts:
+                self._write_fully(part)
+
+        if self._fsync_every is not None:
+            self._unsynced_size += sum(memoryview(part).nbytes for part in parts)
+            if self._unsynced_size >= self._fsync_every:
+                self._fsync()
+
+    def _write_fully(self, bts: bytes_type) -> None:
+        """Write bytes to the open file object, taking care of partial writes.
+
+        Unbuffered (raw) file objects, e.g. of a pipe or a socket opened with buffering=0, can write fewer bytes
+        than requested; the rest is then written in further calls.
+        """
+
+        assert self._file is not None
+
+        view = memoryview(bts).cast('B')
+        while view.nbytes:
+            n_written = self._file.write(view)
+            if n_written is None:
+                if isinstance(self._file, io.RawIOBase):  # non-blocking raw file object, which would block
+                    raise BlockingIOError(errno.EAGAIN, f"Writing to {self.sink_description} would block")
+                return  # file object not reporting the number of written bytes
+            view = view[n_written:]
+
+    @staticmethod
+    def _writev(fd: int, parts: Sequence[bytes_type]) -> None:
+        """Write all the parts to the file using scatter/gather calls, taking care of partial writes."""
+
+        views = [memoryview(part).cast('B') for part in parts]
+        iov_max = _get_iov_max()
+        i = 0
+
+        while i < len(views):
+            batch = views[i:i + iov_max]
+            n_written = os.writev(fd, batch)
+            for view in batch:
+                if n_written < view.nbytes:
+                    views[i] = view[n_written:]  # partial write - continue from where the kernel stopped
+                    break
+                n_written -= view.nbytes
+                i += 1
+
+    def _fsync(self) -> None:
+        """Force the bytes written so far to the storage device."""
+
+        assert self._file is not None
+        self._file.flush()
+        self._unsynced_size = 0
+
+        if self._fileno is None:
+            return  # e.g. an in-memory file object
+
+        try:
+            os.fsync(self._fileno)
+        except OSError as exc:
+            if exc.errno != errno.EINVAL:
+                raise
+            logger.debug(f"Synchronisation not supported for {self.sink_description} ({exc})")  # e.g. a pipe
+
     def write_bytes(self, bts: bytes_type, size: Optional[int] = None) -> None:
-        """Write (in 'wb' or 'ab' mode, as needed) the bytes into the file.
+        """Write the bytes into the file, opening it if needed.
 
         Args:
             bts     :   Bytes to be written to the file.
@@ -45,49 +372,331 @@ class ByteWriter:
 
         Note:
             For performance purposes, the provided size is not checked against the length of the bytes.
+
+        Note:
+            In write-behind mode, mutable bytes objects (bytearray, memoryview) are copied before being queued,
+            so that the caller can reuse the underlying memory as soon as this method returns.
         """
 
-        mode = 'ab' if self._append else 'wb'
+        self._raise_background_error()
+
+        if self._file is None:
+            self.open()
 
         logger.debug("Writing bytes to file")
-        with open(self._filename, mode) as f:
-            f.write(bts)
+        if self._queue is not None:
+            self._queue.put([bts if isinstance(bts, bytes) else bytes(bts)], size or len(bts))
+        else:
+            self._write_to_file([bts])
 
-        self._append = True  # in the future calls, append bytes to the file
         self._total_size += (size or len(bts))
 
+    def write_parts(self, parts: Sequence[bytes_type], size: int) -> None:
+        """Write consecutive parts of bytes into the file in a single (scatter/gather) call, opening the file if needed.
+
+        Unlike in write_bytes, the parts are not copied in write-behind mode; they must therefore not be modified
+        after being passed to this method.
+
+        Args:
+            parts   :   Bytes-like objects to be written to the file, one after another.
+            size    :   Total number of bytes in the parts.
+        """
+
+        self._raise_background_error()
+
+        if self._file is None:
+            self.open()
+
+        logger.debug(f"Writing {len(parts)} parts of bytes to file")
+        if self._queue is not None:
+            self._queue.put(parts, size)
+        else:
+            self._write_to_file(parts)
+
+        self._total_size += size
+
+    def overwrite_bytes(self, position: int, bts: bytes_type) -> None:
+        """Replace bytes which have already been written to the file, without changing the file size.
+
+        Used e.g. to fill in values which are only known after the rest of the file has been written.
+
+        Args:
+            position    :   Position (offset from the beginning of the file) of the first byte to be replaced.
+            bts         :   Bytes to be put in the file in place of the current ones.
+        """
+
+        if self._write_behind:
+            raise RuntimeError("Overwriting bytes of the file is not supported in write-behind mode")
+
+        if self._file is None:
+            raise RuntimeError("Bytes can only be overwritten while the file is open")
+
+        if not self._seekable:
+            raise RuntimeError(f"Bytes cannot be overwritten in {self.sink_description}; it does not support "
+                               f"random access")
+
+        size = memoryview(bts).nbytes
+        if position < 0 or position + size > self._total_size:
+            raise ValueError(f"Cannot overwrite {size} bytes at position {position}; "
+                             f"only {self._total_size} bytes have been written to the file")
+
+        logger.debug(f"Overwriting {size} bytes of {self.sink_description} at position {position}")
+        self._file.flush()  # bytes kept in the file object's buffer must not be written after the replaced ones
+        if self._fileno is not None and hasattr(os, 'pwrite'):
+            view = memoryview(bts).cast('B')
+            while view.nbytes:  # continue after partial writes
+                view = view[os.pwrite(self._fileno, view, self._start_position + position + size - view.nbytes):]
+        else:  # os.pwrite is not available on Windows; in-memory file objects have no file descriptor
+            self._file.seek(self._start_position + position)
+            self._write_fully(bts)
+            self._file.seek(self._start_position + self._total_size)
+
+    def copy_file(self, source: Union[file_name_type, BinaryIO]) -> int:
+        """Append the entire contents of another file to the file, opening it if needed.
+
+        Where possible, the bytes are copied by the kernel (os.copy_file_range, or else os.sendfile), without passing
+        through the user space; some file systems can then even share the data blocks between the files.
+        Otherwise (e.g. for in-memory file objects), the bytes are read and written in chunks.
+
+        Args:
+            source  :   Path of the file whose contents should be appended, or the file open for reading
+                        (binary file object; its contents are copied from the beginning, and it is not closed).
+
+        Returns:
+            Number of copied bytes.
+        """
+
+        if self._write_behind:
+            raise RuntimeError("Copying files is not supported in write-behind mode")
+
+        self._raise_background_error()
+
+        if self._file is None:
+            self.open()
+        assert self._file is not None
+
+        self._file.flush()  # bytes kept in the file object's buffer must be written before the copied ones
+
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                n_copied = self._copy_file_contents(f)
+        else:
+            n_copied = self._copy_file_contents(source)
+
+        self._total_size += n_copied
+
+        if self._fsync_every is not None:
+            self._unsynced_size += n_copied
+            if self._unsynced_size >= self._fsync_every:
+                self._fsync()
+
+        return n_copied
+
+    def _copy_file_contents(self, source: BinaryIO) -> int:
+        """Append the contents of a file open for reading to the open file (see 'copy_file').
+
+        Returns:
+            Number of copied bytes.
+        """
+
+        assert self._file is not None
+
+        logger.debug(f"Copying the contents of {getattr(source, 'name', source)} to {self.sink_description}")
+        n_copied = 0
+        if self._fileno is not None:
+            n_copied = self._copy_in_kernel(source.fileno(), self._fileno, os.fstat(source.fileno()).st_size)
+
+        source.seek(n_copied)
+        while chunk := source.read(self.copy_chunk_size):
+            self._write_fully(chunk)
+            n_copied += len(chunk)
+
+        return n_copied
+
+    @staticmethod
+    def _copy_in_kernel(source_fd: int, target_fd: int, size: int) -> int:
+        """Copy bytes from the beginning of the source file to the current position in the target file in the kernel.
+
+        Returns:
+            Number of copied bytes; fewer than 'size' if neither os.copy_file_range nor os.sendfile
+            can be used for the files (or if they are not available on the platform).
+        """
+
+        n_copied = 0
+
+        for func_name in ('copy_file_range', 'sendfile'):
+            if n_copied >= size or not hasattr(os, func_name):
+                continue
+            try:
+                while n_copied < size:
+                    if func_name == 'copy_file_range':
+                        n = os.copy_file_range(source_fd, target_fd, size - n_copied, n_copied)
+                    else:
+                        n = os.sendfile(target_fd, source_fd, n_copied, size - n_copied)
+                    if not n:
+                        break  # the source file is shorter than expected; the rest is copied by the caller
+                    n_copied += n
+            except OSError as exc:
+                if exc.errno not in _KERNEL_COPY_UNSUPPORTED:
+                    raise
+                logger.debug(f"os.{func_name} cannot be used for copying the file ({exc})")
+
+        return n_copied
+
+    def map_region(self, size: int) -> np.ndarray:
+        """Preallocate the given number of bytes after the current end of the file and memory-map them.
+
+        The file is extended using posix_fallocate (where available), so that the file system can reserve
+        contiguous space for it, or else by truncating it to the new size. The bytes of the region are then
+        filled directly through the returned array; the mapped pages are written to the file by the operating system.
+
+        Note:
+            The bytes of the region are not included in 'total_size' until 'register_mapped_bytes' is called.
+
+        Args:
+            size    :   Number of bytes to preallocate and map.
+
+        Returns:
+            1D uint8 array (np.memmap) corresponding to the mapped region of the file.
+        """
+
+        if self._write_behind:
+            raise RuntimeError("Memory-mapping the file is not supported in write-behind mode")
+
+        if self._filename is None:
+            raise RuntimeError("Memory-mapping is only supported if the bytes are written to a file of a given name")
+
+        if self._file is None:
+            self.open()
+        assert self._file is not None
+
+        self._file.flush()  # bytes written so far must be in the file before it is extended
+
+        if not size:
+            return np.empty(0, dtype=np.uint8)  # an empty region cannot be mapped
+
+        self._preallocate(self._file.fileno(), self._total_size, size)
+        logger.debug(f"Mapping {size} bytes of file {self._filename} starting at position {self._total_size}")
+        return np.memmap(self._filename, dtype=np.uint8, mode='r+', offset=self._total_size, shape=(size,))
+
+    @staticmethod
+    def _preallocate(fd: int, start: int, size: int) -> None:
+        """Extend the file to (start + size) bytes, allocating the disk space for the bytes if possible."""
+
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, start, size)
+                return
+            except OSError as exc:
+                if exc.errno not in (errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS):
+                    raise
+                logger.debug(f"posix_fallocate not supported for the file ({exc}); truncating the file instead")
+
+        os.ftruncate(fd, start + size)  # os.posix_fallocate is not available on Windows and macOS
+
+    def register_mapped_bytes(self, size: int) -> None:
+        """Account for bytes put in the file through a memory-mapped region; synchronise if required by fsync policy.
+
+        Args:
+            size    :   Number of bytes filled in the mapped region.
+        """
+
+        self._total_size += size
+
+        if self._fsync_every is not None:
+            self._unsynced_size += size
+            if self._unsynced_size >= self._fsync_every:
+                self._fsync()  # also writes the modified pages of the memory-mapped regions of the file
+
 
 class BufferedOutput:
     """Provide an automatised buffered interface for storing bytes into a file.
 
-    Collect output bytes in a buffer of predefined size. Once buffer is full*, send the buffer contents to the
-    file writer object to be stored, and prepare a new, empty buffer to collect more bytes.
-    * the storing takes place when the space in the buffer is not enough to accept the provided sequence of bytes.
+    Collect output bytes in fixed-size memory blocks, allocated only when needed. Once the collected bytes reach
+    the specified buffer size, send the complete blocks to the file writer object to be stored, and return
+    the blocks to a pool to be reused for the following bytes.
+
+    The blocks are aligned with the file system blocks of the written file: each of them corresponds to a region
+    of the file starting at a multiple of the block size. Apart from the last one, all writes are therefore made
+    on block-aligned boundaries. The memory footprint is proportional to the amount of buffered bytes
+    (rather than to the buffer size) and never exceeds the buffer size by more than a block.
 
     Note:
         When last bytes have been passed to the buffer, it is necessary to explicitly call 'pass_bytes_to_writer'
         in order to send the bytes remaining in the buffer to the file writer.
     """
 
-    def __init__(self, size: int, writer: ByteWriter):
+    default_block_size = 2 ** 20  #: default size of a memory block, rounded to a multiple of file system block size
+
+    def __init__(self, size: int, writer: ByteWriter, block_size: Optional[int] = None):
         """Initialise BufferedOutput object.
 
         Args:
-            size    :   Size of the buffer.
-            writer  :   File writer object.
+            size        :   Size of the buffer, i.e. the number of collected bytes triggering a write to the file.
+            writer      :   File writer object.
+            block_size  :   Size of a single memory block. Rounded down to a multiple of the file system block size.
+                            If not provided, the smaller of the buffer size and 'default_block_size' is used.
         """
 
-        self._bts = bytearray(size)  #: the buffer
-        self._filled_size = 0  #: how many bytes are in the current buffer
-        self._buffer_size = size  #: size of the output buffer (needed when setting up a new one)
+        fs_block_size = writer.fs_block_size
+        block_size = min(block_size or self.default_block_size, size)
+        self._block_size = max(fs_block_size, block_size - block_size % fs_block_size)  #: size of a memory block
+
+        self._blocks: list[bytearray] = []  #: blocks containing the collected bytes, in order
+        self._first_block_start = 0  #: position in the first block where the collected bytes start
+        self._last_block_end = 0  #: position in the last block where the collected bytes end
+        self._pool: list[bytearray] = []  #: empty blocks ready for reuse
+        self._max_pool_size = -(-size // self._block_size) + 1  #: max number of blocks kept for reuse
+
+        self._filled_size = 0  #: how many bytes are in the buffer
+        self._buffer_size = size  #: number of collected bytes triggering a write to the file
+        self._allocated_size = 0  #: number of bytes currently allocated for the blocks (in use or in the pool)
+        self._peak_size = 0  #: max number of bytes allocated for the blocks at any point
 
         self._writer = writer  #: file writer object
 
+    @property
+    def position(self) -> int:
+        """Position in the file at which the next added bytes will be written."""
+
+        return self._writer.total_size + self._filled_size
+
+    @property
+    def block_size(self) -> int:
+        """Size of a single memory block."""
+
+        return self._block_size
+
+    @property
+    def peak_size(self) -> int:
+        """Maximal number of bytes allocated for the buffer at any point."""
+
+        return self._peak_size
+
+    def _start_new_block(self) -> None:
+        """Take a block from the pool (or allocate a new one) and append it to the blocks in use."""
+
+        if self._pool:
+            block = self._pool.pop()
+        else:
+            block = bytearray(self._block_size)
+            self._allocated_size += self._block_size
+            self._peak_size = max(self._peak_size, self._allocated_size)
+
+        if not self._blocks:
+            # the first block corresponds to the file region which includes the current end of the file
+            self._first_block_start = self._writer.total_size % self._block_size
+            self._last_block_end = self._first_block_start
+        else:
+            self._last_block_end = 0
+
+        self._blocks.append(block)
+
     def add_bytes(self, bts: bytes_type, size: Optional[int] = None) -> None:
-        """Add bytes to the current output buffer.
+        """Add bytes to the output buffer.
 
-        If the bytes would not fit in the current output buffer, send the currently kept bytes to the file writer,
-        set up a clean output buffer, and add the new bytes there.
+        The bytes are copied into the current memory block and - if they do not fit there - into new blocks.
+        If the number of collected bytes reaches the buffer size, the complete blocks are sent to the file writer.
 
         Args:
             bts     :   Bytes to be added to the output buffer.
@@ -98,44 +707,319 @@ class BufferedOutput:
         """
 
         size = size or len(bts)
-        new_size = self._filled_size + size
+        view = memoryview(bts)
+        pos = 0
+
+        while pos < size:
+            if not self._blocks or self._last_block_end == self._block_size:
+                self._start_new_block()
+
+            n = min(size - pos, self._block_size - self._last_block_end)
+            self._blocks[-1][self._last_block_end:self._last_block_end + n] = view[pos:pos + n]
+            self._last_block_end += n
+            self._filled_size += n
+            pos += n
+
+            if self._filled_size >= self._buffer_size:
+                logger.debug(f"Output buffer full; current total output size is {self._writer.total_size}")
+                self._write_blocks(complete_only=True)
+
+    def add_parts(self, parts: Sequence[bytes_type], size: int) -> None:
+        """Add consecutive parts of bytes to the output buffer.
+
+        Args:
+            parts   :   Bytes-like objects to be added to the output buffer, one after another.
+            size    :   Total number of bytes in the parts (not used; kept for compatibility with VectoredOutput).
+        """
+
+        for part in parts:
+            self.add_bytes(part)
+
+    def _write_blocks(self, complete_only: bool = False) -> None:
+        """Send the bytes from the blocks to the file writer; return the written blocks to the pool.
+
+        Args:
+            complete_only   :   If True, the last block is only written if it is complete, so that all writes
+                                end on block-aligned boundaries. Otherwise, all collected bytes are written.
+        """
+
+        n_blocks = len(self._blocks)
+        if complete_only and self._last_block_end < self._block_size:
+            n_blocks -= 1
 
-        if new_size > self._buffer_size:
-            self.pass_bytes_to_writer()  # also sets up a new output buffer
-            logger.debug(f"Making new output chunk; current total output size is {self._writer.total_size}")
-            new_size = size
+        for i in range(n_blocks):
+            start = self._first_block_start if i == 0 else 0
+            end = self._last_block_end if i == len(self._blocks) - 1 else self._block_size
+            self._writer.write_bytes(memoryview(self._blocks[i])[start:end], end - start)
+            self._filled_size -= (end - start)
 
-        self._bts[self._filled_size:new_size] = bts
-        self._filled_size = new_size
+        for block in self._blocks[:n_blocks]:
+            if len(self._pool) < self._max_pool_size:
+                self._pool.append(block)
+            else:
+                self._allocated_size -= self._block_size
+
+        del self._blocks[:n_blocks]
+        if self._blocks:
+            self._first_block_start = 0  # the remaining (incomplete) block starts at a block-aligned position
 
     def pass_bytes_to_writer(self) -> None:
-        """Send the currently kept bytes to the file writer. Set up a new, empty output buffer."""
+        """Send all the currently kept bytes to the file writer. Keep the emptied blocks for future use."""
+
+        self._write_blocks(complete_only=False)
 
-        self._writer.write_bytes(self._bts[:self._filled_size], self._filled_size)
 
-        # set up a new output buffer
-        self._bts = bytearray(self._buffer_size)
-        self._filled_size = 0
+class VectoredOutput:
+    """Collect references to output bytes and pass them to the file writer in scatter/gather batches.
+
+    Unlike BufferedOutput, the bytes are not copied: the output only keeps the added bytes objects
+    (e.g. headers and memoryviews of logical record bytes or of assembled Frame Data chunks) until their total size
+    reaches the specified buffer size. They are then passed to the file writer, which writes them with os.writev.
+
+    Note:
+        The added bytes objects must not be modified afterwards.
+
+    Note:
+        When last bytes have been passed to the buffer, it is necessary to explicitly call 'pass_bytes_to_writer'
+        in order to send the bytes remaining in the buffer to the file writer.
+    """
+
+    def __init__(self, size: int, writer: ByteWriter):
+        """Initialise VectoredOutput object.
+
+        Args:
+            size        :   Total size of the referenced bytes triggering a write to the file.
+            writer      :   File writer object.
+        """
+
+        self._parts: list[bytes_type] = []  #: referenced bytes objects, in order
+        self._filled_size = 0  #: total size of the referenced bytes
+        self._buffer_size = size  #: total size of the referenced bytes triggering a write to the file
+        self._peak_size = 0  #: max total size of the referenced bytes at any point
+
+        self._writer = writer  #: file writer object
+
+    @property
+    def position(self) -> int:
+        """Position in the file at which the next added bytes will be written."""
+
+        return self._writer.total_size + self._filled_size
+
+    @property
+    def peak_size(self) -> int:
+        """Maximal number of bytes referenced by the output at any point."""
+
+        return self._peak_size
+
+    def add_bytes(self, bts: bytes_type, size: Optional[int] = None) -> None:
+        """Add bytes to the output.
+
+        Args:
+            bts     :   Bytes to be added to the output.
+            size    :   Number of bytes to be added. If not provided, it is calculated from bts.
+        """
+
+        self.add_parts([bts], size or memoryview(bts).nbytes)
+
+    def add_parts(self, parts: Sequence[bytes_type], size: int) -> None:
+        """Add consecutive parts of bytes to the output.
+
+        Args:
+            parts   :   Bytes-like objects to be added to the output, one after another.
+            size    :   Total number of bytes in the parts.
+        """
+
+        self._parts.extend(parts)
+        self._filled_size += size
+        self._peak_size = max(self._peak_size, self._filled_size)
+
+        if self._filled_size >= self._buffer_size:
+            logger.debug(f"Output buffer full; current total output size is {self._writer.total_size}")
+            self.pass_bytes_to_writer()
+
+    def pass_bytes_to_writer(self) -> None:
+        """Send all the currently referenced bytes to the file writer."""
+
+        if self._parts:
+            self._writer.write_parts(self._parts, self._filled_size)
+            self._parts = []  # new list - the old one might still be used by the writer (in write-behind mode)
+            self._filled_size = 0
+
+
+class MmapOutput:
+    """Put the output bytes directly in their final location in the file, through a memory-mapped region.
+
+    The number of bytes to be added must be known in advance (see FilePlanner). The region following the bytes
+    written to the file so far is preallocated and memory-mapped (see ByteWriter.map_region).
+    Added bytes are copied straight into the mapped region and Frame Data visible records can be assembled
+    in place in the regions returned by 'reserve'. No output buffer is allocated; buffering the bytes
+    and writing them to the storage device is left to the operating system's page cache.
+
+    Since the regions returned by 'reserve' are disjoint, they can also be filled independently of each other.
+
+    Note:
+        When last bytes have been added, it is necessary to explicitly call 'pass_bytes_to_writer'
+        in order to release the memory map.
+    """
+
+    def __init__(self, size: int, writer: ByteWriter):
+        """Initialise MmapOutput object.
+
+        Args:
+            size        :   Exact number of bytes to be added to the output.
+            writer      :   File writer object.
+        """
+
+        self._map: Optional[np.ndarray] = writer.map_region(size)  #: memory-mapped region of the file
+        self._size = size  #: size of the mapped region
+        self._position = 0  #: position in the mapped region up to which the bytes have been reserved
+
+        self._writer = writer  #: file writer object
+
+    @property
+    def position(self) -> int:
+        """Position in the file at which the next added bytes will be written."""
+
+        return self._writer.total_size  # reserved bytes are included in the writer's total size
+
+    @property
+    def peak_size(self) -> int:
+        """Maximal number of bytes allocated for the output at any point (always 0; no buffer is used)."""
+
+        return 0
+
+    def reserve(self, size: int) -> np.ndarray:
+        """Reserve the next bytes of the mapped region, to be filled by the caller.
+
+        Args:
+            size    :   Number of bytes to reserve.
+
+        Returns:
+            1D uint8 array corresponding to the reserved part of the file.
+        """
+
+        if self._map is None:
+            raise RuntimeError("The memory map has already been released")
+
+        if self._position + size > self._size:
+            raise RuntimeError(f"Cannot reserve {size} bytes; only {self._size - self._position} bytes "
+                               f"of the mapped region are left")
+
+        region = self._map[self._position:self._position + size]
+        self._position += size
+        self._writer.register_mapped_bytes(size)
+        return region
+
+    def add_bytes(self, bts: bytes_type, size: Optional[int] = None) -> None:
+        """Copy bytes to the next position in the mapped region.
+
+        Args:
+            bts     :   Bytes to be added to the output.
+            size    :   Number of bytes to be added. If not provided, it is calculated from bts.
+        """
+
+        self.add_parts([bts], size or memoryview(bts).nbytes)
+
+    def add_parts(self, parts: Sequence[bytes_type], size: int) -> None:
+        """Copy consecutive parts of bytes to the next position in the mapped region.
+
+        Args:
+            parts   :   Bytes-like objects to be added to the output, one after another.
+            size    :   Total number of bytes in the parts.
+        """
+
+        region = self.reserve(size)
+        pos = 0
+        for part in parts:
+            part_array = np.frombuffer(part, dtype=np.uint8)
+            region[pos:pos + part_array.size] = part_array
+            pos += part_array.size
+
+    def pass_bytes_to_writer(self) -> None:
+        """Check that the entire mapped region has been filled and release the memory map."""
+
+        if self._map is None:
+            return
+
+        if self._position != self._size:
+            raise RuntimeError(f"Only {self._position} of the {self._size} bytes of the mapped region "
+                               f"have been filled")
+
+        self._map = None  # the file is unmapped when the array (and all its views) are garbage-collected
 
 
 class DLISWriter:
     """Create a DLIS file given data and structure information (specification of logical records)."""
 
-    def __init__(self, filename: file_name_type, visible_record_length: int = 8192):
+    default_output_chunk_size = 2 ** 26  #: number of bytes collected in the output buffer before writing them
+    default_pipeline_queue_bytes = 2 ** 27  #: default size limit of each of the queues of the pipelined mode
+
+    def __init__(self, filename: sink_type, visible_record_length: int = 8192,
+                 pack_visible_records: bool = False, write_behind: bool = False,
+                 fsync_policy: Union[str, int] = FsyncPolicy.NEVER, output_mode: str = OutputMode.BUFFERED,
+                 n_encoding_workers: Optional[int] = None, max_chunks_in_flight: Optional[int] = None,
+                 executor_type: str = ExecutorType.THREAD, prefetch_bytes: Optional[int] = None,
+                 write_behind_queue_bytes: Optional[int] = None, frame_data_cache: Optional[FrameDataCache] = None):
         """Initialise DLISFile object.
 
         Args:
             filename                :   Name of the file to be created. Note: at this point, no file name / directory
                                         checks (file already exists / directory write access / etc.) are performed.
+                                        Alternatively, a binary file object or a file descriptor the bytes should
+                                        be written to (see ByteWriter).
 
             visible_record_length   :   Maximum allowed length of visible records (physical file units) in the created
                                         file. Expressed in bytes.
+            pack_visible_records    :   If True, put as many logical record segments in each visible record as allowed
+                                        by the visible record length. Otherwise, each segment is wrapped in a separate
+                                        visible record.
+            write_behind            :   If True, write the bytes to the file in a background thread, so that creating
+                                        the next bytes overlaps with writing the previous ones.
+            fsync_policy            :   When the written bytes should be forced to the storage device: 'never',
+                                        'end' (after writing all the bytes), or a positive integer N - every N bytes.
+            output_mode             :   'buffered' - copy the created bytes to an output buffer, write them when it is
+                                        full (see BufferedOutput); 'vectored' - pass references to the created bytes
+                                        to the file using scatter/gather calls, without copying (see VectoredOutput);
+                                        'mmap' - preallocate the file and put the bytes directly in a memory-mapped
+                                        region of it (see MmapOutput). Cannot be combined with write_behind.
+            n_encoding_workers      :   Number of threads or processes encoding the frame data chunks in parallel
+                                        (see EncodingPool). If not provided, the chunks are encoded one by one
+                                        in the main thread.
+            max_chunks_in_flight    :   Max number of chunks being encoded in parallel or waiting to be written.
+                                        If not provided, twice the number of encoding workers is used.
+            executor_type           :   'thread' or 'process'; type of the pool encoding the chunks.
+            prefetch_bytes          :   If provided, the input data chunks are loaded in a background (reader) thread,
+                                        which keeps up to this number of bytes of chunks ready to be encoded.
+            write_behind_queue_bytes:   Max number of bytes waiting to be written by the write-behind thread.
+                                        If not provided, only the number of waiting writes is limited.
+            frame_data_cache        :   If provided, the visible records of the Frame Data of each frame are taken
+                                        from this cache if available there (instead of being encoded), or else
+                                        stored in it after being encoded.
         """
 
-        self._byte_writer = ByteWriter(filename)
+        self._output_mode = OutputMode.make_converter("output modes")(output_mode)  #: how bytes are passed to file
+        if self._output_mode == OutputMode.MMAP and write_behind:
+            raise ValueError("Write-behind cannot be used with 'mmap' output mode")
+        if self._output_mode == OutputMode.MMAP and not is_path(filename):
+            raise ValueError("'mmap' output mode can only be used for writing to a file of a given name")
+
+        self._check_queue_bytes(prefetch_bytes, "Prefetch bytes")
+        self._check_queue_bytes(write_behind_queue_bytes, "Write-behind queue bytes")
+        self._prefetch_bytes = prefetch_bytes  #: max bytes of input chunks loaded in advance (if prefetching)
+
+        self._byte_writer = ByteWriter(filename, fsync_policy=fsync_policy, write_behind=write_behind,
+                                       max_queue_bytes=write_behind_queue_bytes)
+
+        self._encoding_pool: Optional[EncodingPool] = None  #: pool encoding frame data in parallel (if requested)
+        if n_encoding_workers is not None:
+            self._encoding_pool = EncodingPool(n_encoding_workers, max_chunks_in_flight=max_chunks_in_flight,
+                                               executor_type=executor_type)
+
+        self._frame_data_cache = frame_data_cache  #: cache of visible records of Frame Data (if used)
 
         self._check_visible_record_length(visible_record_length)
         self._visible_record_length: int = visible_record_length  #: Maximum allowed visible record length, in bytes
+        self._pack_visible_records = pack_visible_records  #: Whether to put multiple LR segments in a visible record
 
         # format version is a required part of each visible record and is fixed for a given version of the standard
         self._fmt_version = RepresentationCode.USHORT.convert(255) + RepresentationCode.USHORT.convert(1)
@@ -144,6 +1028,19 @@ class DLISWriter:
         # SUL must be the first element of the file
         self._sul_written = False
 
+    @staticmethod
+    def _check_queue_bytes(value: Optional[int], label: str) -> None:
+        """Check that the size limit of a pipeline queue is None or a positive integer."""
+
+        if value is None:
+            return
+
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise TypeError(f"{label} must be an integer; got {type(value)}: {value}")
+
+        if value < 1:
+            raise ValueError(f"{label} must be positive; got {value}")
+
     @staticmethod
     def _check_visible_record_length(vrl: int) -> None:
         """Check the type and value of visible record length against several criteria."""
@@ -177,12 +1074,55 @@ class DLISWriter:
         if size is None:
             size = len(body)
 
-        size += 4  # 4 header bytes will be added
+        return self._make_visible_record_header(size) + body
+
+    def _make_visible_record_header(self, body_size: int) -> bytes:
+        """Create the header of a visible record with a body of the given size."""
+
+        size = body_size + 4  # 4 header bytes will be added
 
         if size > self._visible_record_length:
             raise ValueError(f"VR length is too large; got {size}, max is {self._visible_record_length}")
 
-        return RepresentationCode.UNORM.convert(size) + self._fmt_version + body
+        return RepresentationCode.UNORM.convert(size) + self._fmt_version
+
+    def _make_packed_visible_records(self, segments: Iterable[tuple[list[bytes_type], int]],
+                                     segment_offsets: Optional[list[int]] = None) -> Generator:
+        """Wrap logical record segments in visible records, putting in each VR as many segments as fit in it.
+
+        RP66 allows a visible record to contain any number of (whole) logical record segments, as long as the
+        visible record length limit is respected. Packing the segments reduces the number of visible record headers,
+        which is particularly relevant for short logical records, such as FrameData rows of narrow frames.
+
+        Args:
+            segments        :   Iterable of (segment parts, segment size) tuples;
+                                see LogicalRecordBytes.make_segments_parts.
+            segment_offsets :   If provided, the offset of each segment from the beginning of the first visible record
+                                is appended to this list.
+
+        Yields:
+            (parts, size) tuples of consecutive visible records; the parts include the visible record header.
+        """
+
+        max_body_size = self._visible_record_length - 4  # 4 bytes reserved for VR header
+        body_parts: list[bytes_type] = []
+        body_size = 0
+        offset = 0  # offset of the current visible record
+
+        for segment_parts, segment_size in segments:
+            if body_size + segment_size > max_body_size:
+                yield [self._make_visible_record_header(body_size), *body_parts], body_size + 4
+                offset += body_size + 4
+                body_parts = []
+                body_size = 0
+
+            if segment_offsets is not None:
+                segment_offsets.append(offset + 4 + body_size)
+            body_parts.extend(segment_parts)
+            body_size += segment_size
+
+        if body_parts:
+            yield [self._make_visible_record_header(body_size), *body_parts], body_size + 4
 
     def _check_output_chunk_size(self, output_chunk_size: number_type) -> None:
         """Check output chunk size type (integer or float with zero decimal part) and value (>= max VR length)."""
@@ -214,33 +1154,343 @@ class DLISWriter:
         Note: write_storage_unit_label MUST be called BEFORE calling this method.
         Otherwise, a RuntimeError is raised.
 
+        The file is closed (and synchronised with the storage device, if required by the fsync policy)
+        after writing the logical records, also if an error occurs.
+
+        Args:
+            logical_records     :   Logical records to become part of the file.
+            output_chunk_size   :   Size of the buffers accumulating file bytes before file write action is called.
+        """
+
+        for _ in self.iter_write_logical_records(logical_records, output_chunk_size):
+            pass
+
+    def iter_write_logical_records(self, logical_records: Sequence, output_chunk_size: Optional[number_type]
+                                   ) -> Generator[None, None, None]:
+        """Write the provided logical records to the file step by step, pausing after each step.
+
+        A step consists in passing a logical record or a chunk of Frame Data visible records to the output.
+        Between the steps, the caller can e.g. take the bytes which have been passed to the sink so far
+        (see DLISFile.iter_bytes). Apart from that, this works as 'write_logical_records': the file is closed
+        when the generator is exhausted, closed, or when an error occurs.
+
         Args:
             logical_records     :   Logical records to become part of the file.
             output_chunk_size   :   Size of the buffers accumulating file bytes before file write action is called.
+
+        Yields:
+            None, after each step.
         """
 
         if not self._sul_written:
             raise RuntimeError("Storage Unit Label absent from the file; "
                                "add it calling DLISWriter.write_storage_unit_label")
 
+        n_records = len(logical_records)  # number of all logical records, including the FrameData of each frame
+
+        try:
+            output = yield from self._write_logical_records(logical_records, output_chunk_size)
+        finally:
+            if self._encoding_pool is not None:
+                self._encoding_pool.shutdown()
+            self._byte_writer.close()
+
+        # summarise
+        logger.info(f'{n_records} written to {self._byte_writer.sink_description}')
+        logger.info(f"Total file size is {self._byte_writer.total_size} bytes")
+        logger.info(f"Peak memory used by the output buffer: {output.peak_size} bytes")
+        if self._frame_data_cache is not None:
+            stats = self._frame_data_cache.statistics
+            logger.info(f"Frame data cache: {stats.hits} hits, {stats.misses} misses, "
+                        f"{stats.bytes_reused} bytes reused, {stats.evictions} entries evicted")
+
+    def _compute_output_size(self, logical_records: Sequence) -> int:
+        """Compute the exact number of bytes of the visible records created for the logical records."""
+
+        planner = FilePlanner(self._visible_record_length, pack_visible_records=self._pack_visible_records)
+        return planner.plan_file([logical_records], sul_size=0).size
+
+    def _make_output(self, logical_records: Sequence, output_chunk_size: Optional[number_type]
+                     ) -> Union[BufferedOutput, VectoredOutput, MmapOutput]:
+        """Create the object collecting the bytes of the visible records, as required by the output mode."""
+
         # prepare BufferedOutput object - temporarily keep added bytes, store them in the file when buffer is full
-        output_chunk_size = output_chunk_size or 2 ** 32
+        output_chunk_size = output_chunk_size or self.default_output_chunk_size
         self._check_output_chunk_size(output_chunk_size)
         logger.debug(f"Output file will be produced in chunks of max size {output_chunk_size} bytes")
-        output = BufferedOutput(int(output_chunk_size), self._byte_writer)
+
+        if self._output_mode == OutputMode.VECTORED:
+            return VectoredOutput(int(output_chunk_size), self._byte_writer)
+        if self._output_mode == OutputMode.MMAP:
+            return MmapOutput(self._compute_output_size(logical_records), self._byte_writer)
+        return BufferedOutput(int(output_chunk_size), self._byte_writer)
+
+    @staticmethod
+    def _add_frame_data_chunk(output: Union[BufferedOutput, VectoredOutput, MmapOutput],
+                              assembler: FrameDataAssembler, buffer: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """Assemble visible records of a chunk of encoded FrameData rows and pass them to the output.
+
+        Returns:
+            1D uint8 array with the bytes of the assembled visible records.
+        """
+
+        if isinstance(output, MmapOutput):
+            # assemble the visible records directly in their final location in the file
+            return assembler.assemble(buffer, offsets, out=output.reserve(assembler.compute_chunk_size(offsets)))
+
+        visible_records = assembler.assemble(buffer, offsets)
+        output.add_bytes(visible_records.data)
+        return visible_records
+
+    def _encode_multi_frame_data(self, output: Union[BufferedOutput, VectoredOutput, MmapOutput],
+                                 assembler: FrameDataAssembler, multi_frame_data: MultiFrameData,
+                                 cache_entry: Optional[CacheEntryWriter] = None,
+                                 statistics: Optional[FrameStatistics] = None) -> Generator[int, None, None]:
+        """Encode the Frame Data of a frame chunk by chunk and pass their visible records to the output.
+
+        Args:
+            output              :   Object collecting the bytes of the visible records.
+            assembler           :   Object creating the visible records of the encoded chunks.
+            multi_frame_data    :   Frame and source data the Frame Data are created from.
+            cache_entry         :   If provided, the bytes of the visible records are also written to this entry
+                                    of the frame data cache.
+            statistics          :   If provided, the data chunks are included in these statistics as they are encoded.
+
+        Yields:
+            Number of rows (FrameData records) passed to the output in each step.
+        """
+
+        plan = FramePlan(multi_frame_data, assembler)
+        logger.debug(f"Frame plan compiled:\n{plan.describe()}")
+        if promoted := plan.promoted_channels:
+            logger.info(f"Values of channel(s) {', '.join(c.name for c in promoted)} of {plan.frame} "
+                        f"are cast to larger data types when writing")
+
+        chunks = multi_frame_data.iterate_encoded_chunks(pool=self._encoding_pool,
+                                                         prefetch_bytes=self._prefetch_bytes, plan=plan,
+                                                         statistics=statistics)
+        for buffer, offsets in chunks:
+            visible_records = self._add_frame_data_chunk(output, assembler, buffer, offsets)
+            if cache_entry is not None:
+                cache_entry.write(visible_records.data)
+            yield offsets.size - 1
+
+        multi_frame_data.record_absent_value_counts(plan.encoder)
+        if cache_entry is not None:
+            cache_entry.substitution_counts = plan.encoder.substitution_counts
+
+    def _add_cached_frame_data(self, output: Union[BufferedOutput, VectoredOutput, MmapOutput],
+                               entry: CachedFrameData) -> None:
+        """Pass the bytes of the visible records of Frame Data, taken from a frame data cache entry, to the output."""
+
+        if isinstance(output, MmapOutput):
+            entry.file.readinto(output.reserve(entry.size).data)
+        elif self._byte_writer.write_behind:
+            while chunk := entry.file.read(ByteWriter.copy_chunk_size):
+                output.add_bytes(chunk)
+        else:
+            output.pass_bytes_to_writer()  # the bytes collected so far must be written before the copied ones
+            self._byte_writer.copy_file(entry.file)
+
+    def _write_multi_frame_data(self, output: Union[BufferedOutput, VectoredOutput, MmapOutput],
+                                assembler: FrameDataAssembler, multi_frame_data: MultiFrameData,
+                                statistics: Optional[FrameStatistics] = None) -> Generator[int, None, None]:
+        """Pass the visible records of the Frame Data of a frame to the output, taking them from the cache if possible.
+
+        If a frame data cache is used and has no entry for the frame and data, the bytes of the encoded Frame Data
+        are stored in it, together with the numbers of missing samples replaced with absent values; these numbers
+        are set in the channels when the Frame Data are taken from the cache.
+
+        If statistics are provided, the data are included in them: while being encoded or - if the Frame Data
+        are taken from the cache - in a separate pass over the data.
+
+        Yields:
+            Number of rows (FrameData records) passed to the output in each step.
+        """
+
+        if self._frame_data_cache is None:
+            yield from self._encode_multi_frame_data(output, assembler, multi_frame_data, statistics=statistics)
+            return
+
+        cache = self._frame_data_cache
+        key = cache.make_key(multi_frame_data, self._visible_record_length, self._pack_visible_records)
+
+        cached_entry = cache.get(key)
+        if cached_entry is not None:
+            with cached_entry:  # the open file remains readable if the entry is evicted in the meantime
+                self._add_cached_frame_data(output, cached_entry)
+            encoder = multi_frame_data.make_encoder()
+            encoder.add_substitution_counts(cached_entry.substitution_counts)
+            multi_frame_data.record_absent_value_counts(encoder)
+            if statistics is not None:
+                multi_frame_data.scan_statistics(statistics)
+            yield len(multi_frame_data)
+            return
+
+        cache_entry = cache.open_entry(key)
+        try:
+            yield from self._encode_multi_frame_data(output, assembler, multi_frame_data, cache_entry=cache_entry,
+                                                     statistics=statistics)
+        except BaseException:
+            cache_entry.discard()  # also if the writing has been interrupted (GeneratorExit)
+            raise
+        cache_entry.commit()
+
+    def _make_frame_statistics(self, multi_frame_data: MultiFrameData) -> Optional[FrameStatistics]:
+        """Create the statistics computing the channel ranges of a frame from its data (if required).
+
+        Returns:
+            FrameStatistics object, or None if the frame has no channels whose ranges should be computed.
+        """
+
+        if not multi_frame_data.range_channels:
+            return None
+
+        self.check_channel_ranges_supported()
+
+        return multi_frame_data.make_statistics()
+
+    def check_channel_ranges_supported(self) -> None:
+        """Raise a ValueError if the channel ranges computed from the data cannot be filled in the written file.
+
+        Filling in the ranges requires overwriting the Channel sets, i.e. an output supporting random access
+        and no write-behind. The check can be made before the file is opened (see ByteWriter.check_seekable).
+        """
+
+        if self._byte_writer.write_behind or not self._byte_writer.check_seekable():
+            raise ValueError(f"Cannot compute the channel ranges when writing to {self._byte_writer.sink_description}; "
+                             f"filling them in requires an output supporting random access (e.g. a file or io.BytesIO) "
+                             f"and no write-behind")
+
+    def _write_frame_data(self, output: Union[BufferedOutput, VectoredOutput, MmapOutput],
+                          assembler: FrameDataAssembler, multi_frame_data: MultiFrameData
+                          ) -> Generator[int, None, None]:
+        """Pass the visible records of the Frame Data of a frame to the output (see '_write_multi_frame_data').
+
+        If the ranges of the frame's channels are to be computed (see MultiFrameData.reserve_channel_ranges),
+        they are determined from the data on the way and set in the channels once all Frame Data have been written.
+
+        Yields:
+            Number of rows (FrameData records) passed to the output in each step.
+        """
+
+        statistics = self._make_frame_statistics(multi_frame_data)
+        yield from self._write_multi_frame_data(output, assembler, multi_frame_data, statistics=statistics)
+        if statistics is not None:
+            multi_frame_data.fill_in_channel_ranges(statistics)
+
+    def _pass_segments_to_output(self, output: Union[BufferedOutput, VectoredOutput, MmapOutput],
+                                 segments: list[tuple[list[bytes_type], int]]) -> list[int]:
+        """Wrap logical record segments in visible records and pass them to the output.
+
+        Returns:
+            Positions of the segments in the file.
+        """
+
+        position = output.position
+        offsets: list[int] = []
+
+        if self._pack_visible_records:
+            for visible_record_parts, visible_record_size in self._make_packed_visible_records(segments, offsets):
+                output.add_parts(visible_record_parts, visible_record_size)
+        else:
+            offset = 0
+            for segment_parts, segment_size in segments:
+                # wrap each segment's bytes in a separate visible record and write the VR to the file
+                output.add_parts([self._make_visible_record_header(segment_size), *segment_parts], segment_size + 4)
+                offsets.append(offset + 4)
+                offset += segment_size + 4
+
+        return [position + offset for offset in offsets]
+
+    def _rewrite_channel_sets(self, channel_sets: list[tuple[ChannelSet, list[tuple[int, int]]]]) -> None:
+        """Create the logical record segments of Channel sets again and put them in place of the ones written before.
+
+        Args:
+            channel_sets    :   Channel sets with the (position, size) of each of their segments in the file.
+        """
+
+        max_lr_segment_size = self._visible_record_length - 8
+
+        for channel_set, written_segments in channel_sets:
+            segments = list(channel_set.represent_as_bytes().make_segments_parts(max_lr_segment_size))
+            if [size for _, size in segments] != [size for _, size in written_segments]:
+                raise RuntimeError(f"Size of {channel_set} changed after the channel ranges were filled in; "
+                                   f"the values must have the same representation as the placeholders")
+            for (parts, _), (position, _) in zip(segments, written_segments):
+                self._byte_writer.overwrite_bytes(position, b''.join(parts))
+
+    def _write_logical_records(self, logical_records: Sequence, output_chunk_size: Optional[number_type]
+                               ) -> Generator[None, None, Union[BufferedOutput, VectoredOutput, MmapOutput]]:
+        """Create visible records of the provided logical records and pass them to the byte writer.
+
+        Yields:
+            None, after each logical record or chunk of Frame Data is passed to the output.
+
+        Returns:
+            The output object used to collect the bytes.
+        """
+
+        n_records = len(logical_records)  # number of all logical records, including the FrameData of each frame
+        if self._output_mode == OutputMode.MMAP:
+            # iterated twice: to compute the size of the mapped region, and to create the bytes
+            logical_records = list(logical_records)
+
+        output = self._make_output(logical_records, output_chunk_size)
 
         # max allowed size of an LR segment body; 4 bytes reserved for VR header and another 4 for LR segment header
         max_lr_segment_size = self._visible_record_length - 8
 
+        # FrameData are processed chunk-wise, using precomputed layouts of the visible records and LR segments
+        assembler = FrameDataAssembler(self._visible_record_length, self._fmt_version, pack=self._pack_visible_records)
+
+        # LR segments waiting to be wrapped in visible records; kept as lists of parts (headers and memoryviews
+        # of the logical record bytes), so that the bytes are not copied before they are passed to the output
+        segments: list[tuple[list[bytes_type], int]] = []
+
+        # Channel sets with the (position, size) of their segments in the file, so that the channel ranges computed
+        # from the data can be filled in at the end (see MultiFrameData.reserve_channel_ranges)
+        channel_sets: list[tuple[ChannelSet, list[tuple[int, int]]]] = []
+        pending_channel_sets: list[tuple[ChannelSet, int, int]] = []  # with segments in 'segments': first, number
+        ranges_computed = False
+
+        def flush_segments() -> None:
+            """Wrap the collected segments in visible records and pass them to the output buffer."""
+
+            positions = self._pass_segments_to_output(output, segments)
+            for channel_set, first, n in pending_channel_sets:
+                channel_sets.append((channel_set, [(positions[i], segments[i][1]) for i in range(first, first + n)]))
+            pending_channel_sets.clear()
+            segments.clear()
+
         # loop through the logical records, transform them and write them to the file
         logger.info("Creating & writing visible records of the DLIS...")
-        for lr in progressbar(logical_records, max_value=len(logical_records)):
-            # represent a logical record as bytes; split it segments as needed
-            for segment, segment_size in lr.represent_as_bytes().make_segments(max_lr_segment_size):
-                # wrap each segment's bytes in a separate visible record and write the VR to the file
-                output.add_bytes(self._make_visible_record(segment, segment_size))
+        bar = ProgressBar(max_value=n_records)
+        n_done = 0
+        for lr in logical_records:
+            if isinstance(lr, MultiFrameData):
+                flush_segments()  # visible records are not shared between FrameData chunks and other records
+                for n_rows in self._write_frame_data(output, assembler, lr):
+                    n_done += n_rows
+                    bar.update(n_done)
+                    yield
+                ranges_computed = ranges_computed or bool(lr.range_channels)
+            else:
+                # represent a logical record as bytes; split it segments as needed
+                lr_segments = list(lr.represent_as_bytes().make_segments_parts(max_lr_segment_size))
+                if isinstance(lr, ChannelSet):
+                    pending_channel_sets.append((lr, len(segments), len(lr_segments)))
+                segments.extend(lr_segments)
+                if not self._pack_visible_records:
+                    flush_segments()
+                n_done += 1
+                bar.update(n_done)
+                yield
+        flush_segments()
+        bar.finish()
         output.pass_bytes_to_writer()  # pass the remaining bytes kept in the output buffer (not full atm) to the writer
 
-        # summarise
-        logger.info(f'{len(logical_records)} written to DLIS file at {Path(self._byte_writer.filename).resolve()}')
-        logger.info(f"Total file size is {self._byte_writer.total_size} bytes")
+        if ranges_computed:
+            self._rewrite_channel_sets(channel_sets)
+
+        return output
@@ -94,9 +94,12 @@ class Attribute:
 
     @value.setter
     def value(self, val: Any) -> None:
-        """Set a new value of the attribute. Use the provided converter (if any) to transform/validate the value."""
+        """Set a new value of the attribute. Use the provided converter (if any) to transform/validate the value.
 
-        self._value = self.convert_value(val)
+        Setting None unsets the value (it is then not written to the file).
+        """
+
+        self._value = None if val is None else self.convert_value(val)
 
     @property
     def representation_code(self) -> Union[RepresentationCode, None]:
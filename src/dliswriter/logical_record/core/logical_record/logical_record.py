@@ -4,6 +4,7 @@ from typing import Union, Any
 
 from dliswriter.logical_record.core.logical_record.logical_record_bytes import LogicalRecordBytes
 from dliswriter.utils.internal.internal_enums import RepresentationCode, EFLRType, IFLRType
+from dliswriter.utils.internal.types import bytes_type
 
 
 logger = logging.getLogger(__name__)
@@ -51,7 +52,7 @@ class LogicalRecord(metaclass=LRMeta):
         pass
 
     @abstractmethod
-    def _make_body_bytes(self) -> bytes:
+    def _make_body_bytes(self) -> bytes_type:
         """Create bytes describing the body of this LogicalRecord.
 
         See the implementations subclasses: EFLR, FrameData (IFLR), and NoFormatFrameData (IFLR).
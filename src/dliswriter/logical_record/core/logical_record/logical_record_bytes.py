@@ -3,6 +3,7 @@ from typing import Optional, Generator
 
 from dliswriter.logical_record.core.logical_record.segment_attributes import SegmentAttributes
 from dliswriter.utils.internal.internal_enums import RepresentationCode as RepC
+from dliswriter.utils.internal.types import bytes_type
 
 
 logger = logging.getLogger(__name__)
@@ -13,7 +14,7 @@ class LogicalRecordBytes:
 
     padding: bytes = RepC.USHORT.convert(1)  #: padding byte added if the number of bytes in a segment is odd
 
-    def __init__(self, bts: bytes, lr_type_struct: bytes, is_eflr: bool = False):
+    def __init__(self, bts: bytes_type, lr_type_struct: bytes, is_eflr: bool = False):
         """Initialise a LogicalRecordBytes object.
 
         Args:
@@ -29,7 +30,7 @@ class LogicalRecordBytes:
         self._is_eflr = is_eflr
 
     @property
-    def bts(self) -> bytes:
+    def bts(self) -> bytes_type:
         """Bytes describing a logical record."""
 
         return self._bts
@@ -59,9 +60,31 @@ class LogicalRecordBytes:
                 int     :   Total size of the segment (in bytes).
         """
 
+        parts, size = self.make_segment_parts(start_pos, n_bytes)
+        return b''.join(parts), size
+
+    def make_segment_parts(self, start_pos: int = 0, n_bytes: Optional[int] = None,
+                           padded_size: Optional[int] = None) -> tuple[list[bytes_type], int]:
+        """Create a segment of the logical record bytes as a list of parts, without copying the segment body.
+
+        See make_segment for a more detailed description.
+
+        Args:
+            start_pos   :   Starting index of the segment.
+            n_bytes     :   Number of bytes - following the starting index - to be put in the segment. If not specified,
+                            all bytes from start_pos will be included.
+            padded_size :   If specified, total size the segment is brought to by adding padding bytes (at most 255);
+                            e.g. to put the segment in place of a previously written one of that size.
+
+        Returns:
+            2-tuple of:
+                list    :   Header bytes, a memoryview of the segment body, and (if needed) the padding bytes.
+                int     :   Total size of the segment (in bytes).
+        """
+
         if n_bytes is None:  # include all bytes from start_pos till the end
             n_bytes = self._size - start_pos
-            end_pos = None
+            end_pos = self._size
             is_last = True
         else:
             end_pos = start_pos + n_bytes
@@ -79,42 +102,48 @@ class LogicalRecordBytes:
         )
 
         size = n_bytes + 4  # adding header size - 4 bytes
-        if size % 2:
-            # total segment size must be even; if the number of bytes is odd, add a padding byte
-            size += 1
+        # total segment size must be even; if the number of bytes is odd, add a padding byte
+        n_padding = size % 2
+        if padded_size is not None:
+            n_padding = padded_size - size
+            if n_padding < 0 or n_padding > 255 or padded_size % 2:
+                raise ValueError(f"Logical Record segment of {size} bytes cannot be padded to {padded_size} bytes")
+
+        if n_padding:
+            size += n_padding
             segment_attributes.has_padding = True
 
         header_bytes = RepC.UNORM.convert(size) + segment_attributes.to_struct() + self._lr_type_struct
 
-        new_bts = header_bytes + self._bts[start_pos:end_pos]
-        if segment_attributes.has_padding:
-            new_bts += self.padding  # add the promised padding byte
+        parts: list[bytes_type] = [header_bytes, memoryview(self._bts)[start_pos:end_pos]]
+        if n_padding == 1:
+            parts.append(self.padding)  # add the promised padding byte
+        elif n_padding:
+            # the last padding byte holds the number of padding bytes (see RP66 V1, Logical Record Segment Trailer)
+            parts.append(RepC.USHORT.convert(n_padding) * n_padding)
 
-        return new_bts, size
+        return parts, size
 
-    def make_segments(self, max_n_bytes: int) -> Generator:
-        """Define a generator which splits the logical record bytes into segments of given maximal size.
-
-        See make_segment for a more detailed description.
+    @staticmethod
+    def compute_segment_sizes(size: int, max_n_bytes: int) -> list[int]:
+        """Determine sizes of the bodies of the segments which logical record bytes of given size will be split into.
 
         Args:
-            max_n_bytes :   Maximal number of bytes in a segment body. Note that 4 more bytes will be added for the
-                            header (and one more byte for the padding if the number of bytes is odd).
-                            Must be an integer of minimal value of 12. Only this condition (>= 12) is checked;
-                            other checks (type etc.) are left out for performance reasons.
+            size        :   Total number of bytes describing the logical record. Assumed to be >= 12.
+            max_n_bytes :   Maximal number of bytes in a segment body. See 'make_segments'.
 
-        Yields:
-            bytes   :   Bytes of a logical record segment, including an added header.
+        Returns:
+            List of consecutive segment body sizes (excluding the header and padding), which sum up to 'size'.
         """
 
-        start_pos = 0  # start from the beginning of the logical record bytes
-        remaining_size = self._size  # all bytes will be processed; self._size is assumed to always be >=12
-
         if max_n_bytes < 24:
             # minimal length of a logical record segment is 16 (of which 4 bytes are reserved for header),
             # so for the splitting to work correctly max_n_bytes must be >= 24, which is twice the min segment body size
             raise ValueError(f"Max size of a logical record segment body cannot be less than 24 (got {max_n_bytes})")
 
+        sizes = []
+        remaining_size = size  # all bytes will be processed
+
         while remaining_size > 0:
             n_bytes = min(remaining_size, max_n_bytes)  # size of the current (to be created) segment body
             future_remaining_size = remaining_size - n_bytes  # how many bytes will be left for a next segment
@@ -124,8 +153,47 @@ class LogicalRecordBytes:
                 n_bytes -= (12 - future_remaining_size)
                 future_remaining_size = 12
 
+            sizes.append(n_bytes)
+            remaining_size = future_remaining_size
+
+        return sizes
+
+    def make_segments(self, max_n_bytes: int) -> Generator:
+        """Define a generator which splits the logical record bytes into segments of given maximal size.
+
+        See make_segment for a more detailed description.
+
+        Args:
+            max_n_bytes :   Maximal number of bytes in a segment body. Note that 4 more bytes will be added for the
+                            header (and one more byte for the padding if the number of bytes is odd).
+                            Must be an integer of minimal value of 12. Only this condition (>= 12) is checked;
+                            other checks (type etc.) are left out for performance reasons.
+
+        Yields:
+            bytes   :   Bytes of a logical record segment, including an added header.
+        """
+
+        start_pos = 0  # start from the beginning of the logical record bytes
+
+        # self._size is assumed to always be >=12
+        for n_bytes in self.compute_segment_sizes(self._size, max_n_bytes):
             yield self.make_segment(start_pos, n_bytes)
+            start_pos += n_bytes
 
-            # update values before next iteration of the loop
-            remaining_size = future_remaining_size
+    def make_segments_parts(self, max_n_bytes: int) -> Generator:
+        """Define a generator which splits the logical record bytes into segments, expressed as lists of parts.
+
+        Unlike in make_segments, the bodies of the segments are not copied; see make_segment_parts.
+
+        Args:
+            max_n_bytes :   Maximal number of bytes in a segment body. See make_segments.
+
+        Yields:
+            2-tuples of: list of parts (bytes and memoryviews) of a logical record segment, size of the segment.
+        """
+
+        start_pos = 0
+
+        for n_bytes in self.compute_segment_sizes(self._size, max_n_bytes):
+            yield self.make_segment_parts(start_pos, n_bytes)
             start_pos += n_bytes
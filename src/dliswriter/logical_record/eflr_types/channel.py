@@ -12,7 +12,7 @@ from dliswriter.utils.internal.converters import ReprCodeConverter
 from dliswriter.utils.internal.types import numpy_dtype_type
 from dliswriter.logical_record.core.attribute import (Attribute, DimensionAttribute, EFLRAttribute, NumericAttribute,
                                                       IdentAttribute, EFLROrTextAttribute, PropertiesAttribute)
-from dliswriter.utils.source_data_wrappers import SourceDataWrapper
+from dliswriter.utils.source_data_wrappers import SourceDataWrapper, DataSetInfo
 
 logger = logging.getLogger(__name__)
 
@@ -48,7 +48,8 @@ class ChannelItem(EFLRItem, DimensionedItem):
     parent: "ChannelSet"
 
     def __init__(self, name: str, parent: "ChannelSet", dataset_name: Optional[str] = None,
-                 cast_dtype: Optional[numpy_dtype_type] = None, **kwargs: Any) -> None:
+                 cast_dtype: Optional[numpy_dtype_type] = None, absent_value: Optional[float] = None,
+                 **kwargs: Any) -> None:
         """Initialise ChannelItem.
 
         Args:
@@ -56,6 +57,8 @@ class ChannelItem(EFLRItem, DimensionedItem):
             parent          :   Parent ChannelSet of this ChannelItem.
             dataset_name    :   Name of the data corresponding to this channel in the SourceDataWrapper.
             cast_dtype      :   Numpy data type the channel data should be cast to.
+            absent_value    :   Value written in place of missing samples (NaN or masked values) of the channel,
+                                e.g. -999.25.
             **kwargs        :   Values of to be set as characteristics of the ChannelItem Attributes.
         """
 
@@ -78,6 +81,18 @@ class ChannelItem(EFLRItem, DimensionedItem):
         self._dataset_name: Union[str, None] = dataset_name
         self._set_cast_dtype(cast_dtype)
 
+        self._absent_value: Union[float, None] = None
+        self.absent_value = absent_value
+
+        #: number of missing samples replaced by the absent value when the channel's data were last encoded
+        self.absent_value_count: Optional[int] = None
+
+        #: minimum and maximum values (per element) computed from the data when the file was last written
+        #: with compute_channel_ranges; the values are written to the file, but not kept in 'minimum_value'
+        #: and 'maximum_value', so that the ranges are computed again when the file is written with other data
+        self.computed_minimum_value: Optional[list[float]] = None
+        self.computed_maximum_value: Optional[list[float]] = None
+
     @property
     def dataset_name(self) -> str:
         """Name of the data corresponding to this channel in the SourceDataWrapper."""
@@ -102,6 +117,24 @@ class ChannelItem(EFLRItem, DimensionedItem):
 
         self._set_cast_dtype(dt)
 
+    @property
+    def absent_value(self) -> Union[float, None]:
+        """Value written in place of missing samples (NaN or masked values) of the channel."""
+
+        return self._absent_value
+
+    @absent_value.setter
+    def absent_value(self, value: Union[float, None]) -> None:
+        """Set or remove the absent value of the channel."""
+
+        if value is not None:
+            if not isinstance(value, (int, float, np.integer, np.floating)) or isinstance(value, bool):
+                raise TypeError(f"Absent value must be a number; got {type(value)}: {value}")
+            if not np.isfinite(value):
+                raise ValueError(f"Absent value must be finite; got {value}")
+
+        self._absent_value = value
+
     def _set_cast_dtype(self, dt: Union[numpy_dtype_type, None]) -> None:
         """Check that the provided cast dtype is acceptable and set it in the Channel."""
 
@@ -112,13 +145,18 @@ class ChannelItem(EFLRItem, DimensionedItem):
         self.representation_code.set_from_dtype(self.cast_dtype)
 
     def set_dimension_and_repr_code_from_data(self, data: SourceDataWrapper) -> None:
-        """Determine and dimension and representation code attributes of the ChannelItem based on the source data."""
+        """Determine and dimension and representation code attributes of the ChannelItem based on the source data.
+
+        Only the shape and data type of the channel's data set are used; the data themselves are not read.
+        Data types without a representation code (e.g. int64) are cast to the data type chosen for them
+        by the SourceDataWrapper (e.g. int32).
+        """
 
-        sub_data = data[self.name]
-        self._set_dimension_from_data(sub_data)
-        self._set_repr_code_from_data(sub_data)
+        info = data.get_dataset_info(self.name)
+        self._set_dimension_from_data(info)
+        self._set_repr_code_from_data(info, target_dtype=data.dtype[self.name].base)
 
-    def _set_dimension_from_data(self, sub_data: Union[np.ndarray, Dataset]) -> None:
+    def _set_dimension_from_data(self, sub_data: Union[np.ndarray, Dataset, DataSetInfo]) -> None:
         """Determine dimension (and element limit) of the Channel data from a relevant subset of a SourceDataWrapper."""
 
         dim = list(sub_data.shape[1:]) or [1]
@@ -164,8 +202,15 @@ class ChannelItem(EFLRItem, DimensionedItem):
 
         return True
 
-    def _set_repr_code_from_data(self, sub_data: Union[np.ndarray, Dataset]) -> None:
-        """Determine representation code of the Channel data from a relevant subset of a SourceDataWrapper."""
+    def _set_repr_code_from_data(self, sub_data: Union[np.ndarray, Dataset, DataSetInfo],
+                                 target_dtype: Optional[np.dtype] = None) -> None:
+        """Determine representation code of the Channel data from a relevant subset of a SourceDataWrapper.
+
+        Args:
+            sub_data        :   The channel's data set (or its shape and data type).
+            target_dtype    :   Data type the data are loaded in, if different from that of the data set
+                                (e.g. int32 for int64 data, which have no representation code).
+        """
 
         dt = sub_data.dtype
 
@@ -174,6 +219,10 @@ class ChannelItem(EFLRItem, DimensionedItem):
                 logger.warning(f"Data will be cast from {dt} to {self.cast_dtype}")
             return
 
+        if target_dtype is not None and target_dtype != dt:
+            logger.info(f"Data of {self} will be cast from {dt} to {target_dtype}")
+            dt = target_dtype
+
         self._set_cast_dtype(dt)
 
     def _run_checks_and_set_defaults(self) -> None:
@@ -1,6 +1,6 @@
 import logging
 import numpy as np
-from typing import Union, Any
+from typing import Union, Any, Optional
 
 from dliswriter.logical_record.core.eflr import EFLRSet, EFLRItem
 from dliswriter.utils.internal.internal_enums import EFLRType, RepresentationCode as RepC
@@ -9,6 +9,7 @@ from dliswriter.logical_record.eflr_types.channel import ChannelSet, ChannelItem
 from dliswriter.logical_record.core.attribute import (Attribute, EFLRAttribute, NumericAttribute, TextAttribute,
                                                       IdentAttribute)
 from dliswriter.utils.source_data_wrappers import SourceDataWrapper
+from dliswriter.utils.index_analyzer import IndexAnalyzer
 from dliswriter.configuration import global_config
 
 
@@ -64,8 +65,14 @@ class FrameItem(EFLRItem):
         else:
             raise TypeError(f"Cannot convert {type(value)} object ({value}) to integer")
 
-    def setup_from_data(self, data: SourceDataWrapper) -> None:
-        """Set up attributes of the frame and its channels based on the source data."""
+    def setup_from_data(self, data: SourceDataWrapper, chunk_rows: Optional[int] = None) -> None:
+        """Set up attributes of the frame and its channels based on the source data.
+
+        Args:
+            data        :   Source data of the frame.
+            chunk_rows  :   Number of rows in which the index channel's data are read (see IndexAnalyzer).
+                            If None, the index data are read in a single chunk.
+        """
 
         if not self.channels.value:
             raise RuntimeError(f"No channels defined for {self}")
@@ -73,12 +80,14 @@ class FrameItem(EFLRItem):
         for channel in self.channels.value:
             channel.set_dimension_and_repr_code_from_data(data)
 
-        self._setup_frame_params_from_data(data)
+        self._setup_frame_params_from_data(data, chunk_rows=chunk_rows)
 
-    def _setup_frame_params_from_data(self, data: SourceDataWrapper) -> None:
+    def _setup_frame_params_from_data(self, data: SourceDataWrapper, chunk_rows: Optional[int] = None) -> None:
         """Set up the index characteristics of the frame based on the source data.
 
         The index characteristics include: min and max value, spacing, and direction (increasing/decreasing).
+        They are computed in a single pass over the index channel's data, read in chunks of 'chunk_rows' rows
+        (with additional passes only if the median spacing cannot be computed in one; see '_analyze_index').
 
         This method assumes that the first channel added to the frame is the index channel.
         This assumption is frequently made in DLIS readers.
@@ -98,7 +107,6 @@ class FrameItem(EFLRItem):
                 setattr(attr, key, value)
 
         index_channel: ChannelItem = self.channels.value[0]
-        index_data = data[index_channel.name][:]
 
         if self.index_type.value is None:
             # according to RP66, if index_type is None:
@@ -107,18 +115,16 @@ class FrameItem(EFLRItem):
             logger.info(f"No index channel defined for {self}; it will be indexed by the row number")
             assign_if_none(self.spacing, 1)
             assign_if_none(self.index_min, 1)
-            assign_if_none(self.index_max, index_data.shape[0])
+            assign_if_none(self.index_max, data.n_rows)
 
         else:
-            assign_if_none(self.index_min, index_data.min())
-            assign_if_none(self.index_max, index_data.max())
+            analyzer = self._analyze_index(data, index_channel, chunk_rows=chunk_rows)
+            assign_if_none(self.index_min, analyzer.index_min)
+            assign_if_none(self.index_max, analyzer.index_max)
             for at in (self.index_min, self.index_max, self.spacing):
                 assign_if_none(at, key='units', value=index_channel.units.value)
 
-            if index_data.ndim != 1:
-                raise RuntimeError(f"Index channel's data must be 1-dimensional; got {index_data.ndim} dimensions "
-                                   f"for {index_channel} of {self}")
-            spacing, direction = self._compute_spacing_and_direction(index_data)
+            spacing, direction = analyzer.spacing, analyzer.direction
 
             if spacing is None:
                 # spacing cannot be used because it is not uniform enough; using only direction - if available
@@ -134,42 +140,29 @@ class FrameItem(EFLRItem):
                 assign_if_none(self.spacing, spacing)
                 # no need to define direction if spacing is defined
 
-    @staticmethod
-    def _compute_spacing_and_direction(index_data: np.ndarray) -> tuple[Union[int, float, None], Union[bool, None]]:
-        """Compute spacing and direction of the data.
+    def _analyze_index(self, data: SourceDataWrapper, index_channel: ChannelItem, chunk_rows: Optional[int] = None
+                       ) -> IndexAnalyzer:
+        """Compute the statistics of the index channel's data, reading them in chunks.
 
-        Note:
-            If spacing is not uniform enough, it is assigned to None.
-            If direction cannot be determined, it is assigned to None.
+        A single pass is made over the data, unless the median spacing has to be computed in additional passes
+        (see IndexAnalyzer.compute_exact_median).
         """
 
-        diff = np.diff(index_data)
-        diff_unique = np.unique(diff)
-
-        if (diff_unique == 0).all():
-            direction = None  # all zeros ->not determined
-        elif (diff_unique >= 0).all():
-            direction = True  # all non-negative, at least one positive -> increasing
-        elif (diff_unique <= 0).all():
-            direction = False  # all non-positive, at least one negative -> decreasing
-        else:
-            direction = None  # some increasing, some decreasing -> not determined
-
-        if len(diff_unique) == 1:
-            # if spacing between each sample is the same, this is it
-            return diff_unique[0], direction
+        # check the shape before reading the data - e.g. not to load a whole image if it was set as index
+        index_info = data.get_dataset_info(index_channel.name)
+        if index_info.ndim != 1:
+            raise RuntimeError(f"Index channel's data must be 1-dimensional; got {index_info.ndim} dimensions "
+                               f"for {index_channel} of {self}")
 
-        # if not, check if these are minor deviations (can be attributed to numerical accuracy) or not
-        median_diff = np.median(diff).item()  # mypy complains that median_diff is a numpy array...
-        if median_diff == 0:
-            return None, direction  # need the median for denominator later; if it's 0, cannot determine uniformity
+        analyzer = IndexAnalyzer()
+        for index_chunk in data.iterate_dataset_chunks(index_channel.name, chunk_rows):
+            analyzer.update(index_chunk)
 
-        deviations = (1 - diff_unique / median_diff) ** 2
-        if (deviations < 0.001).all():  # if differences are small enough, median is representative for spacing
-            return median_diff, direction
-
-        # differences too big for spacing to be assumed uniform; set spacing to None
-        return None, direction
+        if not analyzer.is_median_exact:
+            # the estimate would depend on the chunk size
+            logger.debug(f"Computing the exact median spacing of the index of {self} in additional passes")
+            analyzer.compute_exact_median(lambda: data.iterate_dataset_chunks(index_channel.name, chunk_rows))
+        return analyzer
 
     @property
     def channel_name_mapping(self) -> dict:
@@ -183,6 +176,27 @@ class FrameItem(EFLRItem):
 
         return {ch.name: ch.cast_dtype for ch in self.channels.value if ch.cast_dtype is not None}
 
+    def get_absent_values_mapping(self, default: Optional[float] = None) -> dict[str, float]:
+        """Mapping of names of channels of the frame on the values written in place of their missing samples.
+
+        Args:
+            default :   Absent value of the channels which do not define their own. It is only applied to integer
+                        channels if it is an integer itself (missing samples of these can only be masked values).
+
+        Returns:
+            Absent values of the channels which have one; channels without an absent value are not included.
+        """
+
+        mapping = {}
+        for ch in self.channels.value:
+            if ch.absent_value is not None:
+                mapping[ch.name] = ch.absent_value
+            elif default is not None:
+                is_integer_channel = ch.cast_dtype is not None and np.dtype(ch.cast_dtype).kind in 'iu'
+                if not is_integer_channel or float(default).is_integer():
+                    mapping[ch.name] = default
+        return mapping
+
 
 class FrameSet(EFLRSet):
     """Model Frame EFLR."""
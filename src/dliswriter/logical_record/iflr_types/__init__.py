@@ -1,2 +1,3 @@
-from dliswriter.logical_record.iflr_types.frame_data import FrameData
+from dliswriter.logical_record.iflr_types.frame_data import FrameData, EncodedFrameData
+from dliswriter.logical_record.iflr_types.frame_data_encoder import FrameDataEncoder
 from dliswriter.logical_record.iflr_types.no_format_frame_data import NoFormatFrameData
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Optional
 from dliswriter.logical_record.core.iflr import IFLR
 from dliswriter.utils.internal.struct_writer import write_struct_uvari
 from dliswriter.utils.internal.internal_enums import IFLRType
+from dliswriter.utils.internal.types import bytes_type
 
 if TYPE_CHECKING:
     from dliswriter.logical_record.eflr_types.frame import FrameItem
@@ -49,3 +50,29 @@ class FrameData(IFLR):
             body += s.byteswap().tobytes()
 
         return body
+
+
+class EncodedFrameData(IFLR):
+    """Model a FrameData record whose body bytes have already been created (see FrameDataEncoder).
+
+    Objects of this class are produced by MultiFrameData when iterating over data encoded chunk-wise;
+    they carry no reference to the frame or the data, only the ready-made bytes.
+    """
+
+    logical_record_type = IFLRType.FDATA
+
+    def __init__(self, body: bytes_type):
+        """Initialise an EncodedFrameData.
+
+        Args:
+            body    :   Bytes of the FrameData body: frame reference, frame number, and the data.
+        """
+
+        super().__init__()
+
+        self._body = body
+
+    def _make_body_bytes(self) -> bytes_type:
+        """Return the pre-computed bytes of the FrameData body."""
+
+        return self._body
@@ -0,0 +1,323 @@
+import numpy as np
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from dliswriter.utils.internal.struct_writer import UNORM_OFFSET, ULONG_OFFSET
+
+if TYPE_CHECKING:
+    from dliswriter.logical_record.eflr_types.frame import FrameItem
+
+
+class FrameDataEncoder:
+    """Encode whole chunks of frame data into FrameData body bytes using vectorised numpy operations.
+
+    The produced bytes are identical to those obtained by creating a FrameData object for each row of the chunk
+    and calling its '_make_body_bytes', but no Python-level work is done per row or per channel.
+
+    Missing samples (NaN values, or values masked in numpy masked arrays passed as columns) of channels with
+    an absent value defined are replaced with it in the encoded rows, after the data have been put there - no copy
+    of the data is made for this purpose. The numbers of replaced values are kept in 'substitution_counts'.
+    """
+
+    # UVARI frame numbers are stored as USHORT, UNORM, or ULONG, depending on the value;
+    # each tuple specifies: (first frame number, first frame number of the next group, number of bytes, offset, dtype)
+    _uvari_groups = (
+        (0, 128, 1, 0, np.dtype('>u1')),
+        (128, 16384, 2, UNORM_OFFSET, np.dtype('>u2')),
+        (16384, 2 ** 30, 4, ULONG_OFFSET, np.dtype('>u4'))
+    )
+
+    def __init__(self, frame: "FrameItem", dtype: np.dtype, absent_values: Optional[dict[str, float]] = None):
+        """Initialise FrameDataEncoder.
+
+        Args:
+            frame           :   The frame that the encoded data belong to.
+            dtype           :   Structured numpy dtype of the data chunks to be encoded (see SourceDataWrapper.dtype).
+            absent_values   :   Values written in place of missing samples, keyed by field names of the dtype
+                                (see FrameItem.get_absent_values_mapping).
+        """
+
+        self._obname = np.frombuffer(frame.obname, dtype=np.uint8)  #: reference to the frame, added to each row
+        self._target_dtype = self.make_big_endian_dtype(dtype)      #: packed, big-endian version of the data dtype
+
+        #: absent values converted to the (base) data types of the fields
+        self._absent_values = {name: self._convert_absent_value(name, value)
+                               for name, value in (absent_values or {}).items()}
+        self._substitution_counts: dict[str, int] = {}  #: numbers of missing samples replaced with absent values
+        self._lock = Lock()  #: guards the counts (chunks can be encoded in a pool of threads)
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_lock']  # the encoder is passed to worker processes if encoding in a process pool
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def _convert_absent_value(self, name: str, value: float) -> np.ndarray:
+        """Convert the absent value of a field to its data type; check that it is represented exactly enough."""
+
+        if name not in (self._target_dtype.names or ()):
+            raise ValueError(f"Absent value defined for '{name}', which is not one of the fields of the data type "
+                             f"{self._target_dtype.names}")
+
+        dtype = self._target_dtype[name].base
+        if dtype.kind in 'iu':
+            info = np.iinfo(dtype)
+            if not float(value).is_integer() or not info.min <= value <= info.max:
+                raise ValueError(f"Absent value of '{name}' must be an integer between {info.min} and {info.max} "
+                                 f"(the range of its data type, {dtype}); got {value}")
+            return np.array(int(value), dtype=dtype)
+
+        if abs(value) > float(np.finfo(dtype).max):
+            raise ValueError(f"Absent value of '{name}' is out of the range of its data type ({dtype}); got {value}")
+        return np.array(value, dtype=dtype)
+
+    @property
+    def target_dtype(self) -> np.dtype:
+        """Packed, big-endian structured dtype the data are converted to before being represented as bytes."""
+
+        return self._target_dtype
+
+    @property
+    def absent_values(self) -> dict[str, float]:
+        """Values written in place of missing samples of the fields (as converted to the fields' data types)."""
+
+        return {name: value.item() for name, value in self._absent_values.items()}
+
+    @property
+    def substitution_counts(self) -> dict[str, int]:
+        """Numbers of missing samples replaced with the absent values so far, per field."""
+
+        with self._lock:
+            return dict(self._substitution_counts)
+
+    def reset_substitution_counts(self) -> None:
+        """Set the numbers of replaced missing samples to 0."""
+
+        with self._lock:
+            self._substitution_counts = {}
+
+    def add_substitution_counts(self, counts: dict[str, int]) -> None:
+        """Add numbers of replaced missing samples (e.g. made by a copy of the encoder in another process)."""
+
+        with self._lock:
+            for name, n in counts.items():
+                self._substitution_counts[name] = self._substitution_counts.get(name, 0) + n
+
+    @property
+    def row_data_size(self) -> int:
+        """Number of bytes taken by the channel data of a single row (excluding frame reference and frame number)."""
+
+        return self._target_dtype.itemsize
+
+    def compute_body_size_runs(self, first_frame_number: int, n_rows: int) -> list[tuple[int, int]]:
+        """Determine the body sizes of rows of a chunk, without encoding it.
+
+        The body size only depends on the frame number (whose representation takes 1, 2, or 4 bytes);
+        the rows of a chunk therefore form (at most 3) runs of rows of the same size.
+
+        Args:
+            first_frame_number  :   Frame number of the first row of the chunk.
+            n_rows              :   Number of rows in the chunk.
+
+        Returns:
+            List of (body size, number of rows) tuples for consecutive runs of rows of the same body size.
+        """
+
+        self._check_frame_numbers(first_frame_number, n_rows)
+
+        runs = []
+        last_frame_number = first_frame_number + n_rows  # exclusive
+        for start, stop, n_bytes, _, _ in self._uvari_groups:
+            n = min(stop, last_frame_number) - max(start, first_frame_number)
+            if n > 0:
+                runs.append((self._obname.size + n_bytes + self.row_data_size, n))
+        return runs
+
+    @staticmethod
+    def make_big_endian_dtype(dtype: np.dtype) -> np.dtype:
+        """Create a packed, big-endian structured dtype with the same field names, base dtypes, and shapes."""
+
+        if dtype.names is None:
+            raise ValueError(f"Expected a structured numpy dtype; got {dtype}")
+
+        return np.dtype([(name, dtype[name].base.newbyteorder('>'), dtype[name].shape) for name in dtype.names])
+
+    @classmethod
+    def _check_frame_numbers(cls, first_frame_number: int, n_rows: int) -> None:
+        """Check that the frame numbers of the rows of a chunk can be represented as UVARI."""
+
+        if first_frame_number < 1:
+            raise ValueError(f"Frame numbers start from 1; got {first_frame_number}")
+
+        max_frame_number = cls._uvari_groups[-1][1] - 1
+        if first_frame_number + n_rows - 1 > max_frame_number:
+            raise ValueError(f"Frame numbers cannot be larger than {max_frame_number} (max value of UVARI); "
+                             f"got rows up to frame number {first_frame_number + n_rows - 1}")
+
+    def _make_rows(self, first_frame_number: int, n_rows: int
+                   ) -> tuple[np.ndarray, np.ndarray, list[tuple[int, int, int, np.ndarray]]]:
+        """Allocate the bodies of the rows of a chunk and fill in everything except the channel data.
+
+        Args:
+            first_frame_number  :   Frame number of the first row of the chunk.
+            n_rows              :   Number of rows in the chunk.
+
+        Returns:
+            3-tuple of:
+                np.ndarray  :   1D uint8 array for the body bytes of all rows of the chunk.
+                np.ndarray  :   Offsets of the consecutive rows' bodies in the above array (see 'encode').
+                list        :   For each group of rows with the same body size: index of the first and (exclusive)
+                                last row of the group, position of the channel data of the first row of the group
+                                in the buffer, and a 2D uint8 view of the channel data parts of the rows.
+        """
+
+        self._check_frame_numbers(first_frame_number, n_rows)
+
+        frame_numbers = np.arange(first_frame_number, first_frame_number + n_rows, dtype=np.int64)
+
+        n_obname = self._obname.size
+        uvari_sizes = np.ones(n_rows, dtype=np.int64)
+        for start, _, n_bytes, _, _ in self._uvari_groups[1:]:
+            uvari_sizes[frame_numbers >= start] = n_bytes
+
+        offsets = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(n_obname + uvari_sizes + self.row_data_size, out=offsets[1:])
+        buffer = np.empty(offsets[-1], dtype=np.uint8)
+
+        # frame numbers are increasing, so rows with the same UVARI size form (at most 3) contiguous groups;
+        # within each group, all rows have the same size and can be processed as a 2D array
+        groups = []
+        for start, stop, n_bytes, offset, dt in self._uvari_groups:
+            i0, i1 = np.searchsorted(frame_numbers, (start, stop))
+            if i0 == i1:
+                continue
+
+            rows = buffer[offsets[i0]:offsets[i1]].reshape(i1 - i0, -1)
+            rows[:, :n_obname] = self._obname
+            uvari = (frame_numbers[i0:i1] + offset).astype(dt)
+            rows[:, n_obname:n_obname + n_bytes] = uvari.view(np.uint8).reshape(-1, n_bytes)
+            data_offset = int(offsets[i0]) + n_obname + n_bytes
+            groups.append((int(i0), int(i1), data_offset, rows[:, n_obname + n_bytes:]))
+
+        return buffer, offsets, groups
+
+    def encode(self, chunk: np.ndarray, first_frame_number: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """Encode a chunk of data rows as bodies of consecutive FrameData records.
+
+        Args:
+            chunk               :   Structured numpy array with a chunk of the frame data.
+            first_frame_number  :   Frame number (index of the row, starting from 1) of the first row of the chunk.
+
+        Returns:
+            2-tuple of:
+                np.ndarray  :   1D uint8 array with the body bytes of all rows of the chunk, one after another.
+                np.ndarray  :   Offsets of the consecutive rows' bodies in the above array; has one element more than
+                                the number of rows, so that the body of i-th row is buffer[offsets[i]:offsets[i+1]].
+        """
+
+        n_rows = chunk.shape[0]
+        buffer, offsets, groups = self._make_rows(first_frame_number, n_rows)
+
+        # convert all data to big endian (and packed layout) in a single call; view each row as a sequence of bytes;
+        # chunks already in the target dtype (e.g. loaded into big-endian buffers) are used without any conversion
+        if chunk.dtype == self._target_dtype and chunk.flags.c_contiguous:
+            data = chunk
+        else:
+            data = np.ascontiguousarray(chunk.astype(self._target_dtype, copy=False))
+        data_bytes = data.view(np.uint8).reshape(n_rows, self.row_data_size)
+
+        for i0, i1, data_offset, rows_data in groups:
+            rows_data[...] = data_bytes[i0:i1]
+            if self._absent_values:
+                self._substitute_absent_values(self._view_channel_data(buffer, data_offset, rows_data))
+
+        return buffer, offsets
+
+    def _view_channel_data(self, buffer: np.ndarray, data_offset: int, rows_data: np.ndarray) -> np.ndarray:
+        """Create a structured view (of the target dtype) of the channel data parts of a group of rows.
+
+        Args:
+            buffer      :   Buffer with the body bytes of the rows (see '_make_rows').
+            data_offset :   Position of the channel data of the first row of the group in the buffer.
+            rows_data   :   2D uint8 view of the channel data parts of the rows of the group.
+        """
+
+        # the stride is the whole row size, so that the view skips the frame reference and frame number of each row
+        return np.ndarray(shape=(rows_data.shape[0],), dtype=self._target_dtype, buffer=buffer, offset=data_offset,
+                          strides=(rows_data.strides[0],))
+
+    def _substitute_absent_values(self, data: np.ndarray, masks: Optional[dict[str, np.ndarray]] = None) -> None:
+        """Replace the missing samples of the channels with absent values, in place in the encoded rows.
+
+        Args:
+            data    :   Structured view of the channel data of encoded rows (see '_view_channel_data').
+            masks   :   Masks of the values of masked array columns (True where missing), keyed by field names.
+        """
+
+        counts = {}
+        for name, absent_value in self._absent_values.items():
+            values = data[name]
+            missing = np.isnan(values) if values.dtype.kind == 'f' else None
+            mask = masks.get(name) if masks is not None else None
+            if mask is not None:
+                missing = mask if missing is None else missing | mask
+            if missing is None:
+                continue
+
+            n_missing = int(np.count_nonzero(missing))
+            if n_missing:
+                np.copyto(values, absent_value, where=missing)
+                counts[name] = n_missing
+
+        if counts:
+            self.add_substitution_counts(counts)
+
+    def encode_columns(self, columns: dict[str, np.ndarray], first_frame_number: int = 1
+                       ) -> tuple[np.ndarray, np.ndarray]:
+        """Encode a chunk of data given as separate columns (one array per channel) as bodies of FrameData records.
+
+        Instead of first interleaving the columns in a structured array, the values of each column are converted
+        to big endian and put straight in their positions in the rows of the output buffer (a strided assignment
+        through a structured view of the rows). The produced bytes are the same as those of 'encode'.
+
+        Args:
+            columns             :   Arrays of the values of the channels, keyed by the field names of the dtype
+                                    (in any order); the first dimension of each array is the row.
+                                    Values are cast to the data types of the fields if needed.
+            first_frame_number  :   Frame number (index of the row, starting from 1) of the first row of the chunk.
+
+        Returns:
+            (buffer, offsets) tuple, as returned by 'encode'.
+        """
+
+        if set(columns) != set(self._target_dtype.names or ()):
+            raise ValueError(f"Column names {tuple(columns)} do not match the fields of the data type "
+                             f"{self._target_dtype.names}")
+
+        n_rows = next(iter(columns.values())).shape[0]
+        buffer, offsets, groups = self._make_rows(first_frame_number, n_rows)
+
+        # masks of the missing samples of masked array columns, for the channels with absent values
+        masks = {name: np.ma.getmaskarray(columns[name]) for name in self._absent_values
+                 if np.ma.getmask(columns[name]) is not np.ma.nomask}
+
+        for i0, i1, data_offset, rows_data in groups:
+            # structured view of the channel data parts of the rows, with a stride of the whole row size
+            data = self._view_channel_data(buffer, data_offset, rows_data)
+            for name, column in columns.items():
+                data[name] = column[i0:i1]
+            if self._absent_values:
+                self._substitute_absent_values(data, masks={name: mask[i0:i1] for name, mask in masks.items()})
+
+        return buffer, offsets
+
+    def encode_chunk(self, chunk: Union[np.ndarray, dict[str, np.ndarray]], first_frame_number: int = 1
+                     ) -> tuple[np.ndarray, np.ndarray]:
+        """Encode a chunk given either as a structured array ('encode') or as separate columns ('encode_columns')."""
+
+        if isinstance(chunk, dict):
+            return self.encode_columns(chunk, first_frame_number=first_frame_number)
+        return self.encode(chunk, first_frame_number=first_frame_number)
@@ -0,0 +1,147 @@
+import logging
+from typing import Any, Optional
+import numpy as np
+
+from dliswriter.utils.internal.validator_enum import ValidatorEnum
+from dliswriter.utils.internal.types import numpy_dtype_type
+
+
+logger = logging.getLogger(__name__)
+
+
+class CastPolicy(ValidatorEnum):
+    """Ways of handling integer values which do not fit in the data type the data are cast to (e.g. int64 -> int32)."""
+
+    RAISE = "raise"  #: raise a ValueError
+    CLIP = "clip"  #: replace the values with the smallest or largest value of the target data type
+    PROMOTE = "promote"  #: cast the data set to float64 instead; decided from the range of the data before writing
+
+
+class CastChecker:
+    """Check that integer values fit in the (narrower) integer data type they are cast to.
+
+    The check is vectorised: only the minimum and maximum of each chunk of values are compared with the limits
+    of the target data type. Values which fit are passed on unchanged and cast when copied to the chunk (or the encoded
+    rows), so no additional copy is made. Values which do not fit are handled according to the CastPolicy.
+
+    Masked values (of numpy masked arrays) are not checked; they are replaced with absent values when encoded.
+    """
+
+    #: number of rows of the chunks the data are read in to check their range (see 'check_dataset')
+    scan_chunk_rows = 2 ** 20
+
+    def __init__(self, name: str, source_dtype: numpy_dtype_type, target_dtype: numpy_dtype_type,
+                 policy: str = CastPolicy.RAISE) -> None:
+        """Initialise CastChecker.
+
+        Args:
+            name            :   Name of the checked data set (used in messages).
+            source_dtype    :   Integer data type of the values.
+            target_dtype    :   Integer data type the values are cast to.
+            policy          :   How to handle values which do not fit in the target data type (see CastPolicy).
+                                With 'promote', the data set should be cast to float64 before the values are checked
+                                (see 'check_dataset'); values found not to fit at that stage raise an error.
+        """
+
+        self._name = name
+        self._source_dtype = np.dtype(source_dtype)
+        self._target_dtype = np.dtype(target_dtype)
+        self._policy = CastPolicy.make_converter("cast policies")(policy)
+
+        if not self.is_needed(self._source_dtype, self._target_dtype):
+            raise ValueError(f"Values of {self._source_dtype} do not have to be checked to be cast "
+                             f"to {self._target_dtype}")
+
+        source_info, target_info = np.iinfo(self._source_dtype), np.iinfo(self._target_dtype)
+        # limits expressed in the source data type, so that they can be compared with the values without casting
+        self._min = self._source_dtype.type(max(source_info.min, target_info.min))
+        self._max = self._source_dtype.type(min(source_info.max, target_info.max))
+
+        self.n_clipped = 0  #: number of values replaced with the limits of the target data type so far
+
+    @property
+    def target_dtype(self) -> np.dtype:
+        """Data type the values are cast to."""
+
+        return self._target_dtype
+
+    @staticmethod
+    def is_needed(source_dtype: numpy_dtype_type, target_dtype: numpy_dtype_type) -> bool:
+        """Check whether casting integers of the source data type to the target data type can change their values."""
+
+        source, target = np.dtype(source_dtype), np.dtype(target_dtype)
+        return source.kind in 'iu' and target.kind in 'iu' and not np.can_cast(source, target, casting='safe')
+
+    @staticmethod
+    def find_range(values: np.ndarray) -> Optional[tuple[Any, Any]]:
+        """Return the minimum and maximum of the (unmasked) values; None if there are no such values."""
+
+        if not values.size:
+            return None
+
+        lo, hi = values.min(), values.max()
+        if np.ma.is_masked(lo):
+            return None
+        return lo, hi
+
+    def fits(self, values: np.ndarray) -> bool:
+        """Check whether all (unmasked) values fit in the target data type."""
+
+        value_range = self.find_range(values)
+        return value_range is None or bool(self._min <= value_range[0] and value_range[1] <= self._max)
+
+    def __call__(self, values: np.ndarray) -> np.ndarray:
+        """Check the values to be cast; return them - clipped to the limits of the target data type if needed.
+
+        Raises:
+            ValueError  :   If any of the values does not fit in the target data type and the policy is not 'clip'.
+        """
+
+        if self.fits(values):
+            return values
+
+        if self._policy != CastPolicy.CLIP:
+            lo, hi = self.find_range(values)  # type: ignore  # checked in 'fits'
+            raise ValueError(f"Values of '{self._name}' (from {lo} to {hi}) do not fit in {self._target_dtype} "
+                             f"(from {self._min} to {self._max}); use cast policy 'clip' or 'promote' "
+                             f"or set the channel's cast_dtype to a floating-point data type")
+
+        n_clipped = int(np.count_nonzero(np.ma.filled((values < self._min) | (values > self._max), False)))
+        if not self.n_clipped:
+            logger.warning(f"Values of '{self._name}' not fitting in {self._target_dtype} are clipped "
+                           f"to the range {self._min} to {self._max}")
+        self.n_clipped += n_clipped
+        clipped: np.ndarray = np.clip(values, self._min, self._max)
+        return clipped
+
+    def check_dataset(self, chunks: Any) -> bool:
+        """Check whether all values of a data set fit in the target data type, without keeping the data in memory.
+
+        If they do not and the policy is 'promote', a warning is issued if the values cannot all be represented
+        exactly as float64 (the data set is then to be cast to float64 instead).
+
+        Args:
+            chunks  :   Iterable of consecutive chunks of the data set (see SourceDataWrapper.iterate_dataset_chunks).
+
+        Returns:
+            True if all values fit in the target data type, False otherwise.
+        """
+
+        total_range: Optional[tuple[Any, Any]] = None
+        for chunk in chunks:
+            value_range = self.find_range(chunk)
+            if value_range is not None:
+                total_range = value_range if total_range is None else (min(total_range[0], value_range[0]),
+                                                                       max(total_range[1], value_range[1]))
+
+        if total_range is None:
+            return True
+
+        lo, hi = total_range
+        if self._min <= lo and hi <= self._max:
+            return True
+
+        if self._policy == CastPolicy.PROMOTE and max(abs(int(lo)), abs(int(hi))) > 2 ** 53:
+            logger.warning(f"Values of '{self._name}' (from {lo} to {hi}) cannot all be represented exactly "
+                           f"as float64; some precision will be lost")
+        return False
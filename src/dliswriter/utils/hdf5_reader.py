@@ -0,0 +1,276 @@
+import os
+import zlib
+import logging
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Optional, Union
+
+import numpy as np
+import h5py    # type: ignore  # untyped library
+
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetChunkReader:
+    """Read rows of a single HDF5 dataset, decoding each of its (HDF5) chunks only once.
+
+    If the dataset is chunked along the rows only (each chunk spans whole rows) and is stored uncompressed
+    or with gzip (deflate) compression only (no other filters in the pipeline), the chunks are read as raw bytes
+    ('read_direct_chunk') and decompressed outside of the HDF5 library - possibly in a thread pool, concurrently
+    with the chunks of other datasets (zlib releases the GIL). The last decoded chunk is kept, so that consecutive row
+    ranges which are not aligned to the chunk boundaries do not decompress the boundary chunks twice.
+
+    Other datasets (contiguous, or with other filters) are read with 'read_direct' into a preallocated buffer,
+    reused for consecutive reads.
+
+    The rows are converted to the data type of the output array (e.g. big-endian, as needed in the DLIS file)
+    as early as possible: by the HDF5 type conversion layer during 'read_direct' (for byte order changes and safe
+    casts only; other casts are left to numpy, as HDF5 e.g. clips out-of-range integers instead of wrapping them
+    around) or in the decompressing thread for raw chunks. Copying the rows to the output array then involves
+    no conversion. If the values have to be checked before being cast (e.g. int64 values cast to int32, see
+    CastChecker), the chunks are decoded in the data type of the dataset and the values are checked and cast when
+    copied to the output array.
+    """
+
+    def __init__(self, dataset: h5py.Dataset, value_check: Optional[Callable[[np.ndarray], np.ndarray]] = None):
+        """Initialise DatasetChunkReader.
+
+        Args:
+            dataset     :   The HDF5 dataset to read.
+            value_check :   Callable applied to the values of the read rows before they are cast to the data type
+                            of the output array; returns the values to be copied (see CastChecker).
+        """
+
+        self._dataset = dataset
+        self._value_check = value_check
+        self._dtype = dataset.dtype
+        self._row_shape = dataset.shape[1:]
+        self._n_rows = dataset.shape[0]
+
+        filter_ids = self._get_filter_ids(dataset)
+        self._is_deflated = filter_ids == (h5py.h5z.FILTER_DEFLATE,)  #: True if the chunks are gzip-compressed
+        self._chunk_rows: Optional[int] = dataset.chunks[0] if self._is_raw_readable(dataset, filter_ids) else None
+        self._decoded: dict[int, np.ndarray] = {}  #: decoded chunks, keyed by chunk index
+        self._buffer: Optional[np.ndarray] = None  #: reused buffer for datasets read with 'read_direct'
+
+    @staticmethod
+    def _get_filter_ids(dataset: h5py.Dataset) -> Optional[tuple[int, ...]]:
+        """Return the identifiers of the filters in the pipeline of the dataset; None if they cannot be determined."""
+
+        try:
+            plist = dataset.id.get_create_plist()
+            return tuple(plist.get_filter(i)[0] for i in range(plist.get_nfilters()))
+        except (AttributeError, RuntimeError, ValueError):
+            return None
+
+    @staticmethod
+    def _is_raw_readable(dataset: h5py.Dataset, filter_ids: Optional[tuple[int, ...]]) -> bool:
+        """Check whether the chunks of the dataset can be read as raw bytes and decoded outside of HDF5.
+
+        Args:
+            dataset     :   The HDF5 dataset.
+            filter_ids  :   Identifiers of the filters in the pipeline of the dataset (see '_get_filter_ids').
+        """
+
+        if dataset.chunks is None or dataset.chunks[1:] != dataset.shape[1:]:
+            return False
+        # the filter pipeline itself is checked, as filters not known to h5py are not reflected in its properties
+        if filter_ids not in ((), (h5py.h5z.FILTER_DEFLATE,)):
+            return False
+        if dataset.dtype.hasobject or not hasattr(dataset.id, 'read_direct_chunk'):
+            return False
+
+        # chunks which have never been written are not stored; these are filled in by HDF5
+        n_chunks = -(-dataset.shape[0] // dataset.chunks[0])
+        try:
+            return bool(dataset.id.get_num_chunks() == n_chunks)
+        except (AttributeError, RuntimeError):
+            return False
+
+    @property
+    def chunk_rows(self) -> Optional[int]:
+        """Number of rows of the HDF5 chunks read as raw bytes; None if the dataset is read with 'read_direct'."""
+
+        return self._chunk_rows
+
+    def _decode(self, raw: bytes, filter_mask: int, dtype: Optional[np.dtype] = None) -> np.ndarray:
+        """Decompress (if needed) the raw bytes of a chunk, view them as rows of the dataset, and convert them.
+
+        Args:
+            raw         :   Raw bytes of the chunk, as stored in the file.
+            filter_mask :   Mask of the filters skipped for the chunk.
+            dtype       :   Data type the rows should be converted to (if different from the dataset's).
+        """
+
+        if self._is_deflated and not filter_mask & 1:  # bit set if the filter was skipped
+            raw = zlib.decompress(raw)
+        rows = np.frombuffer(raw, dtype=self._dtype).reshape((-1, *self._row_shape))
+
+        if dtype is not None and dtype != self._dtype:
+            rows = rows.astype(dtype)
+        return rows
+
+    def schedule(self, start: int, stop: int, executor: Optional[Executor], dtype: Optional[np.dtype] = None
+                 ) -> dict[int, Union[Future, np.ndarray]]:
+        """Read the raw bytes of the chunks needed for the given rows; start decoding them.
+
+        Chunks decoded before (the last chunk of the previous read) are reused.
+
+        Args:
+            start       :   First row.
+            stop        :   Row after the last one.
+            executor    :   If provided, the chunks are decompressed (and converted) in it.
+            dtype       :   Data type the rows should be converted to when decoded, e.g. that of the output array.
+
+        Returns:
+            Decoded chunks (or futures of the decoded chunks), keyed by chunk index.
+        """
+
+        if self._chunk_rows is None:
+            return {}
+
+        chunks: dict[int, Union[Future, np.ndarray]] = {}
+        for index in range(start // self._chunk_rows, -(-stop // self._chunk_rows)):
+            if index in self._decoded:
+                chunks[index] = self._decoded[index]
+                continue
+
+            offset = (index * self._chunk_rows,) + (0,) * len(self._row_shape)
+            filter_mask, raw = self._dataset.id.read_direct_chunk(offset)
+            if self._value_check is not None:
+                dtype = None  # the values are checked before they are cast (see 'read')
+            if executor is not None:
+                chunks[index] = executor.submit(self._decode, raw, filter_mask, dtype)
+            else:
+                chunks[index] = self._decode(raw, filter_mask, dtype)
+
+        return chunks
+
+    def read(self, start: int, stop: int, out: np.ndarray,
+             chunks: Optional[dict[int, Union[Future, np.ndarray]]] = None) -> None:
+        """Copy rows of the dataset to the output array (converting the values to its data type).
+
+        Args:
+            start   :   First row.
+            stop    :   Row after the last one.
+            out     :   Array of (stop - start) rows to put the values in; e.g. a field of a structured chunk.
+            chunks  :   Chunks scheduled for the rows (see 'schedule'). If not provided, they are scheduled here.
+        """
+
+        if self._chunk_rows is None:
+            self._read_direct(start, stop, out)
+            return
+
+        if chunks is None:
+            chunks = self.schedule(start, stop, executor=None, dtype=out.dtype)
+
+        decoded = {index: chunk.result() if isinstance(chunk, Future) else chunk for index, chunk in chunks.items()}
+        for index, chunk in decoded.items():
+            chunk_start = index * self._chunk_rows
+            i0, i1 = max(start, chunk_start), min(stop, chunk_start + chunk.shape[0])
+            rows = chunk[i0 - chunk_start:i1 - chunk_start]
+            out[i0 - start:i1 - start] = self._value_check(rows) if self._value_check is not None else rows
+
+        # keep the last chunk if it has rows after the ones read, for the next read
+        last_index = max(decoded)
+        self._decoded = {last_index: decoded[last_index]} if (last_index + 1) * self._chunk_rows > stop else {}
+
+    def get_read_dtype(self, dtype: np.dtype) -> np.dtype:
+        """Data type HDF5 should convert the rows to in 'read_direct', for an output array of the given data type.
+
+        The output data type is used if the rows can be converted to it safely (e.g. only the byte order changes,
+        or a float32 is read as float64); otherwise, the data type of the dataset.
+        """
+
+        return dtype if np.can_cast(self._dtype, dtype, casting='safe') else self._dtype
+
+    def _read_direct(self, start: int, stop: int, out: np.ndarray) -> None:
+        """Read the rows with 'read_direct' into the reused buffer and copy them to the output array."""
+
+        n_rows = stop - start
+        dtype = self.get_read_dtype(out.dtype)
+        if self._buffer is None or self._buffer.shape[0] < n_rows or self._buffer.dtype != dtype:
+            self._buffer = np.empty((n_rows, *self._row_shape), dtype=dtype)
+
+        buffer = self._buffer[:n_rows]
+        if n_rows:
+            self._dataset.read_direct(buffer, np.s_[start:stop], np.s_[0:n_rows])
+        out[...] = self._value_check(buffer) if self._value_check is not None else buffer
+
+
+class HDF5ChunkReader:
+    """Read rows of multiple HDF5 datasets, decompressing the chunks of all datasets concurrently.
+
+    See DatasetChunkReader. The raw chunks of all datasets needed for a range of rows are read first
+    (reading is serialised by h5py anyway) and their decompression is started in a thread pool;
+    the decoded rows are then copied to the output arrays.
+    """
+
+    def __init__(self, datasets: dict[str, h5py.Dataset], n_threads: Optional[int] = None,
+                 value_checks: Optional[dict[str, Callable[[np.ndarray], np.ndarray]]] = None):
+        """Initialise HDF5ChunkReader.
+
+        Args:
+            datasets        :   The datasets to read, keyed by names used in 'read'.
+            n_threads       :   Number of threads decompressing the chunks. If not provided, the number of datasets
+                                read as raw chunks, limited to the number of CPUs, is used. If 1 (or if only one CPU
+                                is available), the chunks are decompressed in the calling thread.
+            value_checks    :   Checks of the values of (some of) the datasets, applied before the values are cast
+                                to the data types of the output arrays (see DatasetChunkReader), keyed by dataset names.
+        """
+
+        if n_threads is not None and (not isinstance(n_threads, int) or isinstance(n_threads, bool)):
+            raise TypeError(f"Number of read threads must be an integer; got {type(n_threads)}: {n_threads}")
+        if n_threads is not None and n_threads < 1:
+            raise ValueError(f"Number of read threads must be positive; got {n_threads}")
+
+        value_checks = value_checks or {}
+        self._readers = {name: DatasetChunkReader(dataset, value_check=value_checks.get(name))
+                         for name, dataset in datasets.items()}
+
+        n_raw = sum(reader.chunk_rows is not None for reader in self._readers.values())
+        if n_threads is None:
+            n_threads = min(n_raw, os.cpu_count() or 1)
+        self._n_threads = n_threads if n_raw else 1
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        logger.debug(f"{n_raw} of {len(self._readers)} HDF5 dataset(s) read in raw chunks; "
+                     f"decompressed in {self._n_threads} thread(s)")
+
+    @property
+    def readers(self) -> dict[str, DatasetChunkReader]:
+        """Readers of the individual datasets."""
+
+        return self._readers
+
+    def _get_executor(self) -> Optional[Executor]:
+        """Return the thread pool (creating it if needed), or None if the chunks are decompressed in this thread."""
+
+        if self._n_threads < 2:
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._n_threads, thread_name_prefix="DLISHDF5Reader")
+        return self._executor
+
+    def read(self, start: int, stop: int, out: dict[str, np.ndarray]) -> None:
+        """Copy rows of the datasets to the output arrays.
+
+        Args:
+            start   :   First row.
+            stop    :   Row after the last one.
+            out     :   Arrays of (stop - start) rows, keyed by the names of the datasets to be read.
+        """
+
+        executor = self._get_executor()
+        scheduled = {name: self._readers[name].schedule(start, stop, executor, dtype=arr.dtype)
+                     for name, arr in out.items()}
+
+        for name, arr in out.items():
+            self._readers[name].read(start, stop, arr, chunks=scheduled[name])
+
+    def close(self) -> None:
+        """Stop the thread pool (if started)."""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,285 @@
+import logging
+from typing import Any, Optional, Union, Callable, Iterable
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class IndexAnalyzer:
+    """Statistics of the values of an index channel, folded in chunk by chunk in a single pass.
+
+    The statistics include the minimum and maximum value, the direction (increasing/decreasing), and the spacing
+    of the index. The spacing is the difference between consecutive values if it is always the same; otherwise,
+    if all differences deviate from their median only slightly (as can be caused by numerical accuracy),
+    the median difference.
+
+    Consecutive index values usually take only a handful of distinct differences, so these are counted
+    (instead of keeping all differences) and the median is exact. If the number of distinct differences
+    exceeds 'max_distinct_diffs' while the spacing can still be uniform, the median is estimated from the medians
+    of the consecutive chunks instead. As the estimate depends on the chunks, it should be replaced with the exact
+    median by reading the index values again, if possible (see 'compute_exact_median').
+    """
+
+    tolerance = 0.001           #: max squared relative deviation of the differences from the median for uniformity
+    max_distinct_diffs = 10000  #: max number of distinct differences counted to compute the exact median
+    n_bins = 1024               #: number of bins narrowing down the median in each pass of 'compute_exact_median'
+
+    def __init__(self) -> None:
+        """Initialise IndexAnalyzer."""
+
+        self.n_values = 0  #: number of index values processed so far
+        # numpy scalars of the data type of the index
+        self.index_min: Optional[Any] = None  #: minimum value of the index
+        self.index_max: Optional[Any] = None  #: maximum value of the index
+
+        self._last: Optional[np.ndarray] = None  #: last value of the previous chunk (1-element array)
+        self._min_diff: Optional[Any] = None  #: minimum difference between consecutive values
+        self._max_diff: Optional[Any] = None  #: maximum difference between consecutive values
+        self._has_nan_diff = False  #: whether any of the differences is NaN
+
+        self._diff_values: Optional[np.ndarray] = None  #: distinct differences (sorted) - if counted
+        self._diff_counts: Optional[np.ndarray] = None  #: number of occurrences of the distinct differences
+        self._chunk_medians: list[tuple[float, int]] = []  #: (median, n. differences) of chunks - if not counted
+        self._exact_median: Optional[float] = None  #: median computed by 'compute_exact_median' (if called)
+        self._uniform_possible = True  #: False once the range of the differences excludes a uniform spacing
+
+    def update(self, index: np.ndarray) -> None:
+        """Include a chunk of consecutive index values in the statistics."""
+
+        if index.ndim != 1:
+            raise ValueError(f"Index values must be 1-dimensional; got {index.ndim} dimensions")
+        if not index.size:
+            return
+
+        chunk_min, chunk_max = index.min(), index.max()
+        if self.index_min is None or self.index_max is None:
+            self.index_min, self.index_max = chunk_min, chunk_max
+        else:
+            # np.minimum/np.maximum propagate NaN values, as min() and max() of the whole index would
+            self.index_min = np.minimum(self.index_min, chunk_min)
+            self.index_max = np.maximum(self.index_max, chunk_max)
+
+        # differences in the data type of the index (as np.diff would give for the whole index)
+        diff = np.diff(index if self._last is None else np.concatenate((self._last, index)))
+        self._last = index[-1:].copy()
+        self.n_values += index.size
+
+        if diff.size:
+            self._update_diffs(diff)
+
+    def _update_diffs(self, diff: np.ndarray) -> None:
+        """Include a chunk of differences between consecutive index values in the statistics."""
+
+        if self._has_nan_diff:
+            return  # neither direction nor spacing can be determined
+
+        diff_min, diff_max = diff.min(), diff.max()
+        if np.isnan(diff_min) or np.isnan(diff_max):
+            self._has_nan_diff = True
+            return
+
+        if self._min_diff is None or self._max_diff is None:
+            self._min_diff, self._max_diff = diff_min, diff_max
+        else:
+            self._min_diff, self._max_diff = np.minimum(self._min_diff, diff_min), np.maximum(self._max_diff, diff_max)
+
+        if not self._uniform_possible:
+            return
+
+        if not self._could_be_uniform():
+            logger.debug("Spacing of the index is not uniform; not tracking the differences any further")
+            self._uniform_possible = False
+            self._diff_values = self._diff_counts = None
+            self._chunk_medians.clear()
+            return
+
+        if diff_min == diff_max:
+            values, counts = diff[:1].copy(), np.array([diff.size])  # no need to sort a constant spacing
+        else:
+            values, counts = np.unique(diff, return_counts=True)
+        self._count_diffs(values, counts, diff)
+
+    def _count_diffs(self, values: np.ndarray, counts: np.ndarray, diff: np.ndarray) -> None:
+        """Add counts of distinct differences; switch to estimating the median if there are too many of them."""
+
+        if self._chunk_medians:
+            self._chunk_medians.append((np.median(diff).item(), diff.size))
+            return
+
+        if self._diff_values is not None and self._diff_counts is not None:
+            values, inverse = np.unique(np.concatenate((self._diff_values, values)), return_inverse=True)
+            counts = np.bincount(inverse, weights=np.concatenate((self._diff_counts, counts))).astype(np.int64)
+
+        if values.size <= self.max_distinct_diffs:
+            self._diff_values, self._diff_counts = values, counts
+            return
+
+        logger.debug(f"More than {self.max_distinct_diffs} distinct differences between index values; "
+                     f"the median spacing will be estimated")
+        self._chunk_medians.append((self._weighted_median(values, counts), int(counts.sum())))
+        self._diff_values = self._diff_counts = None
+
+    def _could_be_uniform(self) -> bool:
+        """Check whether the range of the differences still allows all of them to be close to a common median."""
+
+        if self._min_diff is None or self._max_diff is None or self._min_diff == self._max_diff:
+            return True
+        if self._min_diff <= 0 <= self._max_diff:
+            return False  # with a non-zero median, all differences would have its sign
+
+        # all differences must lie within median * (1 -/+ sqrt(tolerance)); a small margin for rounding errors
+        max_ratio = (1 + self.tolerance ** 0.5) / (1 - self.tolerance ** 0.5) * (1 + 1e-9)
+        low, high = sorted((abs(float(self._min_diff)), abs(float(self._max_diff))))
+        return bool(high <= low * max_ratio)
+
+    @staticmethod
+    def _weighted_median(values: np.ndarray, counts: np.ndarray) -> float:
+        """Compute the median of values given as sorted distinct values and their numbers of occurrences.
+
+        The result is the same as np.median of the values repeated according to their counts.
+        """
+
+        cumulative = np.cumsum(counts)
+        n = int(cumulative[-1])
+        positions = np.searchsorted(cumulative, [(n - 1) // 2, n // 2], side='right')
+        return float(np.mean(values[positions]))
+
+    def compute_exact_median(self, iterate_index: Callable[[], Iterable[np.ndarray]]) -> None:
+        """Compute the exact median difference (instead of the estimate) by reading the index values again.
+
+        The median is narrowed down in a few passes over the index values: each pass finds the bin (of 'n_bins' bins
+        dividing the current range of differences) containing the median, until there are at most
+        'max_distinct_diffs' differences in the range; these are then sorted. The result does not depend
+        on the chunks the index values are read in. Does nothing if the median is already exact.
+
+        Args:
+            iterate_index   :   Function returning an iterable over consecutive chunks of the same index values
+                                as have been passed to 'update'. Called once for each pass.
+        """
+
+        if self.is_median_exact or self._min_diff is None or self._max_diff is None:
+            return
+
+        n = self.n_values - 1  # number of differences
+        ranks = sorted({(n - 1) // 2, n // 2})
+        values = np.array([self._select_diff(rank, iterate_index, self._min_diff, self._max_diff) for rank in ranks],
+                          dtype=self._min_diff.dtype)
+        self._exact_median = float(np.mean(values))
+        self._chunk_medians.clear()
+
+    def _select_diff(self, rank: int, iterate_index: Callable[[], Iterable[np.ndarray]], min_diff: Any,
+                     max_diff: Any) -> Any:
+        """Find the difference of the given rank (position in the sorted differences); see 'compute_exact_median'."""
+
+        dtype = np.asarray(min_diff).dtype
+        low, high = float(min_diff), float(max_diff)
+        n_below = 0  # number of differences smaller than 'low'
+        n_in_range = self.n_values - 1
+
+        while n_in_range > self.max_distinct_diffs:
+            if low == high:
+                return np.array(low).astype(dtype)  # all differences in the range are the same
+
+            edges = np.linspace(low, high, self.n_bins + 1)
+            bin_counts = np.zeros(self.n_bins, dtype=np.int64)
+            for diff in self._iterate_diffs(iterate_index):
+                selected = diff[(diff >= low) & (diff <= high)]
+                bin_counts += np.bincount(np.searchsorted(edges[1:-1], selected, side='right'), minlength=self.n_bins)
+
+            # continue with the bin containing the difference of the given rank; the bins include their left edges
+            cumulative = n_below + np.cumsum(bin_counts)
+            idx_bin = int(np.searchsorted(cumulative, rank, side='right'))
+            n_below = int(cumulative[idx_bin - 1]) if idx_bin else n_below
+            n_in_range = int(bin_counts[idx_bin])
+            low = float(edges[idx_bin])
+            high = float(edges[-1]) if idx_bin == self.n_bins - 1 else float(np.nextafter(edges[idx_bin + 1], -np.inf))
+
+        # few enough differences in the range to be sorted
+        in_range = np.sort(np.concatenate([diff[(diff >= low) & (diff <= high)]
+                                           for diff in self._iterate_diffs(iterate_index)]))
+        return in_range[rank - n_below]
+
+    def _iterate_diffs(self, iterate_index: Callable[[], Iterable[np.ndarray]]) -> Iterable[np.ndarray]:
+        """Iterate over the differences between consecutive index values, computed as in 'update'."""
+
+        last: Optional[np.ndarray] = None
+        for index in iterate_index():
+            if not index.size:
+                continue
+            yield np.diff(index if last is None else np.concatenate((last, index)))
+            last = index[-1:]
+
+    @property
+    def is_median_exact(self) -> bool:
+        """Whether the median difference is computed exactly (True) or estimated (False)."""
+
+        return not self._chunk_medians
+
+    @property
+    def median_diff(self) -> Optional[float]:
+        """Median difference between consecutive index values; None if it is not known.
+
+        It is not known if there are fewer than 2 index values or if the spacing is found not to be uniform
+        (in which case the differences are not tracked any further).
+        """
+
+        if self._exact_median is not None:
+            return self._exact_median
+
+        if self._chunk_medians:
+            medians = np.array([m for m, _ in self._chunk_medians])
+            weights = np.array([n for _, n in self._chunk_medians])
+            order = np.argsort(medians)
+            return self._weighted_median(medians[order], weights[order])
+
+        if self._diff_values is None or self._diff_counts is None:
+            return None
+
+        return self._weighted_median(self._diff_values, self._diff_counts)
+
+    @property
+    def direction(self) -> Optional[bool]:
+        """True if the index is increasing, False if decreasing, None if neither (or constant, or unknown).
+
+        Increasing and decreasing are meant in the non-strict sense (consecutive values can be equal).
+        """
+
+        if self._has_nan_diff or self._min_diff is None or self._max_diff is None:
+            return None
+        if self._min_diff == 0 and self._max_diff == 0:
+            return None
+        if self._min_diff >= 0:
+            return True
+        if self._max_diff <= 0:
+            return False
+        return None
+
+    @property
+    def spacing(self) -> Union[np.generic, float, None]:
+        """Spacing of the index values; None if there are too few values or the spacing is not uniform enough.
+
+        If all differences between consecutive values are the same, this difference is returned
+        (in the data type of the index). Otherwise, the median difference (float) is returned if all differences
+        deviate from it by less than 'tolerance' (squared relative deviation).
+        """
+
+        if self._has_nan_diff or self._min_diff is None or self._max_diff is None:
+            return None
+
+        if self._min_diff == self._max_diff:
+            spacing: np.generic = self._min_diff
+            return spacing
+
+        median_diff = self.median_diff
+        if not median_diff:
+            return None  # not uniform, or a median of 0, for which the uniformity cannot be determined
+
+        # the deviation is the largest for the extreme differences
+        extremes = np.array([self._min_diff, self._max_diff])
+        deviations = (1 - extremes / median_diff) ** 2
+        if (deviations < self.tolerance).all():
+            return median_diff
+
+        return None
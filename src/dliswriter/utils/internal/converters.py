@@ -64,6 +64,15 @@ class ReprCodeConverter:
         'float64': RepresentationCode.FDOUBL
     }
 
+    # mapping of names of numpy dtypes without a representation code on the closest dtypes which have one;
+    # data of these dtypes are cast when loaded (integer values are checked to fit, see CastChecker)
+    castable_numpy_dtypes: dict[str, str] = {
+        'int64': 'int32',
+        'uint64': 'uint32',
+        'float16': 'float32',
+        'bool': 'uint8'
+    }
+
     # mapping of numerical representation codes on corresponding numpy dtypes
     repr_codes_to_numpy_dtypes: dict[RepresentationCode, numpy_dtype_type]\
         = {v: getattr(np, k) for k, v in numpy_dtypes_to_repr_codes.items()}
@@ -77,8 +86,15 @@ class ReprCodeConverter:
     }
 
     @classmethod
-    def validate_numpy_dtype(cls, number_type: numpy_dtype_type) -> tuple[str, RepresentationCode]:
-        """Check that the provided value is a numpy dtype. Return the dtype name and the corresponding repr code."""
+    def validate_numpy_dtype(cls, number_type: numpy_dtype_type, allow_cast: bool = False
+                             ) -> tuple[str, RepresentationCode]:
+        """Check that the provided value is a numpy dtype. Return the dtype name and the corresponding repr code.
+
+        Args:
+            number_type :   The numpy dtype (or numpy scalar type) to check.
+            allow_cast  :   If True, also accept the dtypes which can be cast to a supported one
+                            (see 'castable_numpy_dtypes'); the name and repr code of the latter are then returned.
+        """
 
         if isinstance(number_type, np.dtype):
             number_type_name = number_type.name
@@ -86,12 +102,25 @@ class ReprCodeConverter:
             number_type_name = number_type.__name__
         else:
             raise ValueError(f"{number_type} is not a numpy dtype")
+        if allow_cast:
+            number_type_name = cls.castable_numpy_dtypes.get(number_type_name, number_type_name)
         if number_type_name not in ReprCodeConverter.numpy_dtypes_to_repr_codes:
             raise ValueError(f"Dtype {number_type_name} is not supported; "
                              f"allowed dtypes are: {', '.join(ReprCodeConverter.numpy_dtypes_to_repr_codes)}")
 
         return number_type_name, cls.numpy_dtypes_to_repr_codes[number_type_name]
 
+    @classmethod
+    def determine_supported_numpy_dtype(cls, number_type: numpy_dtype_type) -> np.dtype:
+        """Return the numpy dtype if it has a representation code; otherwise, the closest dtype which has one.
+
+        E.g. int64 data are written as int32 (SLONG) and bool data as uint8 (USHORT); see 'castable_numpy_dtypes'.
+        """
+
+        number_type_name = cls.validate_numpy_dtype(number_type, allow_cast=True)[0]
+        dt = np.dtype(number_type)
+        return dt if dt.name == number_type_name else np.dtype(number_type_name)
+
     @classmethod
     def determine_repr_code_from_numpy_dtype(cls, dt: numpy_dtype_type) -> RepresentationCode:
         """Determine representation code for a given numpy dtype."""
@@ -1,6 +1,7 @@
+import io
 import os
 import numpy as np
-from typing import Union, TypeVar, TypedDict, Any
+from typing import Union, TypeVar, TypedDict, Any, BinaryIO
 from datetime import datetime
 import h5py  # type: ignore  # untyped library
 
@@ -10,10 +11,11 @@ from dliswriter.utils import enums
 numpy_dtype_type = Union[np.dtype, type[np.generic]]
 
 file_name_type = Union[str, os.PathLike[str]]
+sink_type = Union[file_name_type, BinaryIO, io.RawIOBase, int]  #: file name, binary file object, or file descriptor
 data_form_type = Union[dict[str, np.ndarray], file_name_type, np.ndarray]
 data_source_type = Union[np.ndarray, dict[str, np.ndarray], h5py.File]
 
-bytes_type = Union[bytes, bytearray]
+bytes_type = Union[bytes, bytearray, memoryview]
 number_type = Union[int, float]
 dtime_or_number_type = Union[str, datetime, number_type]
 list_of_values_type = Union[list[str], list[int], list[float]]
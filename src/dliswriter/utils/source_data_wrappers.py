@@ -1,22 +1,161 @@
+import os
+import hashlib
 import numpy as np
 import h5py    # type: ignore  # untyped library
 from typing import Union, Optional, Any, Generator
 import logging
 from abc import ABC
+from dataclasses import dataclass
+from threading import Condition
 
 from dliswriter.utils.internal.converters import ReprCodeConverter
 from dliswriter.utils.internal.types import data_form_type, data_source_type, file_name_type, numpy_dtype_type
+from dliswriter.utils.hdf5_reader import HDF5ChunkReader
+from dliswriter.utils.cast_checker import CastChecker, CastPolicy
 
 
 logger = logging.getLogger(__name__)
 
 
+class ChunkBufferRing:
+    """Small set of preallocated chunk buffers, filled in place and reused for consecutive chunks of data.
+
+    Instead of allocating (and zero-filling) a new structured array for each loaded chunk, the chunks are loaded
+    into buffers taken from the ring (see 'acquire'). The buffers are handed out as views of the length of the chunk;
+    once the consumer is done with a chunk (e.g. it has been encoded), it should give the buffer back ('release').
+    If all buffers are in use, 'acquire' waits until one is released, so that the ring can be shared between
+    a thread loading the chunks and a thread consuming them.
+
+    The buffers are allocated on first use, so a ring with more buffers than are ever in use at the same time
+    does not take more memory.
+    """
+
+    def __init__(self, dtype: np.dtype, max_rows: int, n_buffers: int = 1):
+        """Initialise ChunkBufferRing.
+
+        Args:
+            dtype       :   Structured numpy dtype of the buffers, e.g. the big-endian dtype the chunks are encoded in.
+            max_rows    :   Number of rows of each buffer (the largest chunk size).
+            n_buffers   :   Max number of buffers.
+        """
+
+        if not isinstance(n_buffers, int) or isinstance(n_buffers, bool):
+            raise TypeError(f"Number of chunk buffers must be an integer; got {type(n_buffers)}: {n_buffers}")
+        if n_buffers < 1:
+            raise ValueError(f"Number of chunk buffers must be positive; got {n_buffers}")
+
+        self._dtype = np.dtype(dtype)
+        self._max_rows = max_rows
+        self._n_buffers = n_buffers
+
+        self._free: list[np.ndarray] = []
+        self._in_use: dict[int, np.ndarray] = {}  #: buffers handed out, keyed by their ids
+        self._n_allocated = 0
+        self._closed = False
+        self._condition = Condition()
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the buffers."""
+
+        return self._dtype
+
+    @property
+    def n_buffers(self) -> int:
+        """Max number of buffers."""
+
+        return self._n_buffers
+
+    @property
+    def n_allocated(self) -> int:
+        """Number of buffers allocated so far."""
+
+        return self._n_allocated
+
+    @property
+    def n_in_use(self) -> int:
+        """Number of buffers acquired and not yet released."""
+
+        return len(self._in_use)
+
+    def acquire(self, n_rows: int) -> np.ndarray:
+        """Take a free buffer from the ring, waiting until one is released if needed.
+
+        Args:
+            n_rows  :   Number of rows of the chunk to be put in the buffer.
+
+        Returns:
+            A view of the first 'n_rows' rows of the buffer. The contents are undefined (not zero-filled).
+        """
+
+        if n_rows > self._max_rows:
+            raise ValueError(f"Cannot put {n_rows} rows in a chunk buffer of {self._max_rows} rows")
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._closed or self._free or self._n_allocated < self._n_buffers)
+            if self._closed:
+                raise RuntimeError("Chunk buffer ring has been closed")
+
+            if self._free:
+                buffer = self._free.pop()
+            else:
+                buffer = np.empty(self._max_rows, dtype=self._dtype)
+                self._n_allocated += 1
+
+            self._in_use[id(buffer)] = buffer
+
+        return buffer[:n_rows]
+
+    def release(self, chunk: np.ndarray) -> None:
+        """Give the buffer of a chunk back to the ring. Arrays which do not come from the ring are ignored."""
+
+        buffer = chunk.base if chunk.base is not None else chunk
+
+        with self._condition:
+            if self._in_use.pop(id(buffer), None) is None:
+                return
+            self._free.append(buffer)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Stop handing out buffers; any thread waiting for a buffer gets a RuntimeError."""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+@dataclass(frozen=True)
+class DataSetInfo:
+    """Shape and data type of a data set of a SourceDataWrapper, determined without reading the data."""
+
+    name: str                   #: data type name of the data set (key of the wrapper's mapping)
+    shape: tuple[int, ...]      #: shape of the data set, restricted to the rows to be loaded
+    dtype: np.dtype             #: data type of the source data set (before any casting)
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows of the data set to be loaded."""
+
+        return self.shape[0]
+
+    @property
+    def ndim(self) -> int:
+        """Number of dimensions of the data set (including the rows)."""
+
+        return len(self.shape)
+
+
 class SourceDataWrapper(ABC):
     """Keep reference to source data. Produce chunks of input data as asked, in the form of a structured numpy array."""
 
+    #: whether the data sets are separate in-memory arrays, so that chunks are best encoded column by column
+    #: (see 'load_columns') rather than interleaved in a structured array first
+    columnar: bool = False
+
     def __init__(self, data_source: data_source_type, mapping: dict[str, str],
                  known_dtypes: Optional[dict[str, numpy_dtype_type]] = None, from_idx: int = 0,
-                 to_idx: Optional[int] = None) -> None:
+                 to_idx: Optional[int] = None, cast_policy: str = CastPolicy.RAISE) -> None:
         """Initialise a SourceDataWrapper.
 
         Args:
@@ -28,6 +167,8 @@ class SourceDataWrapper(ABC):
                                 the data.
             from_idx        :   Index from which data should be loaded (or number of initial rows to ignore).
             to_idx          :   Index up to which data should be loaded.
+            cast_policy     :   How to handle integer values which do not fit in the data type they are cast to,
+                                e.g. int64 values cast to int32 (see CastPolicy and CastChecker).
 
             Note:
                 All data sets from 'mapping' should be found in the 'data_source'. On the other hand, 'data_source'
@@ -56,12 +197,39 @@ class SourceDataWrapper(ABC):
             raise ValueError(f"Starting index {self._from_idx} and end index {self._to_idx} do not yield a positive "
                              f"number of rows to be loaded")
 
+        self._cast_policy: str = CastPolicy.make_converter("cast policies")(cast_policy)
+        if self._cast_policy == CastPolicy.PROMOTE:
+            self._promote_out_of_range_datasets(known_dtypes or {})
+
+        #: checks of the values of the data sets cast to narrower integer data types, applied when loading chunks
+        self._cast_checkers = {
+            name: CastChecker(name, source_dtype, self._dtype[name].base, policy=self._cast_policy)
+            for name, source_dtype in self.source_dtypes.items()
+            if CastChecker.is_needed(source_dtype, self._dtype[name].base)
+        }
+
+        self._identity: Optional[bytes] = None  #: digest of the data to be loaded (see 'identity')
+
     @property
     def n_rows(self) -> int:
         """Total number of data rows."""
 
         return self._n_rows
 
+    @property
+    def cast_policy(self) -> str:
+        """How integer values not fitting in the data type they are cast to are handled (see CastPolicy)."""
+
+        return self._cast_policy
+
+    @property
+    def identity(self) -> bytes:
+        """Digest identifying the data to be loaded (see 'compute_identity'); computed once and then reused."""
+
+        if self._identity is None:
+            self._identity = self.compute_identity()
+        return self._identity
+
     @property
     def data_source(self) -> data_source_type:
         """Source data object."""
@@ -74,6 +242,47 @@ class SourceDataWrapper(ABC):
 
         return self._dtype
 
+    @property
+    def source_dtypes(self) -> dict[str, np.dtype]:
+        """Data types of the elements of the source data sets, keyed by the data type names (as in 'dtype').
+
+        These can differ from the data types in 'dtype' if the data are cast (see 'known_dtypes' in __init__).
+        """
+
+        return {name: np.dtype(self._data_source[source_name].dtype) for name, source_name in self._mapping.items()}
+
+    @property
+    def cast_checkers(self) -> dict[str, CastChecker]:
+        """Checks of the values of the data sets cast to narrower integer data types, keyed by the names in 'dtype'."""
+
+        return self._cast_checkers
+
+    def _promote_out_of_range_datasets(self, known_dtypes: dict[str, numpy_dtype_type]) -> None:
+        """Cast data sets whose integer values do not all fit in the data type chosen for them to float64 instead.
+
+        Only the data sets whose data type has been determined from the data (not the 'known_dtypes') are considered.
+        Their values are read in chunks (see CastChecker.check_dataset) before the writing starts.
+        """
+
+        fields = []
+        for name, source_dtype in self.source_dtypes.items():
+            field_dtype = self._dtype[name]
+            if name not in known_dtypes and CastChecker.is_needed(source_dtype, field_dtype.base):
+                checker = CastChecker(name, source_dtype, field_dtype.base, policy=CastPolicy.PROMOTE)
+                if not checker.check_dataset(self.iterate_dataset_chunks(name, CastChecker.scan_chunk_rows)):
+                    logger.info(f"Values of '{name}' do not fit in {field_dtype.base}; the data set will be cast "
+                                f"to float64 instead")
+                    field_dtype = np.dtype((np.float64, field_dtype.shape))
+            fields.append((name, field_dtype))
+
+        self._dtype = np.dtype(fields)
+
+    def _check_values(self, name: str, values: np.ndarray) -> np.ndarray:
+        """Check the values of a data set which are to be cast to its data type (see 'cast_checkers')."""
+
+        checker = self._cast_checkers.get(name)
+        return checker(values) if checker is not None else values
+
     @staticmethod
     def determine_dtypes(data_object: data_source_type, mapping: dict[str, str],
                          known_dtypes: Optional[dict[str, numpy_dtype_type]] = None) -> np.dtype:
@@ -102,40 +311,83 @@ class SourceDataWrapper(ABC):
                 dset = data_object[dataset_name]
             except (ValueError, KeyError):
                 raise ValueError(f"No dataset '{dataset_name}' found in the source data")
-            dset_row0 = dset[0:1]  # get in form of a 1-element (or 1-row) array, not a single number
-            # for h5 data, the above retrieves the first row of the current data set
+            # only the metadata (shape & dtype) are used; for h5 data, nothing is read from the data set
 
-            # determine the numpy number dtype
-            number_type = known_dtypes.get(dtype_name, dset_row0.dtype)
-            ReprCodeConverter.validate_numpy_dtype(number_type)
+            # determine the numpy number dtype; data types without a representation code are cast to the closest
+            # one which has it (e.g. int64 to int32)
+            if dtype_name in known_dtypes:
+                number_type = known_dtypes[dtype_name]
+                ReprCodeConverter.validate_numpy_dtype(number_type)
+            else:
+                number_type = ReprCodeConverter.determine_supported_numpy_dtype(dset.dtype)
 
             # determine the dtype of the data set (2- or 3-tuple)
             dt = (dtype_name, number_type)
-            if dset_row0.ndim > 1:
-                if dset_row0.ndim > 2:
+            if len(dset.shape) > 1:
+                if len(dset.shape) > 2:
                     raise RuntimeError("Data sets with more than 2 dimensions are not supported")
-                dt = (*dt, dset_row0.shape[-1])  # 3-tuple if the data set has multiple samples per row - add the width
+                dt = (*dt, dset.shape[-1])  # 3-tuple if the data set has multiple samples per row - add the width
             dtypes.append(dt)
 
         return np.dtype(dtypes)
 
+    def _get_source_dataset(self, item: str) -> Any:
+        """Return the source data set (e.g. a numpy array or an h5py Dataset) of the given dtype name, unsliced."""
+
+        try:
+            return self._data_source[self._mapping[item]]
+        except (ValueError, KeyError):
+            raise ValueError(f"No dataset '{item}' found in the source data")
+
     def __getitem__(self, item: str) -> np.ndarray:
         """Retrieve a dataset of the given name from the dataset.
 
         The name should be the one used for the dtype name, not the data set name/location
         (i.e. taken from the keys, not values, of the 'mapping' dictionary specified at init).
 
+        Note:
+            For HDF5 data, this reads the whole data set (within the rows to be loaded) into memory.
+            Use 'get_dataset_info' if only its shape or data type is needed.
+
         Returns:
             A np.ndarray with the data.
         """
 
-        try:
-            data = self._data_source[self._mapping[item]]
-        except (ValueError, KeyError):
-            raise ValueError(f"No dataset '{item}' found in the source data")
-        return data[self._from_idx:self._to_idx]
+        data: np.ndarray = self._get_source_dataset(item)[self._from_idx:self._to_idx]
+        return data
+
+    def get_dataset_info(self, item: str) -> DataSetInfo:
+        """Determine the shape and data type of a dataset of the given (dtype) name, without reading its data.
+
+        Args:
+            item    :   Name of the data set, as used for the dtype name (key of the 'mapping' specified at init).
+
+        Returns:
+            DataSetInfo with the shape of the data set restricted to the rows to be loaded (see 'n_rows')
+            and the data type of the source data set.
+        """
 
-    def load_chunk(self, start: int, stop: Union[int, None]) -> np.ndarray:
+        dataset = self._get_source_dataset(item)
+        return DataSetInfo(name=item, shape=(self._n_rows, *dataset.shape[1:]), dtype=np.dtype(dataset.dtype))
+
+    def compute_identity(self) -> bytes:
+        """Compute a digest identifying the data to be loaded: the mapped data sets and the range of rows.
+
+        Used as a part of the key of cached encoded frame data (see FrameDataCache). By default, the contents
+        of the relevant rows of the data sets are hashed.
+        """
+
+        digest = hashlib.sha256(f"{type(self).__name__}:{self._from_idx}:{self._to_idx}".encode())
+        for name in self._mapping:
+            values = self[name]
+            arr = np.ascontiguousarray(values)
+            digest.update(f"{name}:{arr.dtype.str}:{arr.shape}".encode())
+            digest.update(arr.data)
+            if np.ma.is_masked(values):  # masked samples are written as absent values
+                digest.update(np.ascontiguousarray(np.ma.getmaskarray(values)).data)
+        return digest.digest()
+
+    def load_chunk(self, start: int, stop: Union[int, None], out: Optional[np.ndarray] = None) -> np.ndarray:
         """Copy a chunk of the source data into a structured numpy array of the pre-determined dtype.
 
         The returned chunk is a horizontal slice of the source data, possibly reshaped to match the desired format
@@ -145,11 +397,47 @@ class SourceDataWrapper(ABC):
         Args:
             start   :   Start index.
             stop    :   Stop index. If None, all data from start index till the end will be loaded.
+            out     :   Structured array (e.g. a buffer from a ChunkBufferRing) to put the data in, instead of
+                        allocating a new one. It must have the number of rows of the chunk and the same field names
+                        and shapes as 'dtype'; the data are converted to its data types (e.g. big-endian) when copied.
 
         Returns:
             A structured numpy array, containing the required chunks of all the relevant data sets from the source data.
         """
 
+        stop = self._check_chunk_bounds(start, stop)
+
+        idx = slice(self._from_idx + start, self._from_idx + stop)
+        n_rows = stop - start
+
+        chunk = self._prepare_chunk_array(n_rows, out)
+        for key, loc in self._mapping.items():
+            chunk[key] = self._check_values(key, self._data_source[loc][idx])
+
+        return chunk
+
+    def load_columns(self, start: int, stop: Union[int, None]) -> dict[str, np.ndarray]:
+        """Load a chunk of the source data as separate columns, without interleaving them in a structured array.
+
+        The columns are in their source data types (cast when encoded, see FrameDataEncoder.encode_columns).
+        For in-memory data sets (see 'columnar'), they are views of the source arrays; no data are copied
+        (unless values not fitting in the target data type are clipped, see 'cast_checkers').
+
+        Args:
+            start   :   Start index.
+            stop    :   Stop index. If None, all data from start index till the end will be loaded.
+
+        Returns:
+            Dictionary of the chunks of the data sets, keyed by the names in 'dtype' (in the same order).
+        """
+
+        stop = self._check_chunk_bounds(start, stop)
+        idx = slice(self._from_idx + start, self._from_idx + stop)
+        return {key: self._check_values(key, self._data_source[loc][idx]) for key, loc in self._mapping.items()}
+
+    def _check_chunk_bounds(self, start: int, stop: Union[int, None]) -> int:
+        """Check the start and stop rows of a chunk; return the stop row (the number of rows if stop is None)."""
+
         if start < 0:
             raise ValueError("Start row cannot be negative")
 
@@ -164,26 +452,142 @@ class SourceDataWrapper(ABC):
         if stop < start:
             raise ValueError(f"Stop row cannot be smaller than start row; got {stop} and {start}")
 
-        idx = slice(self._from_idx + start, self._from_idx + stop)
-        n_rows = stop - start
+        return stop
 
-        chunk = np.zeros(n_rows, dtype=self._dtype)
-        for key, loc in self._mapping.items():
-            chunk[key] = self._data_source[loc][idx]
+    def _get_view(self, start: int, stop: Union[int, None]) -> Optional[np.ndarray]:
+        """Return a chunk as a view of the source data, if possible without copying; None otherwise."""
+
+        return None
+
+    def _prepare_chunk_array(self, n_rows: int, out: Optional[np.ndarray]) -> np.ndarray:
+        """Return the provided array for a chunk (after checking it) or allocate a new one (not zero-filled)."""
+
+        if out is None:
+            return np.empty(n_rows, dtype=self._dtype)
+
+        self._check_out_array(out, n_rows)
+        return out
+
+    def _check_out_array(self, out: np.ndarray, n_rows: int) -> None:
+        """Check that the array provided for a chunk has the right number of rows and fields."""
+
+        if out.shape != (n_rows,):
+            raise ValueError(f"Array for a chunk of {n_rows} rows must have shape ({n_rows},); got {out.shape}")
+
+        if out.dtype.names != self._dtype.names or any(
+                out.dtype[name].shape != self._dtype[name].shape for name in self._dtype.names or ()):
+            raise ValueError(f"Array for a chunk must have the same fields and shapes as {self._dtype}; "
+                             f"got {out.dtype}")
+
+    def make_buffer_ring(self, chunk_rows: Union[int, None], n_buffers: int = 1,
+                         dtype: Optional[np.dtype] = None) -> ChunkBufferRing:
+        """Create a ring of buffers for loading the data in chunks of the given size (see 'iterate_chunks').
+
+        Args:
+            chunk_rows  :   Maximal number of rows per chunk. If None, the entire data is loaded as a single chunk.
+            n_buffers   :   Max number of buffers in the ring, i.e. of chunks loaded and not yet released at a time.
+            dtype       :   Data type of the buffers; must have the same fields and shapes as 'dtype', but the data
+                            types may differ (e.g. the big-endian target dtype of the encoder).
+                            If not provided, 'dtype' is used.
+
+        Returns:
+            A ChunkBufferRing.
+        """
 
+        max_rows = max(self.compute_chunk_sizes(chunk_rows))
+        return ChunkBufferRing(dtype if dtype is not None else self._dtype, max_rows=max_rows, n_buffers=n_buffers)
+
+    def _load_chunk_into_ring(self, start: int, stop: Union[int, None], buffer_ring: ChunkBufferRing) -> np.ndarray:
+        """Load a chunk into a buffer taken from the ring; give the buffer back if the data are not put in it."""
+
+        stop = self._check_chunk_bounds(start, stop)
+        view = self._get_view(start, stop)
+        if view is not None:
+            return view  # no data copied, so no buffer needed
+
+        buffer = buffer_ring.acquire(stop - start)
+
+        try:
+            chunk = self.load_chunk(start, stop, out=buffer)
+        except BaseException:
+            buffer_ring.release(buffer)
+            raise
+
+        if chunk is not buffer:
+            buffer_ring.release(buffer)
         return chunk
 
-    def make_chunked_generator(self, chunk_rows: Union[int, None]) -> Generator:
+    def compute_chunk_sizes(self, chunk_rows: Union[int, None]) -> list[int]:
+        """Determine the numbers of rows of consecutive chunks the data would be loaded in (see 'iterate_chunks').
+
+        Args:
+            chunk_rows  :   Maximal number of rows per chunk. If None, the entire data is treated as a single chunk.
+
+        Returns:
+            List of the numbers of rows of consecutive chunks.
+        """
+
+        if chunk_rows is None:
+            return [self._n_rows]
+
+        n_full_chunks, remainder_rows = divmod(self._n_rows, chunk_rows)
+        return [chunk_rows] * n_full_chunks + ([remainder_rows] if remainder_rows else [])
+
+    def iterate_chunks(self, chunk_rows: Union[int, None], buffer_ring: Optional[ChunkBufferRing] = None
+                       ) -> Generator:
         """Define a generator yielding consecutive chunks of input data with the specified size.
 
         Args:
             chunk_rows  :   Maximal number of rows per chunk (the last chunk might be smaller, depending on the total
                             size of the data). If None, the entire data is loaded as a single chunk.
+            buffer_ring :   If provided, the chunks are loaded into buffers taken from this ring
+                            (see 'make_buffer_ring'). The consumer should release each chunk back to the ring
+                            once it is done with it; otherwise, loading waits for a free buffer.
 
         Yields:
             Structured numpy.ndarray objects with the consecutive chunks of the source data.
         """
 
+        for start, stop in self._iterate_chunk_bounds(chunk_rows):
+            if buffer_ring is None:
+                yield self.load_chunk(start, stop)
+            else:
+                yield self._load_chunk_into_ring(start, stop, buffer_ring)
+
+    def iterate_column_chunks(self, chunk_rows: Union[int, None]) -> Generator[dict[str, np.ndarray], None, None]:
+        """Define a generator yielding consecutive chunks of input data as separate columns (see 'load_columns').
+
+        Args:
+            chunk_rows  :   Maximal number of rows per chunk (the last chunk might be smaller, depending on the total
+                            size of the data). If None, the entire data is loaded as a single chunk.
+
+        Yields:
+            Dictionaries of the consecutive chunks of the data sets, keyed by the names in 'dtype'.
+        """
+
+        for start, stop in self._iterate_chunk_bounds(chunk_rows):
+            yield self.load_columns(start, stop)
+
+    def iterate_dataset_chunks(self, item: str, chunk_rows: Union[int, None]) -> Generator[np.ndarray, None, None]:
+        """Define a generator yielding consecutive chunks of a single data set, without loading the other ones.
+
+        Args:
+            item        :   Name of the data set, as used for the dtype name (key of the 'mapping' specified at init).
+            chunk_rows  :   Maximal number of rows per chunk (the last chunk might be smaller, depending on the total
+                            size of the data). If None, the entire data set is loaded as a single chunk.
+
+        Yields:
+            Consecutive chunks of the data set, in its source data type. For in-memory data, these are views.
+        """
+
+        dataset = self._get_source_dataset(item)
+        for start, stop in self._iterate_chunk_bounds(chunk_rows):
+            stop = self._check_chunk_bounds(start, stop)
+            yield dataset[self._from_idx + start:self._from_idx + stop]
+
+    def _iterate_chunk_bounds(self, chunk_rows: Union[int, None]) -> Generator[tuple[int, Optional[int]], None, None]:
+        """Yield (start, stop) rows of consecutive chunks of the specified size (stop is None for the last chunk)."""
+
         if chunk_rows is None:
             chunk_rows = self._n_rows
             n_full_chunks = 1
@@ -202,11 +606,25 @@ class SourceDataWrapper(ABC):
 
         for i in range(n_full_chunks):
             logger.debug(f"Loading chunk {i+1}/{total_chunks} ({chunk_rows} rows)")
-            yield from self.load_chunk(i * chunk_rows, (i + 1) * chunk_rows)
+            yield i * chunk_rows, (i + 1) * chunk_rows
 
         if remainder_rows:
             logger.debug(f"Loading chunk {total_chunks}/{total_chunks} ({remainder_rows} rows)")
-            yield from self.load_chunk(n_full_chunks * chunk_rows, None)
+            yield n_full_chunks * chunk_rows, None
+
+    def make_chunked_generator(self, chunk_rows: Union[int, None]) -> Generator:
+        """Define a generator yielding consecutive rows of input data, loaded in chunks of the specified size.
+
+        Args:
+            chunk_rows  :   Maximal number of rows per chunk (the last chunk might be smaller, depending on the total
+                            size of the data). If None, the entire data is loaded as a single chunk.
+
+        Yields:
+            Consecutive rows (numpy.void objects) of the structured arrays returned by 'iterate_chunks'.
+        """
+
+        for chunk in self.iterate_chunks(chunk_rows):
+            yield from chunk
 
     @classmethod
     def make_wrapper(cls, source: data_form_type, mapping: Optional[dict] = None,
@@ -244,7 +662,8 @@ class HDF5DataWrapper(SourceDataWrapper):
 
     def __init__(self, data_file_name: file_name_type, mapping: dict,
                  known_dtypes: Optional[dict[str, numpy_dtype_type]] = None, from_idx: int = 0,
-                 to_idx: Optional[int] = None) -> None:
+                 to_idx: Optional[int] = None, n_read_threads: Optional[int] = None,
+                 cast_policy: str = CastPolicy.RAISE) -> None:
         """Initialise HDF5DataWrapper.
 
         Args:
@@ -256,19 +675,81 @@ class HDF5DataWrapper(SourceDataWrapper):
                                 the data.
             from_idx        :   Index from which data should be loaded (or number of initial rows to ignore).
             to_idx          :   Index up to which data should be loaded.
+            n_read_threads  :   Number of threads decompressing the chunks of the data sets (see HDF5ChunkReader).
+                                If not provided, it is determined from the number of compressed data sets and CPUs.
+            cast_policy     :   How to handle integer values which do not fit in the data type they are cast to
+                                (see SourceDataWrapper).
         """
 
+        self._n_read_threads = n_read_threads
+        self._reader: Optional[HDF5ChunkReader] = None  #: created when the first chunk is loaded
+
         # open the file
         h5_data = h5py.File(data_file_name, 'r')
 
         # add a forward slash at the beginning of each value in the mapping dict - if missing
         mapping = {k: (f'/{v}' if not v.startswith('/') else v) for k, v in mapping.items()}
 
-        super().__init__(h5_data, mapping, known_dtypes=known_dtypes, from_idx=from_idx, to_idx=to_idx)
+        super().__init__(h5_data, mapping, known_dtypes=known_dtypes, from_idx=from_idx, to_idx=to_idx,
+                         cast_policy=cast_policy)
+
+    def _get_reader(self) -> HDF5ChunkReader:
+        """Return the reader of the mapped data sets, creating it if needed."""
+
+        if self._reader is None:
+            datasets = {key: self._data_source[loc] for key, loc in self._mapping.items()}
+            self._reader = HDF5ChunkReader(datasets, n_threads=self._n_read_threads,
+                                           value_checks=dict(self._cast_checkers))
+        return self._reader
+
+    def load_chunk(self, start: int, stop: Union[int, None], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Load a chunk of the input data.
+
+        The data sets are read with an HDF5ChunkReader: each HDF5 chunk of a data set is decompressed only once,
+        even if the chunk boundaries are not aligned with the rows of the loaded chunks, and the chunks of different
+        data sets are decompressed concurrently.
+
+        Args:
+            start   :   Start index.
+            stop    :   Stop index. If None, all data from start index till the end will be loaded.
+            out     :   Structured array to put the data in (see SourceDataWrapper.load_chunk).
+
+        Returns:
+            A structured numpy array, containing the required chunks of all the relevant data sets from the source data.
+        """
+
+        stop = self._check_chunk_bounds(start, stop)
+        chunk = self._prepare_chunk_array(stop - start, out)
+
+        columns = {key: chunk[key] for key in self._mapping}
+        self._get_reader().read(self._from_idx + start, self._from_idx + stop, columns)
+        return chunk
+
+    def compute_identity(self) -> bytes:
+        """Compute a digest identifying the data to be loaded, without reading them.
+
+        The path, size, and modification time of the HDF5 file are used, together with the paths, data types,
+        and shapes of the mapped data sets and the range of rows. A file modified in place without changing
+        its modification time (e.g. with the time reset explicitly) is therefore not recognised as changed.
+        """
+
+        file_name = os.path.abspath(self._data_source.filename)
+        stat = os.stat(file_name)
+        digest = hashlib.sha256(f"HDF5:{file_name}:{stat.st_size}:{stat.st_mtime_ns}:"
+                                f"{self._from_idx}:{self._to_idx}".encode())
+        for name, path in self._mapping.items():
+            dataset = self._data_source[path]
+            digest.update(f"{name}:{path}:{dataset.dtype.str}:{dataset.shape}".encode())
+        return digest.digest()
 
     def close(self) -> None:
         """Close the HDF5 file (if open)."""
 
+        reader = getattr(self, '_reader', None)  # object might be partially initialised
+        if reader is not None:
+            reader.close()
+            self._reader = None
+
         if hasattr(self, '_data_source'):  # object might be partially initialised
             try:
                 self._data_source.close()
@@ -290,7 +771,7 @@ class NumpyDataWrapper(SourceDataWrapper):
 
     def __init__(self, arr: np.ndarray, mapping: Optional[dict] = None,
                  known_dtypes: Optional[dict[str, numpy_dtype_type]] = None, from_idx: int = 0,
-                 to_idx: Optional[int] = None) -> None:
+                 to_idx: Optional[int] = None, cast_policy: str = CastPolicy.RAISE) -> None:
         """Initialise NumpyDataWrapper.
 
         Args:
@@ -303,6 +784,8 @@ class NumpyDataWrapper(SourceDataWrapper):
                                 the data.
             from_idx        :   Index from which data should be loaded (or number of initial rows to ignore).
             to_idx          :   Index up to which data should be loaded.
+            cast_policy     :   How to handle integer values which do not fit in the data type they are cast to
+                                (see SourceDataWrapper).
 
         """
 
@@ -312,27 +795,69 @@ class NumpyDataWrapper(SourceDataWrapper):
             # default mapping: 1 to 1 for all existing data type names
             mapping = {k: k for k in arr.dtype.names}
 
-        super().__init__(arr, mapping, known_dtypes=known_dtypes, from_idx=from_idx, to_idx=to_idx)
+        super().__init__(arr, mapping, known_dtypes=known_dtypes, from_idx=from_idx, to_idx=to_idx,
+                         cast_policy=cast_policy)
+
+        #: dtype viewing the source array as the target fields, if the data sets do not have to be cast
+        self._projection_dtype = self._make_projection_dtype()
+
+    def _make_projection_dtype(self) -> Optional[np.dtype]:
+        """Create a structured dtype selecting (and renaming) the mapped fields of the source array, in place.
+
+        The dtype has the target field names, in the target order, but the offsets and the item size of the source
+        array, so that the source array can be viewed with it without copying any data.
+        If any of the data sets is cast to another data type (see 'known_dtypes' in __init__), None is returned.
+        """
+
+        source_fields: dict[str, tuple] = dict(self._data_source.dtype.fields or {})
+        names, formats, offsets = [], [], []
+
+        for name, source_name in self._mapping.items():
+            source_dtype, offset = source_fields[source_name][:2]
+            if source_dtype != self._dtype[name]:
+                return None
+            names.append(name)
+            formats.append(source_dtype)
+            offsets.append(offset)
 
-    def load_chunk(self, start: int, stop: Union[int, None]) -> np.ndarray:
+        return np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                         'itemsize': self._data_source.dtype.itemsize})
+
+    def _get_view(self, start: int, stop: Union[int, None]) -> Optional[np.ndarray]:
+        """Return the rows of the source array, viewed as the target fields, if no data set has to be cast."""
+
+        if self._projection_dtype is None:
+            return None
+
+        stop = stop if stop is not None else self._n_rows
+        return self._data_source[self._from_idx + start:self._from_idx + stop].view(self._projection_dtype)
+
+    def load_chunk(self, start: int, stop: Union[int, None], out: Optional[np.ndarray] = None) -> np.ndarray:
         """Load a chunk of the input data.
 
-        If the target data type (data sets names and dtypes) is the same as the one in the source array,
-        take a slice of the source array directly.
-        Otherwise, use the 'load_chunk' from the superclass to copy the relevant data sets into a new structured array.
+        If none of the data sets has to be cast to another data type, return a view of the source array
+        (selecting, ordering, and renaming the fields as in the target data type), without copying any data;
+        'out' is then not used. The field names, order, and data types of the view are those of 'dtype',
+        but the memory layout is that of the source array (the data are converted when encoded).
+        Otherwise, use the 'load_chunk' from the superclass to copy the relevant data sets into a new structured array
+        (or into 'out').
 
         Args:
             start   :   Start index.
             stop    :   Stop index. If None, all data from start index till the end will be loaded.
+            out     :   Structured array to put the data in (see SourceDataWrapper.load_chunk).
 
         Returns:
             A structured numpy array, containing the required chunks of all the relevant data sets from the source data.
         """
 
-        if self._dtype == self._data_source.dtype:
-            return self._data_source[start:stop]
+        self._check_chunk_bounds(start, stop)
+
+        view = self._get_view(start, stop)
+        if view is not None:
+            return view
 
-        return super().load_chunk(start, stop)
+        return super().load_chunk(start, stop, out=out)
 
     @staticmethod
     def _check_source_arr(arr: np.ndarray) -> None:
@@ -351,9 +876,11 @@ class NumpyDataWrapper(SourceDataWrapper):
 class DictDataWrapper(SourceDataWrapper):
     """Wrap source data provided in the form of a dictionary of numpy arrays."""
 
+    columnar = True
+
     def __init__(self, data_dict: dict[str, np.ndarray], mapping: Optional[dict] = None,
                  known_dtypes: Optional[dict[str, numpy_dtype_type]] = None, from_idx: int = 0,
-                 to_idx: Optional[int] = None) -> None:
+                 to_idx: Optional[int] = None, cast_policy: str = CastPolicy.RAISE) -> None:
         """Initialise DictDataWrapper.
 
         Args:
@@ -366,6 +893,8 @@ class DictDataWrapper(SourceDataWrapper):
                                 the data.
             from_idx        :   Index from which data should be loaded (or number of initial rows to ignore).
             to_idx          :   Index up to which data should be loaded.
+            cast_policy     :   How to handle integer values which do not fit in the data type they are cast to
+                                (see SourceDataWrapper).
 
         """
 
@@ -375,7 +904,8 @@ class DictDataWrapper(SourceDataWrapper):
             # default mapping: 1 to 1 for all keys of the data dict
             mapping = {k: k for k in data_dict.keys()}
 
-        super().__init__(data_dict, mapping, known_dtypes=known_dtypes, from_idx=from_idx, to_idx=to_idx)
+        super().__init__(data_dict, mapping, known_dtypes=known_dtypes, from_idx=from_idx, to_idx=to_idx,
+                         cast_policy=cast_policy)
 
     @staticmethod
     def _check_source_dict(data_dict: dict[str, np.ndarray]) -> None:
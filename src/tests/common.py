@@ -25,6 +25,24 @@ def load_dlis(fname: Union[str, bytes, os.PathLike]) -> Generator:
             pass
 
 
+def read_visible_record_lengths(fname: path_type) -> list[int]:
+    """Read lengths of all visible records in a DLIS file (following the 80-byte Storage Unit Label)."""
+
+    with open(fname, 'rb') as f:
+        bts = f.read()
+
+    lengths = []
+    pos = 80
+    while pos < len(bts):
+        length = int.from_bytes(bts[pos:pos + 2], 'big')
+        assert bts[pos + 2:pos + 4] == b'\xff\x01'  # format version, present in every VR header
+        lengths.append(length)
+        pos += length
+
+    assert pos == len(bts)
+    return lengths
+
+
 def select_channel(f: dlis.file.LogicalFile, name: str) -> dlis.channel.Channel:
     """Search for a channel with given name in the dlis file and return it."""
 
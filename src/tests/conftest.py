@@ -51,12 +51,15 @@ def short_reference_data(short_reference_data_path: Path) -> Generator:
     f.close()
 
 
-@pytest.fixture(scope="session")
-def short_dlis(short_reference_data_path: Path, base_data_path: Path) -> Generator:
-    """A freshly written DLIS file - used in tests to check if all contents are there as expected."""
+@pytest.fixture(scope="session", params=(False, True), ids=("unpacked", "packed"))
+def short_dlis(request: pytest.FixtureRequest, short_reference_data_path: Path, base_data_path: Path) -> Generator:
+    """A freshly written DLIS file - used in tests to check if all contents are there as expected.
+
+    The file is written both with and without packing logical record segments into visible records.
+    """
 
-    dlis_path = base_data_path / "outputs/new_fake_dlis_shared.DLIS"
-    write_short_dlis(dlis_path, data=short_reference_data_path)
+    dlis_path = base_data_path / f"outputs/new_fake_dlis_shared_{int(request.param)}.DLIS"
+    write_short_dlis(dlis_path, data=short_reference_data_path, pack_visible_records=request.param)
 
     with load_dlis(dlis_path) as f:
         yield f
@@ -1,5 +1,5 @@
 import os
-from typing import Union, Optional
+from typing import Union, Optional, Any
 
 from dliswriter.file import DLISFile
 from dliswriter.logical_record import eflr_types
@@ -24,11 +24,11 @@ def _add_channels(
     return tuple(channels)
 
 
-def write_dlis_from_dict(
-    fname: Union[str, os.PathLike[str]],
+def create_dlis_file_object(
     data_dict: dict,
     channel_kwargs: Optional[dict] = None,
-) -> None:
+    index_type: Optional[str] = FrameIndexType.VERTICAL_DEPTH,
+) -> DLISFile:
     df = make_df()
 
     logical_file_index = 0
@@ -36,7 +36,17 @@ def write_dlis_from_dict(
         df, logical_file_index, data_dict=data_dict, channel_kwargs=channel_kwargs
     )
     df.logical_files[logical_file_index].add_frame(
-        "MAIN", index_type=FrameIndexType.VERTICAL_DEPTH, channels=channels
+        "MAIN", index_type=index_type, channels=channels
     )
 
-    df.write(fname)
+    return df
+
+
+def write_dlis_from_dict(
+    fname: Union[str, os.PathLike[str]],
+    data_dict: dict,
+    channel_kwargs: Optional[dict] = None,
+    **kwargs: Any,
+) -> None:
+    df = create_dlis_file_object(data_dict, channel_kwargs=channel_kwargs)
+    df.write(fname, **kwargs)
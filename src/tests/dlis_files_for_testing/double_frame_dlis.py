@@ -1,5 +1,5 @@
 import os
-from typing import Union
+from typing import Union, Any
 
 from dliswriter import (
     DLISFile,
@@ -33,9 +33,9 @@ def create_dlis_file_object(*data_dicts: dict) -> DLISFile:
 
 
 def write_double_frame_dlis(
-    fname: Union[str, os.PathLike[str]], *frame_data: dict
+    fname: Union[str, os.PathLike[str]], *frame_data: dict, **kwargs: Any
 ) -> DLISFile:
     df = create_dlis_file_object(*frame_data)
-    df.write(fname)
+    df.write(fname, **kwargs)
 
     return df
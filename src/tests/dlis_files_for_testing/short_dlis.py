@@ -1,5 +1,5 @@
 import os
-from typing import Union
+from typing import Union, Any
 import numpy as np
 from datetime import datetime
 
@@ -613,7 +613,7 @@ def create_dlis_file_object() -> DLISFile:
 
 
 def write_short_dlis(
-    fname: Union[str, os.PathLike[str]], data: Union[dict, os.PathLike[str], np.ndarray]
+    fname: Union[str, os.PathLike[str]], data: Union[dict, os.PathLike[str], np.ndarray], **kwargs: Any
 ) -> None:
     df = create_dlis_file_object()
-    df.write(fname, data=data)
+    df.write(fname, data=data, **kwargs)
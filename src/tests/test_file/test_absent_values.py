@@ -0,0 +1,141 @@
+import pytest
+from pathlib import Path
+from typing import Any
+import numpy as np
+
+from dliswriter import FrameDataCache
+
+from tests.common import load_dlis
+from tests.dlis_files_for_testing.common import make_df
+from tests.dlis_files_for_testing.dlis_from_dict import create_dlis_file_object
+
+
+N_ROWS = 1500
+
+
+#: absent value of the integer channel (the default absent values passed to 'write' are not integers)
+CHANNEL_KWARGS = {'flags': {'absent_value': -999}}
+
+
+@pytest.fixture
+def data() -> dict[str, np.ndarray]:
+    """Data of a depth, an image (with NaN values), and an integer channel (masked array)."""
+
+    rng = np.random.default_rng(8)
+    image = rng.random((N_ROWS, 6))
+    image[rng.random((N_ROWS, 6)) < 0.05] = np.nan
+    flags = np.ma.masked_array(rng.integers(0, 100, N_ROWS).astype(np.int16), mask=rng.random(N_ROWS) < 0.1)
+    return {'depth': np.arange(N_ROWS) * 0.5, 'image': image, 'flags': flags}
+
+
+def expected_curves(data: dict[str, np.ndarray], absent_value: float, flags_absent_value: int
+                    ) -> dict[str, np.ndarray]:
+    """The data with the missing samples replaced with the absent values."""
+
+    return {
+        'depth': data['depth'],
+        'image': np.where(np.isnan(data['image']), absent_value, data['image']),
+        'flags': np.ma.filled(data['flags'], flags_absent_value),
+    }
+
+
+@pytest.mark.parametrize('kwargs', (
+        {},
+        {'pack_visible_records': True, 'output_mode': 'mmap'},
+        {'n_encoding_workers': 2},
+        {'n_encoding_workers': 2, 'executor_type': 'process'},
+))
+def test_missing_samples_replaced(data: dict[str, np.ndarray], new_dlis_path: Path, kwargs: dict[str, Any]) -> None:
+    """Test that NaN and masked values are written as absent values and that the replacements are counted."""
+
+    df = create_dlis_file_object(data, channel_kwargs=CHANNEL_KWARGS)
+    df.write(new_dlis_path, input_chunk_size=200, absent_value=-999.25, **kwargs)
+
+    expected = expected_curves(data, -999.25, -999)
+    with load_dlis(new_dlis_path) as f:
+        curves = f.frames[0].curves()
+        for name in ('depth', 'image', 'flags'):
+            assert np.array_equal(curves[name], expected[name])
+
+    depth, image, flags = df.logical_files[0].channels
+    assert depth.absent_value_count == 0
+    assert image.absent_value_count == np.isnan(data['image']).sum()
+    assert flags.absent_value_count == np.ma.getmaskarray(data['flags']).sum()
+
+    assert not np.ma.is_masked(data['image'])  # the source data are not modified
+    assert np.isnan(data['image']).any()
+
+
+def test_structured_array(data: dict[str, np.ndarray], new_dlis_path: Path) -> None:
+    """Test that NaN values of a structured array source are replaced with the channels' absent values."""
+
+    arr = np.zeros(N_ROWS, dtype=[('depth', np.float64), ('image', np.float64, (6,))])
+    arr['depth'] = data['depth']
+    arr['image'] = data['image']
+    arr['depth'][7] = np.nan
+
+    df = make_df()
+    lf = df.logical_files[0]
+    channels = (lf.add_channel('depth', absent_value=-1), lf.add_channel('image', absent_value=-2.5))
+    lf.add_frame("MAIN", channels=channels)
+    df.write(new_dlis_path, data=arr, input_chunk_size=500)
+
+    with load_dlis(new_dlis_path) as f:
+        curves = f.frames[0].curves()
+        assert curves['depth'][7] == -1
+        assert np.array_equal(curves['image'], np.where(np.isnan(arr['image']), -2.5, arr['image']))
+
+
+def test_default_not_applied_to_integer_channel(data: dict[str, np.ndarray], new_dlis_path: Path) -> None:
+    """Test that a non-integer default absent value is not applied to an integer channel."""
+
+    df = create_dlis_file_object(data)
+    df.write(new_dlis_path, absent_value=-999.25)
+
+    flags = df.logical_files[0].channels[2]
+    assert flags.absent_value_count is None
+    with load_dlis(new_dlis_path) as f:
+        assert np.array_equal(f.frames[0].curves()['flags'], data['flags'].data)
+
+
+def test_channel_ranges_exclude_missing_samples(data: dict[str, np.ndarray], new_dlis_path: Path) -> None:
+    """Test that the computed channel ranges do not include the absent values."""
+
+    df = create_dlis_file_object(data, channel_kwargs=CHANNEL_KWARGS)
+    df.write(new_dlis_path, absent_value=-999.25, compute_channel_ranges=True)
+
+    with load_dlis(new_dlis_path) as f:
+        _, image, flags = f.channels
+        assert np.array_equal(image.attic['MINIMUM-VALUE'].value, np.nanmin(data['image'], axis=0))
+        assert flags.attic['MINIMUM-VALUE'].value == [data['flags'].min()]
+        assert flags.attic['MAXIMUM-VALUE'].value == [data['flags'].max()]
+
+
+def test_cache_key_includes_absent_values(data: dict[str, np.ndarray], new_dlis_path: Path, tmp_path: Path) -> None:
+    """Test that Frame Data written with different absent values are not taken from the frame data cache."""
+
+    cache = FrameDataCache(tmp_path / "cache")
+
+    for absent_value, expected_hits in ((-999.25, 0), (-1, 0), (-1, 1)):
+        df = create_dlis_file_object(data, channel_kwargs=CHANNEL_KWARGS)
+        df.write(new_dlis_path, absent_value=absent_value, frame_data_cache=cache)
+        assert cache.statistics.hits == expected_hits
+
+    with load_dlis(new_dlis_path) as f:
+        assert np.array_equal(f.frames[0].curves()['image'], expected_curves(data, -1, -999)['image'])
+
+
+def test_counts_from_cache(data: dict[str, np.ndarray], new_dlis_path: Path, tmp_path: Path) -> None:
+    """Test that the numbers of replaced samples are set in the channels if the Frame Data are taken from the cache."""
+
+    cache = FrameDataCache(tmp_path / "cache")
+
+    for expected_hits in (0, 1):
+        df = create_dlis_file_object(data, channel_kwargs=CHANNEL_KWARGS)
+        df.write(new_dlis_path, absent_value=-999.25, frame_data_cache=cache)
+        assert cache.statistics.hits == expected_hits
+        assert [channel.absent_value_count for channel in df.logical_files[0].channels] == [
+            0, np.isnan(data['image']).sum(), np.ma.getmaskarray(data['flags']).sum()]
+
+    cache.clear()
+    assert not list(cache.cache_dir.iterdir())
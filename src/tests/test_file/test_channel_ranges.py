@@ -0,0 +1,204 @@
+import io
+import os
+import pytest
+from pathlib import Path
+from typing import Any
+import numpy as np
+
+from dliswriter import FrameDataCache
+
+from tests.common import load_dlis
+from tests.dlis_files_for_testing.dlis_from_dict import create_dlis_file_object
+
+
+N_ROWS = 2000
+
+
+@pytest.fixture
+def data() -> dict[str, np.ndarray]:
+    """Data of a depth, an image (with NaNs, one element entirely NaN), and an integer channel."""
+
+    rng = np.random.default_rng(3)
+    image = rng.normal(size=(N_ROWS, 8)).astype(np.float32)
+    image[17, 3] = np.nan
+    image[:, 5] = np.nan
+    return {
+        'depth': 1000 - 0.25 * np.arange(N_ROWS),
+        'image': image,
+        'flags': rng.integers(-500, 500, N_ROWS).astype(np.int32),
+    }
+
+
+def expected_ranges(data: dict[str, np.ndarray]) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Element-wise minimum and maximum values of the data sets, ignoring NaNs."""
+
+    return {name: (np.atleast_1d(np.fmin.reduce(d, axis=0)), np.atleast_1d(np.fmax.reduce(d, axis=0)))
+            for name, d in data.items()}
+
+
+def to_structured(data: dict[str, np.ndarray]) -> np.ndarray:
+    """Put the data sets in a structured numpy array."""
+
+    arr = np.zeros(N_ROWS, dtype=[(name, d.dtype, d.shape[1:]) for name, d in data.items()])
+    for name, d in data.items():
+        arr[name] = d
+    return arr
+
+
+@pytest.mark.parametrize('structured', (False, True))
+@pytest.mark.parametrize('kwargs', (
+        {},
+        {'pack_visible_records': True},
+        {'output_mode': 'vectored'},
+        {'output_mode': 'mmap', 'pipeline': True},
+        {'n_encoding_workers': 2},
+        {'n_logical_file_workers': 1},
+))
+def test_same_as_set_explicitly(data: dict[str, np.ndarray], new_dlis_path: Path, structured: bool,
+                                kwargs: dict[str, Any]) -> None:
+    """Test that the computed ranges give the same file as the ranges set explicitly before writing."""
+
+    source = to_structured(data) if structured else data
+
+    channel_kwargs = {name: {'minimum_value': [float(v) for v in minimum], 'maximum_value': [float(v) for v in maximum]}
+                      for name, (minimum, maximum) in expected_ranges(data).items()}
+    df = create_dlis_file_object(dict.fromkeys(data), channel_kwargs=channel_kwargs)
+    df.write(new_dlis_path, data=source, input_chunk_size=300, **kwargs)
+    reference = new_dlis_path.read_bytes()
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    df.write(new_dlis_path, data=source, input_chunk_size=300, compute_channel_ranges=True, **kwargs)
+    assert new_dlis_path.read_bytes() == reference
+
+
+def test_values_in_file(data: dict[str, np.ndarray], new_dlis_path: Path) -> None:
+    """Test the minimum and maximum values read from the file."""
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    df.write(new_dlis_path, data=data, input_chunk_size=128, compute_channel_ranges=True)
+
+    with load_dlis(new_dlis_path) as f:
+        depth, image, flags = f.channels
+        assert depth.attic['MINIMUM-VALUE'].value == [1000 - 0.25 * (N_ROWS - 1)]
+        assert depth.attic['MAXIMUM-VALUE'].value == [1000]
+        assert flags.attic['MINIMUM-VALUE'].value == [data['flags'].min()]
+        assert flags.attic['MAXIMUM-VALUE'].value == [data['flags'].max()]
+        with pytest.warns(RuntimeWarning, match="All-NaN slice"):
+            image_min, image_max = np.nanmin(data['image'], axis=0), np.nanmax(data['image'], axis=0)
+        assert np.array_equal(image.attic['MINIMUM-VALUE'].value, image_min, equal_nan=True)
+        assert np.array_equal(image.attic['MAXIMUM-VALUE'].value, image_max, equal_nan=True)
+
+
+def test_computed_values_published(data: dict[str, np.ndarray], new_dlis_path: Path) -> None:
+    """Test that the computed ranges are published in separate attributes and not kept as the channels' ranges."""
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    df.write(new_dlis_path, data=data, compute_channel_ranges=True)
+
+    for channel, (minimum, maximum) in zip(df.logical_files[0].channels, expected_ranges(data).values()):
+        assert channel.minimum_value.value is None
+        assert channel.maximum_value.value is None
+        assert np.array_equal(channel.computed_minimum_value, minimum, equal_nan=True)
+        assert np.array_equal(channel.computed_maximum_value, maximum, equal_nan=True)
+
+
+def test_computed_again_for_other_data(data: dict[str, np.ndarray], new_dlis_path: Path) -> None:
+    """Test that the ranges are computed again if the same file object is written with other data."""
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    df.write(new_dlis_path, data=data, compute_channel_ranges=True)
+
+    other_data = {name: 2 * d for name, d in data.items()}
+    df.write(new_dlis_path, data=other_data, compute_channel_ranges=True)
+
+    with load_dlis(new_dlis_path) as f:
+        assert f.channels[0].attic['MINIMUM-VALUE'].value == [2 * (1000 - 0.25 * (N_ROWS - 1))]
+        assert f.channels[2].attic['MAXIMUM-VALUE'].value == [2 * data['flags'].max()]
+
+
+def test_values_set_explicitly_kept(data: dict[str, np.ndarray], new_dlis_path: Path) -> None:
+    """Test that the ranges of channels with the minimum or maximum value set explicitly are not computed."""
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    image = df.logical_files[0].channels[1]
+    image.minimum_value.value = [-10.0] * 8
+
+    df.write(new_dlis_path, data=data, compute_channel_ranges=True)
+
+    assert image.minimum_value.value == [-10.0] * 8
+    assert image.maximum_value.value is None
+    with load_dlis(new_dlis_path) as f:
+        assert f.channels[1].attic['MINIMUM-VALUE'].value == [-10.0] * 8
+        assert 'MAXIMUM-VALUE' not in f.channels[1].attic.keys()
+        assert 'MAXIMUM-VALUE' in f.channels[0].attic.keys()
+
+
+@pytest.mark.parametrize('kwargs', ({}, {'pack_visible_records': True}))
+def test_planned_size(data: dict[str, np.ndarray], new_dlis_path: Path, kwargs: dict[str, Any]) -> None:
+    """Test that the placeholders of the channel ranges are taken into account in the plan of the file."""
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    plan = df.plan(data=data, compute_channel_ranges=True, **kwargs)
+    assert all(channel.minimum_value.value is None for channel in df.logical_files[0].channels)
+
+    df.write(new_dlis_path, data=data, compute_channel_ranges=True, **kwargs)
+    assert plan.size == os.path.getsize(new_dlis_path)
+    assert plan.size > create_dlis_file_object(dict.fromkeys(data)).plan(data=data, **kwargs).size
+
+
+def test_frame_data_from_cache(data: dict[str, np.ndarray], new_dlis_path: Path, tmp_path: Path) -> None:
+    """Test that the ranges are computed if the Frame Data are taken from the frame data cache."""
+
+    cache = FrameDataCache(tmp_path / "cache")
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    df.write(new_dlis_path, data=data, frame_data_cache=cache, compute_channel_ranges=True)
+    reference = new_dlis_path.read_bytes()
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    df.write(new_dlis_path, data=data, frame_data_cache=cache, compute_channel_ranges=True)
+    assert cache.statistics.hits == 1
+    assert new_dlis_path.read_bytes() == reference
+
+
+def test_write_behind(data: dict[str, np.ndarray], new_dlis_path: Path) -> None:
+    """Test that an error is raised if the ranges are to be computed in write-behind mode."""
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    with pytest.raises(ValueError, match="Channel ranges cannot be computed in write-behind mode"):
+        df.write(new_dlis_path, data=data, pipeline=True, compute_channel_ranges=True)
+
+
+def test_not_seekable(data: dict[str, np.ndarray]) -> None:
+    """Test that an error is raised if the ranges are to be computed and the output does not support random access."""
+
+    class NonSeekableBytesIO(io.BytesIO):
+        def seekable(self) -> bool:
+            return False
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    sink = NonSeekableBytesIO()
+    with pytest.raises(ValueError, match="filling them in requires an output supporting random access"):
+        df.write(sink, data=data, compute_channel_ranges=True)
+
+    assert sink.getvalue() == b''  # checked before anything is written
+    assert all(channel.minimum_value.value is None for channel in df.logical_files[0].channels)
+
+
+def test_placeholders_cleared_after_error(data: dict[str, np.ndarray]) -> None:
+    """Test that the placeholders of the channel ranges are removed if an error occurs while writing the file."""
+
+    class FailingBytesIO(io.BytesIO):
+        def write(self, bts: Any) -> int:
+            if self.tell() > 10000:
+                raise OSError("No space left on device")
+            return super().write(bts)
+
+    df = create_dlis_file_object(dict.fromkeys(data))
+    with pytest.raises(OSError, match="No space left on device"):
+        df.write(FailingBytesIO(), data=data, input_chunk_size=100, output_chunk_size=2 ** 13,
+                 compute_channel_ranges=True)
+
+    for channel in df.logical_files[0].channels:
+        assert channel.minimum_value.value is None
+        assert channel.maximum_value.value is None
@@ -3,7 +3,7 @@ import pytest
 from pathlib import Path
 import numpy as np
 
-from tests.common import N_COLS, load_dlis, select_channel
+from tests.common import N_COLS, load_dlis, select_channel, read_visible_record_lengths
 from tests.dlis_files_for_testing import write_time_based_dlis, write_depth_based_dlis, write_dlis_from_dict
 
 
@@ -82,11 +82,12 @@ def test_channel_dimensions(short_reference_data_path: Path, new_dlis_path: Path
 
 
 @pytest.mark.parametrize('n_points', (10, 100, 128, 987))
+@pytest.mark.parametrize('pack', (False, True))
 def test_channel_curves(reference_data_path: Path, reference_data: h5py.File, new_dlis_path: Path,
-                        n_points: int) -> None:
+                        n_points: int, pack: bool) -> None:
     """Create a DLIS file with varying number of points. Check that the data for each channel are correct."""
 
-    write_time_based_dlis(new_dlis_path, data=reference_data_path, to_idx=n_points)
+    write_time_based_dlis(new_dlis_path, data=reference_data_path, to_idx=n_points, pack_visible_records=pack)
 
     with load_dlis(new_dlis_path) as f:
         for name in ('posix time', 'surface rpm'):
@@ -119,7 +120,8 @@ def test_channel_curves(reference_data_path: Path, reference_data: h5py.File, ne
     np.random.randint(-2**15, 2**15, size=33, dtype=np.int16),
     np.random.randint(-2**7, 2**7, size=(12, 13), dtype=np.int8)
 ))
-def test_all_numpy_dtypes(new_dlis_path: Path, data_arr: np.ndarray) -> None:
+@pytest.mark.parametrize('pack', (False, True))
+def test_all_numpy_dtypes(new_dlis_path: Path, data_arr: np.ndarray, pack: bool) -> None:
 
     data_arr = np.atleast_2d(data_arr)
     data_dict = {
@@ -127,7 +129,7 @@ def test_all_numpy_dtypes(new_dlis_path: Path, data_arr: np.ndarray) -> None:
         'data': data_arr
     }
 
-    write_dlis_from_dict(new_dlis_path, data_dict=data_dict)
+    write_dlis_from_dict(new_dlis_path, data_dict=data_dict, pack_visible_records=pack)
 
     with load_dlis(new_dlis_path) as f:
         ch = select_channel(f, 'data')
@@ -163,3 +165,62 @@ def test_numpy_dtypes_with_casting(new_dlis_path: Path, data_arr: np.ndarray, ca
         assert ch.reprc == rc
         assert ch.curves().dtype == cast_dtype
         assert (ch.curves() == data_arr.astype(cast_dtype)).all()
+
+
+def test_packed_visible_records(base_data_path: Path, new_dlis_path: Path) -> None:
+    """Test that packing LR segments into visible records produces a smaller file with the same contents."""
+
+    data_dict = {
+        'index': np.arange(500).astype(np.float64),
+        'data': np.random.rand(500, 3).astype(np.float32),
+        'image': np.random.rand(500, 2000).astype(np.float32)   # LRs split into multiple segments
+    }
+
+    unpacked_path = base_data_path / "outputs/new_fake_dlis_unpacked.DLIS"
+    write_dlis_from_dict(unpacked_path, data_dict=data_dict)
+    write_dlis_from_dict(new_dlis_path, data_dict=data_dict, pack_visible_records=True)
+
+    try:
+        unpacked_lengths = read_visible_record_lengths(unpacked_path)
+        packed_lengths = read_visible_record_lengths(new_dlis_path)
+
+        assert len(packed_lengths) < len(unpacked_lengths)
+        assert sum(packed_lengths) < sum(unpacked_lengths)
+        assert max(packed_lengths) <= 8192
+        assert all(length % 2 == 0 for length in packed_lengths)
+
+        with load_dlis(new_dlis_path) as f:
+            for name, arr in data_dict.items():
+                assert (select_channel(f, name).curves() == arr).all()
+    finally:
+        unpacked_path.unlink()
+
+
+@pytest.mark.parametrize(('write_behind', 'fsync_policy', 'output_mode'), (
+        (True, 'never', 'buffered'),
+        (False, 'end', 'buffered'),
+        (True, 10000, 'buffered'),
+        (False, 'never', 'vectored'),
+        (True, 'end', 'vectored'),
+        (False, 'never', 'mmap'),
+        (False, 3000, 'mmap'),
+))
+@pytest.mark.parametrize('pack', (False, True))
+def test_write_options_same_bytes(base_data_path: Path, new_dlis_path: Path, write_behind: bool,
+                                  fsync_policy: object, output_mode: str, pack: bool) -> None:
+    """Test that the file writing options (background thread, fsync, output mode) do not affect the bytes."""
+
+    data_dict = {
+        'index': np.arange(5000).astype(np.float64),
+        'image': np.random.rand(5000, 50).astype(np.float32)
+    }
+
+    reference_path = base_data_path / "outputs/new_fake_dlis_reference.DLIS"
+    write_dlis_from_dict(reference_path, data_dict=data_dict, output_chunk_size=2 ** 16, pack_visible_records=pack)
+    write_dlis_from_dict(new_dlis_path, data_dict=data_dict, output_chunk_size=2 ** 16, pack_visible_records=pack,
+                         write_behind=write_behind, fsync_policy=fsync_policy, output_mode=output_mode)
+
+    try:
+        assert new_dlis_path.read_bytes() == reference_path.read_bytes()
+    finally:
+        reference_path.unlink()
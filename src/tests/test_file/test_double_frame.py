@@ -31,9 +31,14 @@ def double_frame_data() -> tuple[dict, dict]:
     return frame1_data, frame2_data
 
 
+@pytest.fixture(scope="session", params=(False, True), ids=("unpacked", "packed"))
+def pack_visible_records(request: pytest.FixtureRequest) -> bool:
+    return request.param  # type: ignore  # return type not recognised
+
+
 @pytest.fixture(scope="session")
-def double_frame_dlis_path(base_data_path: Path) -> Generator:
-    p = base_data_path / "double_frame.DLIS"
+def double_frame_dlis_path(base_data_path: Path, pack_visible_records: bool) -> Generator:
+    p = base_data_path / f"double_frame_{int(pack_visible_records)}.DLIS"
     yield p
 
     if p.exists():
@@ -42,9 +47,9 @@ def double_frame_dlis_path(base_data_path: Path) -> Generator:
 
 @pytest.fixture(scope="session")
 def double_frame_dlis(
-    double_frame_dlis_path: Path, double_frame_data: tuple[dict, dict]
+    double_frame_dlis_path: Path, double_frame_data: tuple[dict, dict], pack_visible_records: bool
 ) -> Generator:
-    df = write_double_frame_dlis(double_frame_dlis_path, *double_frame_data)
+    df = write_double_frame_dlis(double_frame_dlis_path, *double_frame_data, pack_visible_records=pack_visible_records)
     yield df
 
 
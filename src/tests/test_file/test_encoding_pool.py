@@ -0,0 +1,103 @@
+import pytest
+from pathlib import Path
+from typing import Any, Generator
+import numpy as np
+
+from dliswriter.file.encoding_pool import EncodingPool
+from dliswriter.file.multi_frame_data import MultiFrameData
+from dliswriter.logical_record.eflr_types import FrameSet, FrameItem, ChannelSet, ChannelItem
+from dliswriter.logical_record.iflr_types import FrameDataEncoder
+from dliswriter.utils.source_data_wrappers import NumpyDataWrapper
+
+from tests.dlis_files_for_testing import write_dlis_from_dict
+
+
+def make_multi_frame_data(n_rows: int, chunk_size: int) -> MultiFrameData:
+    """Create MultiFrameData of a frame with an index and an image channel, with random data."""
+
+    data = np.zeros(n_rows, dtype=np.dtype([('index', np.float64), ('image', np.float32, (20,))]))
+    data['index'] = np.arange(n_rows)
+    data['image'] = np.random.rand(n_rows, 20)
+
+    channel_set = ChannelSet()
+    channels = [ChannelItem(name, parent=channel_set) for name in data.dtype.names or ()]
+    frame = FrameItem("FRAME", channels=channels, parent=FrameSet(), origin_reference=1)
+
+    return MultiFrameData(frame, NumpyDataWrapper(data), chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize(('executor_type', 'n_workers', 'max_chunks_in_flight'), (
+        ('thread', 1, None),
+        ('thread', 4, 2),
+        ('thread', 3, 10),
+        ('process', 2, None),
+))
+def test_encoded_chunks_in_order(executor_type: str, n_workers: int, max_chunks_in_flight: int) -> None:
+    """Test that chunks encoded in parallel are the same - and in the same order - as those encoded serially."""
+
+    mfd = make_multi_frame_data(20000, chunk_size=700)  # chunks cover all frame number (UVARI) size ranges
+
+    with EncodingPool(n_workers, max_chunks_in_flight=max_chunks_in_flight, executor_type=executor_type) as pool:
+        parallel = list(mfd.iterate_encoded_chunks(pool=pool))
+    serial = list(mfd.iterate_encoded_chunks())
+
+    assert len(parallel) == len(serial) == 29
+    for (buffer, offsets), (ref_buffer, ref_offsets) in zip(parallel, serial):
+        assert np.array_equal(buffer, ref_buffer)
+        assert np.array_equal(offsets, ref_offsets)
+
+
+@pytest.mark.parametrize('max_chunks_in_flight', (1, 3))
+def test_max_chunks_in_flight(max_chunks_in_flight: int) -> None:
+    """Test that no more than the specified number of chunks are submitted to the pool and not yet yielded."""
+
+    mfd = make_multi_frame_data(1000, chunk_size=10)
+    n_loaded = 0
+
+    def counting_chunks() -> Generator:
+        nonlocal n_loaded
+        for chunk_and_frame_number in mfd._iterate_chunks():
+            n_loaded += 1
+            yield chunk_and_frame_number
+
+    encoder = FrameDataEncoder(mfd.frame, mfd.data.dtype)
+    with EncodingPool(4, max_chunks_in_flight=max_chunks_in_flight) as pool:
+        for n_yielded, _ in enumerate(pool.encode_chunks(encoder, counting_chunks()), start=1):
+            assert n_loaded - n_yielded < max_chunks_in_flight
+
+    assert n_loaded == 100
+
+
+@pytest.mark.parametrize(('executor_type', 'n_workers'), (('thread', 3), ('process', 2)))
+@pytest.mark.parametrize('output_mode', ('buffered', 'mmap'))
+def test_parallel_file_same_bytes(base_data_path: Path, new_dlis_path: Path, executor_type: str, n_workers: int,
+                                  output_mode: str) -> None:
+    """Test that a file created with frame data encoded in parallel is identical to one created serially."""
+
+    data_dict = {
+        'index': np.arange(3000).astype(np.float64),
+        'image': np.random.rand(3000, 30).astype(np.float32)
+    }
+
+    reference_path = base_data_path / "outputs/new_fake_dlis_reference.DLIS"
+    write_dlis_from_dict(reference_path, data_dict=data_dict, input_chunk_size=128)
+    write_dlis_from_dict(new_dlis_path, data_dict=data_dict, input_chunk_size=128, output_mode=output_mode,
+                         n_encoding_workers=n_workers, max_chunks_in_flight=4, executor_type=executor_type)
+
+    try:
+        assert new_dlis_path.read_bytes() == reference_path.read_bytes()
+    finally:
+        reference_path.unlink()
+
+
+@pytest.mark.parametrize(('kwargs', 'error_type', 'message'), (
+        ({'n_workers': 0}, ValueError, "Number of encoding workers must be positive"),
+        ({'n_workers': 2.5}, TypeError, "Number of encoding workers must be an integer"),
+        ({'n_workers': 2, 'max_chunks_in_flight': 0}, ValueError, "Max number of chunks in flight must be positive"),
+        ({'n_workers': 2, 'executor_type': 'fiber'}, ValueError, "not one of the allowed executor types"),
+))
+def test_wrong_settings(kwargs: dict[str, Any], error_type: type[Exception], message: str) -> None:
+    """Test that errors are raised for incorrect settings of the pool."""
+
+    with pytest.raises(error_type, match=message):
+        EncodingPool(**kwargs)
@@ -0,0 +1,88 @@
+import pytest
+from pathlib import Path
+import numpy as np
+
+from dliswriter import DLISFile
+from dliswriter.logical_record.iflr_types import EncodedFrameData
+from dliswriter.utils.enums import FrameIndexType
+
+from tests.common import read_visible_record_lengths
+from tests.dlis_files_for_testing.common import make_df
+from tests.dlis_files_for_testing.short_dlis import create_dlis_file_object
+
+
+def make_df_with_frames() -> DLISFile:
+    """Create a DLISFile with frames of different widths, a long EFLR, and No-Format Frame Data."""
+
+    df = make_df()
+    lf = df.logical_files[0]
+
+    for name, n_rows, n_cols in (("NARROW", 20000, 1), ("WIDE", 300, 3000)):
+        index = lf.add_channel(f"{name}_INDEX", data=np.arange(n_rows, dtype=np.float64))
+        image = lf.add_channel(f"{name}_IMAGE", data=np.random.rand(n_rows, n_cols).astype(np.float32))
+        lf.add_frame(name, channels=(index, image), index_type=FrameIndexType.BOREHOLE_DEPTH)
+
+    lf.add_comment("COMMENT", text=["x" * 9000])  # long EFLR, split into multiple segments
+    lf.add_no_format_frame_data(lf.add_no_format("NF"), data="some text")
+
+    return df
+
+
+@pytest.mark.parametrize('input_chunk_size', (None, 1000, 77))
+@pytest.mark.parametrize('pack', (False, True))
+def test_plan_matches_file(new_dlis_path: Path, input_chunk_size: int, pack: bool) -> None:
+    """Test that the planned size and number of visible records are the same as in the written file."""
+
+    df = make_df_with_frames()
+
+    plan = df.plan(input_chunk_size=input_chunk_size, pack_visible_records=pack)
+    df.write(new_dlis_path, input_chunk_size=input_chunk_size, pack_visible_records=pack)
+
+    assert plan.size == new_dlis_path.stat().st_size
+    assert plan.n_visible_records == len(read_visible_record_lengths(new_dlis_path))
+    assert plan.n_segments == sum(lf.n_segments for lf in plan.logical_files)
+
+    lf_plan = plan.logical_files[0]
+    assert [(fp.frame_name, fp.n_rows) for fp in lf_plan.frames] == [("NARROW", 20000), ("WIDE", 300)]
+    assert lf_plan.frames[1].n_segments == 2 * 300  # rows of the wide frame are split into 2 segments each
+    assert lf_plan.n_logical_records == 20000 + 300 + 7  # 6 EFLRs, 1 No-Format Frame Data
+
+
+def test_logical_records_generator_size() -> None:
+    """Test that the size of the logical records generator is the number of records it yields, incl. each FrameData."""
+
+    df = make_df_with_frames()
+
+    logical_records = df.generate_logical_records(None)
+    items = list(logical_records)
+    assert len(logical_records) == len(items) == 20000 + 300 + 7
+    assert sum(isinstance(lr, EncodedFrameData) for lr in items) == 20000 + 300
+
+
+def test_plan_frame_details(short_reference_data_path: Path) -> None:
+    """Test the details of the planned frame data."""
+
+    df = create_dlis_file_object()
+    plan = df.plan(data=short_reference_data_path, input_chunk_size=30)
+
+    frame_plan = plan.logical_files[0].frames[0]
+    assert frame_plan.n_rows == 100
+    assert frame_plan.n_chunks == 4
+    assert frame_plan.n_segments == frame_plan.n_visible_records == 100
+    # each row: VR header, LR segment header, frame reference, frame number (1 byte), channel data, padding
+    row_size = 4 + 4 + len(df.logical_files[0].frames[0].obname) + 1 + frame_plan.row_size
+    assert frame_plan.size == 100 * (row_size + row_size % 2)
+
+    assert plan.peak_memory > frame_plan.peak_chunk_memory > 30 * frame_plan.row_size
+
+
+def test_plan_matches_short_file(short_reference_data_path: Path, new_dlis_path: Path) -> None:
+    """Test the plan of a file with many different EFLRs and No-Format Frame Data."""
+
+    df = create_dlis_file_object()
+
+    plan = df.plan(data=short_reference_data_path, pack_visible_records=True)
+    df.write(new_dlis_path, data=short_reference_data_path, pack_visible_records=True)
+
+    assert plan.size == new_dlis_path.stat().st_size
+    assert plan.n_visible_records == len(read_visible_record_lengths(new_dlis_path))
@@ -0,0 +1,86 @@
+import pytest
+from pathlib import Path
+import numpy as np
+
+from dliswriter.file.writer import DLISWriter
+from dliswriter.file.frame_data_assembler import FrameDataAssembler, FixedRowLayout
+from dliswriter.logical_record.eflr_types import FrameSet, FrameItem, ChannelSet, ChannelItem
+from dliswriter.logical_record.iflr_types import FrameDataEncoder, EncodedFrameData
+from dliswriter.utils.internal.types import bytes_type
+
+
+def make_encoded_chunk(n_cols: int, first_frame_number: int, n_rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """Encode a chunk of random data with a single image channel of the given width."""
+
+    data = np.zeros(n_rows, dtype=np.dtype([('index', np.float64), ('image', np.float32, (n_cols,))]))
+    data['index'] = np.arange(n_rows)
+    data['image'] = np.random.rand(n_rows, n_cols)
+
+    channel_set = ChannelSet()
+    channels = [ChannelItem(name, parent=channel_set) for name in data.dtype.names or ()]
+    frame = FrameItem("FRAME", channels=channels, parent=FrameSet(), origin_reference=1)
+
+    return FrameDataEncoder(frame, data.dtype).encode(data, first_frame_number=first_frame_number)
+
+
+def make_reference_bytes(writer: DLISWriter, buffer: np.ndarray, offsets: np.ndarray, pack: bool) -> bytes:
+    """Create visible records of the encoded rows using the generic (per-segment) path of DLISWriter."""
+
+    bts = b''
+    for start, stop in FrameDataAssembler.split_runs(offsets):
+        segments: list[tuple[list[bytes_type], int]] = []
+        for i in range(start, stop):
+            lr_bytes = EncodedFrameData(buffer[offsets[i]:offsets[i + 1]].tobytes()).represent_as_bytes()
+            segments.extend(lr_bytes.make_segments_parts(writer._visible_record_length - 8))
+
+        if pack:
+            bts += b''.join(b''.join(parts) for parts, _ in writer._make_packed_visible_records(segments))
+        else:
+            bts += b''.join(writer._make_visible_record(b''.join(parts), size) for parts, size in segments)
+
+    return bts
+
+
+@pytest.mark.parametrize('n_cols', (1, 10, 100, 2045, 2046, 5000))
+@pytest.mark.parametrize(('first_frame_number', 'n_rows'), ((1, 20), (100, 50), (16000, 500)))
+@pytest.mark.parametrize('pack', (False, True))
+def test_assembled_bytes(new_dlis_path: Path, n_cols: int, first_frame_number: int, n_rows: int, pack: bool) -> None:
+    """Test that assembled chunks are identical to the visible records created segment by segment."""
+
+    writer = DLISWriter(new_dlis_path, pack_visible_records=pack)
+    buffer, offsets = make_encoded_chunk(n_cols, first_frame_number, n_rows)
+
+    assembled = FrameDataAssembler(8192, writer._fmt_version, pack=pack).assemble(buffer, offsets)
+
+    assert assembled.tobytes() == make_reference_bytes(writer, buffer, offsets, pack)
+
+
+def test_split_runs() -> None:
+    """Test splitting rows into runs of the same size."""
+
+    offsets = np.cumsum([0, 20, 20, 21, 21, 21, 23])
+    assert FrameDataAssembler.split_runs(offsets) == [(0, 2), (2, 5), (5, 6)]
+
+
+@pytest.mark.parametrize(('body_size', 'pack', 'segment_sizes', 'rows_per_vr'), (
+        (20, False, [20], 1),
+        (20, True, [20], 341),
+        (8184, True, [8184], 1),
+        (8185, True, [8173, 12], 1),
+        (20000, False, [8184, 8184, 3632], 1),
+))
+def test_layout(body_size: int, pack: bool, segment_sizes: list[int], rows_per_vr: int) -> None:
+    """Test the precomputed segmentation of rows of different sizes."""
+
+    layout = FixedRowLayout(body_size, 8192, b'\xff\x01', pack=pack)
+
+    assert layout.segment_sizes == segment_sizes
+    assert layout.rows_per_visible_record == rows_per_vr
+    assert layout.compute_n_visible_records(1000) == -(-1000 // rows_per_vr) * len(segment_sizes)
+
+
+def test_layout_too_short_body() -> None:
+    """Test that an error is raised for rows shorter than the minimal segment body size."""
+
+    with pytest.raises(ValueError, match="cannot be shorter than 12 bytes"):
+        FixedRowLayout(10, 8192, b'\xff\x01')
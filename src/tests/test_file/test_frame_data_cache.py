@@ -0,0 +1,220 @@
+import os
+import time
+import shutil
+import pytest
+from pathlib import Path
+from typing import Any
+import numpy as np
+
+from dliswriter import FrameDataCache
+from dliswriter.file.writer import DLISWriter
+from dliswriter.utils.source_data_wrappers import DictDataWrapper
+
+from tests.dlis_files_for_testing import short_dlis, double_frame_dlis
+
+
+@pytest.fixture
+def data() -> tuple[dict, dict]:
+    """Data of the two frames of the file (see double_frame_dlis): depth and image, and time."""
+
+    depth_data = {
+        'depth': np.arange(1500, dtype=np.float64),
+        'image': np.random.rand(1500, 12).astype(np.float32),
+    }
+    time_data = {
+        'time': np.linspace(0, 100, 750),
+    }
+    return depth_data, time_data
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> FrameDataCache:
+    """An empty frame data cache."""
+
+    return FrameDataCache(tmp_path / "cache")
+
+
+@pytest.mark.parametrize('kwargs', (
+        {},
+        {'pack_visible_records': True},
+        {'output_mode': 'vectored', 'write_behind': True},
+        {'output_mode': 'mmap'},
+        {'n_logical_file_workers': 2},
+))
+def test_same_bytes(data: tuple[dict, dict], cache: FrameDataCache, new_dlis_path: Path, kwargs: dict[str, Any]
+                    ) -> None:
+    """Test that the bytes are the same with the frame data encoded, stored in the cache, and taken from the cache."""
+
+    double_frame_dlis.create_dlis_file_object(*data).write(new_dlis_path, input_chunk_size=200, **kwargs)
+    reference = new_dlis_path.read_bytes()
+
+    for expected_hits in (0, 2):
+        df = double_frame_dlis.create_dlis_file_object(*data)
+        df.write(new_dlis_path, input_chunk_size=200, frame_data_cache=cache, **kwargs)
+        assert new_dlis_path.read_bytes() == reference
+        assert cache.statistics.hits == expected_hits
+
+    stats = cache.statistics
+    assert stats.misses == 2
+    assert stats.bytes_stored == stats.bytes_reused == cache.size
+    assert stats.hit_rate == 0.5
+
+
+def test_key_changes(data: tuple[dict, dict], cache: FrameDataCache, new_dlis_path: Path) -> None:
+    """Test that the cached bytes are reused only if the frame data are the same."""
+
+    double_frame_dlis.create_dlis_file_object(*data).write(new_dlis_path, frame_data_cache=cache)
+    assert cache.statistics.misses == 2
+
+    df = double_frame_dlis.create_dlis_file_object(*data)
+    origin = df.logical_files[0].defining_origin
+    assert origin is not None
+    origin.well_name.value = "WELL-2"  # only metadata changed
+    df.write(new_dlis_path, frame_data_cache=cache)
+    assert cache.statistics.hits == 2
+
+    df = double_frame_dlis.create_dlis_file_object(*data)
+    df.write(new_dlis_path, frame_data_cache=cache, pack_visible_records=True)
+    assert cache.statistics.misses == 4
+
+    df = double_frame_dlis.create_dlis_file_object(*data)
+    df.write(new_dlis_path, frame_data_cache=cache, from_idx=100)  # different rows
+    assert cache.statistics.misses == 6
+
+    data[1]['time'][3] += 1
+    double_frame_dlis.create_dlis_file_object(*data).write(new_dlis_path, frame_data_cache=cache)
+    assert cache.statistics.hits == 3  # only the depth frame is the same
+    assert cache.statistics.misses == 7
+
+
+def test_identity_computed_once(data: tuple[dict, dict], cache: FrameDataCache, new_dlis_path: Path,
+                                monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the identity of the source data of each frame is computed only once per write."""
+
+    calls = []
+    compute_identity = DictDataWrapper.compute_identity
+
+    def counting_compute_identity(self: DictDataWrapper) -> bytes:
+        calls.append(self)
+        return compute_identity(self)
+
+    monkeypatch.setattr(DictDataWrapper, 'compute_identity', counting_compute_identity)
+
+    for expected_calls in (2, 4):
+        double_frame_dlis.create_dlis_file_object(*data).write(new_dlis_path, frame_data_cache=cache)
+        assert len(calls) == expected_calls
+    assert cache.statistics.hits == 2
+
+
+def test_hdf5_source(cache: FrameDataCache, new_dlis_path: Path, short_reference_data_path: Path,
+                     tmp_path: Path) -> None:
+    """Test that the identity of HDF5 data is based on the file, without reading the data."""
+
+    data_path = tmp_path / "data.hdf5"
+    shutil.copy(short_reference_data_path, data_path)
+
+    short_dlis.create_dlis_file_object().write(new_dlis_path, data=data_path, frame_data_cache=cache)
+    reference = new_dlis_path.read_bytes()
+    n_frames = cache.statistics.misses
+
+    short_dlis.create_dlis_file_object().write(new_dlis_path, data=data_path, frame_data_cache=cache)
+    assert cache.statistics.hits == n_frames
+    assert new_dlis_path.read_bytes() == reference
+
+    os.utime(data_path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))  # file modified
+    short_dlis.create_dlis_file_object().write(new_dlis_path, data=data_path, frame_data_cache=cache)
+    assert cache.statistics.misses == 2 * n_frames
+
+
+def test_eviction_by_size(data: tuple[dict, dict], tmp_path: Path, new_dlis_path: Path) -> None:
+    """Test that the least recently used entries are removed when the size limit is exceeded."""
+
+    cache = FrameDataCache(tmp_path, max_size=10 ** 9)
+    double_frame_dlis.create_dlis_file_object(*data).write(new_dlis_path, frame_data_cache=cache)
+    entries = sorted(tmp_path.glob('*.frames'), key=lambda p: p.stat().st_size)
+    assert len(entries) == 2
+
+    os.utime(entries[1], (time.time() - 100, time.time() - 100))  # the larger entry used less recently
+    cache._max_size = entries[1].stat().st_size
+    assert cache.evict() == 1
+    assert list(tmp_path.glob('*.frames')) == [entries[0]]
+    assert cache.statistics.evictions == 1
+
+
+def test_eviction_by_age(data: tuple[dict, dict], tmp_path: Path, new_dlis_path: Path) -> None:
+    """Test that entries which have not been used for longer than the max age are not reused and are removed."""
+
+    cache = FrameDataCache(tmp_path, max_age=3600)
+    double_frame_dlis.create_dlis_file_object(*data).write(new_dlis_path, frame_data_cache=cache)
+
+    for path in tmp_path.glob('*.frames'):
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+    double_frame_dlis.create_dlis_file_object(*data).write(new_dlis_path, frame_data_cache=cache)
+    stats = cache.statistics
+    assert (stats.hits, stats.misses, stats.evictions) == (0, 4, 2)
+    assert len(list(tmp_path.glob('*.frames'))) == 2  # stored again
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="open files cannot be removed on Windows")
+@pytest.mark.parametrize('kwargs', ({}, {'output_mode': 'mmap'}, {'output_mode': 'vectored', 'write_behind': True}))
+def test_entry_evicted_after_lookup(data: tuple[dict, dict], cache: FrameDataCache, new_dlis_path: Path,
+                                    monkeypatch: pytest.MonkeyPatch, kwargs: dict[str, Any]) -> None:
+    """Test that an entry found in the cache is copied entirely if it is removed (e.g. by another thread) meanwhile."""
+
+    data[0]['image'][[3, 70, 71]] = np.nan
+
+    double_frame_dlis.create_dlis_file_object(*data).write(new_dlis_path, frame_data_cache=cache,
+                                                           absent_value=-999.25, **kwargs)
+    reference = new_dlis_path.read_bytes()
+
+    get = cache.get
+
+    def get_and_clear(key: str) -> Any:
+        entry = get(key)
+        cache.clear()
+        return entry
+
+    monkeypatch.setattr(cache, 'get', get_and_clear)
+
+    df = double_frame_dlis.create_dlis_file_object(*data)
+    df.write(new_dlis_path, frame_data_cache=cache, absent_value=-999.25, **kwargs)
+    assert cache.statistics.hits == 1  # the second frame's entry has been removed before the lookup
+    assert new_dlis_path.read_bytes() == reference
+    assert df.logical_files[0].channels[1].absent_value_count == 36
+
+
+def test_interrupted_writing(data: tuple[dict, dict], cache: FrameDataCache, new_dlis_path: Path,
+                             monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that no entry (and no temporary file) is left if the writing is interrupted."""
+
+    add_frame_data_chunk = DLISWriter._add_frame_data_chunk
+    n_calls = []
+
+    def add_chunk_and_fail(*args: Any) -> np.ndarray:
+        n_calls.append(1)
+        if len(n_calls) > 3:
+            raise RuntimeError("Writing interrupted")
+        return add_frame_data_chunk(*args)
+
+    monkeypatch.setattr(DLISWriter, '_add_frame_data_chunk', staticmethod(add_chunk_and_fail))
+
+    df = double_frame_dlis.create_dlis_file_object(*data)
+    with pytest.raises(RuntimeError, match="Writing interrupted"):
+        df.write(new_dlis_path, input_chunk_size=100, frame_data_cache=cache)
+
+    assert not os.listdir(cache.cache_dir)
+    assert cache.statistics.bytes_stored == 0
+
+
+@pytest.mark.parametrize(('kwargs', 'error_type', 'message'), (
+        ({'max_size': -1}, ValueError, "Max cache size cannot be negative"),
+        ({'max_size': 1.5}, TypeError, "Max cache size must be an integer"),
+        ({'max_age': -1}, ValueError, "Max age of cache entries cannot be negative"),
+        ({'max_age': '1'}, TypeError, "Max age of cache entries must be a number"),
+))
+def test_wrong_limits(tmp_path: Path, kwargs: dict[str, Any], error_type: type[Exception], message: str) -> None:
+    """Test that errors are raised for incorrect limits of the cache."""
+
+    with pytest.raises(error_type, match=message):
+        FrameDataCache(tmp_path, **kwargs)
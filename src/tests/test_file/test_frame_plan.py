@@ -0,0 +1,80 @@
+import logging
+import pytest
+from pathlib import Path
+import numpy as np
+
+from dliswriter import DLISFile
+from dliswriter.file import FramePlan
+from dliswriter.file.frame_data_assembler import FrameDataAssembler
+
+from tests.dlis_files_for_testing.dlis_from_dict import create_dlis_file_object
+
+
+@pytest.fixture
+def dlis_file() -> DLISFile:
+    """A DLISFile with a single frame; the values of the image channel are cast from float32 to float64."""
+
+    data_dict = {
+        'DEPTH': np.arange(300, dtype=np.float64),
+        'IMAGE': np.random.rand(300, 5).astype(np.float32),
+        'FLAG': np.arange(300, dtype=np.int16) % 3
+    }
+
+    return create_dlis_file_object(data_dict, channel_kwargs={'IMAGE': {'cast_dtype': np.float64}})
+
+
+@pytest.fixture
+def frame_plan(dlis_file: DLISFile) -> FramePlan:
+    """Plan of the frame of the file defined in the dlis_file fixture."""
+
+    plan = dlis_file.plan(input_chunk_size=100)
+    fp = plan.logical_files[0].frames[0].frame_plan
+    assert fp is not None
+    return fp
+
+
+def test_channels(frame_plan: FramePlan) -> None:
+    """Test the description of the channels, including the detection of promoted data types."""
+
+    assert [c.name for c in frame_plan.channels] == ['DEPTH', 'IMAGE', 'FLAG']
+    assert [c.representation_code for c in frame_plan.channels] == ['FDOUBL', 'FDOUBL', 'SNORM']
+    assert [c.dimension for c in frame_plan.channels] == [(), (5,), ()]
+    assert [c.n_bytes for c in frame_plan.channels] == [8, 40, 2]
+
+    assert [c.name for c in frame_plan.promoted_channels] == ['IMAGE']
+    assert frame_plan.promoted_channels[0].source_dtype == np.float32
+
+
+def test_layout(frame_plan: FramePlan) -> None:
+    """Test the row size, chunks, and visible record layouts of the plan."""
+
+    assert frame_plan.n_rows == 300
+    assert frame_plan.row_data_size == 50
+    assert frame_plan.chunk_bounds == [(1, 100), (101, 100), (201, 100)]
+
+    # frame numbers up to 127 take 1 byte, larger ones 2 bytes
+    obname_size = len(frame_plan.obname)
+    assert [layout.body_size for layout in frame_plan.layouts] == [obname_size + 1 + 50, obname_size + 2 + 50]
+
+    description = frame_plan.describe()
+    assert "300 rows in 3 chunk(s)" in description
+    assert "IMAGE: >f8 (promoted from float32), FDOUBL, dimension [5], 40 bytes" in description
+
+
+def test_layouts_cached_in_assembler(dlis_file: DLISFile) -> None:
+    """Test that the layouts compiled in the plan are the ones used by the assembler."""
+
+    mfd = dlis_file._make_multi_frame_data_objects(None)[0][0]
+    assembler = FrameDataAssembler(8192, b'\xff\x01')
+
+    plan = FramePlan(mfd, assembler)
+    assert all(assembler.get_layout(layout.body_size) is layout for layout in plan.layouts)
+
+
+def test_promotion_logged(dlis_file: DLISFile, new_dlis_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """Test that the channels cast to larger data types are reported when writing the file."""
+
+    with caplog.at_level(logging.INFO, logger='dliswriter.file.writer'):
+        dlis_file.write(new_dlis_path)
+
+    assert "Values of channel(s) IMAGE of FrameItem 'MAIN' are cast to larger data types" in caplog.text
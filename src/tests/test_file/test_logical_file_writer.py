@@ -0,0 +1,128 @@
+import io
+import os
+import pytest
+from pathlib import Path
+from typing import Any
+import numpy as np
+from dlisio import dlis    # type: ignore  # untyped library
+
+from dliswriter import DLISFile, enums
+from dliswriter.file.writer import ByteWriter
+from dliswriter.file.logical_file_writer import ParallelLogicalFileWriter, SegmentWriter
+
+
+def make_multi_lf_file(n_logical_files: int = 4, n_rows: int = 2000) -> DLISFile:
+    """Create a DLISFile with multiple logical files, each with its own origin, channels, and frame.
+
+    The parameters of all logical files are in a single, shared set.
+    """
+
+    df = DLISFile()
+    for i in range(n_logical_files):
+        lf = df.add_logical_file(fh_id=f"RUN-{i}", fh_sequence_number=i + 1)
+        set_name = f"RUN-{i}"
+        lf.add_origin(f"ORIGIN-{i}", file_set_number=1, creation_time="2050/03/02 15:30:00", set_name=set_name)
+        channels = (
+            lf.add_channel(f"DEPTH-{i}", data=np.arange(n_rows, dtype=np.float64), set_name=set_name),
+            lf.add_channel(f"IMAGE-{i}", data=np.random.rand(n_rows, 8).astype(np.float32), set_name=set_name),
+        )
+        lf.add_frame(f"MAIN-{i}", channels=channels, index_type=enums.FrameIndexType.BOREHOLE_DEPTH,
+                     set_name=set_name)
+        lf.add_parameter(f"PARAM-{i}", values=[i])
+    return df
+
+
+@pytest.fixture
+def reference_bytes(new_dlis_path: Path) -> bytes:
+    """Bytes of a multi-logical-file DLIS written in the standard way."""
+
+    np.random.seed(123)
+    make_multi_lf_file().write(new_dlis_path, input_chunk_size=300)
+    return new_dlis_path.read_bytes()
+
+
+@pytest.mark.parametrize('n_workers', (1, 3, 10))
+@pytest.mark.parametrize('kwargs', (
+        {},
+        {'pack_visible_records': True},
+        {'output_mode': 'mmap'},
+        {'output_mode': 'vectored', 'write_behind': True, 'n_encoding_workers': 2},
+        {'fsync_policy': 5000},
+))
+def test_same_bytes(reference_bytes: bytes, new_dlis_path: Path, n_workers: int, kwargs: dict[str, Any]) -> None:
+    """Test that the logical files written in parallel and concatenated give the same bytes as standard writing."""
+
+    if kwargs.get('pack_visible_records'):
+        np.random.seed(123)
+        make_multi_lf_file().write(new_dlis_path, input_chunk_size=300, pack_visible_records=True)
+        reference_bytes = new_dlis_path.read_bytes()
+
+    np.random.seed(123)
+    make_multi_lf_file().write(new_dlis_path, input_chunk_size=300, n_logical_file_workers=n_workers, **kwargs)
+
+    assert new_dlis_path.read_bytes() == reference_bytes
+    assert not list(new_dlis_path.parent.glob('*.dlis-segment'))  # temporary files removed
+
+
+def test_readable(new_dlis_path: Path) -> None:
+    """Test that all logical files of the produced file can be read."""
+
+    make_multi_lf_file(n_logical_files=3).write(new_dlis_path, n_logical_file_workers=2)
+
+    with dlis.load(new_dlis_path) as files:
+        assert [f.fileheader.id for f in files] == ["RUN-0", "RUN-1", "RUN-2"]
+        assert [[fr.name for fr in f.frames] for f in files] == [["MAIN-0"], ["MAIN-1"], ["MAIN-2"]]
+        assert [p.name for p in files[2].parameters] == ["PARAM-0", "PARAM-1", "PARAM-2"]  # shared set
+
+
+def test_file_object_and_temp_dir(reference_bytes: bytes, tmp_path: Path) -> None:
+    """Test writing to a file object (bytes are copied in user space), with segment files in a given directory."""
+
+    buffer = io.BytesIO()
+    np.random.seed(123)
+    make_multi_lf_file().write(buffer, input_chunk_size=300, n_logical_file_workers=2, temp_dir=tmp_path)
+
+    assert buffer.getvalue() == reference_bytes
+    assert not os.listdir(tmp_path)
+
+
+def test_error_in_worker(new_dlis_path: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that an error raised while writing a logical file is re-raised and the segment files are removed."""
+
+    def write_logical_records(self: SegmentWriter, logical_records: Any, output_chunk_size: Any) -> None:
+        raise RuntimeError("Failed to write a logical file")
+
+    monkeypatch.setattr(SegmentWriter, 'write_logical_records', write_logical_records)
+
+    with pytest.raises(RuntimeError, match="Failed to write a logical file"):
+        make_multi_lf_file(n_logical_files=3).write(new_dlis_path, n_logical_file_workers=2, temp_dir=tmp_path)
+
+    assert not os.listdir(tmp_path)
+
+
+@pytest.mark.parametrize(('n_workers', 'error_type'), ((0, ValueError), (1.5, TypeError), (True, TypeError)))
+def test_wrong_number_of_workers(new_dlis_path: Path, n_workers: Any, error_type: type[Exception]) -> None:
+    """Test that an error is raised for an incorrect number of workers."""
+
+    with pytest.raises(error_type, match="Number of logical file workers must be"):
+        ParallelLogicalFileWriter(new_dlis_path, n_workers=n_workers)
+
+
+@pytest.mark.parametrize('kernel_copy', (True, False))
+def test_copy_file(new_dlis_path: Path, tmp_path: Path, kernel_copy: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test appending the contents of another file, with and without copying in the kernel."""
+
+    source = tmp_path / "source.bin"
+    source.write_bytes(bytes(range(256)) * 1000)
+
+    if not kernel_copy:
+        monkeypatch.setattr(ByteWriter, '_copy_in_kernel', staticmethod(lambda *args: 0))
+    monkeypatch.setattr(ByteWriter, 'copy_chunk_size', 1000)
+
+    with ByteWriter(new_dlis_path) as writer:
+        writer.write_bytes(b'abc')
+        assert writer.copy_file(source) == 256000
+        writer.write_bytes(b'xyz')
+        assert writer.total_size == 256006
+
+    assert new_dlis_path.read_bytes() == b'abc' + source.read_bytes() + b'xyz'
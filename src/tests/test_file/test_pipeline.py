@@ -0,0 +1,129 @@
+import pytest
+from pathlib import Path
+from threading import Thread
+from typing import Generator
+import numpy as np
+
+from dliswriter.file.pipeline import ByteBoundedQueue, prefetch
+
+from tests.dlis_files_for_testing import write_dlis_from_dict
+from tests.dlis_files_for_testing.short_dlis import create_dlis_file_object
+
+
+def test_queue_bounded_by_bytes() -> None:
+    """Test that putting an item blocks until there is enough space in the queue for it."""
+
+    queue = ByteBoundedQueue(max_bytes=100)
+    queue.put('a', 60)
+
+    thread = Thread(target=queue.put, args=('b', 60))
+    thread.start()
+    thread.join(timeout=0.1)
+    assert thread.is_alive()  # waiting for space in the queue
+    assert len(queue) == 1
+
+    assert queue.get() == 'a'
+    thread.join(timeout=1)
+    assert not thread.is_alive()
+    assert queue.n_bytes == 60
+    assert queue.get() == 'b'
+
+
+def test_queue_large_item_accepted() -> None:
+    """Test that an item larger than the byte limit is accepted by an empty queue."""
+
+    queue = ByteBoundedQueue(max_bytes=100, max_items=5)
+    queue.put('x', 1000)
+
+    assert queue.n_bytes == 1000
+    assert queue.get() == 'x'
+
+
+@pytest.mark.parametrize(('max_bytes', 'max_items'), ((0, None), (None, -1), (2.5, None)))
+def test_queue_wrong_limits(max_bytes: int, max_items: int) -> None:
+    """Test that an error is raised for incorrect limits of the queue."""
+
+    with pytest.raises(ValueError, match="must be a positive integer"):
+        ByteBoundedQueue(max_bytes=max_bytes, max_items=max_items)
+
+
+def test_prefetch_order_and_limit() -> None:
+    """Test that prefetched items are yielded in order, with a limited number of bytes loaded in advance."""
+
+    n_loaded = 0
+
+    def items() -> Generator:
+        nonlocal n_loaded
+        for i in range(50):
+            n_loaded += 1
+            yield bytes(10) + bytes([i])
+
+    for i, item in enumerate(prefetch(items(), max_bytes=35, get_size=len)):
+        assert item[-1] == i
+        assert n_loaded - i <= 5  # 3 items (11 bytes each) in the queue, 1 being put, 1 being consumed
+
+    assert n_loaded == 50
+
+
+def test_prefetch_error_propagated() -> None:
+    """Test that an error raised while loading the items is re-raised in the consuming thread."""
+
+    def items() -> Generator:
+        yield b'abc'
+        raise OSError("Cannot read the file")
+
+    with pytest.raises(OSError, match="Cannot read the file"):
+        list(prefetch(items(), max_bytes=100, get_size=len))
+
+
+def test_prefetch_stopped_early() -> None:
+    """Test that the reader thread stops if the items are not consumed to the end."""
+
+    n_loaded = 0
+
+    def items() -> Generator:
+        nonlocal n_loaded
+        for _ in range(1000):
+            n_loaded += 1
+            yield b'x' * 10
+
+    gen = prefetch(items(), max_bytes=20, get_size=len)
+    next(gen)
+    gen.close()
+
+    assert n_loaded < 10
+
+
+@pytest.mark.parametrize(('output_mode', 'n_encoding_workers'), (('buffered', None), ('vectored', 2), ('mmap', None)))
+def test_pipeline_same_bytes(base_data_path: Path, new_dlis_path: Path, output_mode: str,
+                             n_encoding_workers: int) -> None:
+    """Test that a file written in the pipelined mode is identical to one written sequentially."""
+
+    data_dict = {
+        'index': np.arange(5000).astype(np.float64),
+        'image': np.random.rand(5000, 50).astype(np.float32)
+    }
+
+    reference_path = base_data_path / "outputs/new_fake_dlis_reference.DLIS"
+    write_dlis_from_dict(reference_path, data_dict=data_dict, input_chunk_size=300)
+    write_dlis_from_dict(new_dlis_path, data_dict=data_dict, input_chunk_size=300, output_mode=output_mode,
+                         n_encoding_workers=n_encoding_workers, pipeline=True, pipeline_queue_bytes=50000)
+
+    try:
+        assert new_dlis_path.read_bytes() == reference_path.read_bytes()
+    finally:
+        reference_path.unlink()
+
+
+def test_pipeline_hdf5(short_reference_data_path: Path, base_data_path: Path, new_dlis_path: Path) -> None:
+    """Test that the pipelined mode produces the same file from HDF5 data, with multiple frames."""
+
+    reference_path = base_data_path / "outputs/new_fake_dlis_reference.DLIS"
+    df = create_dlis_file_object()
+    df.write(reference_path, data=short_reference_data_path, input_chunk_size=20)
+    df.write(new_dlis_path, data=short_reference_data_path, input_chunk_size=20, pipeline=True)
+
+    try:
+        assert new_dlis_path.read_bytes() == reference_path.read_bytes()
+    finally:
+        reference_path.unlink()
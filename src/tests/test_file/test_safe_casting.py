@@ -0,0 +1,180 @@
+import pytest
+import h5py  # type: ignore  # untyped library
+from pathlib import Path
+from typing import Any, Optional
+import numpy as np
+
+from dliswriter import FrameDataCache
+
+from tests.common import load_dlis
+from tests.dlis_files_for_testing.dlis_from_dict import create_dlis_file_object
+
+
+N_ROWS = 1000
+
+#: data types without a representation code and the data types their data are expected to be written as
+CAST_DTYPES = {'int64': np.int32, 'uint64': np.uint32, 'float16': np.float32, 'bool': np.uint8}
+
+
+def make_data(large_value: Optional[int] = None) -> dict[str, np.ndarray]:
+    """Create data sets of the data types without a representation code; optionally put a large int64 value in."""
+
+    rng = np.random.default_rng(12)
+    data: dict[str, np.ndarray] = {
+        'int64': rng.integers(-2 ** 31, 2 ** 31, (N_ROWS, 3)),
+        'uint64': rng.integers(0, 2 ** 32, N_ROWS).astype(np.uint64),
+        'float16': rng.normal(size=N_ROWS).astype(np.float16),
+        'bool': rng.random(N_ROWS) < 0.5,
+    }
+    if large_value is not None:
+        data['int64'][17, 1] = large_value
+    return data
+
+
+def to_structured(data: dict[str, np.ndarray]) -> np.ndarray:
+    """Put the data sets in a structured numpy array."""
+
+    arr = np.zeros(N_ROWS, dtype=[(name, d.dtype, d.shape[1:]) for name, d in data.items()])
+    for name, d in data.items():
+        arr[name] = d
+    return arr
+
+
+def to_hdf5(data: dict[str, np.ndarray], path: Path) -> Path:
+    """Write the data sets to an HDF5 file: some as compressed chunks (read raw), others contiguous."""
+
+    with h5py.File(path, 'w') as f:
+        for i, (name, d) in enumerate(data.items()):
+            if i % 2:
+                f.create_dataset(name, data=d)
+            else:
+                f.create_dataset(name, data=d, chunks=(128, *d.shape[1:]), compression='gzip')
+    return path
+
+
+def make_source(data: dict[str, np.ndarray], source_type: str, tmp_path: Path) -> Any:
+    """Convert the data to a source of the given type."""
+
+    if source_type == 'dict':
+        return data
+    if source_type == 'structured':
+        return to_structured(data)
+    return to_hdf5(data, tmp_path / "data.h5")
+
+
+@pytest.mark.parametrize('source_type', ('dict', 'structured', 'hdf5'))
+@pytest.mark.parametrize('kwargs', (
+        {},
+        {'n_encoding_workers': 2, 'executor_type': 'process'},
+        {'pipeline': True, 'output_mode': 'mmap'},
+))
+def test_same_as_cast_beforehand(new_dlis_path: Path, tmp_path: Path, source_type: str, kwargs: dict[str, Any]
+                                 ) -> None:
+    """Test that data of types without a representation code give the same file as the data cast beforehand."""
+
+    data = make_data()
+    cast_data = {name: d.astype(CAST_DTYPES[name]) for name, d in data.items()}
+
+    df = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None)
+    df.write(new_dlis_path, data=cast_data, input_chunk_size=300, **kwargs)
+    reference = new_dlis_path.read_bytes()
+
+    df = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None)
+    df.write(new_dlis_path, data=make_source(data, source_type, tmp_path), input_chunk_size=300, **kwargs)
+    assert new_dlis_path.read_bytes() == reference
+    assert [ch.cast_dtype for ch in df.logical_files[0].channels] == list(CAST_DTYPES.values())
+
+
+@pytest.mark.parametrize('source_type', ('dict', 'structured', 'hdf5'))
+def test_out_of_range_error(new_dlis_path: Path, tmp_path: Path, source_type: str) -> None:
+    """Test that an error is raised for int64 values not fitting in int32 by default."""
+
+    source = make_source(make_data(large_value=2 ** 40), source_type, tmp_path)
+    df = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None)
+    with pytest.raises(ValueError, match="Values of 'int64' .* do not fit in int32"):
+        df.write(new_dlis_path, data=source, input_chunk_size=300)
+
+
+@pytest.mark.parametrize('source_type', ('dict', 'structured', 'hdf5'))
+def test_clip(new_dlis_path: Path, tmp_path: Path, source_type: str) -> None:
+    """Test that values not fitting in the target data type are clipped with the 'clip' policy."""
+
+    data = make_data(large_value=-2 ** 40)
+    df = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None)
+    df.write(new_dlis_path, data=make_source(data, source_type, tmp_path), cast_policy='clip')
+
+    with load_dlis(new_dlis_path) as f:
+        curves = f.frames[0].curves()
+        expected = np.clip(data['int64'], -2 ** 31, 2 ** 31 - 1)
+        assert curves['int64'].dtype == np.int32
+        assert np.array_equal(curves['int64'], expected)
+        assert curves['int64'][17, 1] == -2 ** 31
+
+
+@pytest.mark.parametrize('source_type', ('dict', 'structured', 'hdf5'))
+def test_promote(new_dlis_path: Path, tmp_path: Path, source_type: str) -> None:
+    """Test that a data set with values not fitting in int32 is written as float64 with the 'promote' policy."""
+
+    data = make_data(large_value=2 ** 40)
+    df = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None)
+    df.write(new_dlis_path, data=make_source(data, source_type, tmp_path), cast_policy='promote')
+
+    assert [ch.cast_dtype for ch in df.logical_files[0].channels] == [np.float64, np.uint32, np.float32, np.uint8]
+    with load_dlis(new_dlis_path) as f:
+        curves = f.frames[0].curves()
+        assert curves['int64'].dtype == np.float64
+        assert np.array_equal(curves['int64'], data['int64'])
+        assert curves['uint64'].dtype == np.uint32
+
+
+def test_promote_planned() -> None:
+    """Test that the promotion is taken into account in the plan of the file."""
+
+    data = make_data(large_value=2 ** 40)
+    plan = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None).plan(data=data, cast_policy='promote')
+    frame_plan = plan.logical_files[0].frames[0].frame_plan
+    assert frame_plan is not None
+
+    assert frame_plan.row_data_size == 3 * 8 + 4 + 4 + 1
+    assert [channel.representation_code for channel in frame_plan.channels] == ['FDOUBL', 'ULONG', 'FSINGL', 'USHORT']
+    assert [channel.is_range_checked for channel in frame_plan.channels] == [False, True, False, False]
+
+
+def test_cache_key_includes_cast_policy(new_dlis_path: Path, tmp_path: Path) -> None:
+    """Test that Frame Data with values clipped are not taken from the frame data cache with the 'raise' policy."""
+
+    data = make_data(large_value=2 ** 40)
+    cache = FrameDataCache(tmp_path / "cache")
+
+    df = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None)
+    df.write(new_dlis_path, data=data, cast_policy='clip', frame_data_cache=cache)
+
+    df = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None)
+    with pytest.raises(ValueError, match="Values of 'int64' .* do not fit in int32"):
+        df.write(new_dlis_path, data=data, frame_data_cache=cache)
+    assert cache.statistics.hits == 0
+
+
+@pytest.mark.parametrize(('cast_policy', 'expected'), (('clip', [-32768, 5, 32767]), ('promote', None)))
+def test_explicit_cast_dtype(new_dlis_path: Path, cast_policy: str, expected: Optional[list[int]]) -> None:
+    """Test that values cast to an explicitly set integer data type are checked, but the data type is kept."""
+
+    data_dict = {'depth': np.arange(3) * 0.5, 'x': np.array([-40000, 5, 40000])}
+    df = create_dlis_file_object(data_dict, channel_kwargs={'x': {'cast_dtype': np.int16}}, index_type=None)
+
+    if expected is None:
+        with pytest.raises(ValueError, match="Values of 'x' \\(from -40000 to 40000\\) do not fit in int16"):
+            df.write(new_dlis_path, cast_policy=cast_policy)
+        return
+
+    df.write(new_dlis_path, cast_policy=cast_policy)
+    with load_dlis(new_dlis_path) as f:
+        assert f.frames[0].curves()['x'].tolist() == expected
+
+
+def test_wrong_cast_policy(new_dlis_path: Path) -> None:
+    """Test that an error is raised for an unknown cast policy."""
+
+    df = create_dlis_file_object(dict.fromkeys(CAST_DTYPES), index_type=None)
+    with pytest.raises(ValueError, match="'wrap' is not one of the allowed cast policies"):
+        df.write(new_dlis_path, data=make_data(), cast_policy='wrap')
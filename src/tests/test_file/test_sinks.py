@@ -0,0 +1,191 @@
+import io
+import os
+import pytest
+from pathlib import Path
+from threading import Thread
+from typing import Any
+import numpy as np
+
+from dliswriter import DLISFile
+from dliswriter.file.sinks import ChunkCollector
+from dliswriter.utils.enums import FrameIndexType
+
+from tests.common import load_dlis
+from tests.dlis_files_for_testing.common import make_df
+from tests.dlis_files_for_testing.dlis_from_dict import create_dlis_file_object
+
+
+@pytest.fixture
+def dlis_file_and_bytes(new_dlis_path: Path) -> tuple[DLISFile, bytes]:
+    """A DLISFile and the bytes written for it to a file of a given name."""
+
+    data_dict = {
+        'index': np.arange(3000).astype(np.float64),
+        'image': np.random.rand(3000, 20).astype(np.float32)
+    }
+
+    df = create_dlis_file_object(data_dict)
+    df.write(new_dlis_path, input_chunk_size=256)
+    return df, new_dlis_path.read_bytes()
+
+
+def test_chunk_collector() -> None:
+    """Test that the collector splits the written bytes into chunks of the given size."""
+
+    collector = ChunkCollector(4)
+    assert collector.write(b'abc') == 3
+    assert collector.pop_chunks() == []
+
+    collector.write(memoryview(b'defghijklm'))
+    chunks = collector.pop_chunks()
+    assert chunks == [b'abcd', b'efgh', b'ijkl']
+    assert all(isinstance(chunk, memoryview) and chunk.readonly for chunk in chunks)
+    assert collector.pop_chunks() == []
+
+    collector.write(bytearray(b'nopqr'))
+    assert collector.pop_chunks(include_incomplete=True) == [b'mnop', b'qr']
+    assert collector.pop_chunks(include_incomplete=True) == []
+    assert chunks == [b'abcd', b'efgh', b'ijkl']  # the buffers of the taken chunks are not reused
+
+
+@pytest.mark.parametrize(('chunk_size', 'error_type'), ((0, ValueError), (1.5, TypeError)))
+def test_chunk_collector_wrong_size(chunk_size: int, error_type: type[Exception]) -> None:
+    """Test that an error is raised for an incorrect chunk size."""
+
+    with pytest.raises(error_type, match="Chunk size must be"):
+        ChunkCollector(chunk_size)
+
+
+@pytest.mark.parametrize('chunk_size', (1000, 8192, 100000, 10 ** 8))
+@pytest.mark.parametrize('n_encoding_workers', (None, 2))
+def test_iter_bytes(dlis_file_and_bytes: tuple[DLISFile, bytes], chunk_size: int, n_encoding_workers: int) -> None:
+    """Test that the bytes yielded by iter_bytes are the same as those written to a file."""
+
+    df, reference = dlis_file_and_bytes
+    chunks = list(df.iter_bytes(chunk_size=chunk_size, input_chunk_size=256, n_encoding_workers=n_encoding_workers))
+
+    assert b''.join(chunks) == reference
+    assert all(len(chunk) == chunk_size for chunk in chunks[:-1])
+    assert 0 < len(chunks[-1]) <= chunk_size
+
+
+def test_iter_bytes_lazy() -> None:
+    """Test that the bytes are created as they are requested, not all at once."""
+
+    data_dict = {
+        'index': np.arange(20000).astype(np.float64),
+        'image': np.random.rand(20000, 20).astype(np.float32)
+    }
+
+    df = create_dlis_file_object(data_dict)
+    gen = df.iter_bytes(chunk_size=4096, input_chunk_size=100)
+    first = next(gen)
+    gen.close()
+
+    assert len(first) == 4096
+    assert first[4:9] == b'V1.00'  # DLIS version in the Storage Unit Label
+
+
+def test_write_to_file_object(dlis_file_and_bytes: tuple[DLISFile, bytes], new_dlis_path: Path) -> None:
+    """Test writing to an open file object (at an offset) and to io.BytesIO; the objects are not closed."""
+
+    df, reference = dlis_file_and_bytes
+
+    buffer = io.BytesIO()
+    df.write(buffer, input_chunk_size=256, output_mode='vectored')
+    assert not buffer.closed
+    assert buffer.getvalue() == reference
+
+    with open(new_dlis_path, 'wb') as f:
+        f.write(b'HEADER')
+        df.write(f, input_chunk_size=256, write_behind=True, fsync_policy='end')
+        assert not f.closed
+    assert new_dlis_path.read_bytes() == b'HEADER' + reference
+
+
+def test_write_to_pipe(dlis_file_and_bytes: tuple[DLISFile, bytes]) -> None:
+    """Test writing to a file descriptor of a pipe."""
+
+    df, reference = dlis_file_and_bytes
+    read_fd, write_fd = os.pipe()
+    received = []
+
+    def read() -> None:
+        with open(read_fd, 'rb') as f:
+            received.append(f.read())
+
+    thread = Thread(target=read)
+    thread.start()
+    try:
+        df.write(write_fd, input_chunk_size=256, output_mode='vectored', fsync_policy='end')
+    finally:
+        os.close(write_fd)  # the file descriptor is not closed by the writer
+        thread.join()
+
+    assert received[0] == reference
+
+
+class ShortWritingRawIO(io.RawIOBase):
+    """Unbuffered file object writing at most 1000 bytes per call (as e.g. a pipe or a socket can)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.buffer = io.BytesIO()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, bts: Any) -> int:
+        return self.buffer.write(memoryview(bts)[:1000])
+
+
+@pytest.mark.parametrize('kwargs', ({}, {'output_mode': 'vectored'}, {'write_behind': True}))
+def test_write_to_raw_file_object(dlis_file_and_bytes: tuple[DLISFile, bytes], kwargs: dict[str, Any]) -> None:
+    """Test that no bytes are lost if an unbuffered file object writes fewer bytes than requested."""
+
+    df, reference = dlis_file_and_bytes
+
+    sink = ShortWritingRawIO()
+    df.write(sink, input_chunk_size=256, **kwargs)
+    assert sink.buffer.getvalue() == reference
+
+
+def test_mmap_requires_file_name() -> None:
+    """Test that 'mmap' output mode cannot be used with a file object."""
+
+    with pytest.raises(ValueError, match="'mmap' output mode can only be used for writing to a file of a given name"):
+        create_dlis_file_object({'index': np.arange(10.)}).write(io.BytesIO(), output_mode='mmap')
+
+
+def test_stream_to_bytes_io(new_dlis_path: Path) -> None:
+    """Test streaming to io.BytesIO at an offset; the values filled in on closing are put in the right place."""
+
+    df = make_df()
+    lf = df.logical_files[0]
+    channel = lf.add_channel('index', cast_dtype=np.float64)
+    lf.add_frame("MAIN", index_type=FrameIndexType.VERTICAL_DEPTH, channels=(channel,))
+
+    buffer = io.BytesIO()
+    buffer.write(b'xyz')
+    with df.open_stream(buffer) as stream:
+        stream.append_rows('MAIN', {'index': np.arange(100.)})
+
+    new_dlis_path.write_bytes(buffer.getvalue()[3:])
+    with load_dlis(new_dlis_path) as f:
+        assert f.frames[0].index_max == 99
+
+
+def test_stream_requires_random_access() -> None:
+    """Test that a stream cannot be opened for an output which does not support random access."""
+
+    df = make_df()
+    lf = df.logical_files[0]
+    lf.add_frame("MAIN", channels=(lf.add_channel('index', cast_dtype=np.float64),))
+
+    read_fd, write_fd = os.pipe()
+    try:
+        with pytest.raises(ValueError, match="streaming requires an output supporting random access"):
+            df.open_stream(write_fd)
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
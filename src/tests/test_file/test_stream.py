@@ -0,0 +1,280 @@
+import logging
+import pytest
+from pathlib import Path
+from typing import Optional
+import numpy as np
+
+from dliswriter import DLISFile
+from dliswriter.file.stream import FrameStatistics
+from dliswriter.file.writer import ByteWriter
+from dliswriter.logical_record import eflr_types
+from dliswriter.utils.enums import FrameIndexType
+
+from tests.common import load_dlis, read_visible_record_lengths
+from tests.dlis_files_for_testing.common import make_df
+
+
+def make_stream_df(index_type: Optional[str] = FrameIndexType.VERTICAL_DEPTH, index_units: str = 'm'
+                   ) -> tuple[DLISFile, eflr_types.FrameItem]:
+    """Create a DLISFile with a frame consisting of an index and an image channel, with data types defined."""
+
+    df = make_df()
+    lf = df.logical_files[0]
+    channels = (
+        lf.add_channel('index', cast_dtype=np.float64, units=index_units),
+        lf.add_channel('image', cast_dtype=np.float32, dimension=10)
+    )
+    frame = lf.add_frame("MAIN", index_type=index_type, channels=channels)
+    return df, frame
+
+
+def make_data(n_rows: int) -> dict[str, np.ndarray]:
+    """Create data for the frame defined in make_stream_df."""
+
+    return {
+        'index': 10 + 0.5 * np.arange(n_rows),
+        'image': np.random.rand(n_rows, 10).astype(np.float32)
+    }
+
+
+def test_same_bytes_as_write(base_data_path: Path, new_dlis_path: Path) -> None:
+    """Test that a streamed file is identical to one written at once (with the same chunks of data)."""
+
+    data = make_data(5000)
+
+    reference_path = base_data_path / "outputs/new_fake_dlis_reference.DLIS"
+    df, _ = make_stream_df()
+    df.write(reference_path, data=data, input_chunk_size=300)
+
+    df, frame = make_stream_df()
+    with df.open_stream(new_dlis_path, update_channel_ranges=False) as stream:
+        for i in range(0, 5000, 300):
+            stream.append_rows(frame, {name: d[i:i + 300] for name, d in data.items()})
+
+    try:
+        assert new_dlis_path.read_bytes() == reference_path.read_bytes()
+    finally:
+        reference_path.unlink()
+
+
+def test_packed_visible_records(new_dlis_path: Path) -> None:
+    """Test streaming with visible records packed; Frame and Channel sets are kept in separate visible records."""
+
+    data = make_data(1000)
+
+    df, frame = make_stream_df()
+    with df.open_stream(new_dlis_path, pack_visible_records=True) as stream:
+        for i in range(0, 1000, 128):
+            stream.append_rows(frame, {name: d[i:i + 128] for name, d in data.items()})
+
+    assert max(read_visible_record_lengths(new_dlis_path)) <= 8192
+
+    with load_dlis(new_dlis_path) as f:
+        assert f.frames[0].index_max == 10 + 0.5 * 999
+        assert np.array_equal(f.frames[0].curves()['image'], data['image'])
+
+
+@pytest.mark.filterwarnings("ignore:All-NaN slice")
+def test_values_filled_in(new_dlis_path: Path) -> None:
+    """Test that the values determined from the appended data are filled in when the stream is closed."""
+
+    data = make_data(3000)
+    data['index'] = data['index'][::-1].copy()
+    data['image'][5, 2] = np.nan
+    data['image'][:, 7] = np.nan
+
+    df, _ = make_stream_df()
+    with df.open_stream(new_dlis_path) as stream:
+        for i in range(0, 3000, 700):
+            chunk = np.zeros(min(700, 3000 - i), dtype=[('index', np.float64), ('image', np.float32, (10,))])
+            chunk['index'] = data['index'][i:i + 700]
+            chunk['image'] = data['image'][i:i + 700]
+            stream.append_rows('MAIN', chunk)
+
+    with load_dlis(new_dlis_path) as f:
+        frame = f.frames[0]
+        assert frame.index_min == 10
+        assert frame.index_max == 10 + 0.5 * 2999
+        assert frame.spacing == -0.5
+
+        index, image = f.channels
+        assert index.attic['MINIMUM-VALUE'].value == [10]
+        assert index.attic['MAXIMUM-VALUE'].value == [10 + 0.5 * 2999]
+        assert np.array_equal(image.attic['MINIMUM-VALUE'].value, np.nanmin(data['image'], axis=0), equal_nan=True)
+        assert np.array_equal(image.attic['MAXIMUM-VALUE'].value, np.nanmax(data['image'], axis=0), equal_nan=True)
+
+        curves = frame.curves()
+        assert np.array_equal(curves['index'], data['index'])
+        assert np.array_equal(curves['image'], data['image'], equal_nan=True)
+
+
+def test_values_set_explicitly(new_dlis_path: Path) -> None:
+    """Test that values set explicitly by the user are not replaced."""
+
+    df, frame = make_stream_df()
+    frame.spacing.value = 0.25
+    frame.channels.value[1].minimum_value.value = [-1.0] * 10
+
+    with df.open_stream(new_dlis_path) as stream:
+        stream.append_rows(frame, make_data(100))
+
+    with load_dlis(new_dlis_path) as f:
+        assert f.frames[0].spacing == 0.25
+        assert f.frames[0].index_max == 10 + 0.5 * 99
+        assert f.channels[1].attic['MINIMUM-VALUE'].value == [-1.0] * 10
+        assert 'MAXIMUM-VALUE' not in f.channels[1].attic.keys()
+
+
+def test_row_number_index(new_dlis_path: Path) -> None:
+    """Test that index_max of a frame without an index channel is the number of appended rows."""
+
+    df, frame = make_stream_df(index_type=None)
+    with df.open_stream(new_dlis_path) as stream:
+        for _ in range(3):
+            stream.append_rows(frame, make_data(150))
+
+    with load_dlis(new_dlis_path) as f:
+        assert f.frames[0].index_min == 1
+        assert f.frames[0].index_max == 450
+        assert f.frames[0].curves().shape == (450,)
+
+
+def test_row_number_index_same_as_write(base_data_path: Path, new_dlis_path: Path) -> None:
+    """Test that index_max of a frame without an index channel is recorded as in a file written at once."""
+
+    data = make_data(150)
+
+    reference_path = base_data_path / "outputs/new_fake_dlis_reference.DLIS"
+    reference_df, reference_frame = make_stream_df(index_type=None)
+    reference_df.write(reference_path, data=data)
+
+    df, frame = make_stream_df(index_type=None)
+    with df.open_stream(new_dlis_path, update_channel_ranges=False) as stream:
+        stream.append_rows(frame, data)
+
+    try:
+        assert frame.index_max.value == reference_frame.index_max.value == 150
+        assert frame.index_max.representation_code is reference_frame.index_max.representation_code
+        assert new_dlis_path.read_bytes() == reference_path.read_bytes()
+    finally:
+        reference_path.unlink()
+
+
+@pytest.mark.parametrize('n_rows', (1, 0))
+def test_spacing_unset_for_too_few_rows(new_dlis_path: Path, n_rows: int) -> None:
+    """Test that the spacing is left unset if there are fewer than 2 rows, as in FrameItem.setup_from_data."""
+
+    df, frame = make_stream_df()
+    with df.open_stream(new_dlis_path) as stream:
+        stream.append_rows(frame, make_data(n_rows))
+
+    assert frame.spacing.value is None
+
+    with load_dlis(new_dlis_path) as f:
+        assert f.frames[0].spacing is None
+        assert f.frames[0].curves().shape == (n_rows,)
+
+
+@pytest.mark.parametrize(('index_units', 'direction'), (
+        ('ft', 'DECREASING'),
+        ('m', None),  # the direction takes 1 byte more than the spacing placeholder
+))
+def test_non_uniform_spacing(new_dlis_path: Path, caplog: pytest.LogCaptureFixture, index_units: str,
+                             direction: Optional[str]) -> None:
+    """Test that the spacing is left unset, with a warning, if the spacing of the index is not uniform;
+    the direction is recorded instead if it fits in the space of the spacing placeholder (see setup_from_data).
+    """
+
+    data = make_data(10)
+    data['index'] = np.array([0, 1, 2, 4, 5, 6, 8, 9, 10, 18], dtype=np.float64)[::-1]
+
+    df, frame = make_stream_df(index_units=index_units)
+    with caplog.at_level(logging.WARNING, logger='dliswriter'):
+        with df.open_stream(new_dlis_path) as stream:
+            stream.append_rows(frame, data)
+
+    assert "Spacing of the index channel of FrameItem 'MAIN' is not uniform" in caplog.text
+    assert ("Direction of the index of FrameItem 'MAIN' does not fit" in caplog.text) is (direction is None)
+    assert frame.spacing.value is None
+
+    with load_dlis(new_dlis_path) as f:
+        assert f.frames[0].spacing is None
+        assert f.frames[0].direction == direction
+        assert f.frames[0].index_min == 0
+        assert f.frames[0].index_max == 18
+        assert np.array_equal(f.frames[0].curves()['index'], data['index'])
+
+
+@pytest.mark.parametrize(('chunks', 'spacing'), (
+        (([0, 1, 2], [3, 4]), 1),
+        (([0, 1, 2], [4, 5]), None),  # gap between chunks
+        (([0, 1.0001, 2], [3, 4]), 1),  # within tolerance
+        (([0, 1, 2], [3, 4.004]), 1),  # median (not mean) difference, as in FrameItem.setup_from_data
+        (([5], [5.5], [6]), 0.5),
+        (([3],), None),
+))
+def test_spacing_across_chunks(chunks: tuple[list[float], ...], spacing: Optional[float]) -> None:
+    """Test computing the spacing of the index from consecutive chunks of data."""
+
+    stats = FrameStatistics('index')
+    for values in chunks:
+        stats.update(np.array(values, dtype=[('index', np.float64)]))
+
+    assert stats.spacing == spacing
+
+
+def test_closed_stream(new_dlis_path: Path) -> None:
+    """Test that rows cannot be appended after the stream has been closed."""
+
+    df, frame = make_stream_df()
+    stream = df.open_stream(new_dlis_path)
+    stream.append_rows(frame, make_data(10))
+    stream.close()
+    assert stream.closed
+
+    with pytest.raises(RuntimeError, match="the stream has been closed"):
+        stream.append_rows(frame, make_data(10))
+
+
+def test_wrong_rows(new_dlis_path: Path) -> None:
+    """Test that errors are raised for rows which do not match the frame."""
+
+    df, frame = make_stream_df()
+    with df.open_stream(new_dlis_path) as stream:
+        with pytest.raises(ValueError, match="No frame named 'OTHER'"):
+            stream.append_rows('OTHER', make_data(10))
+
+        with pytest.raises(ValueError, match="No data for ChannelItem 'image'"):
+            stream.append_rows(frame, {'index': np.arange(10)})
+
+        with pytest.raises(ValueError, match="same number of rows"):
+            stream.append_rows(frame, {'index': np.arange(10), 'image': np.zeros((9, 10))})
+
+        with pytest.raises(ValueError, match="does not match the channel's dimension"):
+            stream.append_rows(frame, {'index': np.arange(10), 'image': np.zeros((10, 3))})
+
+
+def test_dtype_required(new_dlis_path: Path) -> None:
+    """Test that the data types of the channels must be defined to open a stream."""
+
+    df = make_df()
+    channel = df.logical_files[0].add_channel('index')
+    df.logical_files[0].add_frame("MAIN", channels=(channel,))
+
+    with pytest.raises(RuntimeError, match="Data type of ChannelItem 'index' is not defined"):
+        df.open_stream(new_dlis_path)
+
+
+def test_overwrite_bytes(new_dlis_path: Path) -> None:
+    """Test replacing bytes which have already been written to the file."""
+
+    writer = ByteWriter(new_dlis_path)
+    writer.write_bytes(b'abcdefgh')
+    writer.overwrite_bytes(2, b'XY')
+    writer.write_bytes(b'ij')
+
+    with pytest.raises(ValueError, match="only 10 bytes have been written"):
+        writer.overwrite_bytes(9, b'XY')
+
+    writer.close()
+    assert new_dlis_path.read_bytes() == b'abXYefghij'
@@ -0,0 +1,264 @@
+import pytest
+import os
+from pathlib import Path
+import numpy as np
+
+from dliswriter.file.writer import ByteWriter, BufferedOutput, VectoredOutput, MmapOutput, FsyncPolicy, DLISWriter
+
+
+class RecordingByteWriter(ByteWriter):
+    """ByteWriter keeping track of the positions and sizes of the performed writes."""
+
+    def __init__(self, filename: Path):
+        super().__init__(filename)
+        self.writes: list[tuple[int, int]] = []
+
+    def write_bytes(self, bts: bytes, size: int = None) -> None:  # type: ignore  # same as in the parent class
+        self.writes.append((self.total_size, size or len(bts)))
+        super().write_bytes(bts, size)
+
+
+@pytest.fixture
+def random_chunks() -> list[bytes]:
+    """Chunks of random bytes of different sizes."""
+
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, size, dtype=np.uint8).tobytes() for size in rng.integers(1, 50000, 200)]
+
+
+@pytest.mark.parametrize(('buffer_size', 'block_size'), ((8192, None), (2 ** 16, 4096), (10 ** 6, 2 ** 15)))
+def test_bytes_written_correctly(new_dlis_path: Path, random_chunks: list[bytes], buffer_size: int,
+                                 block_size: int) -> None:
+    """Test that all the bytes added to the output buffer end up in the file, in the right order."""
+
+    writer = ByteWriter(new_dlis_path)
+    writer.write_bytes(b'x' * 80)  # mimic the Storage Unit Label, written directly to the file
+    output = BufferedOutput(buffer_size, writer, block_size=block_size)
+
+    for chunk in random_chunks:
+        output.add_bytes(chunk)
+    output.pass_bytes_to_writer()
+    writer.close()
+
+    with open(new_dlis_path, 'rb') as f:
+        assert f.read() == b'x' * 80 + b''.join(random_chunks)
+
+
+def test_writes_block_aligned(new_dlis_path: Path, random_chunks: list[bytes]) -> None:
+    """Test that all writes except for the last one end on block-aligned boundaries."""
+
+    writer = RecordingByteWriter(new_dlis_path)
+    writer.write_bytes(b'x' * 80)
+    output = BufferedOutput(2 ** 16, writer, block_size=8192)
+
+    for chunk in random_chunks:
+        output.add_bytes(chunk)
+    output.pass_bytes_to_writer()
+    writer.close()
+
+    assert len(writer.writes) > 10
+    for position, size in writer.writes[1:-1]:
+        assert (position + size) % output.block_size == 0
+        assert size <= 2 ** 16 + output.block_size
+
+
+def test_memory_allocated_on_demand(new_dlis_path: Path) -> None:
+    """Test that a large buffer only allocates memory for the bytes actually collected."""
+
+    writer = ByteWriter(new_dlis_path)
+    output = BufferedOutput(2 ** 32, writer, block_size=2 ** 16)
+
+    output.add_bytes(b'\x01' * 1000)
+    output.pass_bytes_to_writer()
+    writer.close()
+
+    assert output.peak_size == output.block_size
+
+
+def test_blocks_reused(new_dlis_path: Path) -> None:
+    """Test that the peak memory usage is bounded by the buffer size, regardless of the total number of bytes."""
+
+    writer = ByteWriter(new_dlis_path)
+    output = BufferedOutput(2 ** 16, writer, block_size=2 ** 12)
+
+    for _ in range(1000):
+        output.add_bytes(b'\x02' * 3000)
+    output.pass_bytes_to_writer()
+    writer.close()
+
+    assert output.peak_size <= 2 ** 16 + 2 * output.block_size
+    assert new_dlis_path.stat().st_size == 3000 * 1000
+
+
+@pytest.mark.parametrize(('block_size', 'expected'), ((None, 2 ** 16), (5000, 4096), (10, 4096), (2 ** 30, 2 ** 16)))
+def test_block_size(new_dlis_path: Path, block_size: int, expected: int) -> None:
+    """Test that the block size is a multiple of file system block size, not exceeding the buffer size."""
+
+    writer = ByteWriter(new_dlis_path)
+    writer._fs_block_size = 4096
+
+    assert BufferedOutput(2 ** 16, writer, block_size=block_size).block_size == expected
+
+
+@pytest.mark.parametrize('write_behind', (False, True))
+def test_file_opened_once(new_dlis_path: Path, random_chunks: list[bytes], write_behind: bool) -> None:
+    """Test that the file handle is kept open between the writes and that the bytes are written correctly."""
+
+    writer = ByteWriter(new_dlis_path, write_behind=write_behind)
+
+    writer.write_bytes(random_chunks[0])
+    handle = writer._file
+    for chunk in random_chunks[1:]:
+        writer.write_bytes(bytearray(chunk))
+        assert writer._file is handle
+    writer.close()
+
+    assert not writer.is_open
+    assert new_dlis_path.read_bytes() == b''.join(random_chunks)
+
+
+def test_reopened_file_appended(new_dlis_path: Path) -> None:
+    """Test that bytes written after closing the file are appended to it."""
+
+    with ByteWriter(new_dlis_path) as writer:
+        writer.write_bytes(b'abc')
+    writer.write_bytes(b'def')
+    writer.close()
+
+    assert new_dlis_path.read_bytes() == b'abcdef'
+    assert writer.total_size == 6
+
+
+def test_write_behind_reused_memory(new_dlis_path: Path) -> None:
+    """Test that the memory passed to the write-behind writer can be reused as soon as write_bytes returns."""
+
+    block = bytearray(1000)
+    with ByteWriter(new_dlis_path, write_behind=True, max_queue_size=1) as writer:
+        for i in range(100):
+            block[:] = bytes([i]) * 1000
+            writer.write_bytes(memoryview(block))
+
+    assert new_dlis_path.read_bytes() == b''.join(bytes([i]) * 1000 for i in range(100))
+
+
+def test_write_behind_error_propagated(new_dlis_path: Path) -> None:
+    """Test that an error raised in the background thread is re-raised in the main thread."""
+
+    writer = ByteWriter(new_dlis_path, write_behind=True)
+
+    def failing_write(bts: bytes) -> None:
+        raise OSError("No space left on device")
+
+    writer._write_to_file = failing_write  # type: ignore  # replacing method for testing purposes
+    writer.write_bytes(b'abc')
+
+    with pytest.raises(OSError, match="No space left"):
+        writer.close()
+
+
+@pytest.mark.parametrize(('fsync_policy', 'n_calls'), (
+        ('never', 0),
+        (FsyncPolicy.END, 1),
+        (2500, 5),   # after writes 3, 6, 9, 12 (of 1000 bytes each) and at the end
+))
+def test_fsync_policy(new_dlis_path: Path, monkeypatch: pytest.MonkeyPatch, fsync_policy: object,
+                      n_calls: int) -> None:
+    """Test that fsync is called as specified by the fsync policy."""
+
+    calls = []
+    monkeypatch.setattr(os, 'fsync', lambda fd: calls.append(fd))
+
+    with ByteWriter(new_dlis_path, fsync_policy=fsync_policy) as writer:  # type: ignore  # testing various types
+        for _ in range(13):
+            writer.write_bytes(b'\x00' * 1000)
+
+    assert len(calls) == n_calls
+
+
+@pytest.mark.parametrize(('fsync_policy', 'error_type'), (('sometimes', ValueError), (0, ValueError),
+                                                          (1.5, TypeError)))
+def test_fsync_policy_wrong(new_dlis_path: Path, fsync_policy: object, error_type: type[Exception]) -> None:
+    """Test that an error is raised for an incorrect fsync policy."""
+
+    with pytest.raises(error_type):
+        ByteWriter(new_dlis_path, fsync_policy=fsync_policy)  # type: ignore  # testing wrong types
+
+
+@pytest.mark.parametrize('write_behind', (False, True))
+def test_vectored_output(new_dlis_path: Path, random_chunks: list[bytes], write_behind: bool) -> None:
+    """Test that bytes passed to the vectored output (as bytes and memoryviews) end up in the file, in order."""
+
+    writer = ByteWriter(new_dlis_path, write_behind=write_behind)
+    output = VectoredOutput(2 ** 16, writer)
+
+    for chunk in random_chunks:
+        view = memoryview(chunk)
+        output.add_parts([view[:10], view[10:]], len(chunk))
+    output.add_bytes(np.arange(10, dtype=np.uint8).data)
+    output.pass_bytes_to_writer()
+    writer.close()
+
+    assert new_dlis_path.read_bytes() == b''.join(random_chunks) + bytes(range(10))
+    assert writer.total_size == new_dlis_path.stat().st_size
+    assert 2 ** 16 <= output.peak_size < 2 ** 16 + 50000
+
+
+@pytest.mark.skipif(not hasattr(os, 'writev'), reason="os.writev not available on this platform")
+def test_writev_partial_writes(new_dlis_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that writing parts is continued correctly if the kernel writes fewer bytes than requested."""
+
+    original_writev = os.writev
+    monkeypatch.setattr(os, 'writev', lambda fd, buffers: original_writev(fd, [bytes(b''.join(buffers)[:7])]))
+
+    parts = [bytes([i]) * (i + 1) for i in range(30)]
+    with ByteWriter(new_dlis_path) as writer:
+        writer.write_parts(parts, sum(len(p) for p in parts))
+
+    assert new_dlis_path.read_bytes() == b''.join(parts)
+
+
+def test_output_mode_wrong(new_dlis_path: Path) -> None:
+    """Test that an error is raised for an unknown output mode."""
+
+    with pytest.raises(ValueError, match="not one of the allowed output modes"):
+        DLISWriter(new_dlis_path, output_mode='scattered')
+
+
+def test_mmap_output(new_dlis_path: Path, random_chunks: list[bytes]) -> None:
+    """Test that bytes added and put in reserved regions of the memory-mapped output end up in the file, in order."""
+
+    total_size = sum(len(chunk) for chunk in random_chunks)
+    writer = ByteWriter(new_dlis_path)
+    writer.write_bytes(b'x' * 80)
+    output = MmapOutput(total_size + 10, writer)
+
+    assert new_dlis_path.stat().st_size == 80 + total_size + 10  # preallocated
+    for chunk in random_chunks:
+        view = memoryview(chunk)
+        output.add_parts([view[:10], view[10:]], len(chunk))
+    output.reserve(10)[:] = np.arange(10, dtype=np.uint8)
+    output.pass_bytes_to_writer()
+    writer.close()
+
+    assert new_dlis_path.read_bytes() == b'x' * 80 + b''.join(random_chunks) + bytes(range(10))
+    assert writer.total_size == new_dlis_path.stat().st_size
+
+
+def test_mmap_output_size_mismatch(new_dlis_path: Path) -> None:
+    """Test that errors are raised if more or fewer bytes are added than the size of the mapped region."""
+
+    with ByteWriter(new_dlis_path) as writer:
+        output = MmapOutput(100, writer)
+        output.add_bytes(b'\x01' * 60)
+
+        with pytest.raises(RuntimeError, match="only 40 bytes of the mapped region are left"):
+            output.add_bytes(b'\x01' * 50)
+        with pytest.raises(RuntimeError, match="Only 60 of the 100 bytes"):
+            output.pass_bytes_to_writer()
+
+
+def test_mmap_write_behind_wrong(new_dlis_path: Path) -> None:
+    """Test that an error is raised if memory-mapped output is combined with write-behind."""
+
+    with pytest.raises(ValueError, match="cannot be used with 'mmap' output mode"):
+        DLISWriter(new_dlis_path, write_behind=True, output_mode='mmap')
@@ -284,3 +284,24 @@ def test_copy_numbers(chan: ChannelItem) -> None:
     assert chan.copy_number == 0
     chan_chan = ChannelItem(chan.name, parent=chan.parent)
     assert chan_chan.copy_number == 1
+
+
+@pytest.mark.parametrize('value', (-999.25, -999, 0, np.float32(-1.5), np.int16(-9), None))
+def test_setting_absent_value(chan: ChannelItem, value: Any) -> None:
+    """Test that absent value can be set to a finite number or cleared."""
+
+    chan.absent_value = value
+    assert chan.absent_value == value
+
+
+@pytest.mark.parametrize(('value', 'error', 'message'), (
+        ('-999', TypeError, "Absent value must be a number"),
+        (True, TypeError, "Absent value must be a number"),
+        (np.nan, ValueError, "Absent value must be finite"),
+        (-np.inf, ValueError, "Absent value must be finite"),
+))
+def test_setting_absent_value_error(chan: ChannelItem, value: Any, error: type, message: str) -> None:
+    """Test that an error is raised for an absent value which is not a finite number."""
+
+    with pytest.raises(error, match=message):
+        chan.absent_value = value
@@ -82,6 +82,24 @@ def test_spacing_not_even_high_compat_mode() -> None:
         df.generate_logical_records(chunk_size=None)
 
 
+def test_spacing_independent_of_chunk_size() -> None:
+    """Test that the median spacing of a jittered index does not depend on the chunks the index is read in."""
+
+    index = np.cumsum(np.random.default_rng(7).uniform(0.99, 1.01, 50000))  # more distinct steps than counted
+
+    spacings = []
+    for chunk_size in (7, 1000, None):
+        df = DLISFile()
+        lf = df.add_logical_file()
+        lf.add_origin("ORIGIN")
+        ch = lf.add_channel("INDEX", data=index)
+        frame = lf.add_frame("MAIN", channels=(ch,), index_type=enums.FrameIndexType.NON_STANDARD)
+        df.generate_logical_records(chunk_size=chunk_size)
+        spacings.append(frame.spacing.value)
+
+    assert spacings[0] == spacings[1] == spacings[2] == np.median(np.diff(index))
+
+
 def _prepare_file_first_channel_2d(
     index_type: Optional[enums.FrameIndexType] = None,
 ) -> DLISFile:
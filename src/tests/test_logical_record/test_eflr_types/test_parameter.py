@@ -24,3 +24,13 @@ def test_from_config(name: str, value: Any, value_type: type, n_values: int, rep
 
     assert isinstance(param.parent, ParameterSet)
     assert param.parent.set_name is None
+
+
+def test_bytes_repeatable() -> None:
+    """Test that the item can be converted to bytes more than once (dimension set at the first conversion)."""
+
+    param = ParameterItem("p1", values=-12.1211, parent=ParameterSet(), origin_reference=1)
+
+    first = param.make_item_body_bytes()
+    assert param.dimension.value == [1]
+    assert param.make_item_body_bytes() == first
@@ -0,0 +1,175 @@
+import pytest
+import numpy as np
+
+from dliswriter.logical_record.eflr_types import FrameSet, FrameItem, ChannelSet, ChannelItem
+from dliswriter.logical_record.iflr_types import FrameData, FrameDataEncoder
+
+
+@pytest.fixture
+def data() -> np.ndarray:
+    dt = np.dtype([('depth', np.float64), ('rpm', np.int16), ('image', np.float32, (5,)), ('flag', np.uint8)])
+    arr = np.zeros(17000, dtype=dt)
+    arr['depth'] = np.arange(arr.size) * 0.1
+    arr['rpm'] = np.random.randint(-100, 100, arr.size)
+    arr['image'] = np.random.rand(arr.size, 5)
+    arr['flag'] = np.arange(arr.size) % 256
+    return arr
+
+
+@pytest.fixture
+def data_frame(data: np.ndarray) -> FrameItem:
+    channel_set = ChannelSet()
+    channels = [ChannelItem(name, parent=channel_set) for name in data.dtype.names or ()]
+    return FrameItem("MAIN FRAME", channels=channels, parent=FrameSet(), origin_reference=1)
+
+
+def test_big_endian_dtype(data: np.ndarray) -> None:
+    """Test that the target dtype is a packed, big-endian version of the data dtype."""
+
+    dt = FrameDataEncoder.make_big_endian_dtype(data.dtype)
+
+    assert dt.names == data.dtype.names
+    assert dt.itemsize == 8 + 2 + 5 * 4 + 1
+    for name in dt.names or ():
+        assert dt[name].base.byteorder in ('>', '|')
+        assert dt[name].shape == data.dtype[name].shape
+
+
+@pytest.mark.parametrize(('start', 'stop'), ((0, 10), (100, 250), (16370, 16400), (0, 17000)))
+def test_encoding_same_as_frame_data(data_frame: FrameItem, data: np.ndarray, start: int, stop: int) -> None:
+    """Test that the bytes of encoded rows are identical to those created by FrameData objects."""
+
+    buffer, offsets = FrameDataEncoder(data_frame, data.dtype).encode(data[start:stop], first_frame_number=start + 1)
+
+    assert offsets.size == stop - start + 1
+    assert offsets[0] == 0
+    assert offsets[-1] == buffer.size
+
+    for i in range(stop - start):
+        expected = FrameData(data_frame, frame_number=start + i + 1, slots=data[start + i])._make_body_bytes()
+        assert buffer[offsets[i]:offsets[i + 1]].tobytes() == expected
+
+
+def test_big_endian_chunk_not_converted(data_frame: FrameItem, data: np.ndarray, monkeypatch: pytest.MonkeyPatch
+                                        ) -> None:
+    """Test that a chunk already in the target (big-endian) dtype is encoded without being converted."""
+
+    encoder = FrameDataEncoder(data_frame, data.dtype)
+    chunk = data.astype(encoder.target_dtype)
+    expected = encoder.encode(data)[0].tobytes()
+
+    def fail(*args: object, **kwargs: object) -> None:
+        raise AssertionError("Chunk should not be converted")
+
+    monkeypatch.setattr(np, 'ascontiguousarray', fail)
+    assert encoder.encode(chunk)[0].tobytes() == expected
+
+
+def test_frame_number_must_be_positive(data_frame: FrameItem, data: np.ndarray) -> None:
+    """Test that an error is raised if the first frame number is smaller than 1."""
+
+    with pytest.raises(ValueError, match="Frame numbers start from 1"):
+        FrameDataEncoder(data_frame, data.dtype).encode(data, first_frame_number=0)
+
+
+def test_largest_frame_number(data_frame: FrameItem, data: np.ndarray) -> None:
+    """Test encoding rows up to the largest frame number which can be represented as UVARI."""
+
+    buffer, offsets = FrameDataEncoder(data_frame, data.dtype).encode(data[:2], first_frame_number=2 ** 30 - 2)
+
+    expected = FrameData(data_frame, frame_number=2 ** 30 - 1, slots=data[1])._make_body_bytes()
+    assert buffer[offsets[1]:offsets[2]].tobytes() == expected
+
+
+@pytest.mark.parametrize('first_frame_number', (2 ** 30 - 1, 2 ** 30, 2 ** 32))
+def test_frame_number_too_large(data_frame: FrameItem, data: np.ndarray, first_frame_number: int) -> None:
+    """Test that an error is raised if a frame number cannot be represented as UVARI (instead of wrapping around)."""
+
+    encoder = FrameDataEncoder(data_frame, data.dtype)
+
+    with pytest.raises(ValueError, match="Frame numbers cannot be larger than 1073741823"):
+        encoder.encode(data[:2], first_frame_number=first_frame_number)
+
+    with pytest.raises(ValueError, match="Frame numbers cannot be larger than 1073741823"):
+        encoder.compute_body_size_runs(first_frame_number, 2)
+
+
+@pytest.mark.parametrize(('start', 'stop'), ((0, 10), (100, 250), (16370, 16400), (0, 17000)))
+def test_encoding_columns(data_frame: FrameItem, data: np.ndarray, start: int, stop: int) -> None:
+    """Test that encoding separate columns gives the same bytes as encoding the structured array."""
+
+    encoder = FrameDataEncoder(data_frame, data.dtype)
+    columns = {name: np.ascontiguousarray(data[name][start:stop]) for name in reversed(data.dtype.names or ())}
+
+    buffer, offsets = encoder.encode_columns(columns, first_frame_number=start + 1)
+    expected_buffer, expected_offsets = encoder.encode(data[start:stop], first_frame_number=start + 1)
+
+    assert buffer.tobytes() == expected_buffer.tobytes()
+    assert (offsets == expected_offsets).all()
+
+
+def test_encoding_columns_cast(data_frame: FrameItem, data: np.ndarray) -> None:
+    """Test that the values of the columns are cast to the data types of the fields."""
+
+    encoder = FrameDataEncoder(data_frame, data.dtype)
+    columns = {name: data[name].astype(np.float64) for name in data.dtype.names or ()}
+
+    assert encoder.encode_columns(columns)[0].tobytes() == encoder.encode(data)[0].tobytes()
+
+
+def test_encoding_columns_wrong_names(data_frame: FrameItem, data: np.ndarray) -> None:
+    """Test that an error is raised if the columns do not match the fields of the data type."""
+
+    with pytest.raises(ValueError, match="Column names .* do not match"):
+        FrameDataEncoder(data_frame, data.dtype).encode_columns({'depth': data['depth']})
+
+
+def test_absent_values_substituted(data_frame: FrameItem, data: np.ndarray) -> None:
+    """Test that NaN values are replaced with absent values in the encoded rows, without modifying the chunk."""
+
+    data['depth'][[3, 16500]] = np.nan
+    data['image'][10, 2] = np.nan
+    source = data.copy()
+
+    encoder = FrameDataEncoder(data_frame, data.dtype, absent_values={'depth': -999.25, 'image': -1})
+    buffer, _ = encoder.encode(data)
+
+    expected = data.copy()
+    expected['depth'][[3, 16500]] = -999.25
+    expected['image'][10, 2] = -1
+    assert buffer.tobytes() == FrameDataEncoder(data_frame, data.dtype).encode(expected)[0].tobytes()
+    for name in data.dtype.names or ():
+        assert np.array_equal(data[name], source[name], equal_nan=True)
+    assert encoder.substitution_counts == {'depth': 2, 'image': 1}
+
+
+def test_absent_values_substituted_in_columns(data_frame: FrameItem, data: np.ndarray) -> None:
+    """Test that NaN and masked values of columns are replaced with absent values."""
+
+    columns = {name: data[name] for name in data.dtype.names or ()}
+    columns['depth'] = data['depth'].copy()
+    columns['depth'][[0, 200]] = np.nan
+    columns['rpm'] = np.ma.masked_array(data['rpm'], mask=np.arange(data.size) % 1000 == 0)
+
+    encoder = FrameDataEncoder(data_frame, data.dtype, absent_values={'depth': -999.25, 'rpm': -999})
+    buffer, _ = encoder.encode_columns(columns)
+
+    expected = data.copy()
+    expected['depth'][[0, 200]] = -999.25
+    expected['rpm'][::1000] = -999
+    assert buffer.tobytes() == FrameDataEncoder(data_frame, data.dtype).encode(expected)[0].tobytes()
+    assert encoder.substitution_counts == {'depth': 2, 'rpm': 17}
+
+
+@pytest.mark.parametrize(('absent_values', 'message'), (
+        ({'rpm': -999.25}, "must be an integer between -32768 and 32767"),
+        ({'flag': -1}, "must be an integer between 0 and 255"),
+        ({'image': 1e40}, "out of the range of its data type"),
+        ({'other': 0}, "not one of the fields"),
+))
+def test_wrong_absent_values(data_frame: FrameItem, data: np.ndarray, absent_values: dict[str, float],
+                             message: str) -> None:
+    """Test that an error is raised for absent values which cannot be represented in the fields' data types."""
+
+    with pytest.raises(ValueError, match=message):
+        FrameDataEncoder(data_frame, data.dtype, absent_values=absent_values)
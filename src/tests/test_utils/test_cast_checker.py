@@ -0,0 +1,109 @@
+import logging
+import pytest
+from _pytest.logging import LogCaptureFixture
+from typing import Any
+import numpy as np
+
+from dliswriter.utils.cast_checker import CastChecker, CastPolicy
+
+
+@pytest.mark.parametrize(('source', 'target', 'needed'), (
+        (np.int64, np.int32, True),
+        (np.uint64, np.uint32, True),
+        (np.int64, np.uint32, True),
+        (np.int32, np.int16, True),
+        (np.int16, np.int32, False),
+        (np.uint8, np.int16, False),
+        (np.bool_, np.uint8, False),
+        (np.int64, np.float64, False),
+        (np.float64, np.int32, False),
+))
+def test_is_needed(source: Any, target: Any, needed: bool) -> None:
+    """Test that the values are only checked if they are cast to a narrower integer data type."""
+
+    assert CastChecker.is_needed(source, target) is needed
+
+
+@pytest.mark.parametrize(('source', 'target', 'values', 'fits'), (
+        (np.int64, np.int32, [-2 ** 31, 0, 2 ** 31 - 1], True),
+        (np.int64, np.int32, [0, 2 ** 31], False),
+        (np.int64, np.int32, [-2 ** 31 - 1, 0], False),
+        (np.uint64, np.uint32, [0, 2 ** 32 - 1], True),
+        (np.uint64, np.uint32, [2 ** 64 - 1], False),
+        (np.int64, np.uint32, [-1, 5], False),
+        (np.int64, np.int32, [], True),
+))
+def test_fits(source: Any, target: Any, values: list[int], fits: bool) -> None:
+    """Test the range check against the limits of the target data type."""
+
+    assert CastChecker('x', source, target).fits(np.array(values, dtype=source)) is fits
+
+
+def test_values_returned_unchanged() -> None:
+    """Test that values which fit are returned as they are (not copied)."""
+
+    values = np.arange(-100, 100, dtype=np.int64)
+    assert CastChecker('x', np.int64, np.int32)(values) is values
+
+
+@pytest.mark.parametrize('policy', (CastPolicy.RAISE, 'promote'))
+def test_error(policy: str) -> None:
+    """Test that an error is raised for values not fitting in the target data type, unless they are to be clipped."""
+
+    with pytest.raises(ValueError, match="Values of 'x' \\(from 0 to 4294967296\\) do not fit in int32"):
+        CastChecker('x', np.int64, np.int32, policy=policy)(np.array([0, 2 ** 32]))
+
+
+def test_clip(caplog: LogCaptureFixture) -> None:
+    """Test that values not fitting in the target data type are clipped and counted."""
+
+    checker = CastChecker('x', np.int64, np.int16, policy='clip')
+    with caplog.at_level(logging.WARNING):
+        clipped = checker(np.array([-40000, -5, 5, 40000, 70000]))
+
+    assert clipped.tolist() == [-32768, -5, 5, 32767, 32767]
+    assert checker.n_clipped == 3
+    assert "Values of 'x' not fitting in int16 are clipped" in caplog.text
+
+    checker(np.array([1, 2 ** 20]))
+    assert checker.n_clipped == 4
+
+
+def test_masked_values_not_checked() -> None:
+    """Test that masked values are neither checked nor clipped."""
+
+    values = np.ma.masked_array([1, 2 ** 40, 3], mask=[False, True, False])
+    assert CastChecker('x', np.int64, np.int32).fits(values)
+    assert CastChecker('x', np.int64, np.int32).fits(np.ma.masked_all(4, dtype=np.int64))
+
+    clipped = CastChecker('x', np.int64, np.uint8, policy='clip')(np.ma.masked_array([300, -1], mask=[True, False]))
+    assert np.ma.getmaskarray(clipped).tolist() == [True, False]
+    assert clipped[1] == 0
+
+
+def test_check_dataset(caplog: LogCaptureFixture) -> None:
+    """Test the check of a data set passed in chunks, including the warning about float64 precision."""
+
+    checker = CastChecker('x', np.int64, np.int32, policy='promote')
+    assert checker.check_dataset(np.array_split(np.arange(-1000, 1000), 7))
+    assert checker.check_dataset([])
+
+    with caplog.at_level(logging.WARNING):
+        assert not checker.check_dataset([np.array([1, 2]), np.array([2 ** 40])])
+    assert "precision" not in caplog.text
+
+    with caplog.at_level(logging.WARNING):
+        assert not checker.check_dataset([np.array([2 ** 60])])
+    assert "cannot all be represented exactly as float64" in caplog.text
+
+
+@pytest.mark.parametrize(('args', 'error', 'message'), (
+        ((np.int64, np.float64), ValueError, "do not have to be checked"),
+        ((np.int16, np.int32), ValueError, "do not have to be checked"),
+        ((np.int64, np.int32, 'round'), ValueError, "'round' is not one of the allowed cast policies"),
+))
+def test_wrong_arguments(args: tuple, error: type, message: str) -> None:
+    """Test that an error is raised for data types which do not need checking or an unknown policy."""
+
+    with pytest.raises(error, match=message):
+        CastChecker('x', *args)
@@ -25,6 +25,31 @@ def test_determine_repr_code_from_numpy_dtype(dt: numpy_dtype_type, rc: Represen
     assert ReprCodeConverter.determine_repr_code_from_numpy_dtype(np.dtype(dt)) is rc
 
 
+@pytest.mark.parametrize(('dt', 'expected'), (
+        (np.int64, np.int32),
+        (np.uint64, np.uint32),
+        (np.float16, np.float32),
+        (np.bool_, np.uint8),
+        (np.int16, np.int16),
+        (np.dtype('>f8'), np.dtype('>f8')),
+))
+def test_determine_supported_numpy_dtype(dt: numpy_dtype_type, expected: numpy_dtype_type) -> None:
+    """Test that dtypes without a representation code are replaced with the closest dtype which has one."""
+
+    assert ReprCodeConverter.determine_supported_numpy_dtype(dt) == np.dtype(expected)
+
+
+@pytest.mark.parametrize('dt', (np.int64, np.float16, np.bool_, np.complex64, np.dtype('<U4')))
+def test_numpy_dtype_not_supported(dt: numpy_dtype_type) -> None:
+    """Test that casting is only allowed on request, and only for the castable dtypes."""
+
+    with pytest.raises(ValueError, match="Dtype .* is not supported"):
+        ReprCodeConverter.validate_numpy_dtype(dt)
+    if np.dtype(dt).name not in ReprCodeConverter.castable_numpy_dtypes:
+        with pytest.raises(ValueError, match="Dtype .* is not supported"):
+            ReprCodeConverter.validate_numpy_dtype(dt, allow_cast=True)
+
+
 @pytest.mark.parametrize(('t', 'rc'), (
         (int, RepresentationCode.SLONG),
         (float, RepresentationCode.FDOUBL),
@@ -0,0 +1,136 @@
+import pytest
+from typing import Any, Optional, Union
+import numpy as np
+
+from dliswriter.utils.index_analyzer import IndexAnalyzer
+
+
+def reference_spacing_and_direction(index: np.ndarray) -> tuple[Any, Optional[bool]]:
+    """Spacing and direction computed from the whole index at once (sorting all the differences)."""
+
+    diff = np.diff(index)
+    diff_unique = np.unique(diff)
+
+    if (diff_unique == 0).all():
+        direction = None
+    elif (diff_unique >= 0).all():
+        direction = True
+    elif (diff_unique <= 0).all():
+        direction = False
+    else:
+        direction = None
+
+    if len(diff_unique) == 1:
+        return diff_unique[0], direction
+
+    median_diff = np.median(diff).item()
+    if median_diff == 0 or not ((1 - diff_unique / median_diff) ** 2 < 0.001).all():
+        return None, direction
+    return median_diff, direction
+
+
+def analyze(index: np.ndarray, chunk_rows: int) -> IndexAnalyzer:
+    """Run the analyzer on the index, split into chunks of the given size."""
+
+    analyzer = IndexAnalyzer()
+    for start in range(0, index.size, chunk_rows):
+        analyzer.update(index[start:start + chunk_rows])
+    return analyzer
+
+
+rng = np.random.default_rng(5)
+
+
+@pytest.mark.parametrize('index', (
+        np.arange(1000),
+        np.arange(1000, dtype=np.float32) * 0.1,
+        np.arange(1000) * 0.1 + 1234.5,
+        np.arange(1000)[::-1] * 0.25,
+        np.linspace(0, 1, 1001)[::-1],
+        np.cumsum(rng.random(1000)),
+        rng.random(1000),
+        np.repeat(np.arange(10), 100),
+        np.zeros(1000),
+        np.arange(1000).astype(np.int16) * 3 - 1500,
+        np.concatenate((np.arange(500), np.arange(500, 0, -1))),
+))
+@pytest.mark.parametrize('chunk_rows', (1, 7, 100, 1000))
+def test_same_as_whole_index(index: np.ndarray, chunk_rows: int) -> None:
+    """Test that the statistics computed chunk by chunk are the same as those computed on the whole index."""
+
+    analyzer = analyze(index, chunk_rows)
+    spacing, direction = reference_spacing_and_direction(index)
+
+    assert analyzer.n_values == index.size
+    assert analyzer.index_min == index.min() and analyzer.index_max == index.max()
+    assert type(analyzer.index_min) is type(index.min())
+    assert analyzer.direction is direction
+    assert analyzer.spacing == spacing
+    assert type(analyzer.spacing) is type(spacing)
+    assert analyzer.is_median_exact
+
+
+@pytest.mark.parametrize(('index', 'spacing', 'direction'), (
+        (np.array([1.0, 2.0, np.nan, 4.0]), None, None),
+        (np.array([3.0]), None, None),
+        (np.array([1, 2, 3, 2]), None, None),
+))
+def test_special_cases(index: np.ndarray, spacing: Union[float, None], direction: Union[bool, None]) -> None:
+    """Test the statistics of an index with a NaN value, a single value, and changing direction."""
+
+    analyzer = analyze(index, 2)
+    assert analyzer.spacing is spacing
+    assert analyzer.direction is direction
+
+
+def test_median_estimated(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the median spacing is estimated if there are too many distinct differences."""
+
+    monkeypatch.setattr(IndexAnalyzer, 'max_distinct_diffs', 50)
+    index = np.cumsum(1 + rng.random(10000) * 0.01)
+
+    analyzer = analyze(index, 1000)
+    exact_spacing, _ = reference_spacing_and_direction(index)
+
+    assert not analyzer.is_median_exact
+    assert analyzer.spacing == pytest.approx(exact_spacing, rel=1e-3)
+    assert analyzer.direction is True
+
+
+@pytest.mark.parametrize('index', (
+        np.cumsum(rng.uniform(0.99, 1.01, 20000)),
+        np.cumsum(rng.uniform(0.99, 1.01, 20001)).astype(np.float32),
+        -np.cumsum(rng.integers(99000, 101000, 5000)),
+))
+@pytest.mark.parametrize('chunk_rows', (7, 1000))
+def test_exact_median_computed_again(monkeypatch: pytest.MonkeyPatch, index: np.ndarray, chunk_rows: int) -> None:
+    """Test that the exact median is computed in additional passes if it has been estimated."""
+
+    monkeypatch.setattr(IndexAnalyzer, 'max_distinct_diffs', 50)
+    monkeypatch.setattr(IndexAnalyzer, 'n_bins', 16)
+
+    analyzer = analyze(index, chunk_rows)
+    assert not analyzer.is_median_exact
+    analyzer.compute_exact_median(lambda: (index[start:start + chunk_rows]
+                                           for start in range(0, index.size, chunk_rows)))
+    spacing, _ = reference_spacing_and_direction(index)
+
+    assert analyzer.is_median_exact
+    assert analyzer.spacing == spacing
+
+
+def test_differences_not_tracked_if_not_uniform() -> None:
+    """Test that the differences are no longer counted once the spacing is known not to be uniform."""
+
+    analyzer = analyze(np.cumsum(rng.random(1000)), 100)
+
+    assert analyzer.median_diff is None
+    assert analyzer.spacing is None
+    assert analyzer.direction is True
+
+
+def test_index_must_be_1d() -> None:
+    """Test that an error is raised for a 2D chunk of index values."""
+
+    with pytest.raises(ValueError, match="Index values must be 1-dimensional"):
+        IndexAnalyzer().update(np.zeros((10, 2)))
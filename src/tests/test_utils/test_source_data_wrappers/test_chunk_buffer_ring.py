@@ -0,0 +1,140 @@
+import threading
+import time
+import pytest
+from typing import Any
+import numpy as np
+
+from dliswriter.file.encoding_pool import EncodingPool
+from dliswriter.logical_record.iflr_types import FrameDataEncoder
+from dliswriter.utils.source_data_wrappers import ChunkBufferRing, DictDataWrapper, NumpyDataWrapper, SourceDataWrapper
+
+from tests.dlis_files_for_testing.common import make_df
+
+
+@pytest.fixture
+def wrapper() -> DictDataWrapper:
+    """Dict data wrapper with a 1D and a 2D data set."""
+
+    return DictDataWrapper({'depth': np.arange(100) * 0.5, 'image': np.random.rand(100, 8).astype(np.float32)})
+
+
+def test_buffers_reused(wrapper: DictDataWrapper) -> None:
+    """Test that the chunks are loaded into the same buffer if each chunk is released before the next one is loaded."""
+
+    ring = wrapper.make_buffer_ring(30)
+    chunks = []
+
+    for chunk in wrapper.iterate_chunks(30, buffer_ring=ring):
+        chunks.append((chunk.copy(), chunk.__array_interface__['data'][0]))
+        ring.release(chunk)
+
+    assert ring.n_allocated == 1 and ring.n_in_use == 0
+    assert len({address for _, address in chunks}) == 1
+    assert [c.size for c, _ in chunks] == [30, 30, 30, 10]
+    assert np.array_equal(np.concatenate([c for c, _ in chunks]), wrapper.load_chunk(0, None))
+
+
+def test_big_endian_buffers(wrapper: DictDataWrapper) -> None:
+    """Test that the data are converted to the data type of the buffers when loaded."""
+
+    target_dtype = FrameDataEncoder.make_big_endian_dtype(wrapper.dtype)
+    ring = wrapper.make_buffer_ring(None, dtype=target_dtype)
+
+    chunk = next(wrapper.iterate_chunks(None, buffer_ring=ring))
+    assert chunk.dtype == target_dtype
+    assert np.array_equal(chunk['image'], wrapper.data_source['image'])
+    assert chunk.astype(target_dtype, copy=False) is chunk  # no conversion needed when encoding
+
+
+def test_source_slice_not_copied() -> None:
+    """Test that a slice of a structured source array of the right dtype is returned instead of using a buffer."""
+
+    arr = np.zeros(50, dtype=[('a', np.float64), ('b', np.int32)])
+    w = NumpyDataWrapper(arr)
+    ring = w.make_buffer_ring(20)
+
+    chunks = list(w.iterate_chunks(20, buffer_ring=ring))
+    assert all(np.shares_memory(chunk, arr) for chunk in chunks)
+    assert ring.n_in_use == 0
+
+
+def test_acquire_waits_for_release() -> None:
+    """Test that acquiring a buffer waits until one is released if all are in use."""
+
+    ring = ChunkBufferRing(np.dtype([('a', np.float64)]), max_rows=10, n_buffers=1)
+    first = ring.acquire(10)
+
+    threading.Timer(0.05, ring.release, (first,)).start()
+    t0 = time.perf_counter()
+    second = ring.acquire(5)
+    assert time.perf_counter() - t0 >= 0.04
+    assert second.base is first.base
+
+
+def test_close_unblocks() -> None:
+    """Test that closing the ring raises an error in a thread waiting for a buffer."""
+
+    ring = ChunkBufferRing(np.dtype([('a', np.float64)]), max_rows=10, n_buffers=1)
+    ring.acquire(10)
+
+    threading.Timer(0.05, ring.close).start()
+    with pytest.raises(RuntimeError, match="Chunk buffer ring has been closed"):
+        ring.acquire(10)
+
+
+@pytest.mark.parametrize(('kwargs', 'error_type', 'message'), (
+        ({'n_buffers': 0}, ValueError, "Number of chunk buffers must be positive"),
+        ({'n_buffers': 1.0}, TypeError, "Number of chunk buffers must be an integer"),
+))
+def test_wrong_number_of_buffers(kwargs: dict[str, Any], error_type: type[Exception], message: str) -> None:
+    """Test that an error is raised for an incorrect number of buffers."""
+
+    with pytest.raises(error_type, match=message):
+        ChunkBufferRing(np.dtype([('a', np.float64)]), max_rows=10, **kwargs)
+
+
+def test_wrong_out_array(wrapper: DictDataWrapper) -> None:
+    """Test that an error is raised if the array to load a chunk into has a wrong shape or fields."""
+
+    with pytest.raises(ValueError, match="must have shape"):
+        wrapper.load_chunk(0, 10, out=np.empty(11, dtype=wrapper.dtype))
+
+    with pytest.raises(ValueError, match="must have the same fields"):
+        wrapper.load_chunk(0, 10, out=np.empty(10, dtype=[('depth', np.float64), ('image', np.float32)]))
+
+
+@pytest.mark.parametrize(('n_workers', 'prefetch_bytes', 'max_buffers'), (
+        (None, None, 1),
+        (2, None, 3),
+        (None, 10 ** 4, 5),  # chunk being loaded, 3 chunks of 2560 bytes waiting in the queue, chunk being encoded
+))
+def test_buffers_in_multi_frame_data(monkeypatch: pytest.MonkeyPatch, n_workers: Any, prefetch_bytes: Any,
+                                     max_buffers: int) -> None:
+    """Test that encoding the frame data uses a bounded number of buffers and gives all of them back."""
+
+    rings: list[ChunkBufferRing] = []
+    make_buffer_ring = SourceDataWrapper.make_buffer_ring
+
+    def make_and_keep_ring(*args: Any, **kwargs: Any) -> ChunkBufferRing:
+        rings.append(make_buffer_ring(*args, **kwargs))
+        return rings[-1]
+
+    monkeypatch.setattr(SourceDataWrapper, 'make_buffer_ring', make_and_keep_ring)
+    monkeypatch.setattr(DictDataWrapper, 'columnar', False)  # load the chunks as structured arrays
+
+    df = make_df()
+    lf = df.logical_files[0]
+    depth = lf.add_channel('DEPTH', data=np.arange(1000, dtype=np.float64))
+    image = lf.add_channel('IMAGE', data=np.random.rand(1000, 8).astype(np.float32))
+    lf.add_frame('MAIN', channels=(depth, image))
+    mfd = df._make_multi_frame_data_objects(64)[0][0]
+
+    reference = b''.join(buffer.tobytes() for buffer, _ in mfd.iterate_encoded_chunks())
+    with EncodingPool(n_workers=n_workers or 1, max_chunks_in_flight=3) as pool:
+        chunks = mfd.iterate_encoded_chunks(pool if n_workers else None, prefetch_bytes)
+        encoded = b''.join(buffer.tobytes() for buffer, _ in chunks)
+    assert encoded == reference
+
+    ring = rings[-1]
+    assert ring.n_allocated <= max_buffers
+    assert ring.n_in_use == 0
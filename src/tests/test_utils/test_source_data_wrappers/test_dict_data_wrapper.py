@@ -365,3 +365,28 @@ def test_getitem_alternative_mapping(data: source_data_type, from_idx: int, to_i
     for key in ('depth', 'rpm', 'amplitude'):
         with pytest.raises(ValueError, match=f"No dataset '{key}' found in the source data"):
             w[key]
+
+
+@pytest.mark.parametrize(('from_idx', 'to_idx'), ((0, None), (7, 60)))
+def test_iterate_column_chunks(data: source_data_type, from_idx: int, to_idx: Union[int, None]) -> None:
+    """Test that the columns of the chunks are views of the source arrays, in the order of the dtype."""
+
+    w = DictDataWrapper(data, mapping={'AMP': 'amplitude', 'MD': 'depth'}, from_idx=from_idx, to_idx=to_idx)
+    chunks = list(w.iterate_column_chunks(15))
+
+    assert all(tuple(chunk) == ('AMP', 'MD') for chunk in chunks)
+    assert all(np.shares_memory(chunk['AMP'], data['amplitude']) for chunk in chunks)
+    assert (np.concatenate([chunk['MD'] for chunk in chunks]) == data['depth'][from_idx:to_idx]).all()
+    assert sum(chunk['AMP'].shape[0] for chunk in chunks) == w.n_rows
+
+
+@pytest.mark.parametrize(('from_idx', 'to_idx', 'chunk_rows'), ((0, None, 15), (7, 60, 10), (3, None, None)))
+def test_iterate_dataset_chunks(data: source_data_type, from_idx: int, to_idx: Union[int, None],
+                                chunk_rows: Union[int, None]) -> None:
+    """Test that chunks of a single data set cover the rows to be loaded."""
+
+    w = DictDataWrapper(data, mapping={'AMP': 'amplitude', 'MD': 'depth'}, from_idx=from_idx, to_idx=to_idx)
+    chunks = list(w.iterate_dataset_chunks('MD', chunk_rows))
+
+    assert len(chunks) == len(w.compute_chunk_sizes(chunk_rows))
+    assert (np.concatenate(chunks) == data['depth'][from_idx:to_idx]).all()
@@ -0,0 +1,176 @@
+import zlib
+import pytest
+import h5py  # type: ignore  # untyped library
+from pathlib import Path
+from typing import Any
+import numpy as np
+
+from dliswriter import enums
+from dliswriter.utils.hdf5_reader import DatasetChunkReader, HDF5ChunkReader
+from dliswriter.utils.source_data_wrappers import HDF5DataWrapper
+
+from tests.dlis_files_for_testing.common import make_df
+
+
+N_ROWS = 1000
+
+
+@pytest.fixture
+def data() -> dict[str, np.ndarray]:
+    """Data of the datasets of the HDF5 file."""
+
+    rng = np.random.default_rng(11)
+    return {
+        'depth': np.arange(N_ROWS) * 0.5,
+        'image': rng.random((N_ROWS, 16)).astype(np.float32),
+        'flags': rng.integers(0, 100, N_ROWS).astype('>i4'),
+        'shuffled': rng.random(N_ROWS),
+        'contiguous': rng.random((N_ROWS, 3)),
+    }
+
+
+@pytest.fixture
+def h5_path(tmp_path: Path, data: dict[str, np.ndarray]) -> Path:
+    """HDF5 file with gzip-compressed, uncompressed, shuffled, and contiguous datasets."""
+
+    path = tmp_path / "compressed.h5"
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('depth', data=data['depth'], chunks=(64,), compression='gzip')
+        f.create_dataset('image', data=data['image'], chunks=(100, 16), compression='gzip', compression_opts=9)
+        f.create_dataset('flags', data=data['flags'], chunks=(300,))
+        f.create_dataset('shuffled', data=data['shuffled'], chunks=(128,), compression='gzip', shuffle=True)
+        f.create_dataset('contiguous', data=data['contiguous'])
+    return path
+
+
+def test_raw_readable_datasets(h5_path: Path) -> None:
+    """Test which datasets are read as raw chunks and which with read_direct."""
+
+    with h5py.File(h5_path, 'r') as f:
+        chunk_rows = {name: DatasetChunkReader(f[name]).chunk_rows for name in f}
+
+    assert chunk_rows == {'depth': 64, 'image': 100, 'flags': 300, 'shuffled': None, 'contiguous': None}
+
+
+def test_other_filters_read_direct(tmp_path: Path, data: dict[str, np.ndarray]) -> None:
+    """Test that datasets with filters other than deflate in the pipeline are read with read_direct."""
+
+    values = data['depth']
+    with h5py.File(tmp_path / "filters.h5", 'w') as f:
+        f.create_dataset('checksummed', data=values, chunks=(64,), fletcher32=True)
+        f.create_dataset('lzf', data=values, chunks=(64,), compression='lzf')
+
+        # optional filter not registered in the library: skipped when the chunks are written
+        dcpl = h5py.h5p.create(h5py.h5p.DATASET_CREATE)
+        dcpl.set_chunk((64,))
+        dcpl.set_filter(32001, h5py.h5z.FLAG_OPTIONAL)
+        dataset_id = h5py.h5d.create(f.id, b'unregistered', h5py.h5t.IEEE_F64LE, h5py.h5s.create_simple((N_ROWS,)),
+                                     dcpl=dcpl)
+        h5py.Dataset(dataset_id)[...] = values
+
+    with h5py.File(tmp_path / "filters.h5", 'r') as f:
+        for name in f:
+            reader = DatasetChunkReader(f[name])
+            assert reader.chunk_rows is None
+
+            out = np.empty(200)
+            reader.read(100, 300, out)
+            assert np.array_equal(out, values[100:300])
+
+
+@pytest.mark.parametrize('n_read_threads', (1, 3))
+@pytest.mark.parametrize('chunk_rows', (None, 1, 77, 128, 999))
+@pytest.mark.parametrize('from_idx', (0, 13))
+def test_load_chunks(h5_path: Path, data: dict[str, np.ndarray], n_read_threads: int, chunk_rows: Any,
+                     from_idx: int) -> None:
+    """Test that the data loaded in chunks (not aligned with the HDF5 chunks) are the same as in the datasets."""
+
+    mapping = {name: name for name in data}
+    w = HDF5DataWrapper(h5_path, mapping, from_idx=from_idx, n_read_threads=n_read_threads)
+
+    loaded = np.concatenate(list(w.iterate_chunks(chunk_rows)))
+    for name in data:
+        assert np.array_equal(loaded[name], data[name][from_idx:])
+
+    w.close()
+
+
+def test_chunks_decompressed_once(h5_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that each HDF5 chunk is decompressed only once, even if the loaded chunks are not aligned with it."""
+
+    decompressed: list[int] = []
+    zlib_decompress = zlib.decompress
+
+    def decompress(raw: bytes) -> bytes:
+        result = zlib_decompress(raw)
+        decompressed.append(len(result))
+        return result
+
+    monkeypatch.setattr('dliswriter.utils.hdf5_reader.zlib.decompress', decompress)
+
+    w = HDF5DataWrapper(h5_path, {'depth': 'depth'}, n_read_threads=1)
+    for _ in w.iterate_chunks(50):
+        pass
+
+    assert len(decompressed) == -(-N_ROWS // 64)
+    w.close()
+
+
+def test_output_cast(h5_path: Path, data: dict[str, np.ndarray]) -> None:
+    """Test that the rows are converted to the data type of the output array."""
+
+    with h5py.File(h5_path, 'r') as f:
+        reader = HDF5ChunkReader({'flags': f['flags'], 'image': f['image']}, n_threads=2)
+        out = np.empty(150, dtype=[('flags', '<f8'), ('image', '>f4', (16,))])
+        reader.read(250, 400, {'flags': out['flags'], 'image': out['image']})
+        reader.close()
+
+    assert np.array_equal(out['flags'], data['flags'][250:400].astype(np.float64))
+    assert np.array_equal(out['image'], data['image'][250:400])
+
+
+def test_converted_to_big_endian_when_read(h5_path: Path, data: dict[str, np.ndarray]) -> None:
+    """Test that the rows are converted to the (big-endian) output data type when read, not when copied."""
+
+    with h5py.File(h5_path, 'r') as f:
+        reader = HDF5ChunkReader({name: f[name] for name in ('depth', 'shuffled')}, n_threads=1)
+        out = np.empty(200, dtype=[('depth', '>f8'), ('shuffled', '>f8')])
+        reader.read(100, 300, {'depth': out['depth'], 'shuffled': out['shuffled']})
+
+        decoded = reader.readers['depth']._decoded
+        assert all(chunk.dtype == np.dtype('>f8') for chunk in decoded.values())
+        assert reader.readers['shuffled']._buffer.dtype == np.dtype('>f8')  # type: ignore  # set after reading
+
+    for name in ('depth', 'shuffled'):
+        assert np.array_equal(out[name], data[name][100:300])
+
+
+@pytest.mark.parametrize(('out_dtype', 'read_dtype'), (('>f8', '>f8'), ('<f8', '<f8'), ('>f4', '<f8'), ('>i8', '<f8')))
+def test_read_dtype(h5_path: Path, out_dtype: str, read_dtype: str) -> None:
+    """Test that HDF5 converts the rows to the output data type only if the values can be cast safely."""
+
+    with h5py.File(h5_path, 'r') as f:
+        assert DatasetChunkReader(f['contiguous']).get_read_dtype(np.dtype(out_dtype)) == np.dtype(read_dtype)
+
+
+@pytest.mark.parametrize(('n_threads', 'error_type'), ((0, ValueError), (1.5, TypeError)))
+def test_wrong_number_of_threads(h5_path: Path, n_threads: Any, error_type: type[Exception]) -> None:
+    """Test that an error is raised for an incorrect number of read threads."""
+
+    with h5py.File(h5_path, 'r') as f:
+        with pytest.raises(error_type, match="Number of read threads must be"):
+            HDF5ChunkReader({'depth': f['depth']}, n_threads=n_threads)
+
+
+def test_same_file_as_from_dict(h5_path: Path, data: dict[str, np.ndarray], tmp_path: Path) -> None:
+    """Test that a DLIS file written from the compressed HDF5 file is the same as one written from the arrays."""
+
+    def write(path: Path, **kwargs: Any) -> bytes:
+        df = make_df()
+        lf = df.logical_files[0]
+        channels = [lf.add_channel(name, dataset_name=name) for name in data]
+        lf.add_frame("MAIN", channels=channels, index_type=enums.FrameIndexType.BOREHOLE_DEPTH)
+        df.write(path, input_chunk_size=90, **kwargs)
+        return path.read_bytes()
+
+    assert write(tmp_path / "from_h5.dlis", data=h5_path) == write(tmp_path / "from_dict.dlis", data=data)
@@ -2,8 +2,9 @@ import numpy as np
 import pytest
 import h5py  # type: ignore  # untyped library
 from pathlib import Path
-from typing import Union
+from typing import Union, Any
 
+from dliswriter.logical_record.eflr_types import FrameSet, FrameItem, ChannelSet, ChannelItem
 from dliswriter.utils.source_data_wrappers import HDF5DataWrapper, SourceDataWrapper
 
 
@@ -100,3 +101,45 @@ def test_getitem(short_reference_data_path: Path, mapping: dict, from_idx: int,
         for key in ('time', 'rpm', 'rad', 'amp'):
             assert isinstance(w[key], np.ndarray)
             assert (w[key] == data[mapping[key]][from_idx:to_idx]).all()
+
+
+@pytest.mark.parametrize(("from_idx", "to_idx"), ((0, None), (71, 88)))
+def test_dataset_info(short_reference_data_path: Path, mapping: dict, from_idx: int, to_idx: Union[int, None]) -> None:
+    """Test that the shape and dtype of a data set are determined for the rows to be loaded."""
+
+    w = HDF5DataWrapper(short_reference_data_path, mapping=mapping, from_idx=from_idx, to_idx=to_idx,
+                        known_dtypes={'rad': np.float32})
+
+    info = w.get_dataset_info('rad')
+    assert info.shape == (w.n_rows, 128)
+    assert info.n_rows == w.n_rows
+    assert info.ndim == 2
+    assert info.dtype == np.float64  # source dtype, not the cast one
+
+    with pytest.raises(ValueError, match="No dataset 'xyz' found"):
+        w.get_dataset_info('xyz')
+
+
+@pytest.mark.parametrize(('index_type', 'read'), ((None, []), ('TIME', ['/contents/time'])))
+def test_setup_reads_no_data(short_reference_data_path: Path, mapping: dict, monkeypatch: pytest.MonkeyPatch,
+                             index_type: Union[str, None], read: list[str]) -> None:
+    """Test that setting up a frame from HDF5 data only reads the index channel (if any), not the other data sets."""
+
+    read_datasets: list[str] = []
+    getitem = h5py.Dataset.__getitem__
+
+    def record_read(dataset: h5py.Dataset, *args: Any, **kwargs: Any) -> Any:
+        read_datasets.append(dataset.name)
+        return getitem(dataset, *args, **kwargs)
+
+    w = HDF5DataWrapper(short_reference_data_path, mapping=mapping)
+    monkeypatch.setattr(h5py.Dataset, '__getitem__', record_read)
+
+    channel_set = ChannelSet()
+    channels = [ChannelItem(name, parent=channel_set) for name in mapping]
+    frame = FrameItem("MAIN", channels=channels, parent=FrameSet(), index_type=index_type)
+    frame.setup_from_data(w)
+
+    assert read_datasets == read
+    assert channels[1].dimension.value == [128]
+    assert frame.index_max.value == (w.n_rows if index_type is None else w['time'].max())
@@ -168,12 +168,38 @@ def test_load_chunk_alternative_mapping(data: np.ndarray, start: int, stop: int)
 
     assert chunk.size == stop - start
     assert chunk.dtype.names == ('RPM', 'MD')
-    assert chunk.dtype == w.dtype
+    assert all(chunk.dtype[name] == w.dtype[name] for name in ('RPM', 'MD'))  # layout of the source array
+    assert np.shares_memory(chunk, data)
 
     assert (chunk['RPM'] == data['rpm'][start:stop]).all()
     assert (chunk['MD'] == data['depth'][start:stop]).all()
 
 
+@pytest.mark.parametrize(('from_idx', 'to_idx'), ((0, None), (5, None), (12, 40)))
+@pytest.mark.parametrize('mapping', (None, {'RPM': 'rpm', 'MD': 'depth'}))
+def test_load_chunk_from_idx(data: np.ndarray, from_idx: int, to_idx: Union[int, None],
+                             mapping: Union[dict, None]) -> None:
+    """Test that the rows are counted from 'from_idx' in the chunks viewing the source array without a copy."""
+
+    w = NumpyDataWrapper(data, mapping=mapping, from_idx=from_idx, to_idx=to_idx)
+    chunks = list(w.iterate_chunks(7))
+
+    assert all(np.shares_memory(chunk, data) for chunk in chunks)
+    for name, source_name in (mapping or {'depth': 'depth', 'rpm': 'rpm'}).items():
+        assert (np.concatenate([chunk[name] for chunk in chunks]) == data[source_name][from_idx:to_idx]).all()
+
+
+def test_load_chunk_cast(data: np.ndarray) -> None:
+    """Test that the data are copied if any of the data sets has to be cast to another data type."""
+
+    w = NumpyDataWrapper(data, mapping={'RPM': 'rpm', 'MD': 'depth'}, known_dtypes={'MD': np.float32}, from_idx=3)
+    chunk = w.load_chunk(0, 10)
+
+    assert chunk.dtype == w.dtype
+    assert not np.shares_memory(chunk, data)
+    assert (chunk['MD'] == data['depth'][3:13].astype(np.float32)).all()
+
+
 @pytest.mark.parametrize(("from_idx", "to_idx"), ((0, 30), (40, None)))
 def test_getitem_default_mapping(data: np.ndarray, from_idx: int, to_idx: Union[int, None]) -> None:
     w = NumpyDataWrapper(data, from_idx=from_idx, to_idx=to_idx)